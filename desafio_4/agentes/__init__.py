@@ -1,16 +1,24 @@
 """
 Agentes especializados do Sistema de Processamento VR
+
+Os agentes são importados sob demanda: carregar o pacote não puxa pandas,
+numpy e openpyxl até que um agente seja efetivamente utilizado.
 """
 
-from .extrator_validador import ExtratorValidador
-from .consolidador_regras import ConsolidadorRegras
-from .gerador_relatorio import GeradorRelatorio
-from .orquestrador import OrquestradorVR
+from importlib import import_module
+
+_EXPORTS = {
+    'ExtratorValidador': '.extrator_validador',
+    'ConsolidadorRegras': '.consolidador_regras',
+    'GeradorRelatorio': '.gerador_relatorio',
+    'OrquestradorVR': '.orquestrador'
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'ExtratorValidador',
-    'ConsolidadorRegras', 
-    'GeradorRelatorio',
-    'OrquestradorVR'
-]
 
+def __getattr__(name):
+    """Importa o agente solicitado apenas no primeiro acesso"""
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
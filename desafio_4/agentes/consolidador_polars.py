@@ -0,0 +1,199 @@
+"""
+Consolidação com Polars - Sistema de Processamento VR
+Executa junções, regras de elegibilidade e cálculo de VR em um plano lazy do Polars
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Dict, Any, Tuple
+
+import pandas as pd
+
+from agentes.motores import MotorColunar, COLUNAS_RESULTADO
+
+
+def _polars_disponivel() -> bool:
+    """Indica se Polars e pyarrow (conversão de/para pandas) estão instalados"""
+    try:
+        import polars  # noqa: F401
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class MotorConsolidacaoPolars(MotorColunar):
+    """Consolidação expressa como um plano lazy do Polars
+
+    As bases projetadas viram LazyFrames; as junções por matrícula e sindicato e as
+    regras "última linha da matrícula" (afastamento, férias, exterior) são junções
+    com agregações por matrícula, executadas em paralelo pelo Polars. Cada regra de
+    exclusão contribui com os bits dos seus motivos para a máscara de exclusão
+    (bits distintos, então a soma é o OU bit a bit). O plano inteiro é otimizado e
+    coletado uma única vez.
+    """
+
+    nome = 'polars'
+    requisitos = 'polars e pyarrow (pip install polars pyarrow)'
+
+    @staticmethod
+    def disponivel() -> bool:
+        return _polars_disponivel()
+
+    def _executar_regras(self, tabelas: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        import polars as pl
+
+        self.logger.log_info("Consolidação em Polars (plano lazy)")
+        tipos = {
+            'pos': pl.Int64, 'matricula': pl.Int64, 'sindicato': pl.Utf8, 'estado': pl.Utf8,
+            'cargo': pl.Utf8, 'valor': pl.Int64, 'dias': pl.Int64, 'tipo': pl.Utf8,
+            'excluido': pl.Boolean, 'dia': pl.Int64, 'observacao': pl.Utf8, 'bit': pl.Int64
+        }
+        # Tipos explícitos: bases vazias chegam sem tipo e as chaves precisam coincidir nas junções
+        lf = {
+            nome: pl.from_pandas(df).lazy().with_columns(
+                [pl.col(coluna).cast(tipos[coluna]) for coluna in df.columns]
+            )
+            for nome, df in tabelas.items()
+        }
+        col = pl.col
+        regras = self.config['regras_negocio']
+        registro = self.consolidador.registro_exclusoes
+
+        def ultima_linha(base: str, coluna: str, nome: str, filtro=None):
+            """Valor da coluna na última linha (maior pos) de cada matrícula"""
+            origem = lf[base] if filtro is None else lf[base].filter(filtro)
+            return origem.group_by('matricula').agg(col(coluna).sort_by('pos').last().alias(nome))
+
+        def bits_por_matricula(base: str, nome: str, filtro):
+            """OU dos bits de exclusão das linhas de cada matrícula (soma dos bits distintos)"""
+            return lf[base].filter(filtro).group_by('matricula').agg(col('bit').unique().sum().alias(nome))
+
+        def bit_da_marca(marca: str, motivo: str):
+            """Bit do motivo nas linhas marcadas pela regra"""
+            return pl.when(col(marca)).then(pl.lit(registro.bit(motivo), dtype=pl.Int64)).otherwise(0)
+
+        colaboradores = (
+            lf['ativos']
+            .join(lf['admissoes'].select('matricula', col('pos').alias('pos_admissao')),
+                  on='matricula', how='left')
+            .join(lf['sindicato_valor'].select(col('estado').alias('sindicato'), col('pos').alias('pos_valor'),
+                                               col('valor').alias('valor_diario')),
+                  on='sindicato', how='left')
+            .join(lf['dias_uteis'].select('sindicato', col('pos').alias('pos_dias'), col('dias').alias('dias_uteis')),
+                  on='sindicato', how='left')
+        )
+
+        # Regras de exclusão na ordem do ConsolidadorRegras: expressões com os bits de cada regra
+        exclusoes = []
+        for base, motivo in (('aprendizes', 'Aprendiz'), ('estagios', 'Estagiário')):
+            if base in tabelas:
+                matriculas = tabelas[base]['matricula'].dropna().astype('int64').tolist()
+                colaboradores = colaboradores.with_columns(
+                    col('matricula').is_in(matriculas).fill_null(False).alias(f'_{base}')
+                )
+                exclusoes.append(bit_da_marca(f'_{base}', motivo))
+
+        cargos = self.config['exclusoes']['cargos_nao_elegiveis']
+        for indice, cargo in enumerate(cargos):
+            colaboradores = colaboradores.with_columns(
+                col('cargo').str.contains(cargo.upper(), literal=True).fill_null(False).alias(f'_cargo_{indice}')
+            )
+            exclusoes.append(bit_da_marca(f'_cargo_{indice}', f'Cargo: {cargo}'))
+
+        if 'afastamentos' in tabelas:
+            colaboradores = colaboradores.join(
+                bits_por_matricula('afastamentos', '_afastamento', col('excluido')), on='matricula', how='left'
+            )
+            exclusoes.append(col('_afastamento').fill_null(0))
+
+        colaboradores = colaboradores.with_columns(pl.lit(0, dtype=pl.Int64).alias('dias_ferias'))
+        if 'ferias' in tabelas:
+            colaboradores = colaboradores.drop('dias_ferias').join(
+                ultima_linha('ferias', 'dias', 'dias_ferias'), on='matricula', how='left'
+            ).with_columns(col('dias_ferias').fill_null(0))
+
+        colaboradores = colaboradores.with_columns(pl.lit(None, dtype=pl.Int64).alias('pos_desligamento'))
+        if 'desligados' in tabelas:
+            desligamentos = lf['desligados'].group_by('matricula').agg(
+                col('pos').max().alias('pos_desligamento'),
+                (col('dia') <= regras['dia_corte_desligamento']).any().alias('_desligamento')
+            )
+            colaboradores = colaboradores.drop('pos_desligamento').join(
+                desligamentos, on='matricula', how='left'
+            ).with_columns(col('_desligamento').fill_null(False))
+            exclusoes.append(bit_da_marca('_desligamento', f"Desligado antes do dia {regras['dia_corte_desligamento']}"))
+
+        colaboradores = colaboradores.with_columns(pl.lit(0, dtype=pl.Int64).alias('valor_exterior'))
+        if 'exterior' in tabelas:
+            observacao = col('observacao').str.to_lowercase()
+            lf['exterior'] = lf['exterior'].with_columns(
+                (observacao.str.contains('desligado', literal=True)
+                 | observacao.str.contains('removido', literal=True)).fill_null(False).alias('removido')
+            )
+            colaboradores = (
+                colaboradores.drop('valor_exterior')
+                .join(bits_por_matricula('exterior', '_exterior', col('removido')), on='matricula', how='left')
+                .join(ultima_linha('exterior', 'valor', 'valor_exterior', ~col('removido')),
+                      on='matricula', how='left')
+                .with_columns(col('valor_exterior').fill_null(0))
+            )
+            exclusoes.append(col('_exterior').fill_null(0))
+
+        mascara = pl.sum_horizontal(exclusoes).cast(pl.Int64) if exclusoes else pl.lit(0, dtype=pl.Int64)
+
+        dias_liquidos = col('dias_uteis') - col('dias_ferias')
+        colaboradores = (
+            colaboradores
+            .with_columns(mascara.alias('mascara_exclusao'))
+            .with_columns((col('mascara_exclusao') == 0).alias('elegivel'))
+            .with_columns(
+                pl.when(col('elegivel') & col('dias_uteis').is_null()).then(None)
+                .when(col('elegivel') & (dias_liquidos > 0)).then(dias_liquidos).otherwise(0)
+                .cast(pl.Int64).alias('dias_calculados'),
+                pl.when(col('elegivel') & (col('valor_exterior') > 0))
+                .then(pl.lit('Valor especial - Exterior')).otherwise(pl.lit('')).alias('observacoes')
+            )
+            .with_columns(
+                # Centavos: multiplicação exata de inteiros
+                pl.when(~col('elegivel')).then(0)
+                .when(col('valor_exterior') > 0).then(col('valor_exterior'))
+                .otherwise(col('dias_calculados') * col('valor_diario')).cast(pl.Int64).alias('valor_total')
+            )
+            .sort('pos')
+        )
+
+        marcas = [f'_{base}' for base in ('aprendizes', 'estagios') if base in tabelas]
+        marcas += [f'_cargo_{indice}' for indice in range(len(cargos))]
+        resultado = colaboradores.select(['matricula'] + marcas + COLUNAS_RESULTADO).collect()
+        return resultado.select(COLUNAS_RESULTADO).to_pandas(), self._eventos(lf, resultado, tabelas, cargos)
+
+    def _eventos(self, lf: Dict[str, Any], resultado, tabelas: Dict[str, pd.DataFrame], cargos) -> Dict[str, Any]:
+        """Eventos de cada regra para o log (linhas que atingem colaboradores ativos, na ordem da base)"""
+        import polars as pl
+
+        col = pl.col
+        ativos = lf['ativos'].select('matricula')
+
+        def linhas(base: str, colunas, filtro=None) -> pd.DataFrame:
+            origem = lf[base] if filtro is None else lf[base].filter(filtro)
+            return origem.join(ativos, on='matricula', how='semi').sort('pos').select(colunas).collect().to_pandas()
+
+        def marcados(marca: str):
+            return resultado.filter(col(marca))['matricula'].to_list()
+
+        eventos = {'cargos': [(cargo, marcados(f'_cargo_{indice}')) for indice, cargo in enumerate(cargos)]}
+        for base in ('aprendizes', 'estagios'):
+            if base in tabelas:
+                eventos[base] = marcados(f'_{base}')
+        if 'afastamentos' in tabelas:
+            eventos['afastamentos'] = linhas('afastamentos', ['matricula', 'tipo'], col('excluido'))
+        if 'ferias' in tabelas:
+            eventos['ferias'] = linhas('ferias', ['matricula', 'dias'])
+        if 'desligados' in tabelas:
+            eventos['desligados'] = linhas('desligados', ['matricula', 'dia'], col('dia').is_not_null())
+        if 'exterior' in tabelas:
+            eventos['exterior'] = linhas('exterior', ['matricula', 'valor', 'observacao', 'removido'])
+        if 'admissoes_mes' in tabelas:
+            eventos['admissoes_mes'] = linhas('admissoes_mes', ['matricula', 'dia'])
+        return eventos
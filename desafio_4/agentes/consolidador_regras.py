@@ -10,33 +10,173 @@ from typing import Dict, List, Tuple, Any
 import numpy as np
 from datetime import datetime, date
 import calendar
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-from utils.config_loader import get_config_loader
-from utils.logger import VRLogger
+from utils.config_loader import ConfigLoader
+from utils.logger import VRLogger, VRLoggerMemoria
+from utils.sindicatos import NormalizadorSindicatos
+from utils.integridade import deduplicar_chave, InvariantesLinhas
+from utils.memoria import ConsolidadoEmBlocos, GovernadorMemoria, formatar_tamanho, ativar_copia_sob_escrita
+from utils.armazem_consolidado import ArmazemConsolidado
+from utils.contexto import ContextoExecucao
+from utils.dinheiro import em_reais, dividir_valor
+from utils.exclusoes import RegistroExclusoes, COLUNA_MASCARA, removido_exterior
+from utils.estatisticas import calcular_estatisticas, colunas_estatisticas, dimensoes_configuradas
+from agentes.motores import classe_motor, criar_motor
+
+
+# Coluna de data usada pela política de duplicatas 'mais_recente' em cada base
+COLUNAS_DATA_DUPLICATAS = {
+    'admissoes': 'Admissão',
+    'desligados': 'DATA DEMISSÃO'
+}
+
+# Memória adicional por colaborador durante a consolidação em memória (junções, colunas de
+# controle e cópias intermediárias), medida com a base sintética de utils.benchmark
+BYTES_POR_COLABORADOR = 1500
 
 
 class ConsolidadorRegras:
     """Agente responsável pela consolidação de dados e aplicação de regras de negócio"""
     
-    def __init__(self, logger: VRLogger):
+    def __init__(self, logger: VRLogger, config_loader: ConfigLoader = None,
+                 governador: GovernadorMemoria = None, armazem: ArmazemConsolidado = None):
         """Inicializa o agente consolidador de regras"""
         self.logger = logger
-        self.config_loader = get_config_loader()
+        self.config_loader = config_loader or ConfigLoader()
         self.config = self.config_loader.get_config()
+        self.governador = governador or GovernadorMemoria.from_config(self.config, logger)
         
-        # DataFrame consolidado final
+        # Publicação opcional do resultado para outros processos (relatórios, explain, análises)
+        self.armazem = armazem
+        self.publicar_consolidado = True
+        
+        # DataFrame consolidado final (atribuí-lo também descarta as estatísticas calculadas)
         self.df_consolidado = None
         
         # Bases auxiliares
         self.base_sindicatos_valores = None
         self.base_dias_uteis = None
         
+        # Normalizador de nomes de sindicatos (criado com os estados da base de valores)
+        self.normalizador_sindicatos = None
+        
+        # Bits dos motivos de exclusão (mesmo registro em todas as partições)
+        self.registro_exclusoes = None
+        
+        # Bases já preparadas por preparar_bases (reaproveitadas pela próxima consolidação)
+        self._bases_preparadas = False
+        
+        # Contagem de linhas a cada junção (detecta multiplicação de colaboradores)
+        self.invariantes = InvariantesLinhas()
+    
+    @classmethod
+    def from_contexto(cls, contexto: ContextoExecucao) -> 'ConsolidadorRegras':
+        """Cria o agente com os recursos de um ContextoExecucao"""
+        return cls(contexto.logger, contexto.config_loader, contexto.governador, contexto.armazem)
+    
+    @property
+    def df_consolidado(self) -> pd.DataFrame:
+        """DataFrame consolidado; atribuir um novo descarta as estatísticas calculadas"""
+        return self._df_consolidado
+    
+    @df_consolidado.setter
+    def df_consolidado(self, df: pd.DataFrame):
+        self._df_consolidado = df
+        self._estatisticas = None
+    
     def executar(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         """Executa o processo de consolidação e aplicação de regras"""
         self.logger.log_info("Iniciando processo de consolidação e aplicação de regras de negócio")
         
-        # Preparar bases auxiliares
+        try:
+            self._consolidar(dados_validados)
+        finally:
+            self._bases_preparadas = False
+        
+        # Gerar estatísticas finais
+        self._gerar_estatisticas_finais()
+        self._publicar()
+        
+        self.logger.log_info("Processo de consolidação e regras concluído com sucesso")
+        return self.df_consolidado
+    
+    def _consolidar(self, dados_validados: Dict[str, pd.DataFrame]):
+        """Consolida com a estratégia configurada (partições, outro motor, blocos ou em memória)"""
+        # Consolidar, aplicar regras e calcular VR (em partições paralelas, se configurado)
+        config_particionamento = self.config.get('performance', {}).get('consolidacao_particionada', {})
+        if config_particionamento.get('habilitada', False):
+            # Cada partição roda no motor configurado; dependências conferidas antes de criar o pool
+            motor = classe_motor(self.config.get('performance', {}).get('motor_consolidacao', 'pandas'))
+            if not motor.disponivel():
+                raise ImportError(f"O motor de consolidação '{motor.nome}' requer: {motor.requisitos}")
+            workers = config_particionamento.get('workers') or os.cpu_count() or 1
+            bases, tarefas = self.preparar_particoes(
+                dados_validados, config_particionamento.get('chave', 'sindicato_normalizado'), workers
+            )
+            self.df_consolidado = self.mesclar_particoes(self._executar_particoes(bases, tarefas, workers))
+        elif self.config.get('performance', {}).get('motor_consolidacao', 'pandas') != 'pandas':
+            # Junções, regras e cálculo em outro motor (sql, polars) com o mesmo resultado
+            self._preparar_bases_auxiliares(dados_validados)
+            self.df_consolidado = criar_motor(self).executar(dados_validados)
+        elif self.governador.excede_orcamento(
+                'consolidacao', len(dados_validados.get('ativos', [])) * BYTES_POR_COLABORADOR):
+            self.df_consolidado = self._executar_em_blocos(dados_validados)
+        else:
+            # Preparar bases auxiliares
+            self._preparar_bases_auxiliares(dados_validados)
+            self._executar_regras(dados_validados)
+    
+    def preparar_bases(self, dados_validados: Dict[str, pd.DataFrame]):
+        """Prepara as bases de referência antes da consolidação (ex.: enquanto ATIVOS ainda é lido)
+        
+        Usa apenas sindicato_valor, dias_uteis e exterior; a próxima chamada de
+        executar reaproveita as bases em vez de prepará-las de novo.
+        """
+        self._bases_preparadas = False
         self._preparar_bases_auxiliares(dados_validados)
+        self._bases_preparadas = True
+    
+    def executar_mesclagem(self, resultados: List[Tuple],
+                           dados_validados: Dict[str, pd.DataFrame] = None) -> pd.DataFrame:
+        """Conclui a consolidação a partir de partições processadas em outros processos ou hosts
+        
+        dados_validados, se informados, recriam o registro de motivos de exclusão usado
+        pelas partições (que é determinado pela configuração e pelas bases).
+        """
+        if dados_validados is not None:
+            self.registro_exclusoes = RegistroExclusoes.from_config(self.config, dados_validados)
+        self.df_consolidado = self.mesclar_particoes(resultados)
+        
+        # Gerar estatísticas finais
+        self._gerar_estatisticas_finais()
+        self._publicar()
+        
+        self.logger.log_info("Processo de consolidação e regras concluído com sucesso")
+        return self.df_consolidado
+    
+    def _publicar(self):
+        """Publica o consolidado no armazém; uma falha de gravação não interrompe o processamento"""
+        if self.armazem is None or not self.publicar_consolidado:
+            return
+        if isinstance(self.df_consolidado, ConsolidadoEmBlocos):
+            self.logger.log_warning(
+                "Consolidado em blocos no disco (acima do orçamento de memória) não é publicado; "
+                "a versão publicada continua a da execução anterior"
+            )
+            return
+        
+        try:
+            destino = self.armazem.publicar(self.df_consolidado, self.get_estatisticas(),
+                                            self.registro_exclusoes.como_lista())
+            self.logger.log_info(f"Consolidado publicado em {destino} ({self.armazem.formato})")
+        except OSError as e:
+            self.logger.log_warning(f"Não foi possível publicar o consolidado: {e}")
+    
+    def _executar_regras(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Consolida os dados, aplica as regras de negócio e calcula os valores de VR"""
         
         # Consolidar dados principais
         self.df_consolidado = self._consolidar_dados_principais(dados_validados)
@@ -52,28 +192,182 @@ class ConsolidadorRegras:
         # Calcular valores de VR
         self._calcular_valores_vr()
         
-        # Gerar estatísticas finais
-        self._gerar_estatisticas_finais()
-        
-        self.logger.log_info("Processo de consolidação e regras concluído com sucesso")
         return self.df_consolidado
     
+    def preparar_particoes(self, dados_validados: Dict[str, pd.DataFrame], chave: str,
+                           n_particoes: int) -> Tuple[Tuple, List[Dict[str, pd.DataFrame]]]:
+        """Prepara as bases auxiliares e divide os colaboradores em partições independentes
+        
+        Todas as regras dependem apenas da própria matrícula, então cada partição pode
+        ser consolidada isoladamente com consolidar_particao. Retorna as bases de
+        referência (comuns a todas as partições) e os dados de cada partição.
+        """
+        df_ativos, bases = self._preparar_ativos_particionados(dados_validados)
+        
+        if chave not in df_ativos.columns:
+            raise ValueError(f"Chave de particionamento inválida: {chave}")
+        
+        particoes = self._dividir_particoes(df_ativos, chave, n_particoes)
+        tarefas = [self._dados_particao(dados_validados, df_particao) for df_particao in particoes]
+        
+        self.logger.log_info(
+            f"Consolidação particionada por {chave}: {len(tarefas)} partições "
+            f"({[len(p) for p in particoes]} colaboradores)"
+        )
+        return bases, tarefas
+    
+    def _preparar_ativos_particionados(self, dados_validados: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, Tuple]:
+        """Prepara as bases auxiliares e marca os ativos com o sindicato normalizado e a ordem original"""
+        if 'ativos' not in dados_validados:
+            raise ValueError("Base de colaboradores ativos não encontrada")
+        
+        self._preparar_bases_auxiliares(dados_validados)
+        
+        # A normalização é feita uma única vez aqui: serve de chave e é reaproveitada pelas partições
+        df_ativos = dados_validados['ativos']
+        df_ativos = df_ativos.assign(
+            sindicato_normalizado=self.normalizador_sindicatos.normalizar_serie(df_ativos['Sindicato']),
+            _ordem_particao=np.arange(len(df_ativos))
+        )
+        self._registrar_normalizacao_sindicatos()
+        
+        bases = (self.base_sindicatos_valores, self.base_dias_uteis, self.normalizador_sindicatos,
+                 self.registro_exclusoes)
+        return df_ativos, bases
+    
+    def _executar_em_blocos(self, dados_validados: Dict[str, pd.DataFrame]) -> ConsolidadoEmBlocos:
+        """Consolida faixas de matrícula em blocos, gravando cada resultado em disco
+        
+        Apenas um bloco fica em processamento por vez e o consolidado não é remontado:
+        o resultado é um ConsolidadoEmBlocos, lido bloco a bloco pelo relatório.
+        """
+        df_ativos, bases = self._preparar_ativos_particionados(dados_validados)
+        df_ativos = df_ativos.sort_values('MATRICULA', kind='stable')
+        tamanho_bloco = self.governador.tamanho_bloco
+        
+        with self.governador.area_temporaria('consolidacao') as area:
+            arquivos, colunas = [], []
+            for inicio in range(0, len(df_ativos), tamanho_bloco):
+                dados_bloco = self._dados_particao(dados_validados, df_ativos.iloc[inicio:inicio + tamanho_bloco])
+                df_bloco, registros, stats = consolidar_particao(self.config_loader, bases, dados_bloco)
+                self.logger.mesclar(registros, stats)
+                arquivos.append(area.gravar(df_bloco))
+                colunas = list(df_bloco.columns)
+                del dados_bloco, df_bloco, registros
+            
+            self.logger.log_info(
+                f"Consolidação em {len(arquivos)} blocos de até {tamanho_bloco} colaboradores "
+                f"({formatar_tamanho(area.bytes_gravados)} de intermediários em {area.formato}), "
+                f"mantidos em disco para o relatório"
+            )
+            return ConsolidadoEmBlocos(area, arquivos, colunas, len(df_ativos), '_ordem_particao')
+    
+    def _executar_particoes(self, bases: Tuple, tarefas: List[Dict[str, pd.DataFrame]],
+                            workers: int) -> List[Tuple]:
+        """Consolida as partições em um pool de processos (ou no próprio processo com 1 worker)"""
+        if workers > 1 and len(tarefas) > 1:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(tarefas)), mp_context=contexto) as executor:
+                return list(executor.map(
+                    consolidar_particao,
+                    [self.config_loader] * len(tarefas), [bases] * len(tarefas), tarefas
+                ))
+        
+        return [consolidar_particao(self.config_loader, bases, tarefa) for tarefa in tarefas]
+    
+    def mesclar_particoes(self, resultados: List[Tuple]) -> pd.DataFrame:
+        """Remonta o resultado das partições na ordem original da base de ativos
+        
+        As mensagens e estatísticas de log de cada partição são incorporadas na ordem
+        recebida, que deve ser a ordem das partições para o resultado ser determinístico.
+        """
+        for _, registros, stats in resultados:
+            self.logger.mesclar(registros, stats)
+        
+        df = pd.concat([df_particao for df_particao, _, _ in resultados], ignore_index=True)
+        df = df.sort_values('_ordem_particao', kind='stable').drop(columns=['_ordem_particao'])
+        return df.reset_index(drop=True)
+    
+    @staticmethod
+    def _dividir_particoes(df: pd.DataFrame, chave: str, n_grupos: int) -> List[pd.DataFrame]:
+        """Distribui os valores da chave em até n_grupos partições de tamanho equilibrado
+        
+        Um mesmo valor da chave nunca é dividido entre partições. A distribuição é
+        gulosa (maiores primeiro, empate pela ordem de aparição), portanto determinística.
+        """
+        codigos, valores = pd.factorize(df[chave], use_na_sentinel=False)
+        tamanhos = np.bincount(codigos, minlength=len(valores))
+        
+        n_grupos = max(1, min(n_grupos, len(valores)))
+        cargas = [0] * n_grupos
+        grupo_do_codigo = np.zeros(len(valores), dtype=np.int64)
+        for codigo in sorted(range(len(valores)), key=lambda c: (-tamanhos[c], c)):
+            grupo = cargas.index(min(cargas))
+            grupo_do_codigo[codigo] = grupo
+            cargas[grupo] += tamanhos[codigo]
+        
+        grupos = grupo_do_codigo[codigos]
+        return [df[grupos == grupo] for grupo in range(n_grupos) if cargas[grupo] > 0]
+    
+    @staticmethod
+    def _dados_particao(dados_validados: Dict[str, pd.DataFrame],
+                        df_particao: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Monta as bases de uma partição: listas por matrícula são filtradas, as demais vão inteiras"""
+        matriculas = df_particao['MATRICULA']
+        dados = {'ativos': df_particao}
+        for nome, df in dados_validados.items():
+            if nome in ('ativos', 'sindicato_valor', 'dias_uteis'):
+                continue
+            if 'MATRICULA' in df.columns:
+                df = df[df['MATRICULA'].isin(matriculas)]
+            dados[nome] = df
+        return dados
+    
     def _preparar_bases_auxiliares(self, dados_validados: Dict[str, pd.DataFrame]):
-        """Prepara bases auxiliares para cálculos"""
+        """Prepara bases auxiliares para cálculos (nada a fazer se preparar_bases já as preparou)"""
+        if self._bases_preparadas:
+            return
         
         # Base de valores por sindicato
+        estados_conhecidos = []
         if 'sindicato_valor' in dados_validados:
-            self.base_sindicatos_valores = dados_validados['sindicato_valor'].copy()
+            self.base_sindicatos_valores = self._garantir_chave_unica(
+                dados_validados['sindicato_valor'], 'ESTADO', 'sindicato_valor'
+            )
+            estados_conhecidos = self.base_sindicatos_valores['ESTADO'].dropna().unique()
             self.logger.log_info(f"Base de valores carregada: {len(self.base_sindicatos_valores)} sindicatos")
         
+        self.normalizador_sindicatos = NormalizadorSindicatos.from_config(self.config, estados_conhecidos)
+        
         # Base de dias úteis por sindicato
         if 'dias_uteis' in dados_validados:
-            self.base_dias_uteis = dados_validados['dias_uteis'].copy()
-            # Normalizar nomes de sindicatos
-            self.base_dias_uteis['SINDICADO_NORMALIZADO'] = self.base_dias_uteis['SINDICADO'].apply(
-                lambda x: self.config_loader.get_sindicato_normalizado(x)
+            # Normalizar nomes de sindicatos (assign não altera a base validada)
+            self.base_dias_uteis = dados_validados['dias_uteis'].assign(
+                SINDICADO_NORMALIZADO=self.normalizador_sindicatos.normalizar_serie(
+                    dados_validados['dias_uteis']['SINDICADO']
+                )
+            )
+            # Nomes distintos podem convergir para o mesmo sindicato normalizado
+            self.base_dias_uteis = self._garantir_chave_unica(
+                self.base_dias_uteis, 'SINDICADO_NORMALIZADO', 'dias_uteis'
             )
             self.logger.log_info(f"Base de dias úteis carregada: {len(self.base_dias_uteis)} sindicatos")
+        
+        self.registro_exclusoes = RegistroExclusoes.from_config(self.config, dados_validados)
+    
+    def _garantir_chave_unica(self, df: pd.DataFrame, chave: str, base: str) -> pd.DataFrame:
+        """Aplica a política de duplicatas configurada para a base antes de usá-la em uma junção"""
+        config_integridade = self.config.get('integridade', {})
+        politica = config_integridade.get('politicas_duplicatas', {}).get(
+            base, config_integridade.get('politica_duplicatas', 'primeiro')
+        )
+        
+        df, descartadas = deduplicar_chave(df, chave, politica, COLUNAS_DATA_DUPLICATAS.get(base), base)
+        if descartadas:
+            self.logger.log_warning(
+                f"{base}: {descartadas} linhas com {chave} duplicado descartadas (política '{politica}')"
+            )
+        return df
     
     def _consolidar_dados_principais(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         """Consolida dados principais dos colaboradores ativos"""
@@ -81,35 +375,61 @@ class ConsolidadorRegras:
         if 'ativos' not in dados_validados:
             raise ValueError("Base de colaboradores ativos não encontrada")
         
-        # Começar com base de ativos
-        df = dados_validados['ativos'].copy()
+        # Começar com base de ativos (cópia rasa: as colunas novas não alteram a base validada)
+        df = dados_validados['ativos'].copy(deep=False)
+        total_ativos = len(df)
+        self.invariantes.registrar('ativos', total_ativos)
         
         # Adicionar informações de admissão se disponível
         if 'admissoes' in dados_validados:
-            df_admissoes = dados_validados['admissoes'][['MATRICULA', 'Admissão']].copy()
-            df = df.merge(df_admissoes, on='MATRICULA', how='left')
+            df_admissoes = self._garantir_chave_unica(
+                dados_validados['admissoes'][['MATRICULA', 'Admissão']], 'MATRICULA', 'admissoes'
+            )
+            df = df.merge(df_admissoes, on='MATRICULA', how='left', validate='many_to_one')
+            self.invariantes.registrar('merge admissoes', len(df), total_ativos)
         
         # Inicializar colunas de controle
         df['elegivel'] = True
-        df['motivo_exclusao'] = ''
+        df[COLUNA_MASCARA] = np.int64(0)
         df['dias_ferias'] = 0
         df['dias_afastamento'] = 0
         df['data_demissao'] = pd.NaT
         df['comunicado_desligamento'] = ''
-        df['valor_exterior'] = 0.0
+        df['valor_exterior_centavos'] = 0
         df['observacoes'] = ''
         
-        # Normalizar nomes de sindicatos
-        df['sindicato_normalizado'] = df['Sindicato'].apply(
-            lambda x: self.config_loader.get_sindicato_normalizado(x)
-        )
+        # Normalizar nomes de sindicatos (uma vez por valor distinto)
+        if 'sindicato_normalizado' in df.columns:
+            # Partições já chegam normalizadas: apenas manter a posição da coluna do fluxo sequencial
+            df['sindicato_normalizado'] = df.pop('sindicato_normalizado')
+        else:
+            df['sindicato_normalizado'] = self.normalizador_sindicatos.normalizar_serie(df['Sindicato'])
+            self._registrar_normalizacao_sindicatos()
         
         # Adicionar informações de valores e dias úteis por sindicato
         df = self._adicionar_info_sindicatos(df)
+        self.invariantes.registrar('merge sindicatos', len(df), total_ativos)
         
         self.logger.log_info(f"Dados principais consolidados: {len(df)} colaboradores")
         return df
     
+    def _registrar_normalizacao_sindicatos(self):
+        """Registra no log as sugestões de normalização pendentes de revisão"""
+        normalizador = self.normalizador_sindicatos
+        
+        for sindicato, sugestao in normalizador.sugestoes_pendentes.items():
+            self.logger.log_warning(
+                f"Sindicato fora do mapeamento normalizado por similaridade (pendente de aprovação): "
+                f"'{sindicato}' -> '{sugestao}'"
+            )
+        
+        if normalizador.nao_mapeados:
+            self.logger.log_warning(f"Sindicatos sem normalização: {sorted(normalizador.nao_mapeados)}")
+        
+        self.logger.log_info(
+            f"Normalização de sindicatos: {normalizador.calculos_similaridade} cálculos de similaridade"
+        )
+    
     def _adicionar_info_sindicatos(self, df: pd.DataFrame) -> pd.DataFrame:
         """Adiciona informações de valores e dias úteis por sindicato"""
         
@@ -119,9 +439,10 @@ class ConsolidadorRegras:
                 self.base_sindicatos_valores[['ESTADO', 'VALOR']],
                 left_on='sindicato_normalizado',
                 right_on='ESTADO',
-                how='left'
+                how='left',
+                validate='many_to_one'
             )
-            df = df.rename(columns={'VALOR': 'valor_diario_vr'})
+            df = df.rename(columns={'VALOR': 'valor_diario_centavos'})
             df = df.drop(columns=['ESTADO'], errors='ignore')
         
         # Merge com dias úteis
@@ -130,13 +451,14 @@ class ConsolidadorRegras:
                 self.base_dias_uteis[['SINDICADO_NORMALIZADO', 'DIAS UTEIS']],
                 left_on='sindicato_normalizado',
                 right_on='SINDICADO_NORMALIZADO',
-                how='left'
+                how='left',
+                validate='many_to_one'
             )
             df = df.rename(columns={'DIAS UTEIS': 'dias_uteis_sindicato'})
             df = df.drop(columns=['SINDICADO_NORMALIZADO'], errors='ignore')
         
         # Verificar se há colaboradores sem informações de sindicato
-        sem_valor = df['valor_diario_vr'].isna().sum()
+        sem_valor = df['valor_diario_centavos'].isna().sum()
         sem_dias = df['dias_uteis_sindicato'].isna().sum()
         
         if sem_valor > 0:
@@ -146,6 +468,11 @@ class ConsolidadorRegras:
         
         return df
     
+    def _excluir(self, mask, motivo: str):
+        """Marca os colaboradores como não elegíveis e liga o bit do motivo, preservando os anteriores"""
+        self.df_consolidado.loc[mask, 'elegivel'] = False
+        self.df_consolidado.loc[mask, COLUNA_MASCARA] |= self.registro_exclusoes.bit(motivo)
+    
     def _aplicar_regras_exclusao_cargo(self, dados_validados: Dict[str, pd.DataFrame]):
         """Aplica regras de exclusão por cargo"""
         
@@ -155,8 +482,7 @@ class ConsolidadorRegras:
             mask_aprendizes = self.df_consolidado['MATRICULA'].isin(matriculas_aprendizes)
             
             count_aprendizes = mask_aprendizes.sum()
-            self.df_consolidado.loc[mask_aprendizes, 'elegivel'] = False
-            self.df_consolidado.loc[mask_aprendizes, 'motivo_exclusao'] = 'Aprendiz'
+            self._excluir(mask_aprendizes, 'Aprendiz')
             
             for matricula in self.df_consolidado[mask_aprendizes]['MATRICULA']:
                 self.logger.log_exclusao(matricula, 'Aprendiz', 'Aprendizes')
@@ -169,8 +495,7 @@ class ConsolidadorRegras:
             mask_estagios = self.df_consolidado['MATRICULA'].isin(matriculas_estagios)
             
             count_estagios = mask_estagios.sum()
-            self.df_consolidado.loc[mask_estagios, 'elegivel'] = False
-            self.df_consolidado.loc[mask_estagios, 'motivo_exclusao'] = 'Estagiário'
+            self._excluir(mask_estagios, 'Estagiário')
             
             for matricula in self.df_consolidado[mask_estagios]['MATRICULA']:
                 self.logger.log_exclusao(matricula, 'Estagiário', 'Estagiários')
@@ -184,8 +509,7 @@ class ConsolidadorRegras:
             
             count_cargo = mask_cargo.sum()
             if count_cargo > 0:
-                self.df_consolidado.loc[mask_cargo, 'elegivel'] = False
-                self.df_consolidado.loc[mask_cargo, 'motivo_exclusao'] = f'Cargo: {cargo}'
+                self._excluir(mask_cargo, f'Cargo: {cargo}')
                 
                 for matricula in self.df_consolidado[mask_cargo]['MATRICULA']:
                     self.logger.log_exclusao(matricula, f'Cargo: {cargo}', 'Cargos excluídos')
@@ -210,8 +534,7 @@ class ConsolidadorRegras:
                 mask = self.df_consolidado['MATRICULA'] == matricula
                 
                 if mask.any():
-                    self.df_consolidado.loc[mask, 'elegivel'] = False
-                    self.df_consolidado.loc[mask, 'motivo_exclusao'] = f'Afastamento: {tipo_afastamento}'
+                    self._excluir(mask, f'Afastamento: {tipo_afastamento}')
                     
                     self.logger.log_exclusao(matricula, f'Afastamento: {tipo_afastamento}', 'Afastamentos')
         
@@ -270,8 +593,7 @@ class ConsolidadorRegras:
                     
                     if dia_demissao <= dia_corte:
                         # Desligamento antes do dia 15 - VR proporcional
-                        self.df_consolidado.loc[mask, 'elegivel'] = False
-                        self.df_consolidado.loc[mask, 'motivo_exclusao'] = f'Desligado antes do dia {dia_corte}'
+                        self._excluir(mask, f'Desligado antes do dia {dia_corte}')
                         
                         self.logger.log_exclusao(
                             matricula, 
@@ -305,19 +627,18 @@ class ConsolidadorRegras:
             
             if mask.any():
                 # Verificar se deve ser excluído ou tem valor especial
-                if pd.notna(observacao) and ('desligado' in str(observacao).lower() or 'removido' in str(observacao).lower()):
-                    self.df_consolidado.loc[mask, 'elegivel'] = False
-                    self.df_consolidado.loc[mask, 'motivo_exclusao'] = f'Exterior: {observacao}'
+                if removido_exterior(observacao):
+                    self._excluir(mask, f'Exterior: {observacao}')
                     
                     self.logger.log_exclusao(matricula, f'Exterior: {observacao}', 'Colaboradores no exterior')
                 else:
                     # Valor especial para exterior
-                    self.df_consolidado.loc[mask, 'valor_exterior'] = valor
+                    self.df_consolidado.loc[mask, 'valor_exterior_centavos'] = valor
                     
                     self.logger.log_calculo_especial(
                         matricula, 
                         'Valor especial exterior', 
-                        f'Valor: R$ {valor:.2f}'
+                        f'Valor: R$ {em_reais(valor):.2f}'
                     )
         
         self.logger.log_info(f"Processados {len(df_exterior)} colaboradores no exterior")
@@ -356,99 +677,98 @@ class ConsolidadorRegras:
         self.logger.log_info(f"Processadas {len(df_admissoes)} admissões")
     
     def _calcular_valores_vr(self):
-        """Calcula valores de VR para colaboradores elegíveis"""
-        
-        # Filtrar apenas colaboradores elegíveis
-        mask_elegiveis = self.df_consolidado['elegivel'] == True
-        
-        for idx in self.df_consolidado[mask_elegiveis].index:
-            row = self.df_consolidado.loc[idx]
-            
-            # Obter dias úteis do sindicato
-            dias_uteis_base = row.get('dias_uteis_sindicato', 22)  # Default 22 dias
-            
-            # Calcular dias efetivos (descontar férias)
-            dias_efetivos = dias_uteis_base - row.get('dias_ferias', 0)
-            
-            # Garantir que não seja negativo
-            dias_efetivos = max(0, dias_efetivos)
+        """Calcula dias e valores de VR, em centavos, para colaboradores elegíveis
+        
+        Operações vetorizadas sobre inteiros: valor total = dias efetivos x valor diário
+        (ou o valor especial do exterior), dividido entre empresa e colaborador pela
+        regra de arredondamento de dividir_valor. Não elegíveis ficam com zero.
+        """
+        df = self.df_consolidado
+        mask_elegiveis = (df['elegivel'] == True).to_numpy()
+        
+        # Dias efetivos: dias úteis do sindicato (padrão 22) menos férias, nunca negativos; sem
+        # dias úteis do sindicato ficam nulos, assim como o valor total (exceto no exterior)
+        dias_uteis = df['dias_uteis_sindicato'] if 'dias_uteis_sindicato' in df.columns else 22
+        dias_efetivos = (dias_uteis - df['dias_ferias']).clip(lower=0).astype('Int64')
             
-            # Obter valor diário
-            valor_diario = row.get('valor_diario_vr', 0)
+        # Valor total: dias x valor diário, exceto o valor especial dos colaboradores no exterior
+        valor_diario = (df['valor_diario_centavos'] if 'valor_diario_centavos' in df.columns
+                        else pd.Series(0, index=df.index, dtype='Int64'))
+        mask_exterior = (df['valor_exterior_centavos'] > 0).to_numpy()
+        valor_total = (dias_efetivos * valor_diario).astype('Int64')
+        valor_total = valor_total.where(~mask_exterior, df['valor_exterior_centavos']).where(mask_elegiveis, 0)
             
-            # Verificar se há valor especial para exterior
-            if row.get('valor_exterior', 0) > 0:
-                valor_total = row['valor_exterior']
-                self.df_consolidado.loc[idx, 'observacoes'] = 'Valor especial - Exterior'
-            else:
-                valor_total = dias_efetivos * valor_diario
-            
-            # Calcular divisão empresa/colaborador
-            percentual_empresa = self.config['regras_negocio']['percentual_empresa']
-            percentual_colaborador = self.config['regras_negocio']['percentual_colaborador']
-            
-            custo_empresa = valor_total * percentual_empresa
-            desconto_colaborador = valor_total * percentual_colaborador
+        regras = self.config['regras_negocio']
+        custo_empresa, desconto_colaborador = dividir_valor(
+            valor_total, regras['percentual_empresa'], regras['percentual_colaborador']
+        )
             
-            # Atualizar DataFrame
-            self.df_consolidado.loc[idx, 'dias_calculados'] = dias_efetivos
-            self.df_consolidado.loc[idx, 'valor_total_vr'] = valor_total
-            self.df_consolidado.loc[idx, 'custo_empresa'] = custo_empresa
-            self.df_consolidado.loc[idx, 'desconto_colaborador'] = desconto_colaborador
-        
-        # Zerar valores para não elegíveis
-        mask_nao_elegiveis = self.df_consolidado['elegivel'] == False
-        colunas_zerar = ['dias_calculados', 'valor_total_vr', 'custo_empresa', 'desconto_colaborador']
-        
-        for coluna in colunas_zerar:
-            self.df_consolidado.loc[mask_nao_elegiveis, coluna] = 0
+        # Atualizar DataFrame
+        df.loc[mask_elegiveis & mask_exterior, 'observacoes'] = 'Valor especial - Exterior'
+        df['dias_calculados'] = dias_efetivos.where(mask_elegiveis, 0).astype('float64')
+        df['valor_total_centavos'] = valor_total
+        df['custo_empresa_centavos'] = custo_empresa
+        df['desconto_colaborador_centavos'] = desconto_colaborador
         
         total_elegiveis = mask_elegiveis.sum()
-        valor_total_processado = self.df_consolidado[mask_elegiveis]['valor_total_vr'].sum()
+        valor_total_processado = valor_total[mask_elegiveis].sum()
         
         self.logger.log_info(f"Valores calculados para {total_elegiveis} colaboradores elegíveis")
-        self.logger.log_info(f"Valor total processado: R$ {valor_total_processado:,.2f}")
+        self.logger.log_info(f"Valor total processado: R$ {em_reais(valor_total_processado):,.2f}")
     
     def _gerar_estatisticas_finais(self):
-        """Gera estatísticas finais do processamento"""
-        
-        total_colaboradores = len(self.df_consolidado)
-        colaboradores_elegiveis = (self.df_consolidado['elegivel'] == True).sum()
-        colaboradores_excluidos = (self.df_consolidado['elegivel'] == False).sum()
-        valor_total = self.df_consolidado[self.df_consolidado['elegivel'] == True]['valor_total_vr'].sum()
-        
-        # Estatísticas por categoria de exclusão
-        exclusoes_por_motivo = self.df_consolidado[
-            self.df_consolidado['elegivel'] == False
-        ]['motivo_exclusao'].value_counts().to_dict()
+        """Registra no log as estatísticas finais do processamento"""
+        estatisticas = self.get_estatisticas()
         
         self.logger.log_info(f"Estatísticas finais:")
-        self.logger.log_info(f"- Total de colaboradores: {total_colaboradores}")
-        self.logger.log_info(f"- Colaboradores elegíveis: {colaboradores_elegiveis}")
-        self.logger.log_info(f"- Colaboradores excluídos: {colaboradores_excluidos}")
-        self.logger.log_info(f"- Valor total: R$ {valor_total:,.2f}")
-        self.logger.log_info(f"- Exclusões por motivo: {exclusoes_por_motivo}")
+        self.logger.log_info(f"- Total de colaboradores: {estatisticas['total_colaboradores']}")
+        self.logger.log_info(f"- Colaboradores elegíveis: {estatisticas['colaboradores_elegiveis']}")
+        self.logger.log_info(f"- Colaboradores excluídos: {estatisticas['colaboradores_excluidos']}")
+        self.logger.log_info(f"- Valor total: R$ {estatisticas['valor_total']:,.2f}")
+        self.logger.log_info(f"- Exclusões por motivo: {estatisticas['exclusoes_por_motivo']}")
+        
+        if estatisticas['dimensoes_ausentes']:
+            self.logger.log_warning(
+                f"Dimensões de estatísticas ausentes no consolidado: {estatisticas['dimensoes_ausentes']}"
+            )
     
     def get_dados_consolidados(self) -> pd.DataFrame:
         """Retorna os dados consolidados"""
         return self.df_consolidado
     
     def get_estatisticas(self) -> Dict[str, Any]:
-        """Retorna estatísticas detalhadas do processamento"""
+        """Retorna estatísticas detalhadas do processamento, com totais por dimensão
+        
+        Calculadas uma única vez por df_consolidado (utils.estatisticas) e reaproveitadas
+        nas fases 3, 4 e 5, na publicação e no resumo. Alterações feitas no próprio
+        DataFrame, sem atribuir um novo, não são percebidas.
+        """
         if self.df_consolidado is None:
             return {}
         
-        mask_elegiveis = self.df_consolidado['elegivel'] == True
-        
-        return {
-            'total_colaboradores': len(self.df_consolidado),
-            'colaboradores_elegiveis': mask_elegiveis.sum(),
-            'colaboradores_excluidos': (~mask_elegiveis).sum(),
-            'valor_total': self.df_consolidado[mask_elegiveis]['valor_total_vr'].sum(),
-            'custo_total_empresa': self.df_consolidado[mask_elegiveis]['custo_empresa'].sum(),
-            'desconto_total_colaboradores': self.df_consolidado[mask_elegiveis]['desconto_colaborador'].sum(),
-            'exclusoes_por_motivo': self.df_consolidado[~mask_elegiveis]['motivo_exclusao'].value_counts().to_dict(),
-            'colaboradores_com_ferias': (self.df_consolidado['dias_ferias'] > 0).sum(),
-            'colaboradores_exterior': (self.df_consolidado['valor_exterior'] > 0).sum()
-        }
+        if self._estatisticas is None:
+            df = self.df_consolidado
+            dimensoes = dimensoes_configuradas(self.config)
+            if isinstance(df, ConsolidadoEmBlocos):
+                # Só as colunas das somas e agrupamentos, com os textos no tipo compacto do Arrow
+                df = df.ler(colunas_estatisticas(df.columns, dimensoes), restaurar_tipos=False,
+                            ordem_original=False)
+            self._estatisticas = calcular_estatisticas(df, self.registro_exclusoes, dimensoes)
+        return dict(self._estatisticas)
 
+
+def consolidar_particao(config_loader: ConfigLoader, bases: Tuple,
+                         dados_particao: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, List, Dict]:
+    """Consolida uma partição (executado nos processos do pool)
+    
+    Retorna o DataFrame da partição e as mensagens/estatísticas de log, que o
+    processo principal incorpora ao seu próprio logger.
+    """
+    ativar_copia_sob_escrita()
+    logger = VRLoggerMemoria(config_loader.get_config())
+    consolidador = ConsolidadorRegras(logger, config_loader)
+    (consolidador.base_sindicatos_valores, consolidador.base_dias_uteis,
+     consolidador.normalizador_sindicatos, consolidador.registro_exclusoes) = bases
+    
+    df = criar_motor(consolidador).executar(dados_particao)
+    return df, logger.registros, logger.stats
@@ -0,0 +1,283 @@
+"""
+Consolidação em Banco SQL Embarcado - Sistema de Processamento VR
+Executa junções, regras de elegibilidade e cálculo de VR em DuckDB (ou SQLite)
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sqlite3
+from typing import Dict, Any, List, Tuple
+
+import pandas as pd
+
+from agentes.motores import MotorColunar, COLUNAS_RESULTADO
+
+
+BANCOS_SQL = ('duckdb', 'sqlite')
+
+# Tabela de trabalho: uma linha por colaborador ativo, com as posições (pos_*) das linhas
+# de cada base que a regra correspondente escolheu
+SQL_COLABORADORES = """
+CREATE TABLE colaboradores AS
+SELECT a.pos, a.matricula, a.sindicato, a.cargo,
+       adm.pos AS pos_admissao,
+       sv.pos AS pos_valor, sv.valor AS valor_diario,
+       du.pos AS pos_dias, du.dias AS dias_uteis,
+       TRUE AS elegivel,
+       CAST(0 AS BIGINT) AS mascara_exclusao,
+       CAST(0 AS BIGINT) AS dias_ferias,
+       CAST(NULL AS BIGINT) AS pos_desligamento,
+       CAST(0 AS BIGINT) AS valor_exterior,
+       '' AS observacoes,
+       CAST(0 AS BIGINT) AS dias_calculados,
+       CAST(0 AS BIGINT) AS valor_total
+FROM ativos a
+LEFT JOIN admissoes adm ON adm.matricula = a.matricula
+LEFT JOIN sindicato_valor sv ON sv.estado = a.sindicato
+LEFT JOIN dias_uteis du ON du.sindicato = a.sindicato
+"""
+
+SQL_CALCULO_DIAS = """
+UPDATE colaboradores SET dias_calculados = CASE
+    WHEN elegivel AND dias_uteis IS NULL THEN NULL
+    WHEN elegivel AND dias_uteis - dias_ferias > 0 THEN dias_uteis - dias_ferias
+    ELSE 0 END
+"""
+
+# Valores em centavos: dias x valor diário é uma multiplicação exata de inteiros
+SQL_CALCULO_VALOR = """
+UPDATE colaboradores SET
+    valor_total = CASE
+        WHEN NOT elegivel THEN 0
+        WHEN valor_exterior > 0 THEN valor_exterior
+        ELSE dias_calculados * valor_diario END,
+    observacoes = CASE
+        WHEN elegivel AND valor_exterior > 0 THEN 'Valor especial - Exterior'
+        ELSE observacoes END
+"""
+
+SQL_RESULTADO = f"SELECT {', '.join(COLUNAS_RESULTADO)} FROM colaboradores ORDER BY pos"
+
+
+def _duckdb_disponivel() -> bool:
+    """Indica se o DuckDB está instalado"""
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ConexaoSQL:
+    """Conexão com o banco embarcado (DuckDB ou SQLite) com a mesma interface para os dois
+
+    As consultas usam apenas o SQL comum aos dois bancos (parâmetros '?', UPDATE com
+    subconsultas correlacionadas e instr).
+    """
+
+    def __init__(self, banco: str = 'duckdb', arquivo: str = None, threads: int = None,
+                 limite_memoria: str = None):
+        """Abre o banco em memória ou no arquivo informado (execução fora da memória)"""
+        if banco not in BANCOS_SQL:
+            raise ValueError(f"Banco SQL inválido: {banco} (use {', '.join(BANCOS_SQL)})")
+        self.banco = banco if banco == 'sqlite' or _duckdb_disponivel() else 'sqlite'
+
+        if self.banco == 'duckdb':
+            import duckdb
+            self.conexao = duckdb.connect(arquivo or ':memory:')
+            if threads:
+                self.conexao.execute(f"SET threads = {int(threads)}")
+            if limite_memoria:
+                self.conexao.execute(f"SET memory_limit = '{limite_memoria}'")
+        else:
+            self.conexao = sqlite3.connect(arquivo or ':memory:')
+
+    def carregar(self, nome: str, df: pd.DataFrame):
+        """Cria a tabela nome com o conteúdo do DataFrame"""
+        self.executar(f"DROP TABLE IF EXISTS {nome}")
+        if self.banco == 'duckdb':
+            self.conexao.register('_entrada', df)
+            self.conexao.execute(f"CREATE TABLE {nome} AS SELECT * FROM _entrada")
+            self.conexao.unregister('_entrada')
+        else:
+            df.to_sql(nome, self.conexao, index=False)
+
+    def executar(self, sql: str, parametros: List = None):
+        """Executa um comando sem retorno"""
+        self.conexao.execute(sql, parametros or [])
+
+    def consultar(self, sql: str, parametros: List = None) -> pd.DataFrame:
+        """Executa uma consulta e retorna o resultado como DataFrame"""
+        if self.banco == 'duckdb':
+            return self.conexao.execute(sql, parametros or []).df()
+        return pd.read_sql_query(sql, self.conexao, params=parametros or [])
+
+    def valor(self, sql: str, parametros: List = None):
+        """Executa uma consulta de um único valor"""
+        return self.conexao.execute(sql, parametros or []).fetchone()[0]
+
+    def fechar(self):
+        """Fecha a conexão"""
+        self.conexao.close()
+
+
+class MotorConsolidacaoSQL(MotorColunar):
+    """Consolidação expressa em SQL sobre um banco embarcado
+
+    As bases projetadas são carregadas como tabelas; as junções por matrícula e
+    sindicato, as regras de exclusão e o cálculo de VR rodam como comandos SQL na
+    mesma ordem do ConsolidadorRegras, sobre a tabela de trabalho colaboradores.
+    A normalização dos nomes de sindicatos continua em Python (uma vez por nome
+    distinto), pois depende do mapeamento e da similaridade configurados.
+    """
+
+    nome = 'sql'
+
+    def __init__(self, consolidador, banco: str = 'duckdb', arquivo: str = None,
+                 threads: int = None, limite_memoria: str = None):
+        """Inicializa o motor com os parâmetros de conexão do banco"""
+        super().__init__(consolidador)
+        self.parametros_conexao = {'banco': banco, 'arquivo': arquivo, 'threads': threads,
+                                   'limite_memoria': limite_memoria}
+        self.conexao = None
+
+    @classmethod
+    def from_config(cls, consolidador) -> 'MotorConsolidacaoSQL':
+        """Cria o motor a partir da seção performance.sql"""
+        config_sql = consolidador.config.get('performance', {}).get('sql', {})
+        return cls(
+            consolidador,
+            config_sql.get('banco', 'duckdb'),
+            config_sql.get('arquivo'),
+            config_sql.get('threads'),
+            config_sql.get('memory_limit')
+        )
+
+    def _executar_regras(self, tabelas: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        self.conexao = ConexaoSQL(**self.parametros_conexao)
+        try:
+            self.logger.log_info(f"Consolidação em SQL ({self.conexao.banco})")
+            for nome, df in tabelas.items():
+                self.conexao.carregar(nome, df)
+            self.conexao.executar("DROP TABLE IF EXISTS colaboradores")
+            self.conexao.executar(SQL_COLABORADORES)
+
+            eventos = {}
+            self._aplicar_regras_exclusao_cargo(tabelas, eventos)
+            self._aplicar_regras_afastamentos(tabelas, eventos)
+            self._aplicar_regras_ferias(tabelas, eventos)
+            self._aplicar_regras_desligamento(tabelas, eventos)
+            self._aplicar_regras_exterior(tabelas, eventos)
+            if 'admissoes_mes' in tabelas:
+                eventos['admissoes_mes'] = self._eventos('admissoes_mes', 'matricula, dia')
+            self._calcular_valores_vr()
+
+            return self.conexao.consultar(SQL_RESULTADO), eventos
+        finally:
+            self.conexao.fechar()
+
+    def _eventos(self, tabela: str, colunas: str, condicao: str = 'TRUE') -> pd.DataFrame:
+        """Linhas da base que atingem colaboradores ativos, na ordem da base"""
+        return self.conexao.consultar(
+            f"SELECT {colunas} FROM {tabela} "
+            f"WHERE {condicao} AND matricula IN (SELECT matricula FROM colaboradores) ORDER BY pos"
+        )
+
+    def _excluir(self, condicao: str, motivo: str, parametros: List = None) -> List:
+        """Liga o bit do motivo nos colaboradores da condição e retorna suas matrículas"""
+        parametros = parametros or []
+        matriculas = self.conexao.consultar(
+            f"SELECT matricula FROM colaboradores WHERE {condicao} ORDER BY pos", parametros
+        )['matricula'].tolist()
+        if matriculas:
+            self.conexao.executar(
+                f"UPDATE colaboradores SET elegivel = FALSE, "
+                f"mascara_exclusao = mascara_exclusao | {self.consolidador.registro_exclusoes.bit(motivo)} "
+                f"WHERE {condicao}",
+                parametros
+            )
+        return matriculas
+
+    def _aplicar_regras_exclusao_cargo(self, tabelas: Dict[str, pd.DataFrame], eventos: Dict[str, Any]):
+        """Exclui aprendizes, estagiários e cargos não elegíveis"""
+        for base, motivo in (('aprendizes', 'Aprendiz'), ('estagios', 'Estagiário')):
+            if base in tabelas:
+                eventos[base] = self._excluir(f"matricula IN (SELECT matricula FROM {base})", motivo)
+
+        eventos['cargos'] = [
+            (cargo, self._excluir("instr(cargo, ?) > 0", f'Cargo: {cargo}', [cargo.upper()]))
+            for cargo in self.config['exclusoes']['cargos_nao_elegiveis']
+        ]
+
+    def _aplicar_regras_afastamentos(self, tabelas: Dict[str, pd.DataFrame], eventos: Dict[str, Any]):
+        """Exclui afastamentos dos tipos configurados (um bit por tipo encontrado na matrícula)"""
+        if 'afastamentos' not in tabelas:
+            return
+
+        # Bits distintos são potências de 2: a soma dos distintos é o OU bit a bit (sem bit_or no SQLite)
+        eventos['afastamentos'] = self._eventos('afastamentos', 'matricula, tipo', 'excluido')
+        self.conexao.executar("""
+            UPDATE colaboradores SET elegivel = FALSE,
+                mascara_exclusao = mascara_exclusao | (SELECT SUM(DISTINCT f.bit) FROM afastamentos f
+                                                       WHERE f.matricula = colaboradores.matricula AND f.excluido)
+            WHERE matricula IN (SELECT matricula FROM afastamentos WHERE excluido)
+        """)
+
+    def _aplicar_regras_ferias(self, tabelas: Dict[str, pd.DataFrame], eventos: Dict[str, Any]):
+        """Registra os dias de férias (vale a última linha de cada matrícula)"""
+        if 'ferias' not in tabelas:
+            return
+
+        eventos['ferias'] = self._eventos('ferias', 'matricula, dias')
+        self.conexao.executar("""
+            UPDATE colaboradores SET
+                dias_ferias = (SELECT f.dias FROM ferias f WHERE f.matricula = colaboradores.matricula
+                               ORDER BY f.pos DESC LIMIT 1)
+            WHERE matricula IN (SELECT matricula FROM ferias)
+        """)
+
+    def _aplicar_regras_desligamento(self, tabelas: Dict[str, pd.DataFrame], eventos: Dict[str, Any]):
+        """Aplica o corte de desligamento (dia_corte_desligamento)"""
+        if 'desligados' not in tabelas:
+            return
+
+        dia_corte = self.config['regras_negocio']['dia_corte_desligamento']
+        eventos['desligados'] = self._eventos('desligados', 'matricula, dia', 'dia IS NOT NULL')
+        self.conexao.executar("""
+            UPDATE colaboradores SET
+                pos_desligamento = (SELECT MAX(d.pos) FROM desligados d WHERE d.matricula = colaboradores.matricula)
+            WHERE matricula IN (SELECT matricula FROM desligados)
+        """)
+        self._excluir("matricula IN (SELECT matricula FROM desligados WHERE dia <= ?)",
+                      f'Desligado antes do dia {dia_corte}', [dia_corte])
+
+    def _aplicar_regras_exterior(self, tabelas: Dict[str, pd.DataFrame], eventos: Dict[str, Any]):
+        """Exclui desligados/removidos no exterior e aplica o valor especial dos demais"""
+        if 'exterior' not in tabelas:
+            return
+
+        self.conexao.executar("ALTER TABLE exterior ADD COLUMN removido BOOLEAN")
+        self.conexao.executar("""
+            UPDATE exterior SET removido = COALESCE(instr(lower(observacao), 'desligado') > 0
+                                                    OR instr(lower(observacao), 'removido') > 0, FALSE)
+        """)
+
+        eventos['exterior'] = self._eventos('exterior', 'matricula, valor, observacao, removido')
+        self.conexao.executar("""
+            UPDATE colaboradores SET elegivel = FALSE,
+                mascara_exclusao = mascara_exclusao | (SELECT SUM(DISTINCT e.bit) FROM exterior e
+                                                       WHERE e.matricula = colaboradores.matricula AND e.removido)
+            WHERE matricula IN (SELECT matricula FROM exterior WHERE removido)
+        """)
+        self.conexao.executar("""
+            UPDATE colaboradores SET
+                valor_exterior = (SELECT e.valor FROM exterior e
+                                  WHERE e.matricula = colaboradores.matricula AND NOT e.removido
+                                  ORDER BY e.pos DESC LIMIT 1)
+            WHERE matricula IN (SELECT matricula FROM exterior WHERE NOT removido)
+        """)
+
+    def _calcular_valores_vr(self):
+        """Calcula dias e valor total (a divisão empresa/colaborador é feita pelo MotorColunar)"""
+        self.conexao.executar(SQL_CALCULO_DIAS)
+        self.conexao.executar(SQL_CALCULO_VALOR)
@@ -7,32 +7,66 @@ Data: 27/08/2025
 
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import numpy as np
 from datetime import datetime
 import os
 
-from utils.config_loader import get_config_loader
-from utils.logger import VRLogger
+from utils.config_loader import ConfigLoader
+from utils.logger import VRLogger, VRLoggerMemoria
+from utils.contexto import ContextoExecucao
+from utils.cache_arquivos import CacheArquivos
+from utils.sindicatos import NormalizadorSindicatos
+from utils.qualidade_dados import ValidadorContratos, converter_coluna
+from utils.leitores import escolher_leitor
+from utils.memoria import ativar_copia_sob_escrita
 
 
 class ExtratorValidador:
     """Agente responsável pela extração e validação de dados"""
     
-    def __init__(self, logger: VRLogger):
+    # Arquivos de entrada efetivamente lidos pelo pipeline
+    ARQUIVOS_PROCESSADOS = [
+        'ativos', 'admissoes', 'afastamentos', 'aprendizes',
+        'dias_uteis', 'sindicato_valor', 'desligados', 
+        'estagios', 'exterior', 'ferias'
+    ]
+    
+    def __init__(self, logger: VRLogger, config_loader: ConfigLoader = None,
+                 cache_arquivos: CacheArquivos = None):
         """Inicializa o agente extrator/validador"""
         self.logger = logger
-        self.config_loader = get_config_loader()
+        self.config_loader = config_loader or ConfigLoader()
         self.config = self.config_loader.get_config()
         
+        # Cache opcional de arquivos já processados (modo serviço)
+        self.cache_arquivos = cache_arquivos
+        
         # Esquemas de validação para cada arquivo
         self.schemas = self._definir_schemas()
         
+        # Leitura: leitor escolhido pela extensão e projeção das colunas usadas
+        leitura = self.config.get('leitura', {})
+        self.motor_excel = leitura.get('motor_excel', 'auto')
+        self.projecao_colunas = leitura.get('projecao_colunas', True)
+        self.colunas_extras = leitura.get('colunas_extras') or {}
+        
         # Dados extraídos e validados
         self.dados_validados = {}
         
+        # Resultado dos contratos de qualidade por arquivo (linhas em quarentena e perfil)
+        self.qualidade = {}
+        self.gravar_quarentena = True
+        self.validador_contratos = ValidadorContratos(self.config['regras_negocio']['competencia_referencia'])
+    
+    @classmethod
+    def from_contexto(cls, contexto: ContextoExecucao) -> 'ExtratorValidador':
+        """Cria o agente com os recursos de um ContextoExecucao"""
+        return cls(contexto.logger, contexto.config_loader, contexto.cache_arquivos)
+    
     def _definir_schemas(self) -> Dict[str, Dict]:
-        """Define esquemas de validação para cada arquivo"""
+        """Define esquemas de validação e contratos de qualidade para cada arquivo"""
+        validacoes = self.config['validacoes']
         return {
             'ativos': {
                 'colunas_obrigatorias': ['MATRICULA', 'EMPRESA', 'TITULO DO CARGO', 'DESC. SITUACAO', 'Sindicato'],
@@ -42,6 +76,11 @@ class ExtratorValidador:
                     'TITULO DO CARGO': 'object',
                     'DESC. SITUACAO': 'object',
                     'Sindicato': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'EMPRESA': {'obrigatorio': True},
+                    'Sindicato': {'obrigatorio': True}
                 }
             },
             'admissoes': {
@@ -50,6 +89,10 @@ class ExtratorValidador:
                     'MATRICULA': 'int64',
                     'Admissão': 'datetime64[ns]',
                     'Cargo': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'Admissão': {'obrigatorio': True, 'meses_depois_competencia': 0}
                 }
             },
             'afastamentos': {
@@ -57,6 +100,10 @@ class ExtratorValidador:
                 'tipos': {
                     'MATRICULA': 'int64',
                     'DESC. SITUACAO': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'DESC. SITUACAO': {'obrigatorio': True}
                 }
             },
             'aprendizes': {
@@ -64,20 +111,45 @@ class ExtratorValidador:
                 'tipos': {
                     'MATRICULA': 'int64',
                     'TITULO DO CARGO': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1}
                 }
             },
             'dias_uteis': {
                 'colunas_obrigatorias': ['SINDICADO', 'DIAS UTEIS'],
+                # Título na primeira linha: os cabeçalhos reais só existem após _limpar_dados
+                'colunas_leitura': None,
                 'tipos': {
                     'SINDICADO': 'object',
                     'DIAS UTEIS': 'int64'
+                },
+                'contratos': {
+                    'SINDICADO': {'obrigatorio': True},
+                    'DIAS UTEIS': [
+                        {'obrigatorio': True},
+                        # Faixa apenas sinalizada: a linha continua sendo a referência do sindicato
+                        {
+                            'min': validacoes['dias_uteis_minimo'],
+                            'max': validacoes['dias_uteis_maximo'],
+                            'severidade': 'aviso'
+                        }
+                    ]
                 }
             },
             'sindicato_valor': {
                 'colunas_obrigatorias': ['ESTADO', 'VALOR'],
                 'tipos': {
                     'ESTADO': 'object',
-                    'VALOR': 'float64'
+                    'VALOR': 'centavos'
+                },
+                'contratos': {
+                    'ESTADO': {'obrigatorio': True},
+                    'VALOR': {
+                        'obrigatorio': True,
+                        'min': validacoes['valor_minimo_vr'],
+                        'max': validacoes['valor_maximo_vr']
+                    }
                 }
             },
             'desligados': {
@@ -86,6 +158,14 @@ class ExtratorValidador:
                     'MATRICULA': 'int64',
                     'DATA DEMISSÃO': 'datetime64[ns]',
                     'COMUNICADO DE DESLIGAMENTO': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'DATA DEMISSÃO': {
+                        'obrigatorio': True,
+                        'meses_antes_competencia': 1,
+                        'meses_depois_competencia': 1
+                    }
                 }
             },
             'estagios': {
@@ -93,13 +173,22 @@ class ExtratorValidador:
                 'tipos': {
                     'MATRICULA': 'int64',
                     'TITULO DO CARGO': 'object'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1}
                 }
             },
             'exterior': {
                 'colunas_obrigatorias': ['MATRICULA', 'Valor'],
+                # Matrícula chega como 'Cadastro' e a observação em uma coluna sem cabeçalho
+                'colunas_leitura': ['Cadastro', 'MATRICULA', 'Valor', 'Unnamed: 2'],
                 'tipos': {
                     'MATRICULA': 'int64',
-                    'Valor': 'float64'
+                    'Valor': 'centavos'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'Valor': {'obrigatorio': True, 'min': 0}
                 }
             },
             'ferias': {
@@ -108,36 +197,63 @@ class ExtratorValidador:
                     'MATRICULA': 'int64',
                     'DESC. SITUACAO': 'object',
                     'DIAS DE FÉRIAS': 'int64'
+                },
+                'contratos': {
+                    'MATRICULA': {'obrigatorio': True, 'min': 1},
+                    'DIAS DE FÉRIAS': {'obrigatorio': True, 'min': 0, 'max': 30}
                 }
             }
         }
     
     def executar(self) -> Dict[str, pd.DataFrame]:
         """Executa o processo de extração e validação"""
+        self.iniciar_extracao()
+        
+        # Processar cada arquivo
+        for arquivo_key in self.ARQUIVOS_PROCESSADOS:
+            self.incorporar_arquivo(arquivo_key, self.extrair_arquivo(arquivo_key))
+        
+        return self.concluir_extracao()
+    
+    def iniciar_extracao(self):
+        """Confere os arquivos obrigatórios antes das leituras"""
         self.logger.log_info("Iniciando processo de extração e validação de dados")
         
         # Validar existência dos arquivos
         self._validar_existencia_arquivos()
         
-        # Processar cada arquivo
-        arquivos_para_processar = [
-            'ativos', 'admissoes', 'afastamentos', 'aprendizes',
-            'dias_uteis', 'sindicato_valor', 'desligados', 
-            'estagios', 'exterior', 'ferias'
-        ]
+    def extrair_arquivo(self, arquivo_key: str) -> Optional[pd.DataFrame]:
+        """Lê, limpa e valida um arquivo (None se o arquivo opcional não existe)
         
-        for arquivo_key in arquivos_para_processar:
-            try:
-                df = self._processar_arquivo(arquivo_key)
-                if df is not None:
-                    self.dados_validados[arquivo_key] = df
-                    self.logger.log_arquivo_processado(
-                        self.config['arquivos_entrada'][arquivo_key], 
-                        len(df)
-                    )
-            except Exception as e:
-                self.logger.log_error(f"Erro ao processar arquivo {arquivo_key}: {str(e)}")
-                raise
+        Não altera dados_validados: arquivos diferentes podem ser extraídos em threads
+        simultâneas e incorporados depois, um de cada vez.
+        """
+        try:
+            return self._processar_arquivo(arquivo_key)
+        except Exception as e:
+            self.logger.log_error(f"Erro ao processar arquivo {arquivo_key}: {str(e)}")
+            raise
+    
+    def incorporar_arquivo(self, arquivo_key: str, df: Optional[pd.DataFrame],
+                           qualidade: Dict[str, Any] = None) -> Optional[pd.DataFrame]:
+        """Acrescenta um arquivo extraído aos dados validados (qualidade: extraído em outro processo)"""
+        if qualidade is not None:
+            self.qualidade[arquivo_key] = qualidade
+        if df is not None:
+            self.dados_validados[arquivo_key] = df
+            self.logger.log_arquivo_processado(self.config['arquivos_entrada'][arquivo_key], len(df))
+        return df
+    
+    def concluir_extracao(self) -> Dict[str, pd.DataFrame]:
+        """Grava a quarentena e executa as validações cruzadas sobre os arquivos incorporados"""
+        
+        # Mesma ordem da extração sequencial, qualquer que tenha sido a ordem de incorporação
+        ordem = {arquivo_key: posicao for posicao, arquivo_key in enumerate(self.ARQUIVOS_PROCESSADOS)}
+        self.dados_validados = dict(sorted(self.dados_validados.items(), key=lambda item: ordem[item[0]]))
+        self.qualidade = dict(sorted(self.qualidade.items(), key=lambda item: ordem[item[0]]))
+        
+        # Linhas em quarentena e perfil das colunas (antes das validações cruzadas, que podem abortar)
+        self.salvar_quarentena()
         
         # Validações cruzadas
         self._executar_validacoes_cruzadas()
@@ -164,23 +280,45 @@ class ExtratorValidador:
             self.logger.log_warning(f"Arquivo opcional não encontrado: {file_path}")
             return None
         
+        # Reaproveitar a leitura e a conversão se o arquivo não mudou (modo serviço). Os contratos
+        # dependem da competência do job e são reaplicados a cada uso
+        if self.cache_arquivos is not None:
+            em_cache = self.cache_arquivos.obter(arquivo_key, file_path)
+            if em_cache is not None:
+                df, df_convertido = em_cache
+                self.logger.log_info(f"Arquivo {arquivo_key} reaproveitado do cache em memória")
+                return self._aplicar_contratos(df, df_convertido, arquivo_key)
+        
         try:
-            # Ler arquivo Excel
-            df = pd.read_excel(file_path)
+            # Ler apenas as colunas usadas (o índice passa a ser a linha da planilha, com cabeçalho na linha 1)
+            leitor = escolher_leitor(file_path, self.motor_excel)
+            df = leitor.ler(file_path, self.colunas_leitura(arquivo_key))
+            df.index = pd.RangeIndex(2, len(df) + 2)
             
             # Aplicar limpeza e normalização primeiro
             df = self._limpar_dados(df, arquivo_key)
             
             # Depois aplicar validações específicas do arquivo
             df = self._validar_estrutura_arquivo(df, arquivo_key)
-            df = self._converter_tipos(df, arquivo_key)
+            df_convertido = self._converter_tipos(df, arquivo_key)
             
-            return df
+            if self.cache_arquivos is not None:
+                self.cache_arquivos.guardar(arquivo_key, file_path, (df, df_convertido))
+            
+            return self._aplicar_contratos(df, df_convertido, arquivo_key)
             
         except Exception as e:
             self.logger.log_error(f"Erro ao processar {file_path}: {str(e)}")
             raise
     
+    def colunas_leitura(self, arquivo_key: str) -> Optional[List[str]]:
+        """Colunas lidas do arquivo: as do schema mais leitura.colunas_extras (None = todas)"""
+        schema = self.schemas.get(arquivo_key, {})
+        colunas = schema.get('colunas_leitura', schema.get('colunas_obrigatorias'))
+        if not self.projecao_colunas or colunas is None:
+            return None
+        return list(colunas) + list(self.colunas_extras.get(arquivo_key, []))
+    
     def _validar_estrutura_arquivo(self, df: pd.DataFrame, arquivo_key: str) -> pd.DataFrame:
         """Valida a estrutura de um arquivo"""
         schema = self.schemas.get(arquivo_key, {})
@@ -204,10 +342,8 @@ class ExtratorValidador:
     
     def _limpar_dados(self, df: pd.DataFrame, arquivo_key: str) -> pd.DataFrame:
         """Limpa e normaliza os dados"""
-        df_limpo = df.copy()
-        
-        # Limpar nomes das colunas (remover espaços extras)
-        df_limpo.columns = df_limpo.columns.str.strip()
+        # Limpar nomes das colunas (remover espaços extras); os dados não são copiados
+        df_limpo = df.set_axis(df.columns.str.strip(), axis=1)
         
         # Limpar strings (remover espaços extras, etc.)
         for col in df_limpo.select_dtypes(include=['object']).columns:
@@ -226,7 +362,7 @@ class ExtratorValidador:
                 # A primeira linha contém os cabeçalhos reais
                 new_columns = df_limpo.iloc[0].tolist()
                 df_limpo.columns = new_columns
-                df_limpo = df_limpo.iloc[1:].reset_index(drop=True)
+                df_limpo = df_limpo.iloc[1:]
                 
             # Renomear colunas se necessário
             if 'Unnamed: 1' in df_limpo.columns:
@@ -256,19 +392,15 @@ class ExtratorValidador:
         schema = self.schemas.get(arquivo_key, {})
         tipos = schema.get('tipos', {})
         
-        df_convertido = df.copy()
+        # Cópia rasa: só as colunas convertidas ganham dados novos (Copy-on-Write)
+        df_convertido = df.copy(deep=False)
         
         for coluna, tipo in tipos.items():
             if coluna in df_convertido.columns:
                 try:
-                    if tipo == 'datetime64[ns]':
-                        df_convertido[coluna] = pd.to_datetime(df_convertido[coluna], errors='coerce')
-                    elif tipo == 'int64':
-                        df_convertido[coluna] = pd.to_numeric(df_convertido[coluna], errors='coerce').astype('Int64')
-                    elif tipo == 'float64':
-                        df_convertido[coluna] = pd.to_numeric(df_convertido[coluna], errors='coerce')
+                    df_convertido[coluna] = converter_coluna(df_convertido[coluna], tipo)
                     
-                    # Verificar se houve muitas conversões falhadas
+                    # Verificar se houve muitas conversões falhadas (as linhas inválidas vão para quarentena)
                     if df_convertido[coluna].isna().sum() > len(df_convertido) * 0.5:
                         self.logger.log_warning(f"Muitos valores inválidos na coluna {coluna} do arquivo {arquivo_key}")
                         
@@ -277,6 +409,76 @@ class ExtratorValidador:
         
         return df_convertido
     
+    def _aplicar_contratos(self, df_original: pd.DataFrame, df_convertido: pd.DataFrame,
+                           arquivo_key: str) -> pd.DataFrame:
+        """Aplica os contratos de qualidade e separa as linhas inválidas em quarentena"""
+        schema = self.schemas.get(arquivo_key, {})
+        resultado = self.validador_contratos.avaliar(
+            df_original, df_convertido, schema.get('tipos', {}), schema.get('contratos', {})
+        )
+        
+        df_validos = resultado.pop('validos')
+        self.qualidade[arquivo_key] = resultado
+        
+        for motivo, quantidade in resultado['avisos'].items():
+            self.logger.log_warning(f"{arquivo_key}: {quantidade} linhas com {motivo}")
+        
+        linhas_quarentena = len(resultado['quarentena'])
+        if linhas_quarentena:
+            self.logger.log_warning(
+                f"{arquivo_key}: {linhas_quarentena} linhas em quarentena - {resultado['violacoes']}"
+            )
+        self.logger.log_validacao(
+            f"Contratos de dados do arquivo {arquivo_key}",
+            linhas_quarentena == 0,
+            f"{len(df_validos)} linhas válidas, {linhas_quarentena} em quarentena"
+        )
+        return df_validos
+    
+    def salvar_quarentena(self):
+        """Grava as linhas em quarentena e o perfil das colunas em uma planilha de saída
+        
+        Chamado ao concluir a extração; no processamento distribuído, pelo worker do
+        relatório com a qualidade recebida do worker da extração.
+        """
+        config_qualidade = self.config.get('qualidade_dados', {})
+        if not self.gravar_quarentena or not config_qualidade.get('gerar_relatorio', True) or not self.qualidade:
+            return None
+        
+        arquivo = self.config_loader.get_output_files()['quarentena']
+        
+        resumo = pd.DataFrame([
+            {
+                'arquivo': arquivo_key,
+                'linhas_validas': len(self.dados_validados.get(arquivo_key, [])),
+                'linhas_quarentena': len(resultado['quarentena']),
+                'violacoes': '; '.join(f"{m} ({n})" for m, n in resultado['violacoes'].items()),
+                'avisos': '; '.join(f"{m} ({n})" for m, n in resultado['avisos'].items())
+            }
+            for arquivo_key, resultado in self.qualidade.items()
+        ])
+        perfil = pd.DataFrame([
+            {'arquivo': arquivo_key, **coluna}
+            for arquivo_key, resultado in self.qualidade.items()
+            for coluna in resultado['perfil']
+        ])
+        
+        Path(arquivo).parent.mkdir(parents=True, exist_ok=True)
+        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
+            resumo.to_excel(writer, sheet_name='Resumo', index=False)
+            perfil.astype({'minimo': str, 'maximo': str}).replace('None', '').to_excel(
+                writer, sheet_name='Perfil', index=False
+            )
+            for arquivo_key, resultado in self.qualidade.items():
+                if len(resultado['quarentena']):
+                    resultado['quarentena'].rename_axis('linha_planilha').reset_index().to_excel(
+                        writer, sheet_name=arquivo_key[:31], index=False
+                    )
+        
+        total_quarentena = int(resumo['linhas_quarentena'].sum())
+        self.logger.log_info(f"Relatório de qualidade gerado: {arquivo} ({total_quarentena} linhas em quarentena)")
+        return arquivo
+    
     def _executar_validacoes_cruzadas(self):
         """Executa validações que dependem de múltiplos arquivos"""
         
@@ -323,11 +525,10 @@ class ExtratorValidador:
         sindicatos_ativos = set(self.dados_validados['ativos']['Sindicato'].dropna().unique())
         sindicatos_com_valor = set(self.dados_validados['sindicato_valor']['ESTADO'].dropna().unique())
         
-        # Aplicar mapeamento de sindicatos
-        sindicatos_mapeados = set()
-        for sindicato in sindicatos_ativos:
-            sindicato_normalizado = self.config_loader.get_sindicato_normalizado(sindicato)
-            sindicatos_mapeados.add(sindicato_normalizado)
+        # Aplicar mapeamento de sindicatos (com sugestões por similaridade para nomes fora do mapa)
+        normalizador = NormalizadorSindicatos.from_config(self.config, sindicatos_com_valor)
+        sindicatos_mapeados = {normalizador.normalizar(sindicato) for sindicato in sindicatos_ativos}
+        normalizador.salvar_cache()
         
         sindicatos_sem_valor = sindicatos_mapeados - sindicatos_com_valor
         
@@ -368,8 +569,23 @@ class ExtratorValidador:
                 'total_registros': len(df),
                 'colunas': list(df.columns),
                 'registros_com_dados_faltantes': df.isnull().any(axis=1).sum(),
+                'registros_em_quarentena': len(self.qualidade[arquivo_key]['quarentena'])
+                if arquivo_key in self.qualidade else 0,
                 'memoria_utilizada': df.memory_usage(deep=True).sum()
             }
         
         return stats
 
+
+
+def extrair_arquivo_isolado(config_loader: ConfigLoader, arquivo_key: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict], List, Dict]:
+    """Extrai um arquivo em outro processo (tarefa isolada do agendador)
+    
+    Retorna o DataFrame, o resultado dos contratos de qualidade e as mensagens e
+    estatísticas de log, que o processo principal incorpora ao extrator e ao logger.
+    """
+    ativar_copia_sob_escrita()
+    logger = VRLoggerMemoria(config_loader.get_config())
+    extrator = ExtratorValidador(logger, config_loader)
+    df = extrator.extrair_arquivo(arquivo_key)
+    return df, extrator.qualidade.get(arquivo_key), logger.registros, logger.stats
@@ -5,32 +5,135 @@ Autor: Manus AI
 Data: 27/08/2025
 """
 
+import json
+import multiprocessing
+import os
+import re
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 import numpy as np
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.utils import get_column_letter
 
-from utils.config_loader import get_config_loader
-from utils.logger import VRLogger
+from utils.config_loader import ConfigLoader
+from utils.logger import VRLogger, VRLoggerMemoria
+from utils.contexto import ContextoExecucao
+from utils.memoria import ConsolidadoEmBlocos, GovernadorMemoria, ativar_copia_sob_escrita
+from utils.dinheiro import em_reais
+from utils.exclusoes import RegistroExclusoes, COLUNA_MASCARA
+from utils.estatisticas import (calcular_estatisticas, colunas_estatisticas, dimensoes_configuradas, linhas_por_dimensao,
+                                MEDIDAS_MONETARIAS)
+from utils.destino_banco import CargaTabela, DestinoBanco
+
+
+# Memória de uma célula formatada em um workbook openpyxl comum (medida com openpyxl 3.1)
+BYTES_POR_CELULA = 400
+
+# Colunas da aba principal com valores monetários (centavos no DataFrame, R$ na planilha)
+COLUNAS_MONETARIAS = ['VALOR DIÁRIO VR', 'TOTAL', 'Custo empresa', 'Desconto profissional']
+
+# Colunas da aba principal, na ordem da planilha
+COLUNAS_RELATORIO = ['Matricula', 'Admissão', 'Sindicato do Colaborador', 'Competência', 'Dias',
+                     'VALOR DIÁRIO VR', 'TOTAL', 'Custo empresa', 'Desconto profissional', 'OBS GERAL']
+
+# Colunas do consolidado lidas de um ConsolidadoEmBlocos por cada saída
+COLUNAS_CONSOLIDADO_RELATORIO = ['elegivel', 'MATRICULA', 'Admissão', 'Sindicato', 'dias_calculados',
+                                 'valor_diario_centavos', 'valor_total_centavos', 'custo_empresa_centavos',
+                                 'desconto_colaborador_centavos', 'observacoes']
+COLUNAS_CONSOLIDADO_EXCLUSOES = ['elegivel', 'MATRICULA', 'TITULO DO CARGO', 'Sindicato', COLUNA_MASCARA,
+                                 'DESC. SITUACAO']
+COLUNAS_CONSOLIDADO_BANCO = COLUNAS_CONSOLIDADO_RELATORIO + ['EMPRESA', 'TITULO DO CARGO', 'DESC. SITUACAO',
+                                                             COLUNA_MASCARA]
+
+# Chaves aceitas para um workbook por grupo (seção relatorio.fragmentacao)
+CHAVES_FRAGMENTACAO = ('EMPRESA', 'sindicato_normalizado')
+
+# Tabelas da carga em banco (seção relatorio.banco): valores em centavos, datas em ISO
+CHAVE_BANCO = ('competencia', 'matricula')
+COLUNAS_BANCO_ELEGIVEIS = {
+    'competencia': 'VARCHAR(7)',
+    'matricula': 'BIGINT',
+    'empresa': 'BIGINT',
+    'admissao': 'DATE',
+    'sindicato': 'VARCHAR(255)',
+    'dias': 'INTEGER',
+    'valor_diario_centavos': 'BIGINT',
+    'valor_total_centavos': 'BIGINT',
+    'custo_empresa_centavos': 'BIGINT',
+    'desconto_colaborador_centavos': 'BIGINT',
+    'observacoes': 'VARCHAR(255)'
+}
+COLUNAS_BANCO_EXCLUIDOS = {
+    'competencia': 'VARCHAR(7)',
+    'matricula': 'BIGINT',
+    'empresa': 'BIGINT',
+    'cargo': 'VARCHAR(255)',
+    'sindicato': 'VARCHAR(255)',
+    'situacao': 'VARCHAR(255)',
+    'mascara_exclusao': 'BIGINT',
+    'motivo': 'VARCHAR(255)',
+    'motivos': 'TEXT'
+}
+
+
+def nome_fragmento(valor) -> str:
+    """Valor da chave como parte segura de nome de arquivo (ex.: 'São Paulo' -> 'São_Paulo')"""
+    if valor is None or pd.isna(valor):
+        return 'sem_valor'
+    nome = re.sub(r'[^\w.-]+', '_', str(valor)).strip('._')
+    return nome or 'sem_valor'
+
+
+def gravar_fragmento(config_loader: ConfigLoader, arquivo: str, df_relatorio: pd.DataFrame,
+                     estatisticas: Dict[str, Any]) -> Tuple[str, List, Dict]:
+    """Grava o workbook de um fragmento (executado nos processos do pool)
+    
+    Retorna o arquivo e as mensagens/estatísticas de log, que o processo principal
+    incorpora ao seu próprio logger.
+    """
+    ativar_copia_sob_escrita()
+    logger = VRLoggerMemoria(config_loader.get_config())
+    GeradorRelatorio(logger, config_loader)._gravar_workbook(df_relatorio, estatisticas, arquivo)
+    return arquivo, logger.registros, logger.stats
 
 
 class GeradorRelatorio:
     """Agente responsável pela geração da planilha Excel final"""
     
-    def __init__(self, logger: VRLogger):
-        """Inicializa o gerador de relatório"""
+    def __init__(self, logger: VRLogger, config_loader: ConfigLoader = None,
+                 governador: GovernadorMemoria = None, destino_banco: DestinoBanco = None):
+        """Inicializa o gerador de relatório (destino_banco: carga em banco; padrão da seção relatorio.banco)"""
         self.logger = logger
-        self.config_loader = get_config_loader()
+        self.config_loader = config_loader or ConfigLoader()
         self.config = self.config_loader.get_config()
+        self.governador = governador or GovernadorMemoria.from_config(self.config, logger)
+        self.destino_banco = destino_banco or DestinoBanco.from_config(
+            self.config, logger, self.config_loader.project_root
+        )
         
         # Estilos para formatação
         self._definir_estilos()
         
+        # Linhas da aba principal do último relatório gerado
+        self.linhas_relatorio = None
+        
+        # Índice dos workbooks por grupo do último relatório (None sem fragmentação)
+        self.indice_fragmentos = None
+        
+        # Linhas e vazão da última carga em banco (None sem destino_banco)
+        self.carga_banco = None
+    
+    @classmethod
+    def from_contexto(cls, contexto: ContextoExecucao) -> 'GeradorRelatorio':
+        """Cria o agente com os recursos de um ContextoExecucao"""
+        return cls(contexto.logger, contexto.config_loader, contexto.governador)
+        
     def _definir_estilos(self):
         """Define estilos de formatação para a planilha"""
         
@@ -58,24 +161,206 @@ class GeradorRelatorio:
         self.alinhamento_direita = Alignment(horizontal='right', vertical='center')
         self.alinhamento_esquerda = Alignment(horizontal='left', vertical='center')
     
-    def executar(self, df_consolidado: pd.DataFrame, estatisticas: Dict[str, Any]) -> str:
-        """Executa a geração do relatório Excel"""
+    def executar(self, df_consolidado: pd.DataFrame, estatisticas: Dict[str, Any],
+                 registro_exclusoes: RegistroExclusoes = None) -> str:
+        """Executa a geração do relatório Excel
+        
+        Com relatorio.fragmentacao habilitada, grava também um workbook por valor da
+        chave configurada e o índice desses arquivos (registro_exclusoes é usado nas
+        estatísticas de cada fragmento).
+        """
         self.logger.log_info("Iniciando geração do relatório Excel")
+        fragmentacao = self.config.get('relatorio', {}).get('fragmentacao', {})
+        
+        if isinstance(df_consolidado, ConsolidadoEmBlocos):
+            # Consolidado acima do orçamento de memória: cada bloco vira linhas da planilha, sem remontá-lo
+            self.governador.excede_orcamento('relatorio', len(df_consolidado) * len(COLUNAS_RELATORIO) * BYTES_POR_CELULA)
+            arquivo_saida = self._criar_arquivo_excel_em_blocos(
+                self._blocos_relatorio(df_consolidado), estatisticas, self.config_loader.get_output_path()
+            )
+            if fragmentacao.get('habilitada', False):
+                # Os fragmentos agrupam todos os colaboradores de cada chave: lê apenas as colunas usadas
+                colunas = COLUNAS_CONSOLIDADO_RELATORIO + [fragmentacao.get('chave', 'EMPRESA')] + colunas_estatisticas(
+                    df_consolidado.columns, dimensoes_configuradas(self.config)
+                )
+                df_consolidado = df_consolidado.ler([c for c in dict.fromkeys(colunas) if c in df_consolidado.columns])
+                df_relatorio = self._preparar_dados_relatorio(df_consolidado, manter_indice=True)
+        else:
+            # Preparar dados para a planilha
+            df_relatorio = self._preparar_dados_relatorio(df_consolidado, manter_indice=True)
+            self.linhas_relatorio = len(df_relatorio)
+            
+            arquivo_saida = self._gravar_workbook(
+                df_relatorio.reset_index(drop=True), estatisticas, self.config_loader.get_output_path()
+            )
+        self.logger.log_info(f"Relatório Excel gerado com sucesso: {arquivo_saida}")
         
-        # Preparar dados para a planilha
-        df_relatorio = self._preparar_dados_relatorio(df_consolidado)
-        
-        # Criar arquivo Excel
-        arquivo_saida = self._criar_arquivo_excel(df_relatorio, estatisticas)
+        self.indice_fragmentos = None
+        if fragmentacao.get('habilitada', False):
+            self.indice_fragmentos = self._gerar_fragmentos(
+                df_consolidado, df_relatorio, estatisticas, arquivo_saida, registro_exclusoes
+            )
         
-        self.logger.log_info(f"Relatório Excel gerado com sucesso: {arquivo_saida}")
         return arquivo_saida
     
-    def _preparar_dados_relatorio(self, df_consolidado: pd.DataFrame) -> pd.DataFrame:
-        """Prepara os dados no formato da planilha final"""
+    def _gravar_workbook(self, df_relatorio: pd.DataFrame, estatisticas: Dict[str, Any], arquivo_saida: str) -> str:
+        """Grava um workbook (em modo write-only quando a planilha não cabe no orçamento de memória)"""
+        celulas = df_relatorio.shape[0] * df_relatorio.shape[1]
+        if self.governador.excede_orcamento('relatorio', celulas * BYTES_POR_CELULA):
+            tamanho_bloco = self.governador.tamanho_bloco
+            blocos = (df_relatorio.iloc[inicio:inicio + tamanho_bloco]
+                      for inicio in range(0, len(df_relatorio), tamanho_bloco))
+            return self._criar_arquivo_excel_em_blocos(blocos, estatisticas, arquivo_saida)
+        return self._criar_arquivo_excel(df_relatorio, estatisticas, arquivo_saida)
+    
+    def _gerar_fragmentos(self, df_consolidado: pd.DataFrame, df_relatorio: pd.DataFrame,
+                          estatisticas: Dict[str, Any], arquivo_consolidado: str,
+                          registro_exclusoes: Optional[RegistroExclusoes]) -> str:
+        """Grava um workbook por valor da chave em um pool de processos e o índice dos arquivos
+        
+        df_relatorio é o quadro já preparado, ainda com o índice do df_consolidado, de
+        onde vem a chave de cada linha. Cada fragmento tem a própria linha de totais e
+        a própria aba de validações, com estatísticas calculadas sobre todos os seus
+        colaboradores (elegíveis e excluídos). O índice lista cada arquivo com seus
+        totais e confere que a soma dos fragmentos é igual ao total geral.
+        """
+        fragmentacao = self.config['relatorio']['fragmentacao']
+        chave = fragmentacao.get('chave', 'EMPRESA')
+        if chave not in CHAVES_FRAGMENTACAO or chave not in df_consolidado.columns:
+            raise ValueError(f"Chave de fragmentação inválida: {chave} (aceitas: {', '.join(CHAVES_FRAGMENTACAO)})")
+        
+        if registro_exclusoes is None:
+            registro_exclusoes = RegistroExclusoes.from_config(self.config)
+        
+        # Dimensões dos fragmentos sem a própria chave, que teria um único grupo
+        dimensoes = {coluna: rotulo for coluna, rotulo in dimensoes_configuradas(self.config).items() if coluna != chave}
+        
+        codigos, valores = pd.factorize(df_consolidado[chave], use_na_sentinel=False)
+        codigos_relatorio = pd.Series(codigos, index=df_consolidado.index).loc[df_relatorio.index].to_numpy()
+        df_relatorio = df_relatorio.reset_index(drop=True)
+        
+        competencia = self.config['regras_negocio']['competencia_referencia'].replace('-', '_')
+        diretorio = Path(self.config_loader.get_fragments_path())
+        diretorio.mkdir(parents=True, exist_ok=True)
+        template = fragmentacao.get('template', 'VR_MENSAL_{competencia}_{fragmento}.xlsx')
+        
+        # Fragmentos em ordem do valor da chave; nomes repetidos após a limpeza recebem sufixo
+        tarefas, fragmentos, usados = [], [], set()
+        for codigo in sorted(range(len(valores)), key=lambda c: (pd.isna(valores[c]), str(valores[c]))):
+            nome = nome_fragmento(valores[codigo])
+            base, sufixo = nome, 2
+            while nome in usados:
+                nome, sufixo = f"{base}_{sufixo}", sufixo + 1
+            usados.add(nome)
+            
+            arquivo = str(diretorio / template.replace('{competencia}', competencia).replace('{fragmento}', nome))
+            stats_fragmento = calcular_estatisticas(
+                df_consolidado[codigos == codigo], registro_exclusoes, dimensoes
+            )
+            tarefas.append((arquivo, df_relatorio[codigos_relatorio == codigo].reset_index(drop=True), stats_fragmento))
+            fragmentos.append(self._resumo_fragmento(valores[codigo], arquivo, stats_fragmento))
+        
+        workers = fragmentacao.get('workers') or os.cpu_count() or 1
+        for _, registros, stats in self._executar_fragmentos(tarefas, workers):
+            self.logger.mesclar(registros, stats)
+        
+        indice = self._gravar_indice_fragmentos(diretorio, chave, arquivo_consolidado, estatisticas, fragmentos)
+        self.logger.log_info(
+            f"Relatório fragmentado por {chave}: {len(fragmentos)} workbooks em {diretorio} (índice: {indice})"
+        )
+        return indice
+    
+    def _executar_fragmentos(self, tarefas: List[Tuple], workers: int) -> List[Tuple]:
+        """Grava os fragmentos em um pool de processos (ou no próprio processo com 1 worker)"""
+        if workers > 1 and len(tarefas) > 1:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(tarefas)), mp_context=contexto) as executor:
+                return list(executor.map(
+                    gravar_fragmento, [self.config_loader] * len(tarefas), *zip(*tarefas)
+                ))
+        
+        return [gravar_fragmento(self.config_loader, *tarefa) for tarefa in tarefas]
+    
+    @staticmethod
+    def _resumo_fragmento(valor, arquivo: str, estatisticas: Dict[str, Any]) -> Dict[str, Any]:
+        """Entrada do índice: valor da chave, arquivo e totais do fragmento"""
+        resumo = {
+            'valor': None if pd.isna(valor) else str(valor),
+            'arquivo': Path(arquivo).name,
+            'colaboradores': estatisticas['total_colaboradores'],
+            'elegiveis': estatisticas['colaboradores_elegiveis'],
+            'excluidos': estatisticas['colaboradores_excluidos']
+        }
+        for nome, chave_stats in zip(MEDIDAS_MONETARIAS, ('valor_total', 'custo_total_empresa',
+                                                          'desconto_total_colaboradores')):
+            resumo[nome] = estatisticas[chave_stats]
+            resumo[f'{nome}_centavos'] = estatisticas[f'{chave_stats}_centavos']
+        return resumo
+    
+    def _gravar_indice_fragmentos(self, diretorio: Path, chave: str, arquivo_consolidado: str,
+                                  estatisticas: Dict[str, Any], fragmentos: List[Dict[str, Any]]) -> str:
+        """Grava o índice JSON dos fragmentos, com os totais de cada um e a conferência com o total geral"""
+        somas = {
+            nome: sum(fragmento[f'{nome}_centavos'] for fragmento in fragmentos) for nome in MEDIDAS_MONETARIAS
+        }
+        totais = {
+            'colaboradores': estatisticas['total_colaboradores'],
+            'elegiveis': estatisticas['colaboradores_elegiveis'],
+            'valor_total_centavos': estatisticas['valor_total_centavos'],
+            'custo_empresa_centavos': estatisticas['custo_total_empresa_centavos'],
+            'desconto_colaborador_centavos': estatisticas['desconto_total_colaboradores_centavos']
+        }
+        confere = (
+            sum(fragmento['colaboradores'] for fragmento in fragmentos) == totais['colaboradores']
+            and sum(fragmento['elegiveis'] for fragmento in fragmentos) == totais['elegiveis']
+            and all(somas[nome] == totais[f'{nome}_centavos'] for nome in MEDIDAS_MONETARIAS)
+        )
+        if not confere:
+            self.logger.log_warning("Soma dos fragmentos do relatório difere do total geral")
+        
+        competencia = self.config['regras_negocio']['competencia_referencia']
+        caminho = diretorio / f"indice_{competencia.replace('-', '_')}.json"
+        conteudo = {
+            'competencia': competencia,
+            'chave': chave,
+            'criado_em': datetime.now().isoformat(),
+            'relatorio_consolidado': Path(arquivo_consolidado).name,
+            'totais': totais,
+            'soma_fragmentos_confere': confere,
+            'fragmentos': fragmentos
+        }
+        
+        temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+        return str(caminho)
+    
+    def _preparar_dados_relatorio(self, df_consolidado: pd.DataFrame, manter_indice: bool = False) -> pd.DataFrame:
+        """Prepara os dados no formato da planilha final
+        
+        Com manter_indice, as linhas mantêm o índice do df_consolidado (usado para
+        fragmentar o relatório pela chave de cada colaborador).
+        """
+        df_relatorio = self._montar_relatorio(df_consolidado, manter_indice)
+        self.logger.log_info(f"Dados preparados para {len(df_relatorio)} colaboradores elegíveis")
+        return df_relatorio
+    
+    def _blocos_relatorio(self, consolidado: ConsolidadoEmBlocos) -> Iterator[pd.DataFrame]:
+        """Linhas da planilha bloco a bloco; os blocos do consolidado já seguem a ordem de matrícula"""
+        self.linhas_relatorio = 0
+        colunas = [coluna for coluna in COLUNAS_CONSOLIDADO_RELATORIO if coluna in consolidado.columns]
+        for bloco in consolidado.blocos(colunas, restaurar_tipos=False):
+            df_relatorio = self._montar_relatorio(bloco)
+            self.linhas_relatorio += len(df_relatorio)
+            yield df_relatorio
+        self.logger.log_info(f"Dados preparados para {self.linhas_relatorio} colaboradores elegíveis")
+    
+    def _montar_relatorio(self, df_consolidado: pd.DataFrame, manter_indice: bool = False) -> pd.DataFrame:
+        """Linhas da aba principal: elegíveis no layout da planilha, ordenados por matrícula"""
         
         # Filtrar apenas colaboradores elegíveis
-        df_elegiveis = df_consolidado[df_consolidado['elegivel'] == True].copy()
+        df_elegiveis = df_consolidado[df_consolidado['elegivel'] == True]
         
         # Criar DataFrame no formato da planilha final
         df_relatorio = pd.DataFrame()
@@ -92,23 +377,25 @@ class GeradorRelatorio:
         df_relatorio['Competência'] = pd.to_datetime(data_competencia)
         
         df_relatorio['Dias'] = df_elegiveis.get('dias_calculados', 0)
-        df_relatorio['VALOR DIÁRIO VR'] = df_elegiveis.get('valor_diario_vr', 0)
-        df_relatorio['TOTAL'] = df_elegiveis.get('valor_total_vr', 0)
-        df_relatorio['Custo empresa'] = df_elegiveis.get('custo_empresa', 0)
-        df_relatorio['Desconto profissional'] = df_elegiveis.get('desconto_colaborador', 0)
+        # Valores em centavos; a conversão para R$ é feita ao gravar cada célula
+        df_relatorio['VALOR DIÁRIO VR'] = df_elegiveis.get('valor_diario_centavos', 0)
+        df_relatorio['TOTAL'] = df_elegiveis.get('valor_total_centavos', 0)
+        df_relatorio['Custo empresa'] = df_elegiveis.get('custo_empresa_centavos', 0)
+        df_relatorio['Desconto profissional'] = df_elegiveis.get('desconto_colaborador_centavos', 0)
         df_relatorio['OBS GERAL'] = df_elegiveis.get('observacoes', '')
         
         # Ordenar por matrícula
-        df_relatorio = df_relatorio.sort_values('Matricula').reset_index(drop=True)
-        
-        self.logger.log_info(f"Dados preparados para {len(df_relatorio)} colaboradores elegíveis")
+        df_relatorio = df_relatorio.sort_values('Matricula')
+        if not manter_indice:
+            df_relatorio = df_relatorio.reset_index(drop=True)
         return df_relatorio
     
-    def _criar_arquivo_excel(self, df_relatorio: pd.DataFrame, estatisticas: Dict[str, Any]) -> str:
+    def _criar_arquivo_excel(self, df_relatorio: pd.DataFrame, estatisticas: Dict[str, Any],
+                             arquivo_saida: str = None) -> str:
         """Cria o arquivo Excel com formatação"""
         
         # Definir nome do arquivo
-        arquivo_saida = self.config_loader.get_output_path()
+        arquivo_saida = arquivo_saida or self.config_loader.get_output_path()
         
         # Criar workbook
         wb = Workbook()
@@ -129,6 +416,100 @@ class GeradorRelatorio:
         
         return arquivo_saida
     
+    def _criar_arquivo_excel_em_blocos(self, blocos: Iterable[pd.DataFrame], estatisticas: Dict[str, Any],
+                                       arquivo_saida: str = None) -> str:
+        """Cria o mesmo arquivo Excel em modo write-only
+        
+        blocos são as linhas da aba principal em ordem, um DataFrame por vez (fatias de
+        chunk_size do quadro preparado ou os blocos de um ConsolidadoEmBlocos). O
+        openpyxl descarrega as linhas em um arquivo temporário à medida que são
+        anexadas e os totais são somados bloco a bloco, então a memória não cresce
+        com o número de linhas.
+        """
+        arquivo_saida = arquivo_saida or self.config_loader.get_output_path()
+        wb = Workbook(write_only=True)
+        
+        # Aba principal
+        ws = wb.create_sheet("VR Mensal")
+        cabecalhos = COLUNAS_RELATORIO
+        self._ajustar_largura_colunas(ws, cabecalhos)
+        ws.freeze_panes = "A2"
+        
+        ws.append([self._formatar_cabecalho(WriteOnlyCell(ws, value=cabecalho)) for cabecalho in cabecalhos])
+        
+        totais = self._totais_relatorio(pd.DataFrame(columns=cabecalhos))
+        row_num = 2
+        for bloco in blocos:
+            for row in bloco[cabecalhos].itertuples(index=False, name=None):
+                ws.append([
+                    self._formatar_celula(
+                        WriteOnlyCell(ws, value=self._valor_celula(valor, cabecalhos[col_num])),
+                        cabecalhos[col_num], row_num
+                    )
+                    for col_num, valor in enumerate(row)
+                ])
+                row_num += 1
+            for nome, valor in self._totais_relatorio(bloco).items():
+                totais[nome] += valor
+        
+        ws.append(self._celulas_totais(totais, lambda col_num, valor: WriteOnlyCell(ws, value=valor)))
+        
+        # Aba de validações
+        ws_validacoes = wb.create_sheet("Validações")
+        self._ajustar_largura_validacoes(ws_validacoes)
+        ws_validacoes.merged_cells.add('A1:D1')
+        for linha in self._linhas_validacoes(estatisticas):
+            celulas = []
+            for valor, fonte in linha:
+                celula = WriteOnlyCell(ws_validacoes, value=valor)
+                celula.font = fonte
+                celulas.append(celula)
+            ws_validacoes.append(celulas)
+        
+        wb.save(arquivo_saida)
+        
+        self.logger.log_info(f"Relatório gravado em modo write-only em blocos de {self.governador.tamanho_bloco} linhas")
+        return arquivo_saida
+    
+    def _formatar_cabecalho(self, cell):
+        """Aplica o estilo de cabeçalho a uma célula"""
+        cell.font = self.fonte_cabecalho
+        cell.fill = self.cor_cabecalho
+        cell.border = self.borda_fina
+        cell.alignment = self.alinhamento_centro
+        return cell
+    
+    @staticmethod
+    def _valor_celula(valor, coluna_nome: str):
+        """Valor gravado na célula: colunas monetárias passam de centavos para R$; nulos ficam vazios"""
+        if coluna_nome in COLUNAS_MONETARIAS:
+            return em_reais(valor)
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return None
+        return valor
+    
+    def _formatar_celula(self, cell, coluna_nome: str, row_num: int):
+        """Aplica a formatação de uma célula de dados conforme a coluna e a linha"""
+        cell.font = self.fonte_normal
+        cell.border = self.borda_fina
+        
+        # Formatação específica por coluna
+        if coluna_nome in COLUNAS_MONETARIAS:
+            cell.number_format = 'R$ #,##0.00'
+            cell.alignment = self.alinhamento_direita
+        elif coluna_nome in ['Matricula', 'Dias']:
+            cell.alignment = self.alinhamento_centro
+        elif coluna_nome in ['Admissão', 'Competência']:
+            cell.number_format = 'DD/MM/YYYY'
+            cell.alignment = self.alinhamento_centro
+        else:
+            cell.alignment = self.alinhamento_esquerda
+        
+        # Cor alternada para linhas
+        if row_num % 2 == 0:
+            cell.fill = self.cor_alternada
+        return cell
+    
     def _criar_aba_principal(self, ws, df_relatorio: pd.DataFrame):
         """Cria a aba principal com os dados dos colaboradores"""
         
@@ -136,36 +517,14 @@ class GeradorRelatorio:
         cabecalhos = list(df_relatorio.columns)
         
         for col_num, cabecalho in enumerate(cabecalhos, 1):
-            cell = ws.cell(row=1, column=col_num, value=cabecalho)
-            cell.font = self.fonte_cabecalho
-            cell.fill = self.cor_cabecalho
-            cell.border = self.borda_fina
-            cell.alignment = self.alinhamento_centro
+            self._formatar_cabecalho(ws.cell(row=1, column=col_num, value=cabecalho))
         
         # Adicionar dados
         for row_num, (_, row) in enumerate(df_relatorio.iterrows(), 2):
             for col_num, valor in enumerate(row, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=valor)
-                cell.font = self.fonte_normal
-                cell.border = self.borda_fina
-                
-                # Formatação específica por coluna
                 coluna_nome = cabecalhos[col_num - 1]
-                
-                if coluna_nome in ['VALOR DIÁRIO VR', 'TOTAL', 'Custo empresa', 'Desconto profissional']:
-                    cell.number_format = 'R$ #,##0.00'
-                    cell.alignment = self.alinhamento_direita
-                elif coluna_nome in ['Matricula', 'Dias']:
-                    cell.alignment = self.alinhamento_centro
-                elif coluna_nome in ['Admissão', 'Competência']:
-                    cell.number_format = 'DD/MM/YYYY'
-                    cell.alignment = self.alinhamento_centro
-                else:
-                    cell.alignment = self.alinhamento_esquerda
-                
-                # Cor alternada para linhas
-                if row_num % 2 == 0:
-                    cell.fill = self.cor_alternada
+                cell = ws.cell(row=row_num, column=col_num, value=self._valor_celula(valor, coluna_nome))
+                self._formatar_celula(cell, coluna_nome, row_num)
         
         # Adicionar linha de totais
         self._adicionar_linha_totais(ws, df_relatorio, len(df_relatorio) + 2)
@@ -178,24 +537,46 @@ class GeradorRelatorio:
     
     def _adicionar_linha_totais(self, ws, df_relatorio: pd.DataFrame, row_num: int):
         """Adiciona linha de totais na planilha"""
-        
-        # Calcular totais
-        total_colaboradores = len(df_relatorio)
-        total_vr = df_relatorio['TOTAL'].sum()
-        total_custo_empresa = df_relatorio['Custo empresa'].sum()
-        total_desconto = df_relatorio['Desconto profissional'].sum()
+        self._celulas_totais(
+            self._totais_relatorio(df_relatorio),
+            lambda col_num, valor: ws.cell(row=row_num, column=col_num, value=valor)
+        )
+    
+    @staticmethod
+    def _totais_relatorio(df_relatorio: pd.DataFrame) -> Dict[str, int]:
+        """Linhas e somas exatas em centavos das colunas totalizadas (somáveis entre blocos)"""
+        totais = {'colaboradores': len(df_relatorio)}
+        for coluna in ('TOTAL', 'Custo empresa', 'Desconto profissional'):
+            totais[coluna] = int(df_relatorio[coluna].sum())
+        return totais
+        
+    def _celulas_totais(self, totais: Dict[str, int], criar_celula) -> List:
+        """Cria e formata as células da linha de totais, na ordem das colunas
+        
+        totais vem de _totais_relatorio; criar_celula(col_num, valor) devolve a célula
+        da planilha em uso (comum ou write-only).
+        """
+        
+        # Totais: soma exata em centavos, convertida para R$ na célula
+        total_colaboradores = totais['colaboradores']
+        total_vr = em_reais(totais['TOTAL'])
+        total_custo_empresa = em_reais(totais['Custo empresa'])
+        total_desconto = em_reais(totais['Desconto profissional'])
         
         # Adicionar células de total
-        ws.cell(row=row_num, column=1, value="TOTAL GERAL").font = self.fonte_total
-        ws.cell(row=row_num, column=1).fill = self.cor_total
-        ws.cell(row=row_num, column=1).border = self.borda_fina
+        cell_total = criar_celula(1, "TOTAL GERAL")
+        cell_total.font = self.fonte_total
+        cell_total.fill = self.cor_total
+        cell_total.border = self.borda_fina
+        celulas = {1: cell_total}
         
         # Colaboradores
-        cell_colab = ws.cell(row=row_num, column=2, value=total_colaboradores)
+        cell_colab = criar_celula(2, total_colaboradores)
         cell_colab.font = self.fonte_total
         cell_colab.fill = self.cor_total
         cell_colab.border = self.borda_fina
         cell_colab.alignment = self.alinhamento_centro
+        celulas[2] = cell_colab
         
         # Valores monetários (assumindo que TOTAL está na coluna 7)
         colunas_valores = {
@@ -205,32 +586,45 @@ class GeradorRelatorio:
         }
         
         for col_num, valor in colunas_valores.items():
-            cell = ws.cell(row=row_num, column=col_num, value=valor)
+            cell = criar_celula(col_num, valor)
             cell.font = self.fonte_total
             cell.fill = self.cor_total
             cell.border = self.borda_fina
             cell.number_format = 'R$ #,##0.00'
             cell.alignment = self.alinhamento_direita
+            celulas[col_num] = cell
         
         # Preencher células vazias da linha de total
         for col_num in range(3, 11):
             if col_num not in colunas_valores:
-                cell = ws.cell(row=row_num, column=col_num, value="")
+                cell = criar_celula(col_num, "")
                 cell.fill = self.cor_total
                 cell.border = self.borda_fina
+                celulas[col_num] = cell
+        
+        return [celulas[col_num] for col_num in sorted(celulas)]
     
     def _criar_aba_validacoes(self, ws, estatisticas: Dict[str, Any]):
         """Cria a aba de validações com checagens de consistência"""
         
-        # Título
-        ws.cell(row=1, column=1, value="RELATÓRIO DE VALIDAÇÕES E CONSISTÊNCIA").font = Font(size=14, bold=True)
+        for row_num, linha in enumerate(self._linhas_validacoes(estatisticas), 1):
+            for col_num, (valor, fonte) in enumerate(linha, 1):
+                ws.cell(row=row_num, column=col_num, value=valor).font = fonte
+        
         ws.merge_cells('A1:D1')
         
-        row_atual = 3
+        # Ajustar largura das colunas
+        self._ajustar_largura_validacoes(ws)
+    
+    def _linhas_validacoes(self, estatisticas: Dict[str, Any]) -> List[List]:
+        """Conteúdo da aba de validações, linha a linha: [(valor, fonte), ...] ou [] para linha vazia"""
+        fonte_titulo = Font(size=12, bold=True)
+        
+        # Título
+        linhas = [[("RELATÓRIO DE VALIDAÇÕES E CONSISTÊNCIA", Font(size=14, bold=True))], []]
         
         # Resumo estatístico
-        ws.cell(row=row_atual, column=1, value="RESUMO ESTATÍSTICO").font = Font(size=12, bold=True)
-        row_atual += 2
+        linhas += [[("RESUMO ESTATÍSTICO", fonte_titulo)], []]
         
         resumo_items = [
             ("Total de colaboradores processados", estatisticas.get('total_colaboradores', 0)),
@@ -242,38 +636,44 @@ class GeradorRelatorio:
         ]
         
         for item, valor in resumo_items:
-            ws.cell(row=row_atual, column=1, value=item).font = self.fonte_normal
-            ws.cell(row=row_atual, column=2, value=valor).font = self.fonte_normal
-            row_atual += 1
+            linhas.append([(item, self.fonte_normal), (valor, self.fonte_normal)])
         
-        row_atual += 2
+        linhas += [[], []]
         
         # Exclusões por categoria
-        ws.cell(row=row_atual, column=1, value="EXCLUSÕES POR CATEGORIA").font = Font(size=12, bold=True)
-        row_atual += 2
+        linhas += [[("EXCLUSÕES POR CATEGORIA", fonte_titulo)], []]
         
         exclusoes = estatisticas.get('exclusoes_por_motivo', {})
         for motivo, quantidade in exclusoes.items():
-            ws.cell(row=row_atual, column=1, value=motivo).font = self.fonte_normal
-            ws.cell(row=row_atual, column=2, value=quantidade).font = self.fonte_normal
-            row_atual += 1
+            linhas.append([(motivo, self.fonte_normal), (quantidade, self.fonte_normal)])
         
-        row_atual += 2
+        linhas += [[], []]
         
         # Validações de consistência
-        ws.cell(row=row_atual, column=1, value="VALIDAÇÕES DE CONSISTÊNCIA").font = Font(size=12, bold=True)
-        row_atual += 2
+        linhas += [[("VALIDAÇÕES DE CONSISTÊNCIA", fonte_titulo)], []]
         
         # Calcular algumas validações
         validacoes = self._calcular_validacoes_consistencia(estatisticas)
         
         for validacao, resultado in validacoes.items():
             status = "✓" if resultado['status'] else "⚠"
-            ws.cell(row=row_atual, column=1, value=f"{status} {validacao}").font = self.fonte_normal
-            ws.cell(row=row_atual, column=2, value=resultado['detalhes']).font = self.fonte_normal
-            row_atual += 1
-        
-        # Ajustar largura das colunas
+            linhas.append([(f"{status} {validacao}", self.fonte_normal), (resultado['detalhes'], self.fonte_normal)])
+        
+        # Totais por dimensão (empresa, sindicato, cargo), já agregados nas estatísticas
+        max_grupos = self.config.get('estatisticas', {}).get('max_grupos_exibidos', 10)
+        for rotulo, grupos in linhas_por_dimensao(estatisticas, max_grupos).items():
+            linhas += [[], [], [(f"TOTAIS POR {rotulo.upper()}", fonte_titulo)], []]
+            linhas.append([(titulo, self.fonte_total) for titulo in (rotulo, "Elegíveis", "Excluídos", "Valor total")])
+            for grupo, totais in grupos:
+                linhas.append([(grupo, self.fonte_normal), (totais['elegiveis'], self.fonte_normal),
+                               (totais['excluidos'], self.fonte_normal),
+                               (f"R$ {totais['valor_total']:,.2f}", self.fonte_normal)])
+        
+        return linhas
+    
+    @staticmethod
+    def _ajustar_largura_validacoes(ws):
+        """Larguras fixas das colunas da aba de validações"""
         ws.column_dimensions['A'].width = 40
         ws.column_dimensions['B'].width = 30
         ws.column_dimensions['C'].width = 20
@@ -284,17 +684,16 @@ class GeradorRelatorio:
         
         validacoes = {}
         
-        # Validação 1: Soma dos percentuais
-        custo_empresa = estatisticas.get('custo_total_empresa', 0)
-        desconto_colaborador = estatisticas.get('desconto_total_colaboradores', 0)
-        valor_total = estatisticas.get('valor_total', 0)
+        # Validação 1: Soma dos percentuais (exata: os valores são centavos inteiros)
+        custo_empresa = estatisticas.get('custo_total_empresa_centavos', 0)
+        desconto_colaborador = estatisticas.get('desconto_total_colaboradores_centavos', 0)
+        valor_total = estatisticas.get('valor_total_centavos', 0)
         
-        soma_percentuais = custo_empresa + desconto_colaborador
-        diferenca = abs(valor_total - soma_percentuais)
+        diferenca = abs(valor_total - (custo_empresa + desconto_colaborador))
         
         validacoes["Soma dos percentuais empresa + colaborador = total"] = {
-            'status': diferenca < 0.01,  # Tolerância de 1 centavo
-            'detalhes': f"Diferença: R$ {diferenca:.2f}"
+            'status': diferenca == 0,
+            'detalhes': f"Diferença: R$ {em_reais(diferenca):.2f}"
         }
         
         # Validação 2: Percentuais corretos
@@ -357,11 +756,22 @@ class GeradorRelatorio:
             largura = larguras_padrao.get(cabecalho, 15)
             ws.column_dimensions[get_column_letter(col_num)].width = largura
     
-    def gerar_relatorio_exclusoes(self, df_consolidado: pd.DataFrame) -> str:
-        """Gera relatório separado com colaboradores excluídos"""
-        
-        # Filtrar colaboradores excluídos
-        df_excluidos = df_consolidado[df_consolidado['elegivel'] == False].copy()
+    def gerar_relatorio_exclusoes(self, df_consolidado: pd.DataFrame,
+                                  registro_exclusoes: RegistroExclusoes) -> str:
+        """Gera relatório separado com colaboradores excluídos
+        
+        Os textos dos motivos são derivados aqui da máscara de exclusão: o motivo
+        principal (maior precedência) e a lista completa, para quem tem vários.
+        """
+        
+        # Filtrar colaboradores excluídos (de um ConsolidadoEmBlocos, só as linhas e colunas usadas)
+        if isinstance(df_consolidado, ConsolidadoEmBlocos):
+            df_excluidos = df_consolidado.ler(
+                [coluna for coluna in COLUNAS_CONSOLIDADO_EXCLUSOES if coluna in df_consolidado.columns],
+                filtro=lambda bloco: bloco['elegivel'] == False
+            )
+        else:
+            df_excluidos = df_consolidado[df_consolidado['elegivel'] == False]
         
         if df_excluidos.empty:
             self.logger.log_info("Nenhum colaborador excluído para relatório")
@@ -372,11 +782,12 @@ class GeradorRelatorio:
         df_relatorio_exclusoes['Matricula'] = df_excluidos['MATRICULA']
         df_relatorio_exclusoes['Nome/Cargo'] = df_excluidos['TITULO DO CARGO']
         df_relatorio_exclusoes['Sindicato'] = df_excluidos['Sindicato']
-        df_relatorio_exclusoes['Motivo Exclusão'] = df_excluidos['motivo_exclusao']
+        df_relatorio_exclusoes['Motivo Exclusão'] = registro_exclusoes.descrever(df_excluidos[COLUNA_MASCARA])
         df_relatorio_exclusoes['Situação'] = df_excluidos['DESC. SITUACAO']
+        df_relatorio_exclusoes['Todos os Motivos'] = registro_exclusoes.descrever_todos(df_excluidos[COLUNA_MASCARA])
         
         # Salvar em arquivo separado
-        arquivo_exclusoes = self.config_loader.get_output_path("colaboradores_excluidos.xlsx")
+        arquivo_exclusoes = self.config_loader.get_output_files()['exclusoes']
         
         with pd.ExcelWriter(arquivo_exclusoes, engine='openpyxl') as writer:
             df_relatorio_exclusoes.to_excel(writer, sheet_name='Excluídos', index=False)
@@ -384,3 +795,57 @@ class GeradorRelatorio:
         self.logger.log_info(f"Relatório de exclusões gerado: {arquivo_exclusoes}")
         return arquivo_exclusoes
 
+    def gravar_banco(self, df_consolidado: pd.DataFrame, registro_exclusoes: RegistroExclusoes) -> Optional[Dict[str, Any]]:
+        """Carrega elegíveis e excluídos nas tabelas de relatorio.banco (upsert por competência e matrícula)
+
+        As duas tabelas são gravadas na mesma transação; retorna linhas, tempo e
+        linhas/s de cada tabela e do total (None se a carga em banco estiver desabilitada).
+        """
+        if self.destino_banco is None:
+            return None
+        
+        config_banco = self.config.get('relatorio', {}).get('banco', {})
+        competencia = self.config['regras_negocio']['competencia_referencia']
+        if isinstance(df_consolidado, ConsolidadoEmBlocos):
+            # As duas tabelas vão na mesma transação: lê apenas as colunas carregadas
+            df_consolidado = df_consolidado.ler(
+                [coluna for coluna in COLUNAS_CONSOLIDADO_BANCO if coluna in df_consolidado.columns],
+                restaurar_tipos=False
+            )
+        elegivel = df_consolidado['elegivel'] == True
+        df_elegiveis = df_consolidado[elegivel]
+        df_excluidos = df_consolidado[~elegivel]
+        
+        admissao = pd.to_datetime(df_elegiveis.get('Admissão', pd.Series(pd.NaT, index=df_elegiveis.index)))
+        elegiveis = pd.DataFrame({
+            'competencia': competencia,
+            'matricula': df_elegiveis['MATRICULA'],
+            'empresa': df_elegiveis['EMPRESA'],
+            'admissao': admissao.dt.strftime('%Y-%m-%d'),
+            'sindicato': df_elegiveis['Sindicato'],
+            'dias': df_elegiveis['dias_calculados'].astype('Int64'),
+            'valor_diario_centavos': df_elegiveis['valor_diario_centavos'],
+            'valor_total_centavos': df_elegiveis['valor_total_centavos'],
+            'custo_empresa_centavos': df_elegiveis['custo_empresa_centavos'],
+            'desconto_colaborador_centavos': df_elegiveis['desconto_colaborador_centavos'],
+            'observacoes': df_elegiveis['observacoes']
+        }).sort_values('matricula')
+        
+        excluidos = pd.DataFrame({
+            'competencia': competencia,
+            'matricula': df_excluidos['MATRICULA'],
+            'empresa': df_excluidos['EMPRESA'],
+            'cargo': df_excluidos['TITULO DO CARGO'],
+            'sindicato': df_excluidos['Sindicato'],
+            'situacao': df_excluidos['DESC. SITUACAO'],
+            'mascara_exclusao': df_excluidos[COLUNA_MASCARA],
+            'motivo': registro_exclusoes.descrever(df_excluidos[COLUNA_MASCARA]),
+            'motivos': registro_exclusoes.descrever_todos(df_excluidos[COLUNA_MASCARA])
+        }).sort_values('matricula')
+        
+        self.logger.log_info(f"Carregando {len(elegiveis)} elegíveis e {len(excluidos)} excluídos em banco")
+        self.carga_banco = self.destino_banco.gravar([
+            CargaTabela(config_banco.get('tabela_elegiveis', 'vr_elegiveis'), elegiveis, COLUNAS_BANCO_ELEGIVEIS),
+            CargaTabela(config_banco.get('tabela_excluidos', 'vr_excluidos'), excluidos, COLUNAS_BANCO_EXCLUIDOS)
+        ], CHAVE_BANCO)
+        return self.carga_banco
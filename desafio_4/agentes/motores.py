@@ -0,0 +1,381 @@
+"""
+Motores de Consolidação - Sistema de Processamento VR
+Interface comum e registro dos motores que executam as regras de negócio
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import calendar
+from importlib import import_module
+from typing import Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.dinheiro import em_reais, dividir_valor
+from utils.exclusoes import COLUNA_MASCARA
+
+
+# Nome do motor -> (módulo, classe); os módulos são importados apenas quando o motor é usado
+MOTORES_CONSOLIDACAO = {
+    'pandas': ('agentes.motores', 'MotorPandas'),
+    'sql': ('agentes.consolidador_sql', 'MotorConsolidacaoSQL'),
+    'polars': ('agentes.consolidador_polars', 'MotorConsolidacaoPolars')
+}
+
+# Colunas devolvidas pelos motores colunares, uma linha por colaborador na ordem dos ativos
+# (valor_exterior e valor_total em centavos; a divisão empresa/colaborador é feita aqui)
+COLUNAS_RESULTADO = [
+    'elegivel', COLUNA_MASCARA, 'dias_ferias', 'valor_exterior', 'observacoes',
+    'pos_admissao', 'pos_desligamento', 'pos_valor', 'pos_dias',
+    'dias_calculados', 'valor_total'
+]
+
+
+def classe_motor(nome: str):
+    """Retorna a classe do motor de consolidação registrado com o nome informado"""
+    if nome not in MOTORES_CONSOLIDACAO:
+        raise ValueError(f"Motor de consolidação inválido: {nome} (use {', '.join(MOTORES_CONSOLIDACAO)})")
+    modulo, classe = MOTORES_CONSOLIDACAO[nome]
+    return getattr(import_module(modulo), classe)
+
+
+def criar_motor(consolidador, nome: str = None) -> 'MotorConsolidacao':
+    """Cria o motor configurado em performance.motor_consolidacao (padrão: pandas)"""
+    nome = nome or consolidador.config.get('performance', {}).get('motor_consolidacao', 'pandas')
+    motor = classe_motor(nome)
+    if not motor.disponivel():
+        raise ImportError(f"O motor de consolidação '{nome}' requer: {motor.requisitos}")
+    return motor.from_config(consolidador)
+
+
+class MotorConsolidacao:
+    """Interface dos motores de consolidação
+
+    Um motor recebe as bases validadas e devolve o df_consolidado com as mesmas
+    colunas, tipos e mensagens de log do motor pandas. As bases auxiliares
+    (valores, dias úteis e normalizador de sindicatos) já foram preparadas pelo
+    ConsolidadorRegras.
+    """
+
+    nome = None
+    requisitos = ''
+
+    def __init__(self, consolidador):
+        """Inicializa o motor para o consolidador (logger, configuração e bases auxiliares)"""
+        self.consolidador = consolidador
+        self.logger = consolidador.logger
+        self.config = consolidador.config
+
+    @classmethod
+    def from_config(cls, consolidador) -> 'MotorConsolidacao':
+        """Cria o motor a partir da configuração do consolidador"""
+        return cls(consolidador)
+
+    @staticmethod
+    def disponivel() -> bool:
+        """Indica se as dependências do motor estão instaladas"""
+        return True
+
+    def executar(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Consolida os dados, aplica as regras e calcula os valores de VR"""
+        raise NotImplementedError
+
+
+class MotorPandas(MotorConsolidacao):
+    """Motor de referência: regras do ConsolidadorRegras sobre DataFrames em memória"""
+
+    nome = 'pandas'
+
+    def executar(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        return self.consolidador._executar_regras(dados_validados)
+
+
+class MotorColunar(MotorConsolidacao):
+    """Base dos motores que executam as regras fora do pandas (SQL, Polars)
+
+    As bases entram projetadas nas colunas usadas pelas regras, com a posição de
+    cada linha (pos), valores monetários em centavos e, em afastamentos e exterior,
+    o bit do motivo de exclusão de cada linha (0 se a linha não exclui). O motor
+    devolve, por colaborador, a elegibilidade, a máscara de exclusão, os dias e o valor total calculados e a posição da
+    linha escolhida em cada base (COLUNAS_RESULTADO), além dos eventos de cada regra;
+    a divisão empresa/colaborador, os logs e o df_consolidado são montados aqui,
+    igualmente para todos os motores. As colunas copiadas das bases (datas,
+    valores, dias úteis) são reunidas pelas posições, preservando os tipos.
+    """
+
+    def __init__(self, consolidador):
+        super().__init__(consolidador)
+        # Sindicato normalizado dos ativos e linhas da base de admissões (antes da deduplicação)
+        self.sindicatos = None
+        self.linhas_admissoes = 0
+
+    def executar(self, dados_validados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        if 'ativos' not in dados_validados:
+            raise ValueError("Base de colaboradores ativos não encontrada")
+
+        tabelas = self._tabelas_entrada(dados_validados)
+        resultado, eventos = self._executar_regras(tabelas)
+
+        self._verificar_juncoes(resultado, 'admissoes' in dados_validados)
+        self._registrar_eventos(eventos, tabelas)
+        self._registrar_totais(resultado)
+        return self._montar_resultado(dados_validados, resultado)
+
+    def _executar_regras(self, tabelas: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Executa junções, regras e cálculo; retorna COLUNAS_RESULTADO (ordem dos ativos) e eventos
+
+        Eventos esperados: 'aprendizes' e 'estagios' (listas de matrículas), 'cargos'
+        (lista de (cargo, matrículas)) e DataFrames 'afastamentos' (matricula, tipo),
+        'ferias' (matricula, dias), 'desligados' (matricula, dia), 'exterior' (matricula,
+        valor, observacao, removido) e 'admissoes_mes' (matricula, dia), na ordem das
+        linhas de cada base e apenas para matrículas presentes nos ativos.
+        """
+        raise NotImplementedError
+
+    def _tabelas_entrada(self, dados_validados: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Projeta as bases validadas nas colunas usadas pelas regras"""
+        consolidador = self.consolidador
+        registro = consolidador.registro_exclusoes
+        ativos = dados_validados['ativos']
+        consolidador.invariantes.registrar('ativos', len(ativos))
+
+        if 'sindicato_normalizado' in ativos.columns:
+            # Partições já chegam normalizadas
+            self.sindicatos = ativos['sindicato_normalizado']
+        else:
+            self.sindicatos = consolidador.normalizador_sindicatos.normalizar_serie(ativos['Sindicato'])
+            consolidador._registrar_normalizacao_sindicatos()
+
+        tabelas = {
+            'ativos': pd.DataFrame({
+                'pos': np.arange(len(ativos)),
+                'matricula': ativos['MATRICULA'].array,
+                'sindicato': self.sindicatos.astype(object).to_numpy(),
+                # Maiúsculas em Python (o upper do SQLite só converte ASCII)
+                'cargo': ativos['TITULO DO CARGO'].str.upper().to_numpy()
+            }),
+            'admissoes': pd.DataFrame({'pos': pd.Series(dtype='int64'), 'matricula': pd.Series(dtype='Int64')})
+        }
+
+        if 'admissoes' in dados_validados:
+            df_admissoes = dados_validados['admissoes']
+            self.linhas_admissoes = len(df_admissoes)
+            base_admissoes = consolidador._garantir_chave_unica(
+                df_admissoes[['MATRICULA', 'Admissão']].assign(_pos=np.arange(len(df_admissoes))),
+                'MATRICULA', 'admissoes'
+            )
+            tabelas['admissoes'] = pd.DataFrame({'pos': base_admissoes['_pos'].to_numpy(),
+                                                 'matricula': base_admissoes['MATRICULA'].array})
+
+            ano, mes = map(int, self.config['regras_negocio']['competencia_referencia'].split('-'))
+            datas = pd.to_datetime(df_admissoes['Admissão'], errors='coerce')
+            no_mes = ((datas.dt.year == ano) & (datas.dt.month == mes)).to_numpy()
+            tabelas['admissoes_mes'] = pd.DataFrame({
+                'pos': np.arange(len(df_admissoes))[no_mes],
+                'matricula': df_admissoes['MATRICULA'].array[no_mes],
+                'dia': datas[no_mes].dt.day.astype('int64').to_numpy()
+            })
+
+        valores = consolidador.base_sindicatos_valores
+        tabelas['sindicato_valor'] = pd.DataFrame({
+            'pos': np.arange(len(valores) if valores is not None else 0),
+            'estado': valores['ESTADO'].astype(object).to_numpy() if valores is not None else np.array([], dtype=object),
+            'valor': valores['VALOR'].array if valores is not None else pd.array([], dtype='Int64')
+        })
+
+        dias = consolidador.base_dias_uteis
+        tabelas['dias_uteis'] = pd.DataFrame({
+            'pos': np.arange(len(dias) if dias is not None else 0),
+            'sindicato': (dias['SINDICADO_NORMALIZADO'].astype(object).to_numpy() if dias is not None
+                          else np.array([], dtype=object)),
+            'dias': (dias['DIAS UTEIS'].astype('Int64').array if dias is not None
+                     else pd.array([], dtype='Int64'))
+        })
+
+        for base in ('aprendizes', 'estagios'):
+            if base in dados_validados:
+                tabelas[base] = pd.DataFrame({'matricula': dados_validados[base]['MATRICULA'].dropna().array})
+
+        if 'afastamentos' in dados_validados:
+            df_afastamentos = dados_validados['afastamentos']
+            tipos_excluidos = self.config['exclusoes']['tipos_afastamento_excluidos']
+            tabelas['afastamentos'] = pd.DataFrame({
+                'pos': np.arange(len(df_afastamentos)),
+                'matricula': df_afastamentos['MATRICULA'].array,
+                'tipo': df_afastamentos['DESC. SITUACAO'].astype(object).to_numpy(),
+                'excluido': df_afastamentos['DESC. SITUACAO'].isin(tipos_excluidos).to_numpy(),
+                'bit': registro.bits('Afastamento: ' + df_afastamentos['DESC. SITUACAO'].astype(str))
+            })
+
+        if 'ferias' in dados_validados:
+            df_ferias = dados_validados['ferias']
+            tabelas['ferias'] = pd.DataFrame({
+                'pos': np.arange(len(df_ferias)),
+                'matricula': df_ferias['MATRICULA'].array,
+                'dias': df_ferias['DIAS DE FÉRIAS'].array
+            })
+
+        if 'desligados' in dados_validados:
+            df_desligados = dados_validados['desligados']
+            datas = pd.to_datetime(df_desligados['DATA DEMISSÃO'], errors='coerce')
+            tabelas['desligados'] = pd.DataFrame({
+                'pos': np.arange(len(df_desligados)),
+                'matricula': df_desligados['MATRICULA'].array,
+                'dia': datas.dt.day.astype('Int64').array
+            })
+
+        if 'exterior' in dados_validados:
+            df_exterior = dados_validados['exterior']
+            observacoes = df_exterior.get('Unnamed: 2', pd.Series(np.nan, index=df_exterior.index))
+            tabelas['exterior'] = pd.DataFrame({
+                'pos': np.arange(len(df_exterior)),
+                'matricula': df_exterior['MATRICULA'].array,
+                'valor': df_exterior['Valor'].to_numpy(dtype='int64'),
+                'observacao': [None if pd.isna(obs) else str(obs) for obs in observacoes],
+                'bit': registro.bits('Exterior: ' + observacoes.astype(str))
+            })
+
+        return tabelas
+
+    def _verificar_juncoes(self, resultado: pd.DataFrame, com_admissoes: bool):
+        """Invariantes de linhas e colaboradores sem valor ou dias úteis após as junções"""
+        invariantes = self.consolidador.invariantes
+        total_ativos = invariantes.como_dict()['ativos']
+        if com_admissoes:
+            invariantes.registrar('merge admissoes', len(resultado), total_ativos)
+        invariantes.registrar('merge sindicatos', len(resultado), total_ativos)
+
+        sem_valor = int(resultado['pos_valor'].isna().sum())
+        sem_dias = int(resultado['pos_dias'].isna().sum())
+        if sem_valor > 0:
+            self.logger.log_warning(f"{sem_valor} colaboradores sem valor de VR definido")
+        if sem_dias > 0:
+            self.logger.log_warning(f"{sem_dias} colaboradores sem dias úteis definidos")
+
+        self.logger.log_info(f"Dados principais consolidados: {len(resultado)} colaboradores")
+
+    def _registrar_eventos(self, eventos: Dict[str, Any], tabelas: Dict[str, pd.DataFrame]):
+        """Registra exclusões e cálculos especiais na mesma ordem e formato do motor pandas"""
+        logger = self.logger
+
+        for base, motivo, categoria, descricao in (('aprendizes', 'Aprendiz', 'Aprendizes', 'aprendizes'),
+                                                   ('estagios', 'Estagiário', 'Estagiários', 'estagiários')):
+            if base in tabelas:
+                for matricula in eventos[base]:
+                    logger.log_exclusao(matricula, motivo, categoria)
+                logger.log_info(f"Excluídos {len(eventos[base])} {descricao}")
+
+        for cargo, matriculas in eventos['cargos']:
+            if matriculas:
+                for matricula in matriculas:
+                    logger.log_exclusao(matricula, f'Cargo: {cargo}', 'Cargos excluídos')
+                logger.log_info(f"Excluídos {len(matriculas)} colaboradores com cargo {cargo}")
+
+        if 'afastamentos' in tabelas:
+            for matricula, tipo in eventos['afastamentos'].itertuples(index=False):
+                logger.log_exclusao(matricula, f'Afastamento: {tipo}', 'Afastamentos')
+            logger.log_info(
+                f"Processados {int(tabelas['afastamentos']['excluido'].sum())} afastamentos que excluem do VR"
+            )
+
+        if 'ferias' in tabelas:
+            for matricula, dias in eventos['ferias'].itertuples(index=False):
+                logger.log_calculo_especial(matricula, 'Férias proporcionais', f'{dias} dias de férias')
+            logger.log_info(f"Processadas férias para {len(tabelas['ferias'])} colaboradores")
+
+        if 'desligados' in tabelas:
+            dia_corte = self.config['regras_negocio']['dia_corte_desligamento']
+            for matricula, dia in eventos['desligados'].itertuples(index=False):
+                if dia <= dia_corte:
+                    logger.log_exclusao(
+                        matricula,
+                        f'Desligado dia {dia} (antes do corte dia {dia_corte})',
+                        'Desligados antes do dia 15'
+                    )
+                else:
+                    logger.log_calculo_especial(
+                        matricula,
+                        'Desligado após dia 15 (VR integral)',
+                        f'Desligado dia {dia}'
+                    )
+            logger.log_info(f"Processados {len(tabelas['desligados'])} desligamentos")
+
+        if 'exterior' in tabelas:
+            for matricula, valor, observacao, removido in eventos['exterior'].itertuples(index=False):
+                if removido:
+                    logger.log_exclusao(matricula, f'Exterior: {observacao}', 'Colaboradores no exterior')
+                else:
+                    logger.log_calculo_especial(matricula, 'Valor especial exterior',
+                                                f'Valor: R$ {em_reais(valor):.2f}')
+            logger.log_info(f"Processados {len(tabelas['exterior'])} colaboradores no exterior")
+
+        if 'admissoes_mes' in tabelas:
+            ano, mes = map(int, self.config['regras_negocio']['competencia_referencia'].split('-'))
+            dias_no_mes = calendar.monthrange(ano, mes)[1]
+            for matricula, dia in eventos['admissoes_mes'].itertuples(index=False):
+                logger.log_calculo_especial(
+                    matricula,
+                    'Admitido no mês (VR proporcional)',
+                    f'Admitido dia {dia}, {dias_no_mes - dia + 1} dias trabalhados'
+                )
+            logger.log_info(f"Processadas {self.linhas_admissoes} admissões")
+
+    def _registrar_totais(self, resultado: pd.DataFrame):
+        """Registra o total de elegíveis e o valor processado"""
+        elegiveis = resultado['elegivel'].astype(bool)
+        self.logger.log_info(f"Valores calculados para {int(elegiveis.sum())} colaboradores elegíveis")
+        valor_total = resultado.loc[elegiveis, 'valor_total'].astype('Int64').sum()
+        self.logger.log_info(f"Valor total processado: R$ {em_reais(valor_total):,.2f}")
+
+    @staticmethod
+    def _por_posicao(serie: pd.Series, posicoes: pd.Series):
+        """Valores da série nas posições informadas (posição nula -> valor ausente)"""
+        serie = serie.reset_index(drop=True)
+        return serie.reindex(posicoes.fillna(-1).astype('int64').to_numpy()).array
+
+    def _montar_resultado(self, dados_validados: Dict[str, pd.DataFrame], resultado: pd.DataFrame) -> pd.DataFrame:
+        """Monta o df_consolidado com as mesmas colunas e tipos do motor pandas"""
+        consolidador = self.consolidador
+        resultado = resultado.reset_index(drop=True)
+
+        # Sem a normalização que as partições trazem: a coluna volta na posição do fluxo sequencial
+        df = dados_validados['ativos'].drop(columns='sindicato_normalizado', errors='ignore').reset_index(drop=True)
+        if 'admissoes' in dados_validados:
+            df['Admissão'] = self._por_posicao(dados_validados['admissoes']['Admissão'], resultado['pos_admissao'])
+
+        df['elegivel'] = resultado['elegivel'].astype(bool).to_numpy()
+        df[COLUNA_MASCARA] = resultado[COLUNA_MASCARA].astype('int64').to_numpy()
+        df['dias_ferias'] = resultado['dias_ferias'].astype('int64').to_numpy()
+        df['dias_afastamento'] = 0
+
+        df['data_demissao'] = pd.NaT
+        df['comunicado_desligamento'] = ''
+        if 'desligados' in dados_validados:
+            desligados = dados_validados['desligados']
+            posicoes = resultado['pos_desligamento']
+            df['data_demissao'] = pd.to_datetime(
+                self._por_posicao(desligados['DATA DEMISSÃO'], posicoes)
+            ).astype(df['data_demissao'].dtype)
+            comunicados = pd.Series(self._por_posicao(desligados['COMUNICADO DE DESLIGAMENTO'], posicoes))
+            df['comunicado_desligamento'] = comunicados.where(posicoes.notna(), '').to_numpy()
+
+        df['valor_exterior_centavos'] = resultado['valor_exterior'].astype('int64').to_numpy()
+        df['observacoes'] = resultado['observacoes'].to_numpy()
+        df['sindicato_normalizado'] = self.sindicatos.astype(object).set_axis(df.index)
+
+        if consolidador.base_sindicatos_valores is not None:
+            df['valor_diario_centavos'] = self._por_posicao(consolidador.base_sindicatos_valores['VALOR'],
+                                                            resultado['pos_valor'])
+        if consolidador.base_dias_uteis is not None:
+            df['dias_uteis_sindicato'] = self._por_posicao(consolidador.base_dias_uteis['DIAS UTEIS'],
+                                                           resultado['pos_dias'])
+
+        regras = self.config['regras_negocio']
+        df['dias_calculados'] = resultado['dias_calculados'].astype('float64').to_numpy()
+        df['valor_total_centavos'] = resultado['valor_total'].astype('Int64').array
+        df['custo_empresa_centavos'], df['desconto_colaborador_centavos'] = dividir_valor(
+            df['valor_total_centavos'], regras['percentual_empresa'], regras['percentual_colaborador']
+        )
+
+        return df
@@ -5,66 +5,156 @@ Autor: Manus AI
 Data: 27/08/2025
 """
 
+import copy
 import os
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Tuple
 from datetime import datetime
 import traceback
+from contextlib import contextmanager
 
 # Adicionar o diretório pai ao path para imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.config_loader import get_config_loader
-from utils.logger import VRLogger
-from agentes.extrator_validador import ExtratorValidador
+from utils.config_loader import ConfigLoader
+from utils.cache_arquivos import CacheArquivos
+from utils.contexto import ContextoExecucao
+from utils.dinheiro import em_reais
+from utils.exclusoes import RegistroExclusoes, COLUNA_MASCARA
+from utils.estatisticas import linhas_por_dimensao
+from utils.integridade import InvariantesLinhas
+from utils.checkpoints import GerenciadorCheckpoints
+from utils.memoria import ConsolidadoEmBlocos, ativar_copia_sob_escrita
+from utils.arquivamento import ArquivoSaidas
+from utils.agendador import AgendadorTarefas, Tarefa
+from agentes.extrator_validador import ExtratorValidador, extrair_arquivo_isolado
 from agentes.consolidador_regras import ConsolidadorRegras
 from agentes.gerador_relatorio import GeradorRelatorio
 
 
+# Bases usadas na preparação das referências (valores, dias úteis e motivos de exclusão)
+BASES_REFERENCIA = ('sindicato_valor', 'dias_uteis', 'exterior')
+
+# Fase a partir da qual o processamento pode ser retomado -> checkpoint que ela recarrega
+FASES_RETOMADA = {
+    'fase_3': 'fase_2',
+    'fase_4': 'fase_3'
+}
+
+
+def ler_arquivo_isolado(config_loader: ConfigLoader, arquivo_key: str, _ambiente) -> Tuple:
+    """Tarefa de leitura no pool de processos (depois da preparação do ambiente)"""
+    return extrair_arquivo_isolado(config_loader, arquivo_key)
+
+
 class OrquestradorVR:
     """Agente orquestrador principal do sistema de processamento VR"""
     
-    def __init__(self, config_path: str = None):
-        """Inicializa o orquestrador"""
-        
-        # Carregar configurações
-        self.config_loader = get_config_loader(config_path)
-        self.config = self.config_loader.get_config()
-        
-        # Inicializar logger
-        self.logger = VRLogger(config_path or self._get_default_config_path())
+    def __init__(self, config_path: str = None, config_loader: ConfigLoader = None,
+                 cache_arquivos: CacheArquivos = None,
+                 callback_progresso: Callable[[Dict[str, Any]], None] = None,
+                 contexto: ContextoExecucao = None):
+        """Inicializa o orquestrador
+        
+        Sem um contexto injetado, cria um próprio a partir do carregador informado (ou do
+        YAML em config_path); cada orquestrador tem então configuração, logger e saídas
+        independentes e pode rodar em paralelo com outros no mesmo processo.
+        """
+        
+        # As fases repassam DataFrames sem cópias defensivas
+        ativar_copia_sob_escrita()
+        
+        # Contexto da execução (um carregador injetado permite sobrescritas por execução)
+        if contexto is None:
+            contexto = ContextoExecucao(config_loader or ConfigLoader(config_path),
+                                        cache_arquivos=cache_arquivos)
+        self.contexto = contexto
+        self.config_loader = contexto.config_loader
+        self.config = contexto.config
+        self.logger = contexto.logger
+        
+        # Orçamento de memória compartilhado pelas fases (performance.max_memory_usage)
+        self.governador = contexto.governador
+        
+        # Consolidado publicado para outros processos (seção publicacao)
+        self.armazem = contexto.armazem
         
         # Inicializar agentes especializados
-        self.extrator_validador = ExtratorValidador(self.logger)
-        self.consolidador_regras = ConsolidadorRegras(self.logger)
-        self.gerador_relatorio = GeradorRelatorio(self.logger)
+        self.extrator_validador = ExtratorValidador.from_contexto(contexto)
+        self.consolidador_regras = ConsolidadorRegras.from_contexto(contexto)
+        self.gerador_relatorio = GeradorRelatorio.from_contexto(contexto)
+        
+        # Notificação opcional de progresso por fase (modo serviço)
+        self.callback_progresso = callback_progresso
         
         # Estado do processamento
         self.dados_validados = None
         self.dados_consolidados = None
         self.arquivo_relatorio_gerado = None
         
-    def _get_default_config_path(self) -> str:
-        """Retorna o caminho padrão do arquivo de configuração"""
-        return str(Path(__file__).parent.parent / "config" / "config.yaml")
+        # Contagem de linhas por fase (uma divergência indica colaboradores multiplicados ou perdidos)
+        self.invariantes = InvariantesLinhas()
+    
+        # Checkpoints ao fim das fases 2 e 3 (permitem retomar sem reler as planilhas)
+        self.checkpoints = None
+        if self.config.get('checkpoints', {}).get('habilitado', True):
+            self.checkpoints = GerenciadorCheckpoints.from_config(self.config_loader)
+        
+        # Saídas e logs de execuções anteriores vão para o arquivo comprimido (seção arquivamento)
+        self.arquivo_saidas = ArquivoSaidas.from_config(self.config, self.logger)
+        self._saidas_preparadas = False
+    
+        # Monitor de memória da extração no grafo de tarefas (aberto na preparação, fechado na validação)
+        self._monitor_extracao = None
+    
+    def fechar(self):
+        """Libera os recursos da execução (blocos do consolidado em disco e handlers de log do contexto)"""
+        if isinstance(self.dados_consolidados, ConsolidadoEmBlocos):
+            self.dados_consolidados.fechar()
+        self.contexto.fechar()
     
-    def executar_processamento_completo(self) -> Dict[str, Any]:
-        """Executa o processamento completo do VR"""
+    def _notificar_progresso(self, fase: str, status: str):
+        """Notifica o andamento de uma fase ao callback de progresso, se houver"""
+        if self.callback_progresso is not None:
+            self.callback_progresso({
+                'fase': fase,
+                'status': status,
+                'timestamp': datetime.now().isoformat()
+            })
+    
+    def executar_processamento_completo(self, retomar_de: str = None) -> Dict[str, Any]:
+        """Executa o processamento completo do VR
+        
+        Com retomar_de ('fase_3' ou 'fase_4') as fases anteriores são substituídas pelo
+        último checkpoint, desde que configuração e arquivos de entrada não tenham mudado.
+        """
         
         try:
             self.logger.log_info("=== INICIANDO PROCESSAMENTO COMPLETO VR ===")
             self.logger.log_info(f"Sistema: {self.config['sistema']['nome']} v{self.config['sistema']['versao']}")
             self.logger.log_info(f"Competência: {self.config['regras_negocio']['competencia_referencia']}")
             
+            # Fases como grafo de tarefas: cada uma começa assim que suas entradas ficam prontas
+            if self.config.get('performance', {}).get('agendamento', {}).get('habilitado', False):
+                resultado = self._executar_agendado(retomar_de)
+                self.logger.log_info("=== PROCESSAMENTO CONCLUÍDO COM SUCESSO ===")
+                return resultado
+            
             # Fase 1: Validar ambiente e preparar diretórios
             self._fase_1_preparacao()
             
+            if retomar_de:
+                self._retomar_checkpoint(retomar_de)
+            
             # Fase 2: Extração e validação de dados
-            self._fase_2_extracao_validacao()
+            if retomar_de is None:
+                self._fase_2_extracao_validacao()
             
             # Fase 3: Consolidação e aplicação de regras
-            self._fase_3_consolidacao_regras()
+            if retomar_de in (None, 'fase_3'):
+                self._fase_3_consolidacao_regras()
             
             # Fase 4: Geração de relatórios
             self._fase_4_geracao_relatorios()
@@ -80,9 +170,182 @@ class OrquestradorVR:
             self.logger.log_error(f"Traceback: {traceback.format_exc()}")
             raise
     
+        finally:
+            self._registrar_execucao()
+    
+    def _executar_agendado(self, retomar_de: str = None) -> Dict[str, Any]:
+        """Executa as fases como um grafo de tarefas (seção performance.agendamento)
+        
+        As bases de referência são preparadas assim que sindicato_valor, dias_uteis e
+        exterior são lidos, enquanto os demais arquivos (ATIVOS) ainda estão em
+        leitura; o checkpoint da fase 3, o relatório principal e o de exclusões rodam
+        em paralelo. O resultado é o mesmo da execução sequencial e traz os tempos de
+        cada tarefa e o caminho crítico em 'agendamento'.
+        """
+        agendador = AgendadorTarefas.from_config(self.config, self._tarefas_pipeline(retomar_de), self._ao_mudar_tarefa)
+        try:
+            resultado = agendador.executar()['resultado']
+        finally:
+            self._encerrar_monitor_extracao()
+        
+        metricas = agendador.metricas()
+        metricas['diagrama'] = agendador.diagrama()
+        resultado['agendamento'] = metricas
+        
+        self.logger.log_info(
+            f"Caminho crítico: {' -> '.join(metricas['caminho_critico'])} "
+            f"({metricas['duracao_caminho_critico']:.2f}s em tarefas + {metricas['espera_caminho_critico']:.2f}s "
+            f"de espera = {metricas['duracao_total']:.2f}s; "
+            f"paralelismo {metricas['paralelismo']:.2f}x com {metricas['workers']} workers em {metricas['executor']})"
+        )
+        for linha in metricas['diagrama']:
+            self.logger.log_info(linha)
+        return resultado
+    
+    def _ao_mudar_tarefa(self, nome: str, status: str):
+        """Registra o andamento de uma tarefa do grafo e o repassa ao callback de progresso"""
+        if status == 'falhou':
+            self.logger.log_error(f"Tarefa {nome} falhou")
+        else:
+            self.logger.log_info(f"Tarefa {nome} {status}")
+        self._notificar_progresso(nome, status)
+    
+    def _tarefas_pipeline(self, retomar_de: str = None) -> List[Tarefa]:
+        """Grafo de tarefas do processamento, com as entradas e saídas declaradas de cada uma
+        
+        Com executor 'processo', a leitura de cada arquivo de entrada roda no pool de
+        processos (sem o cache em memória do modo serviço) e o resultado é incorporado
+        ao extrator no processo principal; as demais tarefas alteram o estado dos
+        agentes e rodam em threads.
+        """
+        em_processo = self.config.get('performance', {}).get('agendamento', {}).get('executor', 'thread') == 'processo'
+        tarefas = [Tarefa('preparacao', self._tarefa_preparacao, saidas=['ambiente'],
+                          argumentos=(retomar_de is None,))]
+        
+        if retomar_de is None:
+            for arquivo_key in ExtratorValidador.ARQUIVOS_PROCESSADOS:
+                if em_processo:
+                    tarefas.append(Tarefa(
+                        f'ler:{arquivo_key}', ler_arquivo_isolado, ['ambiente'], [f'base:{arquivo_key}'],
+                        argumentos=(self.config_loader, arquivo_key), isolada=True,
+                        concluir=partial(self._incorporar_arquivo_isolado, arquivo_key)
+                    ))
+                else:
+                    tarefas.append(Tarefa(
+                        f'ler:{arquivo_key}', self._tarefa_ler, ['ambiente'], [f'base:{arquivo_key}'],
+                        argumentos=(arquivo_key,),
+                        concluir=partial(self.extrator_validador.incorporar_arquivo, arquivo_key)
+                    ))
+            
+            tarefas += [
+                Tarefa('bases_referencia', self._tarefa_bases_referencia,
+                       [f'base:{arquivo_key}' for arquivo_key in BASES_REFERENCIA], ['bases_referencia']),
+                Tarefa('validacao', self._tarefa_validacao,
+                       [f'base:{arquivo_key}' for arquivo_key in ExtratorValidador.ARQUIVOS_PROCESSADOS],
+                       ['dados_validados', 'estado_fase_2']),
+                Tarefa('checkpoint_fase_2', self._tarefa_checkpoint, ['dados_validados', 'estado_fase_2'],
+                       ['checkpoint_fase_2'], argumentos=('fase_2',))
+            ]
+        else:
+            tarefas.append(Tarefa(
+                'retomada', self._tarefa_retomada, ['ambiente'],
+                ['dados_validados' if retomar_de == 'fase_3' else 'consolidado'], argumentos=(retomar_de,)
+            ))
+        
+        finalizacao = ['relatorio', 'relatorio_exclusoes']
+        if retomar_de in (None, 'fase_3'):
+            tarefas += [
+                Tarefa('consolidacao', self._tarefa_consolidacao,
+                       ['dados_validados'] + (['bases_referencia'] if retomar_de is None else []),
+                       ['consolidado', 'estado_fase_3']),
+                Tarefa('checkpoint_fase_3', self._tarefa_checkpoint, ['consolidado', 'estado_fase_3'],
+                       ['checkpoint_fase_3'], argumentos=('fase_3',))
+            ]
+            finalizacao.append('checkpoint_fase_3')
+            if retomar_de is None:
+                finalizacao.append('checkpoint_fase_2')
+        
+        tarefas += [
+            Tarefa('relatorio', self._tarefa_relatorio, ['consolidado'], ['relatorio'],
+                   argumentos=(self._gerar_relatorio_principal,)),
+            Tarefa('relatorio_exclusoes', self._tarefa_relatorio, ['consolidado'], ['relatorio_exclusoes'],
+                   argumentos=(self._gerar_relatorio_exclusoes,))
+        ]
+        if self.gerador_relatorio.destino_banco is not None:
+            tarefas.append(Tarefa('banco', self._tarefa_relatorio, ['consolidado'], ['banco'],
+                                  argumentos=(self._gravar_banco,)))
+            finalizacao.append('banco')
+        
+        tarefas.append(Tarefa('finalizacao', self._tarefa_finalizacao, finalizacao, ['resultado']))
+        return tarefas
+    
+    def _tarefa_preparacao(self, monitorar_extracao: bool) -> bool:
+        """Fase 1 e conferência dos arquivos obrigatórios antes das leituras
+        
+        As leituras e a validação são tarefas separadas e concorrentes; o pico de RSS da
+        extração (governador de memória) é amostrado daqui até o fim da validação. Com
+        executor 'processo' a leitura dos arquivos ocorre em outros processos e não entra no pico.
+        """
+        self._fase_1_preparacao()
+        self.extrator_validador.iniciar_extracao()
+        if monitorar_extracao:
+            self._monitor_extracao = self.governador.monitorar('extracao')
+            self._monitor_extracao.__enter__()
+        return True
+    
+    def _encerrar_monitor_extracao(self):
+        """Fecha o monitor de memória da extração, se aberto (registra o pico no governador)"""
+        if self._monitor_extracao is not None:
+            monitor, self._monitor_extracao = self._monitor_extracao, None
+            monitor.__exit__(None, None, None)
+    
+    def _tarefa_ler(self, arquivo_key: str, _ambiente):
+        return self.extrator_validador.extrair_arquivo(arquivo_key)
+    
+    def _incorporar_arquivo_isolado(self, arquivo_key: str, extraido: Tuple):
+        """Incorpora um arquivo lido no pool de processos: logs, contratos de qualidade e dados"""
+        df, qualidade, registros, stats = extraido
+        self.logger.mesclar(registros, stats)
+        return self.extrator_validador.incorporar_arquivo(arquivo_key, df, qualidade)
+    
+    def _tarefa_bases_referencia(self, *bases) -> bool:
+        """Prepara valores, dias úteis e motivos de exclusão sem esperar pelos demais arquivos"""
+        self.consolidador_regras.preparar_bases({
+            arquivo_key: df for arquivo_key, df in zip(BASES_REFERENCIA, bases) if df is not None
+        })
+        return True
+    
+    def _tarefa_validacao(self, *_bases) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Quarentena e validações cruzadas sobre todos os arquivos lidos (fim da fase 2)"""
+        try:
+            self.dados_validados = self.extrator_validador.concluir_extracao()
+        finally:
+            self._encerrar_monitor_extracao()
+        self._verificar_extracao()
+        return self.dados_validados, self._estado_checkpoint()
+    
+    def _tarefa_checkpoint(self, fase: str, dados, estado: Dict[str, Any]) -> bool:
+        self._salvar_checkpoint(fase, dados if fase == 'fase_2' else {'consolidado': dados}, estado)
+        return True
+    
+    def _tarefa_retomada(self, retomar_de: str, _ambiente):
+        self._retomar_checkpoint(retomar_de)
+        return self.dados_validados if retomar_de == 'fase_3' else self.dados_consolidados
+    
+    def _tarefa_consolidacao(self, *_entradas) -> Tuple[Any, Dict[str, Any]]:
+        self._consolidar()
+        return self.dados_consolidados, self._estado_checkpoint()
+    
+    def _tarefa_relatorio(self, gerar: Callable, _consolidado):
+        return gerar()
+    
+    def _tarefa_finalizacao(self, *_entradas) -> Dict[str, Any]:
+        return self._fase_5_finalizacao()
+    
     def _fase_1_preparacao(self):
         """Fase 1: Preparação do ambiente"""
         self.logger.log_info("FASE 1: Preparação do ambiente")
+        self._notificar_progresso('fase_1', 'iniciada')
         
         # Validar e criar diretórios necessários
         self.config_loader.validate_directories()
@@ -97,17 +360,72 @@ class OrquestradorVR:
         
         self.logger.log_validacao("Arquivos obrigatórios", True, "Todos os arquivos obrigatórios encontrados")
         
-        # Limpar arquivos de execuções anteriores (garantir idempotência)
-        self._limpar_arquivos_anteriores()
+        # Arquivar (ou, com o arquivamento desabilitado, remover) as saídas de execuções anteriores
+        if self.arquivo_saidas is not None:
+            self._arquivar_execucoes_anteriores()
+        else:
+            self._limpar_arquivos_anteriores()
+        self._saidas_preparadas = True
+        
+        # O diretório dos relatórios por grupo é recriado pela fragmentação, se habilitada
+        try:
+            Path(self.config_loader.get_fragments_path()).rmdir()
+        except OSError:
+            pass
         
         self.logger.log_info("Fase 1 concluída: Ambiente preparado")
     
+        self._notificar_progresso('fase_1', 'concluida')
+    
+    def _saidas_execucao(self) -> Dict[str, str]:
+        """Saídas desta competência no diretório de saída (nome no arquivo -> caminho)"""
+        saidas = {Path(arquivo).name: arquivo for arquivo in self.contexto.arquivos_saida.values()}
+        
+        diretorio_fragmentos = Path(self.config_loader.get_fragments_path())
+        if diretorio_fragmentos.is_dir():
+            for arquivo in sorted(diretorio_fragmentos.iterdir()):
+                if arquivo.is_file():
+                    saidas[f"{diretorio_fragmentos.name}/{arquivo.name}"] = str(arquivo)
+        return saidas
+    
+    def _arquivar_execucoes_anteriores(self):
+        """Arquiva saídas e logs das execuções anteriores da competência e aplica a retenção
+        
+        Falhas no arquivamento não interrompem o processamento: os arquivos ficam no
+        lugar e são sobrescritos por esta execução.
+        """
+        try:
+            self.arquivo_saidas.arquivar_anteriores(self.contexto.competencia, self._saidas_execucao())
+            
+            dias_logs = self.config.get('arquivamento', {}).get('dias_logs_avulsos')
+            if dias_logs is not None:
+                self.arquivo_saidas.arquivar_logs_avulsos(self.config['arquivos']['diretorio_logs'], dias_logs)
+            
+            self.arquivo_saidas.aplicar_retencao()
+        except Exception as e:
+            self.logger.log_warning(f"Não foi possível arquivar as execuções anteriores: {e}")
+    
+    def _registrar_execucao(self):
+        """Registra os logs e as saídas desta execução, arquivados no início da próxima"""
+        if self.arquivo_saidas is None:
+            return
+        
+        arquivos = {f"logs/{Path(arquivo).name}": arquivo for arquivo in self.logger.get_log_files().values()}
+        if self._saidas_preparadas:
+            arquivos.update(self._saidas_execucao())
+        try:
+            self.arquivo_saidas.registrar_execucao(self.contexto.competencia, self.logger.timestamp, arquivos)
+        except Exception as e:
+            self.logger.log_warning(f"Não foi possível registrar a execução para arquivamento: {e}")
+    
     def _limpar_arquivos_anteriores(self):
-        """Limpa arquivos de execuções anteriores para garantir idempotência"""
-        diretorio_saida = Path(self.config['arquivos']['diretorio_saida'])
+        """Limpa arquivos de execuções anteriores para garantir idempotência
         
-        # Listar arquivos existentes
-        arquivos_existentes = list(diretorio_saida.glob("*.xlsx"))
+        Apenas os arquivos que esta execução vai gerar são removidos: saídas de outras
+        competências no mesmo diretório (inclusive de execuções simultâneas) são mantidas.
+        """
+        arquivos_existentes = [Path(arquivo) for arquivo in self._saidas_execucao().values()
+                               if os.path.exists(arquivo)]
         
         if arquivos_existentes:
             self.logger.log_info(f"Removendo {len(arquivos_existentes)} arquivos de execuções anteriores")
@@ -120,9 +438,21 @@ class OrquestradorVR:
     def _fase_2_extracao_validacao(self):
         """Fase 2: Extração e validação de dados"""
         self.logger.log_info("FASE 2: Extração e validação de dados")
+        self._notificar_progresso('fase_2', 'iniciada')
         
         # Executar extração e validação
-        self.dados_validados = self.extrator_validador.executar()
+        with self.governador.monitorar('extracao'):
+            self.dados_validados = self.extrator_validador.executar()
+        self._verificar_extracao()
+        
+        self._salvar_checkpoint('fase_2', self.dados_validados)
+        
+        self.logger.log_info("Fase 2 concluída: Dados extraídos e validados")
+        
+        self._notificar_progresso('fase_2', 'concluida')
+    
+    def _verificar_extracao(self):
+        """Confere os dados extraídos e registra a contagem de ativos e as estatísticas da extração"""
         
         # Verificar se dados essenciais foram carregados
         if not self.dados_validados:
@@ -131,63 +461,168 @@ class OrquestradorVR:
         if 'ativos' not in self.dados_validados:
             raise ValueError("Base de colaboradores ativos não foi carregada")
         
+        self.invariantes.registrar('fase_2: ativos validados', len(self.dados_validados['ativos']))
+        
         # Log de estatísticas da extração
         stats_extracao = self.extrator_validador.get_estatisticas()
         self.logger.log_info(f"Estatísticas de extração: {stats_extracao}")
         
-        self.logger.log_info("Fase 2 concluída: Dados extraídos e validados")
-    
     def _fase_3_consolidacao_regras(self):
         """Fase 3: Consolidação e aplicação de regras de negócio"""
         self.logger.log_info("FASE 3: Consolidação e aplicação de regras de negócio")
+        self._notificar_progresso('fase_3', 'iniciada')
+        
+        self._consolidar()
+        self._salvar_checkpoint('fase_3', {'consolidado': self.dados_consolidados})
+        
+        self.logger.log_info("Fase 3 concluída: Dados consolidados e regras aplicadas")
+        
+        self._notificar_progresso('fase_3', 'concluida')
+    
+    def _consolidar(self):
+        """Consolida os dados validados e confere o número de colaboradores consolidados"""
         
         # Executar consolidação e regras
-        self.dados_consolidados = self.consolidador_regras.executar(self.dados_validados)
+        with self.governador.monitorar('consolidacao'):
+            self.dados_consolidados = self.consolidador_regras.executar(self.dados_validados)
         
         # Verificar se consolidação foi bem-sucedida
         if self.dados_consolidados is None or self.dados_consolidados.empty:
             raise ValueError("Falha na consolidação dos dados")
+        self._verificar_linhas_consolidadas()
         
         # Log de estatísticas da consolidação
         stats_consolidacao = self.consolidador_regras.get_estatisticas()
         self.logger.log_info(f"Estatísticas de consolidação: {stats_consolidacao}")
         
-        self.logger.log_info("Fase 3 concluída: Dados consolidados e regras aplicadas")
+    def _estado_checkpoint(self) -> Dict[str, Any]:
+        """Cópia do estado auxiliar gravado com os checkpoints (log, contagens e motivos de exclusão)
+        
+        A cópia é tirada no fim da fase: com o agendamento, o checkpoint é gravado
+        enquanto as tarefas seguintes já alteram o logger e as contagens.
+        """
+        return {
+            'estatisticas_log': copy.deepcopy(self.logger.stats),
+            'contagens_linhas': list(self.invariantes.contagens),
+            'motivos_exclusao': (self.consolidador_regras.registro_exclusoes.como_lista()
+                                 if self.consolidador_regras.registro_exclusoes else None)
+        }
+    
+    def _salvar_checkpoint(self, fase: str, tabelas: Dict[str, Any], estado: Dict[str, Any] = None):
+        """Grava o checkpoint da fase; uma falha de gravação não interrompe o processamento"""
+        if self.checkpoints is None:
+            return
+        if any(isinstance(tabela, ConsolidadoEmBlocos) for tabela in tabelas.values()):
+            self.logger.log_warning(f"Checkpoint da {fase} não gravado: consolidado mantido em blocos em disco")
+            return
+        
+        estado = estado or self._estado_checkpoint()
+        try:
+            destino = self.checkpoints.salvar(fase, tabelas, estado)
+            self.logger.log_info(f"Checkpoint da {fase} gravado em {destino} ({self.checkpoints.formato})")
+        except OSError as e:
+            self.logger.log_warning(f"Não foi possível gravar o checkpoint da {fase}: {e}")
+    
+    def _retomar_checkpoint(self, fase: str):
+        """Recarrega o estado anterior à fase informada a partir do último checkpoint válido"""
+        if fase not in FASES_RETOMADA:
+            raise ValueError(f"Fase de retomada inválida: {fase} (use {', '.join(FASES_RETOMADA)})")
+        if self.checkpoints is None:
+            raise ValueError("Checkpoints desabilitados na configuração (checkpoints.habilitado)")
+        
+        origem = FASES_RETOMADA[fase]
+        tabelas, estado, manifesto = self.checkpoints.carregar(origem)
+        
+        self.logger.mesclar([], estado['estatisticas_log'])
+        self.invariantes.contagens = list(estado['contagens_linhas'])
+        
+        if origem == 'fase_2':
+            self.dados_validados = tabelas
+        else:
+            self.dados_consolidados = tabelas['consolidado']
+            self.consolidador_regras.df_consolidado = self.dados_consolidados
+            self.consolidador_regras.registro_exclusoes = RegistroExclusoes(estado['motivos_exclusao'])
+        
+        self.logger.log_info(
+            f"Retomando a partir da {fase} com o checkpoint da {origem} de {manifesto['criado_em']} "
+            f"(configuração e arquivos de entrada conferidos)"
+        )
+    
+    def _verificar_linhas_consolidadas(self):
+        """A consolidação deve manter exatamente um registro por colaborador ativo"""
+        self.invariantes.registrar(
+            'fase_3: colaboradores consolidados', len(self.dados_consolidados), len(self.dados_validados['ativos'])
+        )
+        self.logger.log_info(f"Contagem de linhas por fase: {self.invariantes.como_dict()}")
     
     def _fase_4_geracao_relatorios(self):
         """Fase 4: Geração de relatórios"""
         self.logger.log_info("FASE 4: Geração de relatórios")
+        self._notificar_progresso('fase_4', 'iniciada')
+        
+        self._gerar_relatorio_principal()
+        self._gerar_relatorio_exclusoes()
+        self._gravar_banco()
+        
+        self.logger.log_info("Fase 4 concluída: Relatórios gerados")
+        
+        self._notificar_progresso('fase_4', 'concluida')
+    
+    def _gerar_relatorio_principal(self) -> str:
+        """Gera a planilha principal e confere o número de linhas com o de elegíveis"""
         
         # Obter estatísticas para o relatório
         stats_consolidacao = self.consolidador_regras.get_estatisticas()
         
         # Gerar relatório principal
-        self.arquivo_relatorio_gerado = self.gerador_relatorio.executar(
-            self.dados_consolidados, 
-            stats_consolidacao
+        with self.governador.monitorar('relatorio'):
+            self.arquivo_relatorio_gerado = self.gerador_relatorio.executar(
+                self.dados_consolidados, 
+                stats_consolidacao,
+                self.consolidador_regras.registro_exclusoes
+            )
+        
+        self.invariantes.registrar(
+            'fase_4: linhas do relatório', self.gerador_relatorio.linhas_relatorio,
+            stats_consolidacao['colaboradores_elegiveis']
         )
+        return self.arquivo_relatorio_gerado
         
-        # Gerar relatório de exclusões (opcional)
+    def _gerar_relatorio_exclusoes(self):
+        """Gera o relatório de exclusões (opcional: uma falha não interrompe o processamento)"""
+        arquivo_exclusoes = None
         try:
-            arquivo_exclusoes = self.gerador_relatorio.gerar_relatorio_exclusoes(self.dados_consolidados)
+            arquivo_exclusoes = self.gerador_relatorio.gerar_relatorio_exclusoes(
+                self.dados_consolidados, self.consolidador_regras.registro_exclusoes
+            )
             if arquivo_exclusoes:
                 self.logger.log_info(f"Relatório de exclusões gerado: {arquivo_exclusoes}")
         except Exception as e:
             self.logger.log_warning(f"Erro ao gerar relatório de exclusões: {e}")
+        return arquivo_exclusoes
         
-        self.logger.log_info("Fase 4 concluída: Relatórios gerados")
+    def _gravar_banco(self):
+        """Carrega elegíveis e excluídos no banco de relatorio.banco (uma falha interrompe o processamento)"""
+        return self.gerador_relatorio.gravar_banco(
+            self.dados_consolidados, self.consolidador_regras.registro_exclusoes
+        )
     
     def _fase_5_finalizacao(self) -> Dict[str, Any]:
         """Fase 5: Finalização e geração de estatísticas"""
         self.logger.log_info("FASE 5: Finalização do processamento")
+        self._notificar_progresso('fase_5', 'iniciada')
         
-        # Obter estatísticas finais
+        # Obter estatísticas finais (as mesmas já calculadas nas fases 3 e 4)
         stats_finais = self.consolidador_regras.get_estatisticas()
+        totais_por_dimensao = linhas_por_dimensao(
+            stats_finais, self.config.get('estatisticas', {}).get('max_grupos_exibidos', 10)
+        )
         
         # Finalizar logs
         self.logger.finalizar_processamento(
             stats_finais['colaboradores_elegiveis'],
-            stats_finais['valor_total']
+            stats_finais['valor_total'],
+            totais_por_dimensao
         )
         
         # Preparar resultado final
@@ -196,21 +631,74 @@ class OrquestradorVR:
             'timestamp': datetime.now().isoformat(),
             'competencia': self.config['regras_negocio']['competencia_referencia'],
             'arquivo_relatorio': self.arquivo_relatorio_gerado,
+            'indice_fragmentos': self.gerador_relatorio.indice_fragmentos,
+            'carga_banco': self.gerador_relatorio.carga_banco,
             'arquivos_log': self.logger.get_log_files(),
             'estatisticas': stats_finais,
+            'contagens_linhas': self.invariantes.como_dict(),
+            'memoria': self.governador.resumo(),
             'resumo': {
                 'total_colaboradores': stats_finais['total_colaboradores'],
                 'colaboradores_elegiveis': stats_finais['colaboradores_elegiveis'],
                 'colaboradores_excluidos': stats_finais['colaboradores_excluidos'],
                 'valor_total': stats_finais['valor_total'],
                 'custo_empresa': stats_finais['custo_total_empresa'],
-                'desconto_colaboradores': stats_finais['desconto_total_colaboradores']
+                'desconto_colaboradores': stats_finais['desconto_total_colaboradores'],
+                'por_dimensao': totais_por_dimensao
             }
         }
         
         self.logger.log_info("Fase 5 concluída: Processamento finalizado")
+        
+        self._notificar_progresso('fase_5', 'concluida')
         return resultado
     
+    def executar_a_partir_de_particoes(self, dados_validados: Dict[str, Any], resultados_particoes: List,
+                                       qualidade: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Conclui o processamento com partições consolidadas por workers da fila distribuída
+        
+        qualidade é o resultado dos contratos de dados da extração (feita em outro
+        worker): a quarentena é gravada aqui, depois do arquivamento das saídas anteriores.
+        """
+        
+        try:
+            self.logger.log_info("=== CONCLUINDO PROCESSAMENTO A PARTIR DE PARTIÇÕES ===")
+            self.logger.log_info(f"Competência: {self.config['regras_negocio']['competencia_referencia']}")
+            
+            self._fase_1_preparacao()
+            self.dados_validados = dados_validados
+            if qualidade is not None:
+                self.extrator_validador.dados_validados = dados_validados
+                self.extrator_validador.qualidade = qualidade
+                self.extrator_validador.salvar_quarentena()
+            self.invariantes.registrar('fase_2: ativos validados', len(dados_validados['ativos']))
+            
+            # Fase 3: apenas a mesclagem, as regras já foram aplicadas em cada partição
+            self.logger.log_info(f"FASE 3: Mesclagem de {len(resultados_particoes)} partições consolidadas")
+            self._notificar_progresso('fase_3', 'iniciada')
+            
+            self.dados_consolidados = self.consolidador_regras.executar_mesclagem(resultados_particoes, dados_validados)
+            if self.dados_consolidados is None or self.dados_consolidados.empty:
+                raise ValueError("Falha na consolidação dos dados")
+            self._verificar_linhas_consolidadas()
+            
+            self.logger.log_info("Fase 3 concluída: Partições mescladas")
+            self._notificar_progresso('fase_3', 'concluida')
+            
+            self._fase_4_geracao_relatorios()
+            resultado = self._fase_5_finalizacao()
+            
+            self.logger.log_info("=== PROCESSAMENTO CONCLUÍDO COM SUCESSO ===")
+            return resultado
+        
+        except Exception as e:
+            self.logger.log_error(f"Erro durante o processamento: {str(e)}")
+            self.logger.log_error(f"Traceback: {traceback.format_exc()}")
+            raise
+        
+        finally:
+            self._registrar_execucao()
+    
     def executar_apenas_validacao(self) -> Dict[str, Any]:
         """Executa apenas a validação dos dados sem processamento completo"""
         
@@ -274,8 +762,9 @@ class OrquestradorVR:
             if os.path.exists(file_path):
                 try:
                     # Tentar ler arquivo para verificar integridade
-                    import pandas as pd
-                    df = pd.read_excel(file_path)
+                    from utils.leitores import escolher_leitor
+                    leitor = escolher_leitor(file_path, self.config.get('leitura', {}).get('motor_excel', 'auto'))
+                    df = leitor.ler(file_path)
                     
                     resultado_integridade['arquivos_encontrados'][arquivo_key] = {
                         'nome': nome_arquivo,
@@ -297,6 +786,129 @@ class OrquestradorVR:
                 })
         
         return resultado_integridade
+    
+    @contextmanager
+    def _somente_leitura(self):
+        """Suspende quarentena, checkpoints e publicação (consultas que não devem alterar as saídas)"""
+        checkpoints = self.checkpoints
+        self.checkpoints = None
+        self.extrator_validador.gravar_quarentena = False
+        self.consolidador_regras.publicar_consolidado = False
+        try:
+            yield
+        finally:
+            self.checkpoints = checkpoints
+            self.extrator_validador.gravar_quarentena = True
+            self.consolidador_regras.publicar_consolidado = True
+    
+    def explicar_colaborador(self, matricula: int, publicado: bool = False) -> Dict[str, Any]:
+        """Explica a elegibilidade e o cálculo de VR de um colaborador
+        
+        Com publicado=True usa a última versão publicada do consolidado, sem reprocessar.
+        """
+        import pandas as pd
+        
+        if publicado and self.dados_consolidados is None:
+            if self.armazem is None:
+                raise ValueError("Publicação do consolidado desabilitada na configuração (publicacao.habilitada)")
+            self.dados_consolidados, manifesto = self.armazem.abrir()
+            self.consolidador_regras.registro_exclusoes = RegistroExclusoes(manifesto['motivos_exclusao'])
+            self.logger.log_info(f"Usando o consolidado publicado em {manifesto['criado_em']} ({manifesto['versao']})")
+        
+        # Consolidar sob demanda, sem gravar nada: relatórios, quarentena, checkpoints e a
+        # versão publicada continuam os da última execução
+        if self.dados_consolidados is None:
+            with self._somente_leitura():
+                self._fase_2_extracao_validacao()
+                self._fase_3_consolidacao_regras()
+        
+        df = self.dados_consolidados
+        if isinstance(df, ConsolidadoEmBlocos):
+            linhas = df.ler(filtro=lambda bloco: bloco['MATRICULA'] == matricula)
+        else:
+            linhas = df[df['MATRICULA'] == matricula]
+        if linhas.empty:
+            raise KeyError(f"Matrícula {matricula} não encontrada na base consolidada")
+        
+        row = linhas.iloc[0]
+        explicacao = []
+        motivos = self.consolidador_regras.registro_exclusoes.motivos_da_mascara(row[COLUNA_MASCARA])
+        
+        # Valores em reais apenas para a explicação (o consolidado guarda centavos); sem valor
+        # do sindicato os valores são None
+        valor_diario, valor_total, custo_empresa, desconto_colaborador = (
+            em_reais(row.get(coluna)) for coluna in ('valor_diario_centavos', 'valor_total_centavos',
+                                                     'custo_empresa_centavos', 'desconto_colaborador_centavos')
+        )
+        
+        def reais(valor) -> str:
+            return "R$ (não definido)" if valor is None else f"R$ {valor:,.2f}"
+        
+        if row['elegivel']:
+            explicacao.append("Elegível para VR")
+            if row.get('valor_exterior_centavos', 0) > 0:
+                explicacao.append(f"Valor especial de exterior: R$ {em_reais(row['valor_exterior_centavos']):,.2f}")
+            elif pd.isna(row['dias_calculados']):
+                explicacao.append("Dias úteis do sindicato não definidos: dias e valores sem cálculo")
+            else:
+                explicacao.append(
+                    f"{row['dias_uteis_sindicato']} dias úteis do sindicato - {row['dias_ferias']} dias de férias "
+                    f"= {row['dias_calculados']:g} dias x {reais(valor_diario)}"
+                )
+            explicacao.append(
+                f"Total {reais(valor_total)} = empresa {reais(custo_empresa)} "
+                f"+ colaborador {reais(desconto_colaborador)}"
+            )
+        else:
+            explicacao.append(f"Excluído do VR: {motivos[0]}")
+            if len(motivos) > 1:
+                explicacao.append(f"Outros motivos de exclusão: {'; '.join(motivos[1:])}")
+        
+        if pd.notna(row.get('data_demissao')):
+            explicacao.append(f"Desligamento em {row['data_demissao']:%d/%m/%Y} ({row['comunicado_desligamento']})")
+        
+        return {
+            'matricula': matricula,
+            'elegivel': bool(row['elegivel']),
+            'motivo_exclusao': motivos[0] if motivos else '',
+            'motivos_exclusao': motivos,
+            'sindicato': row['Sindicato'],
+            'sindicato_normalizado': row['sindicato_normalizado'],
+            'dias_uteis_sindicato': row['dias_uteis_sindicato'],
+            'dias_ferias': row['dias_ferias'],
+            'dias_calculados': row['dias_calculados'],
+            'valor_diario_vr': valor_diario,
+            'valor_total_vr': valor_total,
+            'custo_empresa': custo_empresa,
+            'desconto_colaborador': desconto_colaborador,
+            'explicacao': explicacao
+        }
+
+
+def executar_competencias(config_loader: ConfigLoader, competencias: List[str],
+                          max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+    """Processa várias competências em paralelo, em threads do mesmo processo
+    
+    Cada competência recebe um carregador derivado e o próprio ContextoExecucao (logs,
+    saídas, checkpoints e publicação separados). Retorna o resultado por competência;
+    uma competência que falhar é registrada com {'erro': mensagem} sem interromper as demais.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def processar(competencia: str) -> Dict[str, Any]:
+        with ContextoExecucao(config_loader.derivar(competencia=competencia)) as contexto:
+            return OrquestradorVR(contexto=contexto).executar_processamento_completo()
+    
+    with ThreadPoolExecutor(max_workers=max_workers or len(competencias)) as executor:
+        futuros = {competencia: executor.submit(processar, competencia) for competencia in competencias}
+    
+    resultados = {}
+    for competencia, futuro in futuros.items():
+        try:
+            resultados[competencia] = futuro.result()
+        except Exception as e:
+            resultados[competencia] = {'erro': str(e)}
+    return resultados
 
 
 def main():
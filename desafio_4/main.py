@@ -3,49 +3,564 @@
 Script principal do Sistema de Processamento VR
 Autor: Manus AI
 Data: 27/08/2025
+
+Subcomandos:
+    run        Executa o processamento completo (padrão; --resume-from retoma de um checkpoint)
+    validate   Valida configuração e arquivos obrigatórios (--dados valida também os dados)
+    integrity  Verifica a integridade dos arquivos de entrada
+    explain    Explica a elegibilidade e o cálculo de VR de uma matrícula
+    bench      Mede a inicialização, a consolidação (paralela ou por motor) ou o pico de memória
+    serve      Inicia o serviço local que mantém as bases de referência em memória
+    submit     Submete um job ao serviço local e acompanha o progresso
+    watch      Observa dados_entrada/ e reprocessa quando arquivos mudam
+    enqueue    Publica um processamento na fila distribuída (SQLite compartilhado)
+    worker     Executa tarefas da fila distribuída
+    queue-status  Mostra os jobs da fila distribuída
+    archives   Lista as execuções arquivadas (relatórios e logs de execuções anteriores)
+    restore    Restaura uma execução arquivada sem reprocessar
+
+Os módulos pesados (pandas, numpy, openpyxl) só são importados pelos
+subcomandos que precisam deles.
 """
 
+import argparse
+import json
 import sys
-import os
 from pathlib import Path
 
 # Adicionar o diretório atual ao Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agentes.orquestrador import OrquestradorVR
+CONFIG_PADRAO = Path(__file__).parent / "config" / "config.yaml"
 
 
-def main():
-    """Função principal"""
-    
+def _imprimir_cabecalho():
+    """Imprime o cabeçalho do sistema"""
     print("=== Sistema de Processamento VR ===")
     print("Autor: Manus AI")
     print("Data: 27/08/2025")
     print()
     
+
+def _criar_orquestrador(args):
+    """Cria o orquestrador (importa os agentes e suas dependências)"""
+    from agentes.orquestrador import OrquestradorVR
+    return OrquestradorVR(args.config)
+
+
+def _cmd_run(args) -> int:
+    """Executa o processamento completo"""
+    _imprimir_cabecalho()
+    
+    orquestrador = _criar_orquestrador(args)
+    
+    # Executar processamento completo (ou retomar do último checkpoint); fechar libera os
+    # handlers de log do contexto e os blocos do consolidado em disco
     try:
-        # Inicializar orquestrador
-        config_path = Path(__file__).parent / "config" / "config.yaml"
-        orquestrador = OrquestradorVR(str(config_path))
+        resultado = orquestrador.executar_processamento_completo(retomar_de=args.resume_from)
+    finally:
+        orquestrador.fechar()
+    
+    # Exibir resumo
+    print("\n" + "="*50)
+    print("PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
+    print("="*50)
+    print(f"Arquivo gerado: {resultado['arquivo_relatorio']}")
+    if resultado.get('indice_fragmentos'):
+        print(f"Índice dos relatórios por grupo: {resultado['indice_fragmentos']}")
+    print(f"Colaboradores elegíveis: {resultado['resumo']['colaboradores_elegiveis']}")
+    print(f"Colaboradores excluídos: {resultado['resumo']['colaboradores_excluidos']}")
+    print(f"Valor total: R$ {resultado['resumo']['valor_total']:,.2f}")
+    print(f"Custo empresa: R$ {resultado['resumo']['custo_empresa']:,.2f}")
+    print(f"Desconto colaboradores: R$ {resultado['resumo']['desconto_colaboradores']:,.2f}")
+    for rotulo, grupos in resultado['resumo'].get('por_dimensao', {}).items():
+        print(f"Por {rotulo.lower()}:")
+        for grupo, totais in grupos:
+            print(f"  {grupo[:40]:<40} {totais['elegiveis']:>6} elegíveis  R$ {totais['valor_total']:>14,.2f}")
+    if resultado.get('carga_banco'):
+        carga = resultado['carga_banco']
+        print(f"Carga em banco: {carga['linhas']} linhas em {', '.join(carga['tabelas'])} "
+              f"({carga['linhas_por_segundo']:,.0f} linhas/s)")
+    if resultado.get('agendamento'):
+        agendamento = resultado['agendamento']
+        print(f"Caminho crítico: {' -> '.join(agendamento['caminho_critico'])} "
+              f"({agendamento['duracao_caminho_critico']:.2f}s em tarefas + "
+              f"{agendamento['espera_caminho_critico']:.2f}s de espera = {agendamento['duracao_total']:.2f}s)")
+    print(f"Log de auditoria: {resultado['arquivos_log']['audit']}")
+    print(f"Log técnico: {resultado['arquivos_log']['technical']}")
+    print("="*50)
+    
+    return 0
+
+
+def _cmd_validate(args) -> int:
+    """Valida a configuração e a presença dos arquivos obrigatórios"""
+    from utils.config_loader import ConfigLoader
+    
+    config_loader = ConfigLoader(args.config)
+    print(f"Configuração válida: {config_loader.config_path}")
+    
+    faltantes = []
+    for arquivo_key in ['ativos', 'sindicato_valor', 'dias_uteis']:
+        file_path = Path(config_loader.get_file_path(arquivo_key))
+        if file_path.exists():
+            print(f"✓ {arquivo_key}: {file_path.name}")
+        else:
+            print(f"✗ {arquivo_key}: {file_path} não encontrado")
+            faltantes.append(arquivo_key)
+    
+    if faltantes:
+        return 1
+    
+    if args.dados:
+        resultado = _criar_orquestrador(args).executar_apenas_validacao()
+        print(f"Arquivos validados: {', '.join(resultado['arquivos_processados'])}")
+        print(f"Total de registros: {resultado['total_registros']}")
+    
+    return 0
+
+
+def _cmd_integrity(args) -> int:
+    """Verifica a integridade dos arquivos de entrada"""
+    resultado = _criar_orquestrador(args).verificar_integridade_dados()
+    print(json.dumps(resultado, ensure_ascii=False, indent=2, default=str))
+    return 1 if resultado['arquivos_faltantes'] or resultado['problemas_estrutura'] else 0
+
+
+def _cmd_explain(args) -> int:
+    """Explica o cálculo de uma matrícula"""
+    orquestrador = _criar_orquestrador(args)
+    try:
+        resultado = orquestrador.explicar_colaborador(args.matricula, args.publicado)
+    finally:
+        orquestrador.fechar()
+    
+    print(f"Matrícula {resultado['matricula']} - {resultado['sindicato']}")
+    for linha in resultado['explicacao']:
+        print(f"- {linha}")
+    return 0
+
+
+def _cmd_bench(args) -> int:
+    """Mede o tempo de inicialização e compara com o orçamento"""
+    if args.alvo == 'consolidacao':
+        return _bench_consolidacao(args)
+    if args.alvo == 'memoria':
+        return _bench_memoria(args)
+    if args.alvo == 'motores':
+        return _bench_motores(args)
+    if args.alvo == 'leitores':
+        return _bench_leitores(args)
+    
+    from utils.benchmark import medir_inicializacao
+    
+    resultado = medir_inicializacao(__file__, args.config, args.repeticoes)
+    
+    for nome, tempos in resultado['comandos'].items():
+        print(f"{nome:<10} mediana {tempos['mediana_ms']:>8.1f} ms  "
+              f"(min {tempos['min_ms']:.1f} / max {tempos['max_ms']:.1f})")
+    
+    falhou = False
+    for nome in ['help', 'validate']:
+        mediana = resultado['comandos'][nome]['mediana_ms']
+        if mediana > args.orcamento_ms:
+            print(f"✗ {nome} excedeu o orçamento: {mediana:.1f} ms > {args.orcamento_ms:.1f} ms")
+            falhou = True
+    
+    if resultado['modulos_pesados_carregados']:
+        print(f"✗ Módulos pesados carregados na inicialização: {resultado['modulos_pesados_carregados']}")
+        falhou = True
+    
+    if not falhou:
+        print(f"✓ Inicialização dentro do orçamento de {args.orcamento_ms:.1f} ms")
+    return 1 if falhou else 0
+
+
+def _bench_consolidacao(args) -> int:
+    """Mede a escalabilidade da consolidação particionada de 1 a N workers"""
+    from utils.config_loader import ConfigLoader
+    from utils.benchmark import medir_consolidacao_paralela
+    
+    workers = [int(n) for n in args.workers.split(',')]
+    resultado = medir_consolidacao_paralela(
+        ConfigLoader(args.config), args.linhas, workers, args.chave, args.repeticoes
+    )
+    
+    print(f"Consolidação de {resultado['linhas']} colaboradores particionada por {resultado['chave']} "
+          f"({resultado['nucleos_disponiveis']} núcleos disponíveis)")
+    for cenario in resultado['cenarios']:
+        status = "✓" if cenario['identico'] else "✗ resultado divergente"
+        print(f"{str(cenario['workers']):<11} {cenario['segundos']:>8.3f} s  "
+              f"aceleração {cenario['aceleracao']:>5.2f}x  {status}")
+    
+    return 0 if all(c['identico'] for c in resultado['cenarios']) else 1
+
+
+def _bench_memoria(args) -> int:
+    """Verifica se o processamento de N colaboradores fica dentro de performance.max_memory_usage"""
+    from utils.config_loader import ConfigLoader
+    from utils.benchmark import medir_memoria
+    from utils.memoria import formatar_tamanho
+    
+    resultado = medir_memoria(ConfigLoader(args.config), args.linhas)
+    limite = resultado['limite_bytes']
+    
+    print(f"Processamento de {resultado['linhas']} colaboradores com limite de {formatar_tamanho(limite)} "
+          f"(blocos de {resultado['tamanho_bloco']} linhas)")
+    excedeu = False
+    for fase, registro in resultado['fases'].items():
+        dentro = limite is None or registro['pico_rss'] <= limite
+        excedeu = excedeu or not dentro
+        print(f"{fase:<13} pico {formatar_tamanho(registro['pico_rss']):>7}  "
+              f"fim {formatar_tamanho(registro.get('rss_fim')):>7}  "
+              f"{registro.get('segundos', 0):>7.1f} s  {registro['estrategia']:<16} "
+              f"{'✓' if dentro else '✗ acima do limite'}")
+    
+    return 1 if excedeu else 0
+
+
+def _bench_motores(args) -> int:
+    """Compara tempo e resultado da consolidação em cada motor com o motor pandas"""
+    from utils.config_loader import ConfigLoader
+    from utils.benchmark import comparar_motores
+    
+    escalas = [int(n) for n in args.escalas.split(',')]
+    resultado = comparar_motores(ConfigLoader(args.config), escalas, args.motores.split(','))
+    
+    divergente = False
+    for escala in resultado['escalas']:
+        print(f"Consolidação de {escala['linhas']} colaboradores por motor")
+        for cenario in escala['cenarios']:
+            if 'indisponivel' in cenario:
+                print(f"{cenario['motor']:<8} indisponível (requer {cenario['indisponivel']})")
+                continue
+            divergente = divergente or not cenario['identico']
+            status = "✓" if cenario['identico'] else "✗ resultado divergente do pandas"
+            print(f"{cenario['motor']:<8} {cenario['segundos']:>8.3f} s  "
+                  f"aceleração {cenario['aceleracao']:>5.2f}x  {status}")
+    
+    return 1 if divergente else 0
+
+
+def _bench_leitores(args) -> int:
+    """Compara o tempo de leitura de ATIVOS por leitor, com e sem projeção de colunas"""
+    from utils.config_loader import ConfigLoader
+    from utils.benchmark import comparar_leitores
+    
+    resultado = comparar_leitores(ConfigLoader(args.config), args.linhas)
+    
+    print(f"Leitura de ATIVOS com {resultado['linhas']} linhas: {resultado['colunas_total']} colunas, "
+          f"{resultado['colunas_projetadas']} projetadas")
+    divergente = False
+    for cenario in resultado['cenarios']:
+        if 'indisponivel' in cenario:
+            print(f"{cenario['leitor']:<9} {cenario['formato']:<8} indisponível (requer {cenario['indisponivel']})")
+            continue
+        divergente = divergente or not cenario['identico']
+        status = "✓" if cenario['identico'] else "✗ projeção divergente da leitura completa"
+        print(f"{cenario['leitor']:<9} {cenario['formato']:<8} completo {cenario['completo_s']:>8.3f} s  "
+              f"projetado {cenario['projetado_s']:>8.3f} s  aceleração {cenario['aceleracao']:>5.2f}x  {status}")
+    
+    return 1 if divergente else 0
+
+
+def _cmd_serve(args) -> int:
+    """Inicia o serviço local até ser interrompido"""
+    import asyncio
+    from servico.servidor import ServidorVR
+    
+    servidor = ServidorVR(args.config, host=args.host, porta=args.porta,
+                          socket_path=args.socket, workers=args.workers)
+    print(f"Serviço VR em {servidor.endereco()} com {servidor.workers} workers (Ctrl+C para encerrar)")
+    
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        print("Serviço encerrado")
+    return 0
         
-        # Executar processamento completo
-        resultado = orquestrador.executar_processamento_completo()
         
-        # Exibir resumo
-        print("\n" + "="*50)
-        print("PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
-        print("="*50)
-        print(f"Arquivo gerado: {resultado['arquivo_relatorio']}")
-        print(f"Colaboradores elegíveis: {resultado['resumo']['colaboradores_elegiveis']}")
-        print(f"Colaboradores excluídos: {resultado['resumo']['colaboradores_excluidos']}")
-        print(f"Valor total: R$ {resultado['resumo']['valor_total']:,.2f}")
-        print(f"Custo empresa: R$ {resultado['resumo']['custo_empresa']:,.2f}")
-        print(f"Desconto colaboradores: R$ {resultado['resumo']['desconto_colaboradores']:,.2f}")
-        print(f"Log de auditoria: {resultado['arquivos_log']['audit']}")
-        print(f"Log técnico: {resultado['arquivos_log']['technical']}")
-        print("="*50)
+def _cmd_submit(args) -> int:
+    """Submete um job ao serviço local e exibe o progresso"""
+    from servico.cliente import ClienteVR
         
+    cliente = ClienteVR(args.host or '127.0.0.1', args.porta or 8765, socket_path=args.socket)
+    job = cliente.submeter(args.diretorio_entrada, args.competencia, args.diretorio_saida)
+    print(f"Job {job['id']} submetido")
+    
+    evento = None
+    for evento in cliente.acompanhar(job['id']):
+        if evento['tipo'] == 'progresso':
+            print(f"[{evento['timestamp']}] {evento['fase']} {evento['status']}")
+    
+    if evento is None or evento['tipo'] == 'erro':
+        print(f"ERRO: {evento['mensagem'] if evento else 'conexão encerrada sem resultado'}")
+        return 1
+    
+    resumo = evento['resultado']['resumo']
+    print(f"Arquivo gerado: {evento['resultado']['arquivo_relatorio']}")
+    print(f"Colaboradores elegíveis: {resumo['colaboradores_elegiveis']}")
+    print(f"Valor total: R$ {resumo['valor_total']:,.2f}")
+    print(f"Arquivos reaproveitados do cache do worker: {evento['cache']['acertos']}")
+    return 0
+
+
+def _cmd_watch(args) -> int:
+    """Observa o diretório de entrada e reprocessa a cada alteração"""
+    from servico.observador import ObservadorEntrada
+    
+    def exibir_ciclo(ciclo):
+        print(f"Arquivos alterados: {', '.join(ciclo['arquivos_alterados'])}")
+        if ciclo['erro']:
+            print(f"ERRO: {ciclo['erro']}")
+        else:
+            print(f"Relatório atualizado em {ciclo['duracao_segundos']:.1f}s: {ciclo['resultado']['arquivo_relatorio']}")
+    
+    observador = ObservadorEntrada(args.config, modo=args.modo, debounce_segundos=args.debounce,
+                                   ao_concluir=exibir_ciclo)
+    print(f"Observando {observador.diretorio_entrada} ({observador.modo_efetivo}, Ctrl+C para encerrar)")
+    
+    try:
+        observador.observar()
+    except KeyboardInterrupt:
+        print("Observação encerrada")
+    return 0
+
+
+def _abrir_fila(args):
+    """Abre a fila distribuída configurada (ou a indicada em --fila)"""
+    from utils.config_loader import ConfigLoader
+    from servico.fila import FilaTarefas
+    
+    return FilaTarefas.from_config(ConfigLoader(args.config).get_config(), args.fila)
+
+
+def _exibir_tarefa(execucao):
+    """Exibe o resultado de uma tarefa executada por um worker da fila"""
+    particao = f"[{execucao['particao']}]" if execucao['particao'] is not None else ''
+    status = f"ERRO: {execucao['erro']}" if 'erro' in execucao else (
+        f"concluída em {execucao['resultado']['duracao_segundos']:.1f}s"
+        + ('' if execucao['aceita'] else ' (descartada: lease perdido)')
+    )
+    print(f"Job {execucao['job_id']} - {execucao['tipo']}{particao} (tentativa {execucao['tentativa']}): {status}")
+
+
+def _cmd_enqueue(args) -> int:
+    """Publica um processamento na fila distribuída"""
+    from utils.config_loader import ConfigLoader
+    from servico.distribuido import publicar_processamento
+    
+    fila = _abrir_fila(args)
+    config_fila = ConfigLoader(args.config).get_config().get('fila', {})
+    
+    job_id = publicar_processamento(
+        fila,
+        args.particoes or config_fila.get('particoes', 4),
+        args.chave or config_fila.get('chave', 'EMPRESA'),
+        args.diretorio_entrada, args.competencia, args.diretorio_saida
+    )
+    print(f"Job {job_id} publicado em {fila.caminho}")
+    return 0
+
+
+def _cmd_worker(args) -> int:
+    """Executa workers da fila distribuída neste host"""
+    from servico.distribuido import executar_trabalhador
+    
+    fila = _abrir_fila(args)
+    print(f"Consumindo {fila.caminho} com {args.processos} worker(s) (Ctrl+C para encerrar)")
+    
+    try:
+        if args.processos == 1:
+            executar_trabalhador(args.config, args.fila, args.nome, args.max_tarefas,
+                                 args.sair_quando_vazia, ao_concluir=_exibir_tarefa)
+            return 0
+        
+        import multiprocessing
+        processos = [
+            multiprocessing.Process(
+                target=executar_trabalhador,
+                args=(args.config, args.fila, f"{args.nome}-{i}" if args.nome else None,
+                      args.max_tarefas, args.sair_quando_vazia, _exibir_tarefa)
+            )
+            for i in range(args.processos)
+        ]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join()
+    except KeyboardInterrupt:
+        print("Workers encerrados")
+    return 0
+
+
+def _cmd_queue_status(args) -> int:
+    """Exibe os jobs da fila ou o estado detalhado de um job"""
+    fila = _abrir_fila(args)
+    
+    if args.job_id is None:
+        for job in fila.listar_jobs():
+            print(f"{job['id']}  {job['status']:<10}  {job['erro'] or ''}")
         return 0
+    
+    status = fila.status_job(args.job_id)
+    print(json.dumps(status, ensure_ascii=False, indent=2))
+    return 1 if status['status'] == 'falhou' else 0
+
+
+def _abrir_arquivo(args):
+    """Abre o arquivo de execuções da configuração (None se o arquivamento está desabilitado)"""
+    from utils.config_loader import ConfigLoader
+    from utils.arquivamento import ArquivoSaidas
+    
+    config = ConfigLoader(args.config).get_config()
+    competencia = args.competencia or config['regras_negocio']['competencia_referencia']
+    return ArquivoSaidas.from_config(config), competencia, config
+
+
+def _cmd_archives(args) -> int:
+    """Lista as execuções arquivadas de uma competência (ou de todas)"""
+    arquivo, competencia, _ = _abrir_arquivo(args)
+    if arquivo is None:
+        print("Arquivamento desabilitado (arquivamento.habilitado)")
+        return 1
+    
+    competencias = arquivo.competencias() if args.todas else [competencia]
+    for particao in competencias:
+        for manifesto in arquivo.listar(particao):
+            print(f"{particao}  {manifesto['execucao']:<20}  {manifesto['arquivado_em'][:19]}  "
+                  f"{len(manifesto['arquivos']):>3} arquivos  {manifesto['bytes']:>12,} bytes")
+    return 0
+
+
+def _cmd_restore(args) -> int:
+    """Restaura os arquivos de uma execução arquivada"""
+    arquivo, competencia, config = _abrir_arquivo(args)
+    if arquivo is None:
+        print("Arquivamento desabilitado (arquivamento.habilitado)")
+        return 1
+    
+    destino = args.destino or str(
+        Path(config['arquivos']['diretorio_saida']) / f"restaurado_{competencia.replace('-', '_')}_{args.execucao}"
+    )
+    restaurados = arquivo.restaurar(competencia, args.execucao, destino)
+    print(f"{len(restaurados)} arquivos da execução {args.execucao} restaurados em {destino}")
+    for caminho in restaurados:
+        print(f"  {caminho}")
+    return 0
+
+
+def _criar_parser() -> argparse.ArgumentParser:
+    """Cria o parser de argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description="Sistema de Processamento VR")
+    parser.add_argument('--config', default=str(CONFIG_PADRAO), help="Arquivo de configuração YAML")
+    
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    p_run = subparsers.add_parser('run', help="Executa o processamento completo")
+    p_run.add_argument('--resume-from', choices=['fase_3', 'fase_4'],
+                       help="Retoma a partir da fase usando o último checkpoint válido")
+    p_run.set_defaults(func=_cmd_run)
+    
+    p_validate = subparsers.add_parser('validate', help="Valida configuração e arquivos obrigatórios")
+    p_validate.add_argument('--dados', action='store_true', help="Também extrai e valida os dados de entrada")
+    p_validate.set_defaults(func=_cmd_validate)
+    
+    p_integrity = subparsers.add_parser('integrity', help="Verifica a integridade dos arquivos de entrada")
+    p_integrity.set_defaults(func=_cmd_integrity)
+    
+    p_explain = subparsers.add_parser('explain', help="Explica o cálculo de VR de uma matrícula")
+    p_explain.add_argument('matricula', type=int, help="Matrícula do colaborador")
+    p_explain.add_argument('--publicado', action='store_true',
+                           help="Usa o último consolidado publicado em vez de reprocessar as planilhas")
+    p_explain.set_defaults(func=_cmd_explain)
+    
+    p_bench = subparsers.add_parser('bench', help="Mede a inicialização da CLI, a consolidação paralela ou a memória")
+    p_bench.add_argument('--alvo', choices=['inicializacao', 'consolidacao', 'memoria', 'motores', 'leitores'],
+                         default='inicializacao',
+                         help="O que medir (padrão: inicializacao)")
+    p_bench.add_argument('--repeticoes', type=int, default=5, help="Execuções por comando/cenário")
+    p_bench.add_argument('--orcamento-ms', type=float, default=500.0,
+                         help="Orçamento de inicialização (mediana) em milissegundos")
+    p_bench.add_argument('--linhas', type=int, default=20000,
+                         help="Colaboradores sintéticos na consolidação ou na leitura (padrão: 20000)")
+    p_bench.add_argument('--workers', default='1,2,4', help="Workers a medir, separados por vírgula")
+    p_bench.add_argument('--motores', default='pandas,sql,polars',
+                         help="Motores de consolidação a comparar, separados por vírgula")
+    p_bench.add_argument('--escalas', default='100000,1000000',
+                         help="Colaboradores sintéticos por escala na comparação de motores")
+    p_bench.add_argument('--chave', choices=['EMPRESA', 'sindicato_normalizado'], default='EMPRESA',
+                         help="Chave de particionamento da consolidação")
+    p_bench.set_defaults(func=_cmd_bench)
+    
+    p_serve = subparsers.add_parser('serve', help="Inicia o serviço local (HTTP ou socket Unix)")
+    p_serve.add_argument('--host', help="Endereço TCP (padrão: servico.host)")
+    p_serve.add_argument('--porta', type=int, help="Porta TCP (padrão: servico.porta)")
+    p_serve.add_argument('--socket', help="Caminho de socket Unix (substitui host/porta)")
+    p_serve.add_argument('--workers', type=int, help="Processos no pool (padrão: servico.workers)")
+    p_serve.set_defaults(func=_cmd_serve)
+    
+    p_submit = subparsers.add_parser('submit', help="Submete um job ao serviço local")
+    p_submit.add_argument('--diretorio-entrada', help="Diretório com os arquivos de entrada")
+    p_submit.add_argument('--competencia', help="Competência no formato AAAA-MM")
+    p_submit.add_argument('--diretorio-saida', help="Diretório para os relatórios gerados")
+    p_submit.add_argument('--host', help="Endereço TCP do serviço")
+    p_submit.add_argument('--porta', type=int, help="Porta TCP do serviço")
+    p_submit.add_argument('--socket', help="Caminho de socket Unix do serviço")
+    p_submit.set_defaults(func=_cmd_submit)
+    
+    p_watch = subparsers.add_parser('watch', help="Reprocessa quando arquivos de entrada são gravados")
+    p_watch.add_argument('--modo', choices=['auto', 'inotify', 'polling'],
+                         help="Mecanismo de observação (padrão: observador.modo)")
+    p_watch.add_argument('--debounce', type=float,
+                         help="Segundos sem gravações antes de reprocessar (padrão: observador.debounce_segundos)")
+    p_watch.set_defaults(func=_cmd_watch)
+    
+    p_enqueue = subparsers.add_parser('enqueue', help="Publica um processamento na fila distribuída")
+    p_enqueue.add_argument('--diretorio-entrada', help="Diretório com os arquivos de entrada (compartilhado)")
+    p_enqueue.add_argument('--competencia', help="Competência no formato AAAA-MM")
+    p_enqueue.add_argument('--diretorio-saida', help="Diretório para os relatórios gerados (compartilhado)")
+    p_enqueue.add_argument('--particoes', type=int, help="Tarefas de consolidação (padrão: fila.particoes)")
+    p_enqueue.add_argument('--chave', choices=['EMPRESA', 'sindicato_normalizado'],
+                           help="Chave de particionamento (padrão: fila.chave)")
+    p_enqueue.add_argument('--fila', help="Banco SQLite da fila (padrão: arquivos.diretorio_fila)")
+    p_enqueue.set_defaults(func=_cmd_enqueue)
+    
+    p_worker = subparsers.add_parser('worker', help="Executa tarefas da fila distribuída")
+    p_worker.add_argument('--processos', type=int, default=1, help="Workers neste host (padrão: 1)")
+    p_worker.add_argument('--nome', help="Identificação do worker (padrão: host:pid)")
+    p_worker.add_argument('--max-tarefas', type=int, help="Encerra após executar este número de tarefas")
+    p_worker.add_argument('--sair-quando-vazia', action='store_true',
+                          help="Encerra quando não houver tarefas pendentes")
+    p_worker.add_argument('--fila', help="Banco SQLite da fila (padrão: arquivos.diretorio_fila)")
+    p_worker.set_defaults(func=_cmd_worker)
+    
+    p_queue = subparsers.add_parser('queue-status', help="Mostra os jobs da fila distribuída")
+    p_queue.add_argument('job_id', nargs='?', help="Job a detalhar (omitido: lista todos)")
+    p_queue.add_argument('--fila', help="Banco SQLite da fila (padrão: arquivos.diretorio_fila)")
+    p_queue.set_defaults(func=_cmd_queue_status)
+    
+    p_archives = subparsers.add_parser('archives', help="Lista as execuções arquivadas")
+    p_archives.add_argument('--competencia', help="Competência no formato AAAA-MM (padrão: a da configuração)")
+    p_archives.add_argument('--todas', action='store_true', help="Lista todas as competências arquivadas")
+    p_archives.set_defaults(func=_cmd_archives)
+    
+    p_restore = subparsers.add_parser('restore', help="Restaura uma execução arquivada sem reprocessar")
+    p_restore.add_argument('execucao', help="Identificador da execução (ver archives)")
+    p_restore.add_argument('--competencia', help="Competência no formato AAAA-MM (padrão: a da configuração)")
+    p_restore.add_argument('--destino', help="Diretório de destino (padrão: restaurado_<competencia>_<execucao> na saída)")
+    p_restore.set_defaults(func=_cmd_restore)
+    
+    parser.set_defaults(func=_cmd_run, resume_from=None)
+    return parser
+
+
+def main(argv=None):
+    """Função principal"""
+    args = _criar_parser().parse_args(argv)
+    
+    try:
+        return args.func(args)
         
     except Exception as e:
         print(f"\nERRO: {str(e)}")
@@ -56,4 +571,3 @@ def main():
 
 if __name__ == "__main__":
     sys.exit(main())
-
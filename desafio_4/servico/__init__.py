@@ -0,0 +1,28 @@
+"""
+Modo serviço do Sistema de Processamento VR
+
+Servidor local (HTTP sobre TCP ou socket Unix) que mantém configuração e bases
+de referência carregadas entre execuções, o cliente correspondente, o
+observador que reprocessa quando arquivos de entrada são gravados e a fila
+durável para distribuir o processamento entre vários workers e hosts.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    'ServidorVR': '.servidor',
+    'ClienteVR': '.cliente',
+    'ObservadorEntrada': '.observador',
+    'FilaTarefas': '.fila',
+    'TrabalhadorFila': '.distribuido',
+    'publicar_processamento': '.distribuido'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Importa o componente solicitado apenas no primeiro acesso"""
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
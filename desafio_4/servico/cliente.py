@@ -0,0 +1,105 @@
+"""
+Cliente do Serviço Local do Sistema de Processamento VR
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import http.client
+import json
+import socket
+from typing import Dict, Any, Iterator, List
+
+
+class _ConexaoUnix(http.client.HTTPConnection):
+    """Conexão HTTP sobre socket Unix"""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ClienteVR:
+    """Cliente para submeter e acompanhar jobs no serviço VR"""
+
+    def __init__(self, host: str = '127.0.0.1', porta: int = 8765, socket_path: str = None,
+                 timeout: float = None):
+        """Inicializa o cliente (socket_path tem precedência sobre host/porta)"""
+        self.host = host
+        self.porta = porta
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _conexao(self) -> http.client.HTTPConnection:
+        """Abre uma conexão com o serviço"""
+        if self.socket_path:
+            return _ConexaoUnix(self.socket_path, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+
+    def _requisitar(self, metodo: str, caminho: str, corpo: Dict[str, Any] = None) -> Any:
+        """Executa uma requisição e retorna o JSON da resposta"""
+        conexao = self._conexao()
+        try:
+            dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+            cabecalhos = {'Content-Type': 'application/json'} if dados is not None else {}
+            conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+
+            resposta = conexao.getresponse()
+            conteudo = json.loads(resposta.read().decode('utf-8'))
+            if resposta.status >= 400:
+                raise RuntimeError(f"Erro do serviço ({resposta.status}): {conteudo.get('erro')}")
+            return conteudo
+        finally:
+            conexao.close()
+
+    def saude(self) -> Dict[str, Any]:
+        """Retorna o estado do serviço"""
+        return self._requisitar('GET', '/saude')
+
+    def listar_jobs(self) -> List[Dict[str, Any]]:
+        """Lista os jobs submetidos"""
+        return self._requisitar('GET', '/jobs')
+
+    def submeter(self, diretorio_entrada: str = None, competencia: str = None,
+                 diretorio_saida: str = None) -> Dict[str, Any]:
+        """Submete um job de processamento"""
+        return self._requisitar('POST', '/jobs', {
+            'diretorio_entrada': diretorio_entrada,
+            'competencia': competencia,
+            'diretorio_saida': diretorio_saida
+        })
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Retorna o estado e o resultado de um job"""
+        return self._requisitar('GET', f'/jobs/{job_id}')
+
+    def acompanhar(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Itera sobre os eventos de progresso do job até sua conclusão"""
+        conexao = self._conexao()
+        try:
+            conexao.request('GET', f'/jobs/{job_id}/eventos')
+            resposta = conexao.getresponse()
+            if resposta.status >= 400:
+                conteudo = json.loads(resposta.read().decode('utf-8'))
+                raise RuntimeError(f"Erro do serviço ({resposta.status}): {conteudo.get('erro')}")
+
+            while True:
+                linha = resposta.readline()
+                if not linha:
+                    break
+                yield json.loads(linha.decode('utf-8'))
+        finally:
+            conexao.close()
+
+    def executar(self, diretorio_entrada: str = None, competencia: str = None,
+                 diretorio_saida: str = None) -> Dict[str, Any]:
+        """Submete um job e aguarda sua conclusão, retornando o evento final"""
+        job = self.submeter(diretorio_entrada, competencia, diretorio_saida)
+        evento = None
+        for evento in self.acompanhar(job['id']):
+            pass
+        return evento
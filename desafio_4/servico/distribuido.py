@@ -0,0 +1,235 @@
+"""
+Processamento Distribuído - Sistema de Processamento VR
+Divide o pipeline em tarefas (extração, consolidação por partição, relatório)
+publicadas na fila durável e executadas por qualquer número de workers
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import os
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional
+
+from utils.config_loader import ConfigLoader
+from servico.fila import FilaTarefas
+
+
+def _gravar_atomico(objeto, caminho: Path):
+    """Grava um objeto com pickle sem expor arquivos parciais a outros workers"""
+    import pandas as pd
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    pd.to_pickle(objeto, temporario)
+    os.replace(temporario, caminho)
+
+
+def publicar_processamento(fila: FilaTarefas, particoes: int, chave: str = 'EMPRESA',
+                           diretorio_entrada: str = None, competencia: str = None,
+                           diretorio_saida: str = None) -> str:
+    """Publica um processamento completo como tarefas encadeadas na fila
+
+    extracao -> consolidacao (uma tarefa por partição) -> relatorio
+    """
+    if competencia and not re.fullmatch(r'\d{4}-\d{2}', str(competencia)):
+        raise ValueError(f"Competência inválida (esperado AAAA-MM): {competencia}")
+
+    parametros = {
+        'diretorio_entrada': str(Path(diretorio_entrada).resolve()) if diretorio_entrada else None,
+        'diretorio_saida': str(Path(diretorio_saida).resolve()) if diretorio_saida else None,
+        'competencia': competencia,
+        'particoes': particoes,
+        'chave': chave
+    }
+
+    tarefas = [{'tipo': 'extracao'}]
+    tarefas += [{'tipo': 'consolidacao', 'particao': i, 'dependencias': [0]} for i in range(particoes)]
+    tarefas.append({'tipo': 'relatorio', 'dependencias': list(range(1, particoes + 1))})
+
+    return fila.publicar(parametros, tarefas)
+
+
+class TrabalhadorFila:
+    """Worker que reivindica e executa tarefas da fila até ser interrompido
+
+    Os arquivos intermediários de cada job ficam em <diretório da fila>/jobs/<id>/,
+    que precisa ser compartilhado entre os hosts, assim como os diretórios de
+    entrada e saída informados no job.
+    """
+
+    def __init__(self, fila: FilaTarefas, config_path: str = None, nome: str = None,
+                 duracao_lease: float = None, intervalo_consulta: float = None,
+                 ao_concluir: Callable[[Dict[str, Any]], None] = None):
+        """Inicializa o worker"""
+        self.fila = fila
+        self.config_path = config_path
+        self.config_loader = ConfigLoader(config_path)
+        config_fila = self.config_loader.get_config().get('fila', {})
+
+        self.nome = nome or f"{socket.gethostname()}:{os.getpid()}"
+        self.duracao_lease = duracao_lease or config_fila.get('duracao_lease_segundos', 120)
+        self.intervalo_consulta = intervalo_consulta or config_fila.get('intervalo_consulta_segundos', 1.0)
+        self.ao_concluir = ao_concluir
+        self.tarefas_executadas = 0
+
+    def _diretorio_job(self, job_id: str) -> Path:
+        return self.fila.diretorio / 'jobs' / job_id
+
+    def _config_job(self, tarefa: Dict[str, Any]) -> ConfigLoader:
+        """Configuração deste worker com as sobrescritas do job"""
+        parametros = tarefa['job_parametros']
+        return self.config_loader.derivar(
+            parametros['diretorio_entrada'], parametros['diretorio_saida'], parametros['competencia']
+        )
+
+    def _tarefa_extracao(self, tarefa: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrai e valida as entradas e grava os dados de cada partição"""
+        from agentes.extrator_validador import ExtratorValidador
+        from agentes.consolidador_regras import ConsolidadorRegras
+        from utils.logger import VRLoggerMemoria
+
+        config_loader = self._config_job(tarefa)
+        parametros = tarefa['job_parametros']
+        logger = VRLoggerMemoria(config_loader.get_config())
+
+        # A quarentena é gravada pelo worker do relatório, depois do arquivamento das saídas anteriores
+        extrator = ExtratorValidador(logger, config_loader)
+        extrator.gravar_quarentena = False
+        dados_validados = extrator.executar()
+        if 'ativos' not in dados_validados:
+            raise ValueError("Base de colaboradores ativos não foi carregada")
+
+        bases, tarefas = ConsolidadorRegras(logger, config_loader).preparar_particoes(
+            dados_validados, parametros['chave'], parametros['particoes']
+        )
+
+        diretorio = self._diretorio_job(tarefa['job_id'])
+        for i, dados_particao in enumerate(tarefas):
+            _gravar_atomico((bases, dados_particao), diretorio / 'particoes' / f'{i}.pkl')
+        _gravar_atomico((dados_validados, extrator.qualidade, logger.registros, logger.stats),
+                        diretorio / 'extracao.pkl')
+
+        return {
+            'registros_ativos': len(dados_validados['ativos']),
+            'particoes_com_dados': len(tarefas)
+        }
+
+    def _tarefa_consolidacao(self, tarefa: Dict[str, Any]) -> Dict[str, Any]:
+        """Consolida uma partição"""
+        import pandas as pd
+        from agentes.consolidador_regras import consolidar_particao
+        from utils.dinheiro import em_reais
+
+        diretorio = self._diretorio_job(tarefa['job_id'])
+        arquivo = diretorio / 'particoes' / f"{tarefa['particao']}.pkl"
+        if not arquivo.exists():
+            # Há menos valores distintos da chave do que partições publicadas
+            return {'colaboradores': 0}
+
+        bases, dados_particao = pd.read_pickle(arquivo)
+        df, registros, stats = consolidar_particao(self._config_job(tarefa), bases, dados_particao)
+        _gravar_atomico((df, registros, stats), diretorio / 'resultados' / f"{tarefa['particao']}.pkl")
+
+        elegiveis = df['elegivel'] == True
+        return {
+            'colaboradores': len(df),
+            'colaboradores_elegiveis': int(elegiveis.sum()),
+            'valor_total': em_reais(df.loc[elegiveis, 'valor_total_centavos'].sum())
+        }
+
+    def _tarefa_relatorio(self, tarefa: Dict[str, Any]) -> Dict[str, Any]:
+        """Mescla as partições na ordem e gera os relatórios do job (incluindo a quarentena)"""
+        import pandas as pd
+        from agentes.orquestrador import OrquestradorVR
+
+        diretorio = self._diretorio_job(tarefa['job_id'])
+        dados_validados, qualidade, registros, stats = pd.read_pickle(diretorio / 'extracao.pkl')
+        resultados = [
+            pd.read_pickle(diretorio / 'resultados' / f'{i}.pkl')
+            for i in range(tarefa['job_parametros']['particoes'])
+            if (diretorio / 'resultados' / f'{i}.pkl').exists()
+        ]
+
+        orquestrador = OrquestradorVR(self.config_path, config_loader=self._config_job(tarefa))
+        try:
+            orquestrador.logger.mesclar(registros, stats)
+            resultado = orquestrador.executar_a_partir_de_particoes(dados_validados, resultados, qualidade)
+        finally:
+            orquestrador.fechar()
+
+        return {
+            'arquivo_relatorio': resultado['arquivo_relatorio'],
+            'arquivos_log': resultado['arquivos_log'],
+            'resumo': {k: v.item() if hasattr(v, 'item') else v for k, v in resultado['resumo'].items()}
+        }
+
+    def executar_tarefa(self, tarefa: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa uma tarefa conforme o tipo"""
+        executores = {
+            'extracao': self._tarefa_extracao,
+            'consolidacao': self._tarefa_consolidacao,
+            'relatorio': self._tarefa_relatorio
+        }
+        if tarefa['tipo'] not in executores:
+            raise ValueError(f"Tipo de tarefa desconhecido: {tarefa['tipo']}")
+        return executores[tarefa['tipo']](tarefa)
+
+    def _manter_lease(self, tarefa_id: int, parar: threading.Event):
+        """Renova o lease periodicamente enquanto a tarefa executa"""
+        while not parar.wait(self.duracao_lease / 3):
+            if not self.fila.renovar_lease(tarefa_id, self.nome, self.duracao_lease):
+                return
+
+    def processar_proxima(self) -> Optional[Dict[str, Any]]:
+        """Reivindica e executa uma tarefa; None se não houver tarefa pronta"""
+        tarefa = self.fila.reivindicar(self.nome, self.duracao_lease)
+        if tarefa is None:
+            return None
+
+        parar = threading.Event()
+        renovacao = threading.Thread(target=self._manter_lease, args=(tarefa['id'], parar), daemon=True)
+        renovacao.start()
+
+        inicio = time.perf_counter()
+        execucao = {'tarefa_id': tarefa['id'], 'job_id': tarefa['job_id'], 'tipo': tarefa['tipo'],
+                    'particao': tarefa['particao'], 'tentativa': tarefa['tentativas']}
+        try:
+            resultado = self.executar_tarefa(tarefa)
+            resultado['duracao_segundos'] = round(time.perf_counter() - inicio, 3)
+            execucao['aceita'] = self.fila.concluir(tarefa['id'], self.nome, resultado)
+            execucao['resultado'] = resultado
+        except Exception as e:
+            self.fila.falhar(tarefa['id'], self.nome, f"{type(e).__name__}: {e}")
+            execucao['erro'] = str(e)
+        finally:
+            parar.set()
+            renovacao.join()
+
+        self.tarefas_executadas += 1
+        if self.ao_concluir is not None:
+            self.ao_concluir(execucao)
+        return execucao
+
+    def trabalhar(self, max_tarefas: int = None, sair_quando_vazia: bool = False):
+        """Executa tarefas em sequência, aguardando novas quando a fila está vazia"""
+        while max_tarefas is None or self.tarefas_executadas < max_tarefas:
+            if self.processar_proxima() is not None:
+                continue
+            if sair_quando_vazia and self.fila.pendentes() == 0:
+                return
+            time.sleep(self.intervalo_consulta)
+
+
+def executar_trabalhador(config_path: str = None, caminho_fila: str = None, nome: str = None,
+                         max_tarefas: int = None, sair_quando_vazia: bool = False,
+                         ao_concluir: Callable[[Dict[str, Any]], None] = None) -> int:
+    """Cria a fila e um worker e executa tarefas (alvo dos processos iniciados pela CLI)"""
+    config_loader = ConfigLoader(config_path)
+    fila = FilaTarefas.from_config(config_loader.get_config(), caminho_fila)
+    trabalhador = TrabalhadorFila(fila, config_path, nome=nome, ao_concluir=ao_concluir)
+    trabalhador.trabalhar(max_tarefas, sair_quando_vazia)
+    return trabalhador.tarefas_executadas
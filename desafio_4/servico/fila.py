@@ -0,0 +1,314 @@
+"""
+Fila Durável de Tarefas - Sistema de Processamento VR
+Fila em SQLite compartilhada por workers locais ou em outros hosts
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    criado_em REAL NOT NULL,
+    parametros TEXT NOT NULL,
+    status TEXT NOT NULL,
+    resultado TEXT,
+    erro TEXT
+);
+CREATE TABLE IF NOT EXISTS tarefas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    tipo TEXT NOT NULL,
+    particao INTEGER,
+    parametros TEXT NOT NULL,
+    status TEXT NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    max_tentativas INTEGER NOT NULL,
+    disponivel_em REAL NOT NULL,
+    lease_ate REAL,
+    worker TEXT,
+    resultado TEXT,
+    erro TEXT
+);
+CREATE TABLE IF NOT EXISTS dependencias (
+    tarefa_id INTEGER NOT NULL REFERENCES tarefas(id),
+    depende_de INTEGER NOT NULL REFERENCES tarefas(id),
+    PRIMARY KEY (tarefa_id, depende_de)
+);
+CREATE INDEX IF NOT EXISTS idx_tarefas_status ON tarefas(status, disponivel_em);
+"""
+
+# Tarefa pronta: pendente (ou com lease vencido), job ativo e todas as dependências concluídas
+_SQL_PRONTAS = """
+SELECT t.* FROM tarefas t JOIN jobs j ON j.id = t.job_id
+WHERE j.status = 'executando'
+  AND ((t.status = 'pendente' AND t.disponivel_em <= :agora)
+       OR (t.status = 'executando' AND t.lease_ate < :agora))
+  AND NOT EXISTS (
+      SELECT 1 FROM dependencias d JOIN tarefas dep ON dep.id = d.depende_de
+      WHERE d.tarefa_id = t.id AND dep.status != 'concluida')
+ORDER BY t.id
+"""
+
+
+class FilaTarefas:
+    """Fila de tarefas com leases, novas tentativas e agregação de resultados
+
+    Cada operação abre sua própria conexão e as reivindicações usam BEGIN IMMEDIATE,
+    de modo que vários processos (ou hosts que compartilham o diretório) podem
+    consumir a mesma fila. Um worker que morre perde o lease e a tarefa volta a
+    ficar disponível; cada reivindicação conta como uma tentativa.
+    """
+
+    def __init__(self, caminho: str, max_tentativas: int = 3, espera_retentativa: float = 5.0):
+        """Inicializa a fila, criando o banco se necessário"""
+        self.caminho = Path(caminho)
+        self.max_tentativas = max_tentativas
+        self.espera_retentativa = espera_retentativa
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conectar()) as conexao:
+            conexao.executescript(ESQUEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], caminho: str = None) -> 'FilaTarefas':
+        """Cria a fila a partir da configuração do sistema (caminho substitui o banco configurado)"""
+        secao = config.get('fila', {})
+        return cls(
+            caminho or str(Path(config['arquivos']['diretorio_fila']) / secao.get('arquivo', 'fila_vr.db')),
+            max_tentativas=secao.get('max_tentativas', 3),
+            espera_retentativa=secao.get('espera_retentativa_segundos', 5.0)
+        )
+
+    @property
+    def diretorio(self) -> Path:
+        """Diretório compartilhado da fila (banco e arquivos intermediários dos jobs)"""
+        return self.caminho.parent
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexao = sqlite3.connect(str(self.caminho), timeout=30, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        return conexao
+
+    @staticmethod
+    def _tarefa(row: sqlite3.Row) -> Dict[str, Any]:
+        tarefa = dict(row)
+        tarefa['parametros'] = json.loads(tarefa['parametros'])
+        tarefa['resultado'] = json.loads(tarefa['resultado']) if tarefa['resultado'] else None
+        return tarefa
+
+    def publicar(self, parametros: Dict[str, Any], tarefas: List[Dict[str, Any]]) -> str:
+        """Publica um job e suas tarefas em uma única transação
+
+        Cada tarefa é um dict com 'tipo', 'particao' (opcional), 'parametros' (opcional)
+        e 'dependencias': índices de tarefas anteriores na mesma lista.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        agora = time.time()
+
+        conexao = self._conectar()
+        try:
+            conexao.execute("BEGIN IMMEDIATE")
+            conexao.execute(
+                "INSERT INTO jobs (id, criado_em, parametros, status) VALUES (?, ?, ?, 'executando')",
+                (job_id, agora, json.dumps(parametros))
+            )
+
+            ids = []
+            for tarefa in tarefas:
+                cursor = conexao.execute(
+                    "INSERT INTO tarefas (job_id, tipo, particao, parametros, status, max_tentativas, disponivel_em) "
+                    "VALUES (?, ?, ?, ?, 'pendente', ?, ?)",
+                    (job_id, tarefa['tipo'], tarefa.get('particao'), json.dumps(tarefa.get('parametros', {})),
+                     self.max_tentativas, agora)
+                )
+                ids.append(cursor.lastrowid)
+                conexao.executemany(
+                    "INSERT INTO dependencias (tarefa_id, depende_de) VALUES (?, ?)",
+                    [(cursor.lastrowid, ids[i]) for i in tarefa.get('dependencias', [])]
+                )
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+        return job_id
+
+    def reivindicar(self, worker: str, duracao_lease: float) -> Optional[Dict[str, Any]]:
+        """Reivindica a próxima tarefa pronta, com lease de duracao_lease segundos"""
+        conexao = self._conectar()
+        try:
+            conexao.execute("BEGIN IMMEDIATE")
+            agora = time.time()
+            for row in conexao.execute(_SQL_PRONTAS, {'agora': agora}).fetchall():
+                if row['tentativas'] >= row['max_tentativas']:
+                    # Lease vencido na última tentativa: o worker morreu durante a execução
+                    self._registrar_falha_definitiva(conexao, row['id'], row['job_id'],
+                                                     "Lease expirado na última tentativa")
+                    continue
+
+                conexao.execute(
+                    "UPDATE tarefas SET status = 'executando', worker = ?, lease_ate = ?, "
+                    "tentativas = tentativas + 1 WHERE id = ?",
+                    (worker, agora + duracao_lease, row['id'])
+                )
+                tarefa = self._tarefa(conexao.execute("SELECT * FROM tarefas WHERE id = ?", (row['id'],)).fetchone())
+                tarefa['job_parametros'] = json.loads(
+                    conexao.execute("SELECT parametros FROM jobs WHERE id = ?", (row['job_id'],)).fetchone()[0]
+                )
+                conexao.execute("COMMIT")
+                return tarefa
+
+            conexao.execute("COMMIT")
+            return None
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+    def renovar_lease(self, tarefa_id: int, worker: str, duracao_lease: float) -> bool:
+        """Estende o lease de uma tarefa em execução; False se o worker não a detém mais"""
+        with closing(self._conectar()) as conexao:
+            cursor = conexao.execute(
+                "UPDATE tarefas SET lease_ate = ? WHERE id = ? AND worker = ? AND status = 'executando'",
+                (time.time() + duracao_lease, tarefa_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def concluir(self, tarefa_id: int, worker: str, resultado: Dict[str, Any]) -> bool:
+        """Registra o resultado de uma tarefa e conclui o job quando todas as tarefas terminarem"""
+        conexao = self._conectar()
+        try:
+            conexao.execute("BEGIN IMMEDIATE")
+            cursor = conexao.execute(
+                "UPDATE tarefas SET status = 'concluida', resultado = ?, lease_ate = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'executando'",
+                (json.dumps(resultado), tarefa_id, worker)
+            )
+            if cursor.rowcount != 1:
+                # O lease venceu e outro worker assumiu a tarefa: este resultado é descartado
+                conexao.execute("ROLLBACK")
+                return False
+
+            job_id = conexao.execute("SELECT job_id FROM tarefas WHERE id = ?", (tarefa_id,)).fetchone()[0]
+            restantes = conexao.execute(
+                "SELECT COUNT(*) FROM tarefas WHERE job_id = ? AND status != 'concluida'", (job_id,)
+            ).fetchone()[0]
+            if restantes == 0:
+                conexao.execute(
+                    "UPDATE jobs SET status = 'concluido', resultado = ? WHERE id = ?",
+                    (json.dumps(self._agregar_resultados(conexao, job_id)), job_id)
+                )
+            conexao.execute("COMMIT")
+            return True
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+    def falhar(self, tarefa_id: int, worker: str, erro: str):
+        """Registra uma falha: a tarefa volta à fila com espera exponencial até esgotar as tentativas"""
+        conexao = self._conectar()
+        try:
+            conexao.execute("BEGIN IMMEDIATE")
+            row = conexao.execute(
+                "SELECT * FROM tarefas WHERE id = ? AND worker = ? AND status = 'executando'",
+                (tarefa_id, worker)
+            ).fetchone()
+
+            if row is not None:
+                if row['tentativas'] >= row['max_tentativas']:
+                    self._registrar_falha_definitiva(conexao, tarefa_id, row['job_id'], erro)
+                else:
+                    espera = self.espera_retentativa * 2 ** (row['tentativas'] - 1)
+                    conexao.execute(
+                        "UPDATE tarefas SET status = 'pendente', erro = ?, lease_ate = NULL, disponivel_em = ? "
+                        "WHERE id = ?",
+                        (erro, time.time() + espera, tarefa_id)
+                    )
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+    @staticmethod
+    def _registrar_falha_definitiva(conexao: sqlite3.Connection, tarefa_id: int, job_id: str, erro: str):
+        conexao.execute(
+            "UPDATE tarefas SET status = 'falhou', erro = ?, lease_ate = NULL WHERE id = ?", (erro, tarefa_id)
+        )
+        conexao.execute(
+            "UPDATE jobs SET status = 'falhou', erro = ? WHERE id = ?", (f"Tarefa {tarefa_id}: {erro}", job_id)
+        )
+
+    @staticmethod
+    def _agregar_resultados(conexao: sqlite3.Connection, job_id: str) -> Dict[str, Any]:
+        """Agrega os resultados das tarefas: o da última etapa e o das partições em ordem"""
+        rows = conexao.execute(
+            "SELECT tipo, particao, resultado, worker FROM tarefas WHERE job_id = ? ORDER BY id", (job_id,)
+        ).fetchall()
+
+        agregado = {'particoes': [], 'workers': sorted({row['worker'] for row in rows if row['worker']})}
+        for row in rows:
+            resultado = json.loads(row['resultado']) if row['resultado'] else None
+            if row['particao'] is not None:
+                agregado['particoes'].append({'particao': row['particao'], **(resultado or {})})
+            else:
+                agregado[row['tipo']] = resultado
+        return agregado
+
+    def status_job(self, job_id: str) -> Dict[str, Any]:
+        """Estado do job, contagem de tarefas por status e resultado agregado"""
+        with closing(self._conectar()) as conexao:
+            job = conexao.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                raise KeyError(f"Job não encontrado: {job_id}")
+
+            tarefas = [self._tarefa(row) for row in conexao.execute(
+                "SELECT * FROM tarefas WHERE job_id = ? ORDER BY id", (job_id,)
+            ).fetchall()]
+
+        contagem = {}
+        for tarefa in tarefas:
+            contagem[tarefa['status']] = contagem.get(tarefa['status'], 0) + 1
+
+        return {
+            'id': job['id'],
+            'status': job['status'],
+            'parametros': json.loads(job['parametros']),
+            'tarefas_por_status': contagem,
+            'tarefas': [
+                {k: tarefa[k] for k in ('id', 'tipo', 'particao', 'status', 'tentativas', 'worker', 'erro')}
+                for tarefa in tarefas
+            ],
+            'resultado': json.loads(job['resultado']) if job['resultado'] else None,
+            'erro': job['erro']
+        }
+
+    def listar_jobs(self) -> List[Dict[str, Any]]:
+        """Lista os jobs da fila, do mais recente para o mais antigo"""
+        with closing(self._conectar()) as conexao:
+            return [dict(row) for row in conexao.execute(
+                "SELECT id, criado_em, status, erro FROM jobs ORDER BY criado_em DESC"
+            ).fetchall()]
+
+    def pendentes(self) -> int:
+        """Número de tarefas ainda não finalizadas em jobs ativos"""
+        with closing(self._conectar()) as conexao:
+            return conexao.execute(
+                "SELECT COUNT(*) FROM tarefas t JOIN jobs j ON j.id = t.job_id "
+                "WHERE j.status = 'executando' AND t.status IN ('pendente', 'executando')"
+            ).fetchone()[0]
@@ -0,0 +1,214 @@
+"""
+Observador do Diretório de Entrada - Sistema de Processamento VR
+Reprocessa automaticamente quando arquivos de entrada são gravados
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Any, Callable, List, Optional, Set
+
+from utils.config_loader import ConfigLoader
+from utils.cache_arquivos import CacheArquivos
+
+
+# Eventos inotify de interesse (ver inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+MASCARA_INOTIFY = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_CABECALHO_EVENTO = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Acesso mínimo ao inotify do Linux via libc"""
+
+    def __init__(self, diretorio: str):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(diretorio), MASCARA_INOTIFY) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, f"inotify_add_watch falhou para {diretorio}")
+
+    def aguardar(self, timeout: Optional[float]) -> Set[str]:
+        """Aguarda eventos e retorna os nomes de arquivo afetados"""
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return set()
+
+        nomes = set()
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return nomes
+
+        posicao = 0
+        while posicao < len(dados):
+            _, _, _, tamanho = _CABECALHO_EVENTO.unpack_from(dados, posicao)
+            posicao += _CABECALHO_EVENTO.size
+            nome = dados[posicao:posicao + tamanho].rstrip(b'\0')
+            posicao += tamanho
+            if nome:
+                nomes.add(os.fsdecode(nome))
+        return nomes
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+class ObservadorEntrada:
+    """Observa o diretório de entrada e reprocessa apenas o que mudou"""
+
+    def __init__(self, config_path: str = None, modo: str = None, debounce_segundos: float = None,
+                 intervalo_polling: float = None,
+                 ao_concluir: Callable[[Dict[str, Any]], None] = None):
+        """Inicializa o observador"""
+        self.config_path = config_path
+        self.config_loader = ConfigLoader(config_path)
+        self.config = self.config_loader.get_config()
+
+        config_observador = self.config.get('observador', {})
+        self.modo = modo or config_observador.get('modo', 'auto')
+        self.debounce_segundos = debounce_segundos or config_observador.get('debounce_segundos', 2.0)
+        self.intervalo_polling = intervalo_polling or config_observador.get('intervalo_polling_segundos', 1.0)
+        self.ao_concluir = ao_concluir
+
+        self.diretorio_entrada = self.config['arquivos']['diretorio_entrada']
+        self.arquivos_por_nome = {nome: chave for chave, nome in self.config['arquivos_entrada'].items()}
+
+        # Arquivos já processados ficam em memória; a versão é o hash do conteúdo
+        self.cache_arquivos = CacheArquivos(por_conteudo=True)
+        self.hashes: Dict[str, Optional[str]] = {}
+        self._versoes_polling: Dict[str, Optional[tuple]] = {}
+
+        self._inotify = None
+        if self.modo in ('auto', 'inotify'):
+            try:
+                self._inotify = _Inotify(self.diretorio_entrada)
+            except (OSError, AttributeError):
+                if self.modo == 'inotify':
+                    raise
+        self.modo_efetivo = 'inotify' if self._inotify else 'polling'
+
+    def _caminho(self, arquivo_key: str) -> str:
+        return self.config_loader.get_file_path(arquivo_key)
+
+    def _versao_stat(self, arquivo_key: str) -> Optional[tuple]:
+        """Data de modificação e tamanho do arquivo (None se não existir)"""
+        try:
+            stat = os.stat(self._caminho(arquivo_key))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _aguardar_eventos(self, timeout: Optional[float]) -> Set[str]:
+        """Aguarda alterações em arquivos configurados (timeout=None bloqueia até haver alguma)"""
+        if self._inotify is not None:
+            while True:
+                nomes = self._inotify.aguardar(timeout)
+                relevantes = {self.arquivos_por_nome[n] for n in nomes if n in self.arquivos_por_nome}
+                if relevantes or timeout is not None:
+                    return relevantes
+
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            alterados = set()
+            for arquivo_key in self.arquivos_por_nome.values():
+                versao = self._versao_stat(arquivo_key)
+                if self._versoes_polling.get(arquivo_key) != versao:
+                    self._versoes_polling[arquivo_key] = versao
+                    alterados.add(arquivo_key)
+            if alterados or (limite is not None and time.monotonic() >= limite):
+                return alterados
+            time.sleep(self.intervalo_polling)
+
+    def _aguardar_rajada(self) -> Set[str]:
+        """Aguarda a primeira alteração e agrupa as seguintes até o fim da rajada de gravações"""
+        tocados = self._aguardar_eventos(None)
+        while True:
+            mais = self._aguardar_eventos(self.debounce_segundos)
+            if not mais:
+                return tocados
+            tocados |= mais
+
+    def detectar_alteracoes(self, candidatos: Set[str] = None) -> Set[str]:
+        """Compara o hash de conteúdo dos arquivos configurados com a última versão processada"""
+        alterados = set()
+        for arquivo_key in (candidatos or self.arquivos_por_nome.values()):
+            caminho = self._caminho(arquivo_key)
+            hash_atual = self.cache_arquivos.hash_conteudo(caminho) if os.path.exists(caminho) else None
+            if self.hashes.get(arquivo_key, '') != hash_atual:
+                self.hashes[arquivo_key] = hash_atual
+                alterados.add(arquivo_key)
+        return alterados
+
+    def etapas_afetadas(self, alterados: Set[str]) -> List[str]:
+        """Etapas do pipeline que precisam ser refeitas para os arquivos alterados"""
+        from agentes.extrator_validador import ExtratorValidador
+
+        consumidos = sorted(a for a in alterados if a in ExtratorValidador.ARQUIVOS_PROCESSADOS)
+        if not consumidos:
+            return []
+
+        # Só os arquivos alterados são relidos; os demais vêm do cache em memória
+        return [f"extracao:{a}" for a in consumidos] + ['consolidacao', 'relatorios']
+
+    def processar(self, alterados: Set[str]) -> Optional[Dict[str, Any]]:
+        """Reprocessa o pipeline para um conjunto de arquivos alterados"""
+        from agentes.orquestrador import OrquestradorVR
+
+        etapas = self.etapas_afetadas(alterados)
+        if not etapas:
+            return None
+
+        inicio = time.perf_counter()
+        resultado, erro = None, None
+        orquestrador = OrquestradorVR(self.config_path, cache_arquivos=self.cache_arquivos)
+        try:
+            orquestrador.logger.log_info(f"Reprocessamento por alteração em: {sorted(alterados)}")
+            resultado = orquestrador.executar_processamento_completo()
+        except Exception as e:
+            # Um arquivo com problema não encerra o observador; a próxima gravação dispara nova tentativa
+            erro = str(e)
+        finally:
+            orquestrador.fechar()
+
+        ciclo = {
+            'arquivos_alterados': sorted(alterados),
+            'etapas': etapas,
+            'duracao_segundos': round(time.perf_counter() - inicio, 3),
+            'resultado': resultado,
+            'erro': erro
+        }
+        if self.ao_concluir is not None:
+            self.ao_concluir(ciclo)
+        return ciclo
+
+    def observar(self, max_ciclos: int = None):
+        """Processa o estado atual e passa a reprocessar a cada rajada de alterações"""
+        self._versoes_polling = {k: self._versao_stat(k) for k in self.arquivos_por_nome.values()}
+        self.processar(self.detectar_alteracoes())
+
+        ciclos = 0
+        try:
+            while max_ciclos is None or ciclos < max_ciclos:
+                tocados = self._aguardar_rajada()
+                alterados = self.detectar_alteracoes(tocados)
+                if alterados:
+                    self.processar(alterados)
+                    ciclos += 1
+        finally:
+            if self._inotify is not None:
+                self._inotify.fechar()
@@ -0,0 +1,370 @@
+"""
+Servidor Local do Sistema de Processamento VR
+Mantém configuração, dependências e bases de referência em memória entre jobs
+Autor: Manus AI
+Data: 27/08/2025
+
+Rotas (JSON):
+    GET  /saude               Estado do serviço
+    GET  /jobs                Lista os jobs submetidos
+    POST /jobs                Submete um job {"diretorio_entrada", "competencia", "diretorio_saida"}
+    GET  /jobs/<id>           Estado e resultado de um job
+    GET  /jobs/<id>/eventos   Progresso do job em JSON por linha até a conclusão
+"""
+
+import asyncio
+import json
+import multiprocessing
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from utils.config_loader import ConfigLoader
+
+
+# Estado mantido em cada processo worker entre jobs
+_estado_worker: Dict[str, Any] = {}
+
+STATUS_FINAIS = {'concluido', 'erro'}
+
+
+def _json_default(obj):
+    """Converte tipos numpy e datas para JSON"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _inicializar_worker(config_path: str, arquivos_em_memoria: List[str], fila_eventos):
+    """Carrega dependências e configuração uma única vez por processo worker"""
+    from utils.cache_arquivos import CacheArquivos
+    from agentes.orquestrador import OrquestradorVR
+
+    _estado_worker.update({
+        'config_path': config_path,
+        'config_loader': ConfigLoader(config_path),
+        'cache_arquivos': CacheArquivos(arquivos_em_memoria),
+        'orquestrador_cls': OrquestradorVR,
+        'fila_eventos': fila_eventos
+    })
+
+
+def _executar_job(job_id: str, diretorio_entrada: Optional[str], diretorio_saida: Optional[str],
+                  competencia: Optional[str]):
+    """Executa um job no worker, publicando progresso e resultado na fila de eventos"""
+    fila = _estado_worker['fila_eventos']
+    cache = _estado_worker['cache_arquivos']
+
+    def publicar(tipo: str, dados: Dict[str, Any]):
+        fila.put(json.loads(json.dumps({'job_id': job_id, 'tipo': tipo, **dados}, default=_json_default)))
+
+    config_loader = _estado_worker['config_loader'].derivar(diretorio_entrada, diretorio_saida, competencia)
+    orquestrador = None
+
+    try:
+        orquestrador = _estado_worker['orquestrador_cls'](
+            _estado_worker['config_path'],
+            config_loader=config_loader,
+            cache_arquivos=cache,
+            callback_progresso=lambda evento: publicar('progresso', evento)
+        )
+        resultado = orquestrador.executar_processamento_completo()
+        publicar('concluido', {
+            'resultado': resultado,
+            'cache': {'acertos': cache.acertos, 'falhas': cache.falhas},
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        publicar('erro', {'mensagem': str(e), 'timestamp': datetime.now().isoformat()})
+
+    finally:
+        if orquestrador is not None:
+            orquestrador.fechar()
+
+
+class ServidorVR:
+    """Serviço asyncio que recebe jobs de processamento VR e os executa em um pool de workers"""
+
+    def __init__(self, config_path: str = None, host: str = None, porta: int = None,
+                 socket_path: str = None, workers: int = None):
+        """Inicializa o servidor com a configuração compilada uma única vez"""
+        self.config_loader = ConfigLoader(config_path)
+        self.config_path = str(self.config_loader.config_path)
+
+        config_servico = self.config_loader.get_config().get('servico', {})
+        self.host = host or config_servico.get('host', '127.0.0.1')
+        self.porta = porta or config_servico.get('porta', 8765)
+        self.socket_path = socket_path or config_servico.get('socket')
+        self.workers = workers or config_servico.get('workers', 2)
+        self.max_jobs_finalizados = config_servico.get('max_jobs_finalizados', 100)
+        self.arquivos_em_memoria = config_servico.get('arquivos_em_memoria', ['sindicato_valor', 'dias_uteis'])
+
+        # Jobs e assinantes de eventos (acessados apenas pelo event loop); dos jobs finalizados,
+        # só os max_jobs_finalizados mais recentes são mantidos
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._assinantes: Dict[str, List[asyncio.Queue]] = {}
+        self._locks_saida: Dict[str, asyncio.Lock] = {}
+
+        self._loop = None
+        self._pool = None
+        self._fila_eventos = None
+        self._thread_eventos = None
+        self._servidor = None
+
+    async def iniciar(self):
+        """Cria o pool de workers e começa a aceitar conexões"""
+        self._loop = asyncio.get_running_loop()
+
+        contexto = multiprocessing.get_context('spawn')
+        self._fila_eventos = contexto.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=contexto,
+            initializer=_inicializar_worker,
+            initargs=(self.config_path, self.arquivos_em_memoria, self._fila_eventos)
+        )
+
+        self._thread_eventos = threading.Thread(target=self._consumir_eventos, daemon=True)
+        self._thread_eventos.start()
+
+        if self.socket_path:
+            Path(self.socket_path).unlink(missing_ok=True)
+            self._servidor = await asyncio.start_unix_server(self._tratar_conexao, path=self.socket_path)
+        else:
+            self._servidor = await asyncio.start_server(self._tratar_conexao, self.host, self.porta)
+
+    async def servir(self):
+        """Inicia o serviço e atende requisições até ser interrompido"""
+        await self.iniciar()
+        try:
+            async with self._servidor:
+                await self._servidor.serve_forever()
+        finally:
+            await self.encerrar()
+
+    async def encerrar(self):
+        """Encerra o servidor, o pool de workers e a leitura de eventos"""
+        if self._servidor is not None:
+            self._servidor.close()
+        if self._pool is not None:
+            await self._loop.run_in_executor(None, self._pool.shutdown)
+        if self._fila_eventos is not None:
+            self._fila_eventos.put(None)
+            self._thread_eventos.join(timeout=5)
+        if self.socket_path:
+            Path(self.socket_path).unlink(missing_ok=True)
+
+    def endereco(self) -> str:
+        """Retorna o endereço em que o serviço está escutando"""
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        return f"http://{self.host}:{self.porta}"
+
+    def _consumir_eventos(self):
+        """Repassa ao event loop os eventos publicados pelos workers"""
+        while True:
+            evento = self._fila_eventos.get()
+            if evento is None:
+                break
+            self._loop.call_soon_threadsafe(self._registrar_evento, evento)
+
+    def _registrar_evento(self, evento: Dict[str, Any]):
+        """Registra um evento no job e o entrega aos assinantes"""
+        job = self.jobs.get(evento['job_id'])
+        if job is None or job['status'] in STATUS_FINAIS:
+            return
+
+        job['eventos'].append(evento)
+        if evento['tipo'] == 'progresso':
+            job['status'] = 'executando'
+            job['fase_atual'] = evento['fase']
+        elif evento['tipo'] == 'concluido':
+            job['status'] = 'concluido'
+            job['resultado'] = evento['resultado']
+        elif evento['tipo'] == 'erro':
+            job['status'] = 'erro'
+            job['erro'] = evento['mensagem']
+
+        for fila in self._assinantes.get(job['id'], []):
+            fila.put_nowait(evento)
+        
+        if job['status'] in STATUS_FINAIS:
+            self._descartar_finalizados()
+    
+    def _descartar_finalizados(self):
+        """Remove os jobs finalizados mais antigos além de max_jobs_finalizados
+        
+        Os assinantes de um job descartado já receberam o evento final e continuam
+        com a própria referência ao job até encerrar a transmissão.
+        """
+        finalizados = [job_id for job_id, job in self.jobs.items() if job['status'] in STATUS_FINAIS]
+        for job_id in finalizados[:max(0, len(finalizados) - self.max_jobs_finalizados)]:
+            del self.jobs[job_id]
+
+    def submeter(self, parametros: Dict[str, Any]) -> Dict[str, Any]:
+        """Valida e enfileira um novo job"""
+        competencia = parametros.get('competencia')
+        if competencia and not re.fullmatch(r'\d{4}-\d{2}', str(competencia)):
+            raise ValueError(f"Competência inválida (esperado AAAA-MM): {competencia}")
+
+        diretorio_entrada = parametros.get('diretorio_entrada')
+        if diretorio_entrada and not Path(diretorio_entrada).is_dir():
+            raise ValueError(f"Diretório de entrada não encontrado: {diretorio_entrada}")
+
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'status': 'na_fila',
+            'fase_atual': None,
+            'parametros': {
+                'diretorio_entrada': diretorio_entrada,
+                'diretorio_saida': parametros.get('diretorio_saida'),
+                'competencia': competencia
+            },
+            'criado_em': datetime.now().isoformat(),
+            'eventos': [],
+            'resultado': None,
+            'erro': None
+        }
+        self.jobs[job['id']] = job
+        self._loop.create_task(self._executar(job))
+        return job
+
+    async def _executar(self, job: Dict[str, Any]):
+        """Executa o job no pool, serializando jobs que escrevem no mesmo diretório de saída"""
+        parametros = job['parametros']
+        diretorio_saida = str(Path(
+            parametros['diretorio_saida'] or self.config_loader.get_config()['arquivos']['diretorio_saida']
+        ).resolve())
+        lock = self._locks_saida.setdefault(diretorio_saida, asyncio.Lock())
+
+        async with lock:
+            try:
+                await self._loop.run_in_executor(
+                    self._pool, _executar_job, job['id'],
+                    parametros['diretorio_entrada'], parametros['diretorio_saida'], parametros['competencia']
+                )
+            except Exception as e:
+                self._registrar_evento({
+                    'job_id': job['id'],
+                    'tipo': 'erro',
+                    'mensagem': f"Falha no worker: {e}",
+                    'timestamp': datetime.now().isoformat()
+                })
+
+    def _resumo_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Representação do job sem a lista de eventos"""
+        return {k: v for k, v in job.items() if k != 'eventos'}
+
+    async def _tratar_conexao(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma requisição HTTP"""
+        try:
+            linha = (await reader.readline()).decode('latin-1').strip()
+            if not linha:
+                return
+            metodo, caminho, _ = linha.split(' ', 2)
+
+            cabecalhos = {}
+            while True:
+                cabecalho = (await reader.readline()).decode('latin-1').strip()
+                if not cabecalho:
+                    break
+                nome, _, valor = cabecalho.partition(':')
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+            corpo = b''
+            if int(cabecalhos.get('content-length', 0)):
+                corpo = await reader.readexactly(int(cabecalhos['content-length']))
+
+            await self._rotear(metodo, caminho.rstrip('/'), corpo, writer)
+
+        except Exception as e:
+            await self._responder(writer, 500, {'erro': str(e)})
+        finally:
+            writer.close()
+
+    async def _rotear(self, metodo: str, caminho: str, corpo: bytes, writer: asyncio.StreamWriter):
+        """Encaminha a requisição para a rota correspondente"""
+        partes = [p for p in caminho.split('/') if p]
+
+        if metodo == 'GET' and partes == ['saude']:
+            await self._responder(writer, 200, {
+                'status': 'ok',
+                'workers': self.workers,
+                'jobs': len(self.jobs),
+                'jobs_em_andamento': sum(1 for j in self.jobs.values() if j['status'] not in STATUS_FINAIS)
+            })
+
+        elif partes == ['jobs'] and metodo == 'GET':
+            await self._responder(writer, 200, [self._resumo_job(j) for j in self.jobs.values()])
+
+        elif partes == ['jobs'] and metodo == 'POST':
+            try:
+                job = self.submeter(json.loads(corpo or b'{}'))
+            except ValueError as e:
+                await self._responder(writer, 400, {'erro': str(e)})
+                return
+            await self._responder(writer, 202, self._resumo_job(job))
+
+        elif len(partes) >= 2 and partes[0] == 'jobs' and metodo == 'GET':
+            job = self.jobs.get(partes[1])
+            if job is None:
+                await self._responder(writer, 404, {'erro': f"Job {partes[1]} não encontrado"})
+            elif partes[2:] == ['eventos']:
+                await self._transmitir_eventos(job, writer)
+            elif not partes[2:]:
+                await self._responder(writer, 200, self._resumo_job(job))
+            else:
+                await self._responder(writer, 404, {'erro': f"Rota não encontrada: {caminho}"})
+
+        else:
+            await self._responder(writer, 404, {'erro': f"Rota não encontrada: {metodo} {caminho}"})
+
+    async def _transmitir_eventos(self, job: Dict[str, Any], writer: asyncio.StreamWriter):
+        """Envia os eventos do job, um JSON por linha, até a conclusão"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+
+        # Histórico e assinatura são feitos sem await entre si: nenhum evento se perde
+        pendentes = list(job['eventos'])
+        fila = asyncio.Queue()
+        self._assinantes.setdefault(job['id'], []).append(fila)
+
+        try:
+            for evento in pendentes:
+                writer.write(json.dumps(evento, ensure_ascii=False).encode('utf-8') + b"\n")
+            await writer.drain()
+
+            ultimo_tipo = pendentes[-1]['tipo'] if pendentes else None
+            while ultimo_tipo not in STATUS_FINAIS:
+                evento = await fila.get()
+                writer.write(json.dumps(evento, ensure_ascii=False).encode('utf-8') + b"\n")
+                await writer.drain()
+                ultimo_tipo = evento['tipo']
+        finally:
+            assinantes = self._assinantes[job['id']]
+            assinantes.remove(fila)
+            if not assinantes:
+                del self._assinantes[job['id']]
+
+    async def _responder(self, writer: asyncio.StreamWriter, status: int, dados: Any):
+        """Envia uma resposta JSON"""
+        motivos = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+        corpo = json.dumps(dados, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+        writer.write(
+            f"HTTP/1.1 {status} {motivos.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + corpo
+        )
+        await writer.drain()
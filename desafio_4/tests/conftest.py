@@ -0,0 +1,112 @@
+"""
+Fixtures Compartilhadas dos Testes
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from utils.config_loader import ConfigLoader
+
+SINDICATOS = {
+    'SP': 'SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.',
+    'RS': 'SINDPPD RS - SINDICATO DOS TRAB. EM PROC. DE DADOS RIO GRANDE DO SUL',
+    'RJ': 'SINDPD RJ - SINDICATO PROFISSIONAIS DE PROC DADOS DO RIO DE JANEIRO',
+    'PR': 'SITEPD PR - SIND DOS TRAB EM EMPR PRIVADAS DE PROC DE DADOS DE CURITIBA E REGIAO METROPOLITANA',
+}
+
+
+def _tabela(linhas, colunas, inteiros=(), datas=()) -> pd.DataFrame:
+    """Base no formato entregue pelo ExtratorValidador (inteiros Int64, textos str)"""
+    df = pd.DataFrame(linhas, columns=colunas)
+    for coluna in colunas:
+        if coluna in inteiros:
+            df[coluna] = df[coluna].astype('Int64')
+        elif coluna in datas:
+            df[coluna] = pd.to_datetime(df[coluna])
+        else:
+            df[coluna] = df[coluna].astype('str')
+    return df
+
+
+@pytest.fixture
+def config_loader(tmp_path) -> ConfigLoader:
+    """Configuração do projeto com saídas e cache no diretório temporário do teste"""
+    loader = ConfigLoader().derivar(diretorio_saida=str(tmp_path))
+    loader.config['arquivos']['diretorio_cache'] = str(tmp_path / 'cache')
+    loader.config['performance']['max_memory_usage'] = None
+    return loader
+
+
+@pytest.fixture
+def config_path(tmp_path) -> str:
+    """config.yaml do projeto com as entradas reais e os demais diretórios em tmp_path"""
+    with open(RAIZ / 'config' / 'config.yaml', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['arquivos']['diretorio_entrada'] = str(RAIZ / 'dados_entrada')
+
+    caminho = tmp_path / 'config' / 'config.yaml'
+    caminho.parent.mkdir()
+    with open(caminho, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return str(caminho)
+
+
+@pytest.fixture
+def folha_sintetica():
+    """Folha pequena de 2025-05 com os casos de borda das regras
+
+    - 1001 aparece duas vezes em ativos e 1002 tem duas admissões (chaves duplicadas)
+    - os colaboradores do RJ não têm valor diário e os do PR não têm dias úteis
+    - 1005 tem férias e desligamento; 1006 está no exterior; 1007 é aprendiz
+    - 1008 está afastado e 1009 foi desligado antes do dia 15
+    """
+    ativos = _tabela([
+        (1001, 1410, 'ANALISTA I', 'Trabalhando', SINDICATOS['SP']),
+        (1001, 1410, 'ANALISTA II', 'Trabalhando', SINDICATOS['SP']),
+        (1002, 1410, 'ANALISTA I', 'Trabalhando', SINDICATOS['RS']),
+        (1003, 1410, 'ANALISTA I', 'Trabalhando', SINDICATOS['RJ']),
+        (1004, 1411, 'ANALISTA I', 'Trabalhando', SINDICATOS['PR']),
+        (1005, 1411, 'ANALISTA I', 'Trabalhando', SINDICATOS['SP']),
+        (1006, 1411, 'GERENTE', 'Trabalhando', SINDICATOS['RS']),
+        (1007, 1410, 'APRENDIZ', 'Trabalhando', SINDICATOS['SP']),
+        (1008, 1410, 'ANALISTA I', 'Licença Maternidade', SINDICATOS['RS']),
+        (1009, 1410, 'ANALISTA I', 'Trabalhando', SINDICATOS['SP']),
+        (1010, 1411, 'ANALISTA I', 'Trabalhando', SINDICATOS['RS']),
+    ], ['MATRICULA', 'EMPRESA', 'TITULO DO CARGO', 'DESC. SITUACAO', 'Sindicato'], inteiros=('MATRICULA', 'EMPRESA'))
+
+    return {
+        'ativos': ativos,
+        'admissoes': _tabela([
+            (1002, '2025-04-01', 'ANALISTA I'),
+            (1002, '2025-05-10', 'ANALISTA I'),
+            (1010, '2025-05-20', 'ANALISTA I'),
+        ], ['MATRICULA', 'Admissão', 'Cargo'], inteiros=('MATRICULA',), datas=('Admissão',)),
+        'afastamentos': _tabela([(1008, 'Licença Maternidade')], ['MATRICULA', 'DESC. SITUACAO'],
+                                inteiros=('MATRICULA',)),
+        'aprendizes': _tabela([(1007, 'APRENDIZ')], ['MATRICULA', 'TITULO DO CARGO'], inteiros=('MATRICULA',)),
+        'estagios': _tabela([], ['MATRICULA', 'TITULO DO CARGO'], inteiros=('MATRICULA',)),
+        'dias_uteis': _tabela([
+            (SINDICATOS['SP'], 22), (SINDICATOS['RS'], 21), (SINDICATOS['RJ'], 21),
+        ], ['SINDICADO', 'DIAS UTEIS'], inteiros=('DIAS UTEIS',)),
+        'sindicato_valor': _tabela([
+            ('São Paulo', 3750), ('Rio Grande do Sul', 3550), ('Paraná', 3500),
+        ], ['ESTADO', 'VALOR'], inteiros=('VALOR',)),
+        'desligados': _tabela([
+            (1005, '2025-05-25', 'OK'),
+            (1009, '2025-05-09', 'OK'),
+        ], ['MATRICULA', 'DATA DEMISSÃO', 'COMUNICADO DE DESLIGAMENTO'], inteiros=('MATRICULA',),
+            datas=('DATA DEMISSÃO',)),
+        'exterior': _tabela([(1006, 55440, '')], ['MATRICULA', 'Valor', 'Unnamed: 2'],
+                            inteiros=('MATRICULA', 'Valor')),
+        'ferias': _tabela([(1005, 'Férias', 10)], ['MATRICULA', 'DESC. SITUACAO', 'DIAS DE FÉRIAS'],
+                          inteiros=('MATRICULA', 'DIAS DE FÉRIAS')),
+    }
@@ -0,0 +1,34 @@
+"""
+Testes do Cache em Memória de Arquivos
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.cache_arquivos import CacheArquivos
+
+
+def test_cada_acerto_recebe_uma_copia_que_nao_altera_a_entrada(tmp_path):
+    arquivo = tmp_path / 'ativos.xlsx'
+    arquivo.write_bytes(b'conteudo')
+    cache = CacheArquivos()
+    original = pd.DataFrame({'MATRICULA': [1, 2], 'Sindicato': ['SP', 'RS']})
+    cache.guardar('ativos', str(arquivo), (original, original))
+
+    primeiro, _ = cache.obter('ativos', str(arquivo))
+    primeiro.loc[0, 'Sindicato'] = 'RJ'
+    primeiro['novo'] = 0
+    original.loc[1, 'Sindicato'] = 'PR'
+
+    segundo, convertido = cache.obter('ativos', str(arquivo))
+    assert segundo is not primeiro
+    assert segundo['Sindicato'].tolist() == ['SP', 'RS']
+    assert list(segundo.columns) == ['MATRICULA', 'Sindicato']
+    assert convertido['Sindicato'].tolist() == ['SP', 'RS']
+    assert cache.acertos == 2
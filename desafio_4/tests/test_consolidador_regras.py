@@ -0,0 +1,50 @@
+"""
+Testes do Consolidador de Regras
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agentes.consolidador_regras import ConsolidadorRegras
+from agentes.gerador_relatorio import GeradorRelatorio
+from utils.logger import VRLoggerMemoria
+
+
+def _consolidar(config_loader, dados) -> pd.DataFrame:
+    return ConsolidadorRegras(VRLoggerMemoria(config_loader.get_config()), config_loader).executar(dados)
+
+
+def _linha(df, matricula) -> pd.Series:
+    return df[df['MATRICULA'] == matricula].iloc[0]
+
+
+def test_sem_dias_uteis_do_sindicato_dias_e_valores_ficam_nulos(config_loader, folha_sintetica):
+    df = _consolidar(config_loader, folha_sintetica)
+
+    sem_dias = _linha(df, 1004)
+    assert sem_dias['elegivel']
+    assert pd.isna(sem_dias['dias_calculados'])
+    assert pd.isna(sem_dias['valor_total_centavos'])
+    assert pd.isna(sem_dias['custo_empresa_centavos'])
+    assert pd.isna(sem_dias['desconto_colaborador_centavos'])
+
+    # Os demais não são afetados: férias descontadas e valor especial do exterior
+    assert _linha(df, 1005)['dias_calculados'] == 12
+    assert _linha(df, 1005)['valor_total_centavos'] == 12 * 3750
+    assert _linha(df, 1006)['valor_total_centavos'] == 55440
+
+
+def test_relatorio_grava_dias_e_valores_nulos_como_celulas_vazias(config_loader, folha_sintetica):
+    df = _consolidar(config_loader, folha_sintetica)
+    gerador = GeradorRelatorio(VRLoggerMemoria(config_loader.get_config()), config_loader)
+    linha = gerador._preparar_dados_relatorio(df).set_index('Matricula').loc[1004]
+
+    assert gerador._valor_celula(linha['Dias'], 'Dias') is None
+    assert gerador._valor_celula(linha['TOTAL'], 'TOTAL') is None
+    assert gerador._valor_celula(linha['VALOR DIÁRIO VR'], 'VALOR DIÁRIO VR') == 35.0
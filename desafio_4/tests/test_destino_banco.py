@@ -0,0 +1,137 @@
+"""
+Testes da Carga em Banco (DestinoBanco) contra SQLite
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agentes.gerador_relatorio import CHAVE_BANCO, COLUNAS_BANCO_ELEGIVEIS, COLUNAS_BANCO_EXCLUIDOS
+from utils.destino_banco import CargaTabela, DestinoBanco
+
+
+def _elegiveis(competencia: str = '2025-05') -> pd.DataFrame:
+    return pd.DataFrame({
+        'competencia': competencia,
+        'matricula': [34941, 24401, 32104],
+        'empresa': [1409, 1409, 1410],
+        'admissao': ['2024-03-04', None, '2025-04-28'],
+        'sindicato': ['São Paulo', 'Rio de Janeiro', 'Paraná'],
+        'dias': [22, 21, 15],
+        'valor_diario_centavos': [3770, 3500, 3550],
+        'valor_total_centavos': [82940, 73500, 53250],
+        'custo_empresa_centavos': [66352, 58800, 42600],
+        'desconto_colaborador_centavos': [16588, 14700, 10650],
+        'observacoes': [None, 'Férias parciais', None]
+    })
+
+
+def _excluidos(competencia: str = '2025-05') -> pd.DataFrame:
+    return pd.DataFrame({
+        'competencia': competencia,
+        'matricula': [35741, 33090],
+        'empresa': [1409, 1410],
+        'cargo': ['DIRETOR', 'ESTAGIARIO'],
+        'sindicato': ['São Paulo', None],
+        'situacao': ['Trabalhando', 'Trabalhando'],
+        'mascara_exclusao': [1, 4],
+        'motivo': ['Diretor', 'Estagiário'],
+        'motivos': ['Diretor', 'Estagiário']
+    })
+
+
+def _gravar(banco: Path, elegiveis: pd.DataFrame, excluidos: pd.DataFrame, tamanho_lote: int = 2):
+    destino = DestinoBanco(lambda: sqlite3.connect(banco), tamanho_lote=tamanho_lote)
+    return destino.gravar([
+        CargaTabela('vr_elegiveis', elegiveis, COLUNAS_BANCO_ELEGIVEIS),
+        CargaTabela('vr_excluidos', excluidos, COLUNAS_BANCO_EXCLUIDOS)
+    ], CHAVE_BANCO)
+
+
+def _tabela(banco: Path, tabela: str) -> pd.DataFrame:
+    with sqlite3.connect(banco) as conexao:
+        return pd.read_sql_query(f"SELECT * FROM {tabela} ORDER BY competencia, matricula", conexao)
+
+
+def test_recarga_nao_duplica_e_preserva_valores(tmp_path):
+    banco = tmp_path / 'vr.db'
+    elegiveis, excluidos = _elegiveis(), _excluidos()
+
+    primeira = _gravar(banco, elegiveis, excluidos)
+    segunda = _gravar(banco, elegiveis, excluidos)
+
+    assert primeira['linhas'] == segunda['linhas'] == 5
+    assert segunda['tabelas']['vr_elegiveis']['linhas'] == 3
+
+    gravados = _tabela(banco, 'vr_elegiveis')
+    esperados = elegiveis.sort_values('matricula').reset_index(drop=True)
+    assert len(gravados) == 3
+    assert not gravados.duplicated(list(CHAVE_BANCO)).any()
+    for coluna in ('valor_diario_centavos', 'valor_total_centavos',
+                   'custo_empresa_centavos', 'desconto_colaborador_centavos'):
+        assert gravados[coluna].tolist() == esperados[coluna].tolist()
+    assert gravados['observacoes'].isna().tolist() == esperados['observacoes'].isna().tolist()
+
+    assert len(_tabela(banco, 'vr_excluidos')) == 2
+
+
+def test_recarga_atualiza_linhas_e_move_chave_entre_tabelas(tmp_path):
+    banco = tmp_path / 'vr.db'
+    _gravar(banco, _elegiveis(), _excluidos())
+    _gravar(banco, _elegiveis('2025-04'), _excluidos('2025-04'))
+
+    # Reprocessamento de 05/2025: novo valor para 34941 e 35741 passa de excluído a elegível
+    elegiveis = _elegiveis()
+    elegiveis.loc[elegiveis['matricula'] == 34941, 'valor_total_centavos'] = 79170
+    elegiveis = pd.concat([elegiveis, _elegiveis().iloc[[0]].assign(matricula=35741)], ignore_index=True)
+    _gravar(banco, elegiveis, _excluidos().iloc[[1]])
+
+    gravados = _tabela(banco, 'vr_elegiveis')
+    maio = gravados[gravados['competencia'] == '2025-05']
+    assert len(gravados) == 7
+    assert len(maio) == 4
+    assert maio.loc[maio['matricula'] == 34941, 'valor_total_centavos'].item() == 79170
+
+    excluidos = _tabela(banco, 'vr_excluidos')
+    assert excluidos[['competencia', 'matricula']].values.tolist() == [
+        ['2025-04', 33090], ['2025-04', 35741], ['2025-05', 33090]
+    ]
+
+
+def test_falha_no_meio_da_carga_desfaz_a_transacao(tmp_path):
+    banco = tmp_path / 'vr.db'
+    _gravar(banco, _elegiveis(), _excluidos())
+    antes = {tabela: _tabela(banco, tabela) for tabela in ('vr_elegiveis', 'vr_excluidos')}
+
+    # Reprocessamento que altera elegíveis e move 35741 de tabela, mas falha no último lote de excluídos
+    elegiveis = _elegiveis().assign(valor_total_centavos=1)
+    elegiveis = pd.concat([elegiveis, _elegiveis().iloc[[0]].assign(matricula=35741)], ignore_index=True)
+    excluidos = pd.concat([_excluidos().iloc[[1]], _excluidos().iloc[[1]].assign(matricula=40000)], ignore_index=True)
+    excluidos['motivos'] = excluidos['motivos'].astype(object)
+    excluidos.at[1, 'motivos'] = {'valor': 'não suportado pelo driver'}
+
+    with pytest.raises(sqlite3.Error):
+        _gravar(banco, elegiveis, excluidos, tamanho_lote=1)
+
+    for tabela, df in antes.items():
+        pd.testing.assert_frame_equal(_tabela(banco, tabela), df)
+
+
+def test_from_config_resolve_banco_sqlite_relativo_a_raiz(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    raiz = tmp_path / 'projeto'
+    (raiz / 'dados_saida').mkdir(parents=True)
+    config = {'relatorio': {'banco': {'habilitado': True, 'conexao': {'database': './dados_saida/vr.db'}}}}
+
+    destino = DestinoBanco.from_config(config, raiz=str(raiz))
+    destino.gravar([CargaTabela('vr_elegiveis', _elegiveis(), COLUNAS_BANCO_ELEGIVEIS)], CHAVE_BANCO)
+
+    assert (raiz / 'dados_saida' / 'vr.db').exists()
+    assert not (tmp_path / 'dados_saida').exists()
@@ -0,0 +1,27 @@
+"""
+Testes do Processamento Distribuído
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from servico.distribuido import TrabalhadorFila, publicar_processamento
+from servico.fila import FilaTarefas
+
+
+def test_job_distribuido_grava_relatorios_e_quarentena(tmp_path, config_path):
+    fila = FilaTarefas(str(tmp_path / 'fila' / 'fila_vr.db'))
+    job_id = publicar_processamento(fila, particoes=2, diretorio_saida=str(tmp_path / 'saida'))
+
+    TrabalhadorFila(fila, config_path, nome='w1', intervalo_consulta=0.01).trabalhar(sair_quando_vazia=True)
+
+    status = fila.status_job(job_id)
+    assert status['status'] == 'concluido', status['erro']
+    assert [particao['particao'] for particao in status['resultado']['particoes']] == [0, 1]
+    assert sorted(p.name for p in (tmp_path / 'saida').iterdir()) == [
+        'VR_MENSAL_2025_05.xlsx', 'colaboradores_excluidos_2025_05.xlsx', 'quarentena_2025_05.xlsx'
+    ]
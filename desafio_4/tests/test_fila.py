@@ -0,0 +1,128 @@
+"""
+Testes da Fila Durável de Tarefas
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from servico import fila as modulo_fila
+from servico.fila import FilaTarefas
+
+
+class Relogio:
+    """Substitui time.time na fila para avançar leases e esperas sem dormir"""
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def time(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float):
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch) -> Relogio:
+    relogio = Relogio()
+    monkeypatch.setattr(modulo_fila, 'time', relogio)
+    return relogio
+
+
+@pytest.fixture
+def fila(tmp_path, relogio) -> FilaTarefas:
+    return FilaTarefas(str(tmp_path / 'fila.db'), max_tentativas=3, espera_retentativa=5.0)
+
+
+def test_lease_vencido_volta_para_a_fila_e_descarta_o_resultado_antigo(fila, relogio):
+    job_id = fila.publicar({}, [{'tipo': 'extracao'}])
+
+    primeira = fila.reivindicar('w1', duracao_lease=10)
+    assert fila.reivindicar('w2', duracao_lease=10) is None
+
+    relogio.avancar(11)
+    segunda = fila.reivindicar('w2', duracao_lease=10)
+    assert segunda['id'] == primeira['id']
+    assert segunda['tentativas'] == 2
+    assert not fila.renovar_lease(primeira['id'], 'w1', 10)
+
+    assert not fila.concluir(primeira['id'], 'w1', {'origem': 'w1'})
+    assert fila.concluir(segunda['id'], 'w2', {'origem': 'w2'})
+    status = fila.status_job(job_id)
+    assert status['status'] == 'concluido'
+    assert status['resultado']['extracao'] == {'origem': 'w2'}
+
+
+def test_lease_vencido_na_ultima_tentativa_falha_o_job(fila, relogio):
+    job_id = fila.publicar({}, [{'tipo': 'extracao'}])
+    for _ in range(3):
+        assert fila.reivindicar('w1', duracao_lease=10) is not None
+        relogio.avancar(11)
+
+    assert fila.reivindicar('w1', duracao_lease=10) is None
+    status = fila.status_job(job_id)
+    assert status['status'] == 'falhou'
+    assert status['tarefas'][0]['status'] == 'falhou'
+    assert 'Lease expirado' in status['erro']
+
+
+def test_falhas_voltam_com_espera_exponencial_ate_max_tentativas(fila, relogio):
+    job_id = fila.publicar({}, [{'tipo': 'extracao'}])
+
+    for espera in (5.0, 10.0):
+        tarefa = fila.reivindicar('w1', duracao_lease=60)
+        fila.falhar(tarefa['id'], 'w1', 'ValueError: entrada inválida')
+        relogio.avancar(espera - 0.5)
+        assert fila.reivindicar('w1', duracao_lease=60) is None
+        relogio.avancar(0.5)
+
+    tarefa = fila.reivindicar('w1', duracao_lease=60)
+    assert tarefa['tentativas'] == 3
+    fila.falhar(tarefa['id'], 'w1', 'ValueError: entrada inválida')
+
+    status = fila.status_job(job_id)
+    assert status['status'] == 'falhou'
+    assert status['tarefas'][0]['tentativas'] == 3
+    assert status['erro'] == f"Tarefa {tarefa['id']}: ValueError: entrada inválida"
+    assert fila.pendentes() == 0
+
+
+def test_dependencias_e_resultado_agregado_do_job(fila):
+    job_id = fila.publicar({'particoes': 2}, [
+        {'tipo': 'extracao'},
+        {'tipo': 'consolidacao', 'particao': 0, 'dependencias': [0]},
+        {'tipo': 'consolidacao', 'particao': 1, 'dependencias': [0]},
+        {'tipo': 'relatorio', 'dependencias': [1, 2]},
+    ])
+
+    extracao = fila.reivindicar('w1', duracao_lease=60)
+    assert extracao['job_parametros'] == {'particoes': 2}
+    assert fila.reivindicar('w2', duracao_lease=60) is None
+    fila.concluir(extracao['id'], 'w1', {'registros_ativos': 3})
+
+    # Partições concluídas fora de ordem por workers diferentes
+    particao_0 = fila.reivindicar('w1', duracao_lease=60)
+    particao_1 = fila.reivindicar('w2', duracao_lease=60)
+    assert fila.reivindicar('w3', duracao_lease=60) is None
+    fila.concluir(particao_1['id'], 'w2', {'colaboradores': 1})
+    fila.concluir(particao_0['id'], 'w1', {'colaboradores': 2})
+
+    relatorio = fila.reivindicar('w3', duracao_lease=60)
+    assert relatorio['tipo'] == 'relatorio'
+    fila.concluir(relatorio['id'], 'w3', {'arquivo_relatorio': 'VR_MENSAL_2025_05.xlsx'})
+
+    status = fila.status_job(job_id)
+    assert status['status'] == 'concluido'
+    assert status['tarefas_por_status'] == {'concluida': 4}
+    assert status['resultado'] == {
+        'particoes': [{'particao': 0, 'colaboradores': 2}, {'particao': 1, 'colaboradores': 1}],
+        'workers': ['w1', 'w2', 'w3'],
+        'extracao': {'registros_ativos': 3},
+        'relatorio': {'arquivo_relatorio': 'VR_MENSAL_2025_05.xlsx'},
+    }
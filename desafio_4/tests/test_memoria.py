@@ -0,0 +1,71 @@
+"""
+Testes do Governador de Memória
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openpyxl import load_workbook
+
+from agentes.consolidador_regras import ConsolidadorRegras
+from agentes.extrator_validador import ExtratorValidador
+from agentes.gerador_relatorio import GeradorRelatorio
+from utils.benchmark import gerar_dados_sinteticos
+from utils.config_loader import ConfigLoader
+from utils.logger import VRLoggerMemoria
+from utils.memoria import ConsolidadoEmBlocos, GovernadorMemoria, rss_atual
+
+LINHAS = 30000
+# Folga do orçamento sobre o RSS com os dados já extraídos: abaixo dos
+# LINHAS * BYTES_POR_COLABORADOR projetados para consolidar em memória
+FOLGA_BYTES = 36 * 1024 ** 2
+
+
+@pytest.fixture(scope='module')
+def cenario(tmp_path_factory):
+    if rss_atual() is None:
+        pytest.skip("RSS do processo indisponível nesta plataforma")
+    loader = ConfigLoader().derivar(diretorio_saida=str(tmp_path_factory.mktemp('saida')))
+    dados = ExtratorValidador(VRLoggerMemoria(loader.get_config()), loader).executar()
+    return loader, gerar_dados_sinteticos(dados, LINHAS)
+
+
+def _gerar(loader, dados, governador, arquivo):
+    logger = VRLoggerMemoria(loader.get_config())
+    consolidador = ConsolidadorRegras(logger, loader, governador)
+    with governador.monitorar('consolidacao'):
+        df = consolidador.executar(dados)
+    gerador = GeradorRelatorio(logger, loader, governador)
+    gerador.config_loader = loader.derivar()
+    gerador.config_loader.config['arquivos']['template_saida'] = arquivo
+    with governador.monitorar('relatorio'):
+        gerador.executar(df, consolidador.get_estatisticas())
+    return df, gerador.config_loader.get_output_path()
+
+
+def _linhas_planilha(arquivo):
+    wb = load_workbook(arquivo, read_only=True)
+    return list(wb['VR Mensal'].iter_rows(values_only=True))
+
+
+def test_consolidacao_acima_do_orcamento_respeita_o_limite(cenario):
+    loader, dados = cenario
+    governador = GovernadorMemoria(rss_atual() + FOLGA_BYTES, tamanho_bloco=2000)
+    blocos, arquivo_blocos = _gerar(loader, dados, governador, 'blocos.xlsx')
+    referencia, arquivo_referencia = _gerar(loader, dados, GovernadorMemoria(None), 'memoria.xlsx')
+
+    fases = governador.resumo()
+    assert isinstance(blocos, ConsolidadoEmBlocos)
+    assert fases['consolidacao']['estrategia'] == 'blocos_em_disco'
+    for fase in ('consolidacao', 'relatorio'):
+        assert fases[fase]['pico_rss'] <= governador.limite_bytes, fase
+
+    assert blocos.ler().equals(referencia)
+    assert _linhas_planilha(arquivo_blocos) == _linhas_planilha(arquivo_referencia)
+    blocos.fechar()
@@ -0,0 +1,57 @@
+"""
+Testes de Paridade dos Motores de Consolidação
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agentes.consolidador_regras import ConsolidadorRegras
+from agentes.motores import classe_motor
+from utils.logger import VRLoggerMemoria
+
+CONTAGENS_LOG = ('colaboradores_excluidos', 'exclusoes_por_categoria', 'calculos_especiais')
+
+
+def _consolidar(config_loader, dados, motor: str):
+    config_loader.config['performance']['motor_consolidacao'] = motor
+    logger = VRLoggerMemoria(config_loader.get_config())
+    consolidador = ConsolidadorRegras(logger, config_loader)
+    df = consolidador.executar(dados)
+    return df, consolidador.get_estatisticas(), {chave: logger.stats[chave] for chave in CONTAGENS_LOG}
+
+
+@pytest.mark.parametrize('motor', ['sql', 'polars'])
+def test_motor_reproduz_o_pandas_nos_casos_de_borda(config_loader, folha_sintetica, motor):
+    if not classe_motor(motor).disponivel():
+        pytest.skip(f"Motor {motor} requer {classe_motor(motor).requisitos}")
+
+    referencia, estatisticas, contagens = _consolidar(config_loader, folha_sintetica, 'pandas')
+    df, estatisticas_motor, contagens_motor = _consolidar(config_loader, folha_sintetica, motor)
+
+    assert list(df.columns) == list(referencia.columns)
+    assert df.equals(referencia)
+    assert estatisticas_motor == estatisticas
+    assert contagens_motor == contagens
+
+
+def test_casos_de_borda_da_folha_sintetica(config_loader, folha_sintetica):
+    df, estatisticas, _ = _consolidar(config_loader, folha_sintetica, 'pandas')
+    linhas = df.set_index('MATRICULA')
+
+    # Matrícula duplicada em ativos não é descartada pela consolidação
+    assert (df['MATRICULA'] == 1001).sum() == 2
+    # Sem valor diário (RJ) ou sem dias úteis (PR): valores nulos, ainda elegível
+    assert linhas.loc[[1003, 1004], 'elegivel'].all()
+    assert linhas.loc[[1003, 1004], 'valor_total_centavos'].isna().all()
+    # Férias e desligamento após o dia 15: dias descontados, continua elegível
+    assert linhas.loc[1005, 'dias_calculados'] == 12
+    # Exterior, aprendiz, afastado e desligado antes do dia 15
+    assert linhas.loc[1006, 'valor_total_centavos'] == 55440
+    assert not linhas.loc[[1007, 1008, 1009], 'elegivel'].any()
+    assert estatisticas['colaboradores_excluidos'] == 3
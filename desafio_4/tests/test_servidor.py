@@ -0,0 +1,66 @@
+"""
+Testes do Serviço Local
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from servico.cliente import ClienteVR
+from servico.servidor import ServidorVR
+
+
+@pytest.fixture
+def servidor(tmp_path, config_path):
+    """Serviço escutando em um socket Unix, com o event loop em uma thread"""
+    servidor = ServidorVR(config_path, socket_path=str(tmp_path / 'vr.sock'), workers=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(servidor.iniciar(), loop).result(timeout=60)
+
+    yield servidor
+
+    asyncio.run_coroutine_threadsafe(servidor.encerrar(), loop).result(timeout=60)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+def test_job_submetido_pelo_socket_publica_progresso_e_resultado(tmp_path, servidor):
+    cliente = ClienteVR(socket_path=servidor.socket_path, timeout=300)
+    assert cliente.saude()['status'] == 'ok'
+
+    job = cliente.submeter(diretorio_saida=str(tmp_path / 'saida'))
+    assert job['status'] in ('na_fila', 'executando')
+
+    eventos = list(cliente.acompanhar(job['id']))
+    assert {evento['tipo'] for evento in eventos[:-1]} == {'progresso'}
+    assert eventos[-1]['tipo'] == 'concluido', eventos[-1]
+
+    status = cliente.status(job['id'])
+    assert status['status'] == 'concluido'
+    assert status['resultado'] == eventos[-1]['resultado']
+    assert (tmp_path / 'saida' / 'VR_MENSAL_2025_05.xlsx').exists()
+    assert cliente.saude()['jobs_em_andamento'] == 0
+    assert not servidor._assinantes
+
+
+def test_jobs_finalizados_alem_do_limite_sao_descartados(config_path):
+    servidor = ServidorVR(config_path)
+    servidor.max_jobs_finalizados = 2
+    for job_id in ('a', 'b', 'c', 'd'):
+        servidor.jobs[job_id] = {'id': job_id, 'status': 'executando', 'eventos': []}
+
+    for job_id in ('a', 'b', 'c'):
+        servidor._registrar_evento({'job_id': job_id, 'tipo': 'concluido', 'resultado': {}})
+
+    # O mais antigo dos finalizados sai; o job em andamento é mantido
+    assert list(servidor.jobs) == ['b', 'c', 'd']
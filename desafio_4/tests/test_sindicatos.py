@@ -0,0 +1,55 @@
+"""
+Testes da Normalização de Sindicatos
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.sindicatos import NormalizadorSindicatos
+
+ESTADOS = ['São Paulo', 'Rio de Janeiro', 'Rio Grande do Sul', 'Paraná']
+SINDICATO = 'SINDICATO DOS TRABALHADORES DE TI DA CAPITAL'
+
+
+def _normalizador(tmp_path, entrada, usar_sugestoes_pendentes=False) -> NormalizadorSindicatos:
+    cache = tmp_path / 'sindicatos_sugeridos.json'
+    cache.write_text(json.dumps({SINDICATO: entrada}), encoding='utf-8')
+    return NormalizadorSindicatos({}, ESTADOS, str(cache), 0.8, usar_sugestoes_pendentes)
+
+
+def test_aprovacao_manual_vale_abaixo_da_similaridade_minima(tmp_path):
+    normalizador = _normalizador(tmp_path, {'sugestao': 'São Paulo', 'similaridade': 0.4, 'aprovado': True})
+
+    assert normalizador.normalizar(SINDICATO) == 'São Paulo'
+    assert not normalizador.nao_mapeados
+    assert not normalizador.sugestoes_pendentes
+
+
+def test_pendente_abaixo_da_similaridade_minima_fica_sem_mapeamento(tmp_path):
+    normalizador = _normalizador(tmp_path, {'sugestao': 'São Paulo', 'similaridade': 0.4, 'aprovado': None},
+                                 usar_sugestoes_pendentes=True)
+
+    assert normalizador.normalizar(SINDICATO) == SINDICATO
+    assert normalizador.nao_mapeados == {SINDICATO}
+
+
+def test_pendente_so_e_usada_quando_habilitado(tmp_path):
+    entrada = {'sugestao': 'Paraná', 'similaridade': 0.9, 'aprovado': None}
+
+    assert _normalizador(tmp_path, dict(entrada)).normalizar(SINDICATO) == SINDICATO
+    normalizador = _normalizador(tmp_path, dict(entrada), usar_sugestoes_pendentes=True)
+    assert normalizador.normalizar(SINDICATO) == 'Paraná'
+    assert normalizador.sugestoes_pendentes == {SINDICATO: 'Paraná'}
+
+
+def test_rejeicao_manual_prevalece(tmp_path):
+    normalizador = _normalizador(tmp_path, {'sugestao': 'Paraná', 'similaridade': 0.95, 'aprovado': False},
+                                 usar_sugestoes_pendentes=True)
+
+    assert normalizador.normalizar(SINDICATO) == SINDICATO
+    assert normalizador.nao_mapeados == {SINDICATO}
@@ -1,14 +1,28 @@
 """
 Utilitários do Sistema de Processamento VR
+
+Os utilitários são importados sob demanda para manter leve a inicialização da CLI.
 """
 
-from .config_loader import ConfigLoader, get_config_loader, get_config
-from .logger import VRLogger
+from importlib import import_module
+
+_EXPORTS = {
+    'ConfigLoader': '.config_loader',
+    'get_config_loader': '.config_loader',
+    'get_config': '.config_loader',
+    'VRLogger': '.logger',
+    'VRLoggerMemoria': '.logger',
+    'NormalizadorSindicatos': '.sindicatos',
+    'CacheArquivos': '.cache_arquivos',
+    'ContextoExecucao': '.contexto',
+    'RegistroExclusoes': '.exclusoes'
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'ConfigLoader',
-    'get_config_loader',
-    'get_config',
-    'VRLogger'
-]
 
+def __getattr__(name):
+    """Importa o utilitário solicitado apenas no primeiro acesso"""
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,268 @@
+"""
+Agendador de Tarefas em Grafo de Dependências
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+EXECUTORES = ('thread', 'processo')
+
+# Atraso (s) entre o fim da última dependência e o início de uma tarefa a partir do qual
+# considera-se que ela esperou por um worker livre
+TOLERANCIA_ESPERA = 0.01
+
+
+def _executar_medindo(funcao: Callable, argumentos: Tuple) -> Tuple[Any, float, float]:
+    """Executa a função e devolve o resultado com os instantes de início e fim (relógio de parede)
+
+    O relógio de parede é o mesmo em threads e em processos do pool, então as
+    durações das tarefas isoladas ficam comparáveis às das demais.
+    """
+    inicio = time.time()
+    resultado = funcao(*argumentos)
+    return resultado, inicio, time.time()
+
+
+class Tarefa:
+    """Uma tarefa do grafo: nome, função, artefatos que consome e artefatos que produz
+
+    A função recebe argumentos + os valores das entradas, na ordem declarada. Com uma
+    saída, o retorno é o valor dela; com várias, uma tupla na ordem de saidas.
+    Tarefas isoladas só usam os próprios argumentos e entradas (nada do processo
+    principal) e podem rodar no pool de processos; concluir, se informado, recebe o
+    retorno da função no processo principal e devolve o valor das saídas (ex.:
+    incorporar logs e resultados produzidos em outro processo).
+    """
+
+    def __init__(self, nome: str, funcao: Callable, entradas: Iterable[str] = (), saidas: Iterable[str] = (),
+                 argumentos: Tuple = (), isolada: bool = False, concluir: Callable[[Any], Any] = None):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = tuple(entradas)
+        self.saidas = tuple(saidas)
+        self.argumentos = tuple(argumentos)
+        self.isolada = isolada
+        self.concluir = concluir
+
+
+class AgendadorTarefas:
+    """Executa um grafo de tarefas iniciando cada uma assim que suas entradas ficam prontas
+
+    O grafo é validado antes da execução (cada artefato com um único produtor, sem
+    entradas sem produtor e sem ciclos). As tarefas rodam em um pool de threads; com
+    executor 'processo', as tarefas isoladas vão para um pool de processos (spawn) e
+    as demais continuam em threads, pois alteram o estado dos agentes. As funções
+    concluir e o registro das saídas rodam sempre na thread do agendador, uma tarefa
+    por vez. Se uma tarefa falha, nenhuma outra é iniciada, as que estão em execução
+    terminam e a exceção original é propagada.
+
+    Depois da execução, metricas() traz início, fim e duração de cada tarefa e o
+    caminho crítico observado: partindo da última tarefa a terminar, volta-se à
+    dependência que terminou por último ou, se a tarefa começou depois disso (esperou
+    um worker), à tarefa que terminou logo antes do seu início e liberou o worker.
+    """
+
+    def __init__(self, tarefas: List[Tarefa], executor: str = 'thread', workers: Optional[int] = None,
+                 ao_mudar: Callable[[str, str], None] = None):
+        """Cria o agendador e valida o grafo; ao_mudar(nome, status) é chamado ao iniciar e concluir cada tarefa"""
+        if executor not in EXECUTORES:
+            raise ValueError(f"Executor de tarefas inválido: {executor} (use {', '.join(EXECUTORES)})")
+
+        self.tarefas = {}
+        for tarefa in tarefas:
+            if tarefa.nome in self.tarefas:
+                raise ValueError(f"Tarefa duplicada no grafo: {tarefa.nome}")
+            self.tarefas[tarefa.nome] = tarefa
+
+        self.executor = executor
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.ao_mudar = ao_mudar
+        self.produtor = self._validar_grafo()
+        self.execucoes: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], tarefas: List[Tarefa],
+                    ao_mudar: Callable[[str, str], None] = None) -> 'AgendadorTarefas':
+        """Cria o agendador a partir da seção performance.agendamento"""
+        agendamento = config.get('performance', {}).get('agendamento', {})
+        return cls(tarefas, agendamento.get('executor', 'thread'), agendamento.get('workers'), ao_mudar)
+
+    def _validar_grafo(self) -> Dict[str, str]:
+        """Mapeia cada artefato à tarefa que o produz; ValueError se o grafo for inválido"""
+        produtor = {}
+        for tarefa in self.tarefas.values():
+            for saida in tarefa.saidas:
+                if saida in produtor:
+                    raise ValueError(f"Artefato {saida} produzido por {produtor[saida]} e {tarefa.nome}")
+                produtor[saida] = tarefa.nome
+
+        for tarefa in self.tarefas.values():
+            faltantes = [entrada for entrada in tarefa.entradas if entrada not in produtor]
+            if faltantes:
+                raise ValueError(f"Tarefa {tarefa.nome} depende de artefatos sem produtor: {', '.join(faltantes)}")
+
+        # Ordenação topológica (Kahn): sobra alguma tarefa se houver ciclo
+        restantes = {nome: set(self.dependencias(nome, produtor)) for nome in self.tarefas}
+        while restantes:
+            prontas = [nome for nome, dependencias in restantes.items() if not dependencias]
+            if not prontas:
+                raise ValueError(f"Ciclo de dependências entre as tarefas: {', '.join(sorted(restantes))}")
+            for nome in prontas:
+                del restantes[nome]
+            for dependencias in restantes.values():
+                dependencias.difference_update(prontas)
+        return produtor
+
+    def dependencias(self, nome: str, produtor: Dict[str, str] = None) -> List[str]:
+        """Tarefas que produzem as entradas da tarefa"""
+        produtor = produtor or self.produtor
+        return list(dict.fromkeys(produtor[entrada] for entrada in self.tarefas[nome].entradas))
+
+    def _notificar(self, nome: str, status: str):
+        if self.ao_mudar is not None:
+            self.ao_mudar(nome, status)
+
+    def executar(self) -> Dict[str, Any]:
+        """Executa o grafo e devolve os artefatos produzidos"""
+        artefatos: Dict[str, Any] = {}
+        pendentes = dict(self.tarefas)
+        em_execucao = {}
+        self.execucoes = {}
+        self._inicio = time.time()
+        falha = None
+
+        with ExitStack() as pilha:
+            threads = pilha.enter_context(ThreadPoolExecutor(max_workers=self.workers))
+            processos = None
+            if self.executor == 'processo' and any(tarefa.isolada for tarefa in self.tarefas.values()):
+                processos = pilha.enter_context(ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                ))
+
+            while (pendentes and falha is None) or em_execucao:
+                # Iniciar todas as tarefas cujas entradas já foram produzidas (na ordem declarada)
+                if falha is None:
+                    for nome in [nome for nome, tarefa in pendentes.items()
+                                 if all(entrada in artefatos for entrada in tarefa.entradas)]:
+                        tarefa = pendentes.pop(nome)
+                        pool = processos if tarefa.isolada and processos is not None else threads
+                        argumentos = tarefa.argumentos + tuple(artefatos[entrada] for entrada in tarefa.entradas)
+                        self._notificar(nome, 'iniciada')
+                        em_execucao[pool.submit(_executar_medindo, tarefa.funcao, argumentos)] = tarefa
+
+                concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidas:
+                    tarefa = em_execucao.pop(futuro)
+                    try:
+                        resultado, inicio, fim = futuro.result()
+                        if tarefa.concluir is not None:
+                            resultado = tarefa.concluir(resultado)
+                            fim = time.time()
+                    except Exception as e:
+                        self.execucoes[tarefa.nome] = {'status': 'falhou', 'erro': str(e)}
+                        self._notificar(tarefa.nome, 'falhou')
+                        falha = falha or e
+                        continue
+
+                    self.execucoes[tarefa.nome] = {'status': 'concluida', 'inicio': inicio, 'fim': fim}
+                    if len(tarefa.saidas) == 1:
+                        artefatos[tarefa.saidas[0]] = resultado
+                    elif tarefa.saidas:
+                        artefatos.update(zip(tarefa.saidas, resultado))
+                    self._notificar(tarefa.nome, 'concluida')
+
+        self._fim = time.time()
+        if falha is not None:
+            raise falha
+        return artefatos
+
+    # Métricas
+
+    def _antecessor_critico(self, nome: str, concluidas: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        """Tarefa que determinou o início desta: a última dependência ou a que liberou o worker"""
+        inicio = concluidas[nome]['inicio']
+        fim = lambda outra: concluidas[outra]['fim']
+        
+        dependencias = [outra for outra in self.dependencias(nome) if outra in concluidas]
+        ultima_dependencia = max(dependencias, key=fim, default=None)
+        pronta_em = fim(ultima_dependencia) if ultima_dependencia is not None else self._inicio
+        
+        # Começou bem depois de ficar pronta: esperou a tarefa que terminou logo antes
+        anteriores = [outra for outra, execucao in concluidas.items()
+                      if execucao['inicio'] < inicio and execucao['fim'] <= inicio + TOLERANCIA_ESPERA]
+        ultima = max(anteriores, key=fim, default=None)
+        if ultima is not None and inicio - pronta_em > TOLERANCIA_ESPERA and fim(ultima) > pronta_em:
+            return ultima
+        return ultima_dependencia
+    
+    def caminho_critico(self) -> List[str]:
+        """Tarefas do caminho crítico observado, da primeira à última"""
+        concluidas = {nome: execucao for nome, execucao in self.execucoes.items() if execucao['status'] == 'concluida'}
+        if not concluidas:
+            return []
+
+        caminho = [max(concluidas, key=lambda nome: concluidas[nome]['fim'])]
+        while True:
+            anterior = self._antecessor_critico(caminho[-1], concluidas)
+            if anterior is None:
+                break
+            caminho.append(anterior)
+        return list(reversed(caminho))
+
+    def metricas(self) -> Dict[str, Any]:
+        """Tempos de cada tarefa (em segundos desde o início), caminho crítico e paralelismo obtido"""
+        tarefas = {}
+        for nome in self.tarefas:
+            execucao = self.execucoes.get(nome, {'status': 'nao_iniciada'})
+            registro = {'status': execucao['status'], 'dependencias': self.dependencias(nome)}
+            if execucao['status'] == 'concluida':
+                registro.update({
+                    'inicio': round(execucao['inicio'] - self._inicio, 3),
+                    'fim': round(execucao['fim'] - self._inicio, 3),
+                    'duracao': round(execucao['fim'] - execucao['inicio'], 3)
+                })
+            tarefas[nome] = registro
+
+        caminho = self.caminho_critico()
+        duracao_total = round(self._fim - self._inicio, 3)
+        duracao_caminho = round(sum(tarefas[nome]['duracao'] for nome in caminho), 3)
+        soma_duracoes = round(sum(registro.get('duracao', 0) for registro in tarefas.values()), 3)
+        return {
+            'executor': self.executor,
+            'workers': self.workers,
+            'tarefas': tarefas,
+            'caminho_critico': caminho,
+            'duracao_caminho_critico': duracao_caminho,
+            # Intervalos do caminho sem tarefa em execução (agendamento, concluir, fim do pool)
+            'espera_caminho_critico': round(max(0.0, duracao_total - duracao_caminho), 3),
+            'duracao_total': duracao_total,
+            'soma_duracoes': soma_duracoes,
+            'paralelismo': round(soma_duracoes / duracao_total, 2) if duracao_total else 1.0
+        }
+
+    def diagrama(self, largura: int = 40) -> List[str]:
+        """Linha do tempo em texto, uma tarefa por linha (█ = caminho crítico, ░ = demais)"""
+        metricas = self.metricas()
+        total = metricas['duracao_total'] or 1.0
+        critico = set(metricas['caminho_critico'])
+        coluna_nome = max(len(nome) for nome in self.tarefas)
+
+        linhas = []
+        for nome, registro in sorted(metricas['tarefas'].items(), key=lambda item: item[1].get('inicio', float('inf'))):
+            if registro['status'] != 'concluida':
+                linhas.append(f"{nome:<{coluna_nome}}  {registro['status']}")
+                continue
+            inicio = min(largura - 1, int(registro['inicio'] / total * largura))
+            fim = max(inicio + 1, int(round(registro['fim'] / total * largura)))
+            barra = ' ' * inicio + ('█' if nome in critico else '░') * (fim - inicio)
+            linhas.append(
+                f"{nome:<{coluna_nome}}  |{barra:<{largura}}|  {registro['inicio']:7.2f}s {registro['duracao']:7.2f}s"
+            )
+        return linhas
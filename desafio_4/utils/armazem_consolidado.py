@@ -0,0 +1,227 @@
+"""
+Armazém Compartilhado do DataFrame Consolidado
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+VERSAO_MANIFESTO = 3
+
+# Arquivo com a versão publicada mais recente (substituído atomicamente)
+PONTEIRO_ATUAL = 'atual.json'
+
+# Arrays anuláveis do pandas gravados como valores + máscara no formato numpy
+MASCARADOS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+
+
+def _arrow_disponivel() -> bool:
+    """Indica se pyarrow está instalado para publicar em Arrow IPC"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _valor_json(valor):
+    """Converte escalares numpy/pandas das estatísticas para tipos JSON"""
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+
+def _gravar_json(caminho: Path, conteudo: Dict[str, Any]):
+    """Grava um JSON sem expor um arquivo parcial a outros processos"""
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=2, default=_valor_json)
+    os.replace(temporario, caminho)
+
+
+class ArmazemConsolidado:
+    """Publica o df_consolidado em arquivos mapeáveis em memória para outros processos
+
+    Cada publicação é uma versão imutável em <diretorio>/<competencia>/<versao>/ com os
+    dados e um manifesto.json (linhas, colunas, tipos, estatísticas, formato e os
+    motivos de exclusão na ordem dos bits de mascara_exclusao). Só
+    depois de a versão estar completa o ponteiro atual.json é substituído, então um
+    leitor sempre abre uma versão inteira e consistente, mesmo durante uma nova
+    publicação. As versões mais antigas que manter_versoes são removidas; em POSIX um
+    leitor que já mapeou os arquivos continua a vê-los.
+
+    Formatos:
+        arrow  um arquivo Arrow IPC sem compressão, aberto com pa.memory_map (requer
+               pyarrow); colunas numéricas sem nulos chegam ao pandas sem cópia
+        numpy  um .npy por coluna numérica, booleana ou de data (inteiros anuláveis
+               como valores + máscara), abertos com np.load(mmap_mode='r'); colunas de
+               texto ficam em texto.pkl e são desserializadas (usado sem pyarrow)
+    """
+
+    def __init__(self, diretorio: str, formato: str = 'arrow', manter_versoes: int = 2):
+        """Inicializa o armazém no diretório da competência"""
+        self.diretorio = Path(diretorio)
+        self.formato = formato
+        if formato == 'arrow' and not _arrow_disponivel():
+            self.formato = 'numpy'
+        self.manter_versoes = max(1, int(manter_versoes))
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ArmazemConsolidado']:
+        """Cria o armazém a partir da seção publicacao (None se desabilitada)"""
+        publicacao = config.get('publicacao', {})
+        if not publicacao.get('habilitada', False):
+            return None
+
+        competencia = config['regras_negocio']['competencia_referencia']
+        return cls(
+            Path(config['arquivos'].get('diretorio_publicacao', './publicacao/')) / competencia,
+            publicacao.get('formato', 'arrow'),
+            publicacao.get('manter_versoes', 2)
+        )
+
+    # Publicação
+
+    def publicar(self, df: pd.DataFrame, estatisticas: Dict[str, Any] = None,
+                 motivos_exclusao: List[str] = None) -> Path:
+        """Grava uma nova versão do consolidado e a torna a versão atual"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        versao = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+        temporario = self.diretorio / f".{versao}.{os.getpid()}.tmp"
+        temporario.mkdir()
+
+        try:
+            if self.formato == 'arrow':
+                arquivos = self._gravar_arrow(df, temporario)
+            else:
+                arquivos = self._gravar_numpy(df, temporario)
+
+            _gravar_json(temporario / 'manifesto.json', {
+                'versao_manifesto': VERSAO_MANIFESTO,
+                'versao': versao,
+                'criado_em': datetime.now().isoformat(),
+                'formato': self.formato,
+                'linhas': len(df),
+                'colunas': [{'nome': str(coluna), 'tipo': str(df[coluna].dtype)} for coluna in df.columns],
+                'arquivos': arquivos,
+                'bytes': sum((temporario / arquivo).stat().st_size for arquivo in arquivos),
+                'estatisticas': estatisticas or {},
+                'motivos_exclusao': list(motivos_exclusao or [])
+            })
+            os.replace(temporario, self.diretorio / versao)
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+
+        _gravar_json(self.diretorio / PONTEIRO_ATUAL, {'versao': versao})
+        self._remover_versoes_antigas()
+        return self.diretorio / versao
+
+    def _gravar_arrow(self, df: pd.DataFrame, destino: Path) -> list:
+        import pyarrow as pa
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(destino / 'consolidado.arrow'), 'wb') as arquivo:
+            with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        return ['consolidado.arrow']
+
+    def _gravar_numpy(self, df: pd.DataFrame, destino: Path) -> list:
+        arquivos, texto = [], {}
+        for indice, coluna in enumerate(df.columns):
+            serie = df[coluna]
+            base = f"coluna_{indice:03d}"
+            if isinstance(serie.array, MASCARADOS):
+                # Inteiros, decimais e booleanos anuláveis: valores e máscara de nulos
+                tipo = serie.dtype.numpy_dtype
+                np.save(destino / f"{base}.npy", serie.array.to_numpy(dtype=tipo, na_value=tipo.type(0)))
+                np.save(destino / f"{base}.mascara.npy", serie.isna().to_numpy())
+                arquivos += [f"{base}.npy", f"{base}.mascara.npy"]
+            elif isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufM':
+                np.save(destino / f"{base}.npy", serie.to_numpy())
+                arquivos.append(f"{base}.npy")
+            else:
+                texto[coluna] = serie
+
+        pd.to_pickle((pd.DataFrame(texto, index=df.index), df.index), destino / 'texto.pkl')
+        return arquivos + ['texto.pkl']
+
+    def _remover_versoes_antigas(self):
+        versoes = sorted(p for p in self.diretorio.iterdir() if p.is_dir() and not p.name.startswith('.'))
+        for antiga in versoes[:-self.manter_versoes]:
+            shutil.rmtree(antiga, ignore_errors=True)
+
+    # Leitura
+
+    def versao_atual(self) -> Optional[str]:
+        """Versão publicada mais recente (None se nada foi publicado)"""
+        try:
+            with open(self.diretorio / PONTEIRO_ATUAL, 'r', encoding='utf-8') as f:
+                return json.load(f)['versao']
+        except FileNotFoundError:
+            return None
+
+    def manifesto(self, versao: str = None) -> Dict[str, Any]:
+        """Manifesto de uma versão (padrão: a atual) sem abrir os dados"""
+        versao = versao or self.versao_atual()
+        if versao is None:
+            raise FileNotFoundError(f"Nenhum consolidado publicado em {self.diretorio}")
+
+        with open(self.diretorio / versao / 'manifesto.json', 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('versao_manifesto') != VERSAO_MANIFESTO:
+            raise ValueError(f"Consolidado publicado em formato incompatível ({manifesto.get('versao_manifesto')})")
+        return manifesto
+
+    def abrir(self, versao: str = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Abre uma versão publicada (padrão: a atual) mapeando os arquivos em memória
+
+        Retorna o DataFrame, somente leitura nas colunas mapeadas, e o manifesto.
+        """
+        manifesto = self.manifesto(versao)
+        diretorio = self.diretorio / manifesto['versao']
+
+        if manifesto['formato'] == 'arrow':
+            df = self.tabela(manifesto['versao']).to_pandas(split_blocks=True)
+        else:
+            df = self._abrir_numpy(diretorio, manifesto)
+        return df, manifesto
+
+    def tabela(self, versao: str = None):
+        """Tabela pyarrow de uma versão em Arrow IPC, sem cópia (para análises em Arrow)"""
+        import pyarrow as pa
+
+        manifesto = self.manifesto(versao)
+        if manifesto['formato'] != 'arrow':
+            raise ValueError(f"A versão {manifesto['versao']} foi publicada em {manifesto['formato']}, não Arrow")
+
+        origem = pa.memory_map(str(self.diretorio / manifesto['versao'] / 'consolidado.arrow'), 'r')
+        return pa.ipc.open_file(origem).read_all()
+
+    @staticmethod
+    def _abrir_numpy(diretorio: Path, manifesto: Dict[str, Any]) -> pd.DataFrame:
+        texto, indice = pd.read_pickle(diretorio / 'texto.pkl')
+        arquivos = set(manifesto['arquivos'])
+
+        colunas = {}
+        for posicao, coluna in enumerate(manifesto['colunas']):
+            nome, base = coluna['nome'], f"coluna_{posicao:03d}"
+            if f"{base}.mascara.npy" in arquivos:
+                valores = np.load(diretorio / f"{base}.npy", mmap_mode='r')
+                mascara = np.load(diretorio / f"{base}.mascara.npy", mmap_mode='r')
+                tipo = pd.api.types.pandas_dtype(coluna['tipo'])
+                colunas[nome] = pd.Series(tipo.construct_array_type()(valores, mascara), index=indice, copy=False)
+            elif f"{base}.npy" in arquivos:
+                colunas[nome] = pd.Series(np.load(diretorio / f"{base}.npy", mmap_mode='r'), index=indice, copy=False)
+            else:
+                colunas[nome] = texto[nome]
+        return pd.DataFrame(colunas, copy=False)
@@ -0,0 +1,319 @@
+"""
+Arquivamento de Saídas e Logs de Execuções Anteriores
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Execuções ainda não arquivadas de uma competência (arquivadas no início da próxima execução)
+PENDENTES = 'pendentes.json'
+
+# Partição das execuções de logs sem competência conhecida (arquivados por idade)
+PARTICAO_AVULSOS = 'avulsos'
+
+# Objetos gravados ou reaproveitados há menos que isso não são removidos pela retenção,
+# pois uma execução simultânea pode estar arquivando um arquivo com o mesmo conteúdo
+CARENCIA_OBJETOS_SEGUNDOS = 3600
+
+TAMANHO_LEITURA = 1 << 20
+
+
+def _gravar_json(caminho: Path, conteudo: Any):
+    """Grava um JSON sem expor um arquivo parcial a outros processos"""
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_LEITURA), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+class ArquivoSaidas:
+    """Move as saídas e os logs de execuções anteriores para um arquivo comprimido
+
+    Em vez de apagar os relatórios da execução anterior, o orquestrador os arquiva no
+    início de cada execução, junto com os logs daquela execução:
+
+        <diretorio>/objetos/ab/abcdef...gz          conteúdo comprimido (gzip), um por SHA-256
+        <diretorio>/<competencia>/<execucao>.json   manifesto: nome, hash e tamanhos de cada arquivo
+        <diretorio>/<competencia>/pendentes.json    execuções ainda não arquivadas
+
+    O conteúdo é endereçado pelo hash, então um arquivo idêntico em várias execuções
+    (fragmentos sem mudança, logs repetidos) ocupa espaço uma vez só. Ao final, cada
+    execução se registra em pendentes.json com os logs e as saídas que gravou; a
+    próxima execução da mesma competência arquiva esses arquivos sob o identificador
+    da execução (o timestamp dos logs). A retenção mantém as manter_execucoes mais
+    recentes de cada competência e as mais novas que dias_retencao, e remove os
+    objetos que nenhum manifesto referencia. restaurar() descomprime uma execução
+    arquivada em um diretório, sem reprocessar.
+    """
+
+    def __init__(self, diretorio: str, nivel_compressao: int = 6, manter_execucoes: Optional[int] = 10,
+                 dias_retencao: Optional[float] = None, logger=None):
+        """Inicializa o arquivo no diretório informado"""
+        self.diretorio = Path(diretorio)
+        self.nivel_compressao = nivel_compressao
+        self.manter_execucoes = manter_execucoes
+        self.dias_retencao = dias_retencao
+        self.logger = logger
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], logger=None) -> Optional['ArquivoSaidas']:
+        """Cria o arquivo a partir da seção arquivamento (None se desabilitado)"""
+        arquivamento = config.get('arquivamento', {})
+        if not arquivamento.get('habilitado', True):
+            return None
+
+        return cls(
+            config['arquivos'].get('diretorio_arquivo', './arquivo/'),
+            arquivamento.get('nivel_compressao', 6),
+            arquivamento.get('manter_execucoes', 10),
+            arquivamento.get('dias_retencao'),
+            logger
+        )
+
+    def _log(self, mensagem: str):
+        if self.logger is not None:
+            self.logger.log_info(mensagem)
+
+    # Registro e arquivamento
+
+    def registrar_execucao(self, competencia: str, execucao: str, arquivos: Dict[str, str]):
+        """Registra os arquivos de uma execução para serem arquivados na próxima
+
+        arquivos mapeia o nome relativo no arquivo (ex.: 'logs/processamento.log') para
+        o caminho atual do arquivo.
+        """
+        particao = self.diretorio / competencia
+        particao.mkdir(parents=True, exist_ok=True)
+        pendentes = [p for p in self._ler_pendentes(competencia) if p['execucao'] != execucao]
+        pendentes.append({'execucao': execucao, 'registrado_em': datetime.now().isoformat(),
+                          'arquivos': {nome: str(Path(caminho).resolve()) for nome, caminho in arquivos.items()}})
+        _gravar_json(particao / PENDENTES, pendentes)
+
+    def _ler_pendentes(self, competencia: str) -> List[Dict[str, Any]]:
+        caminho = self.diretorio / competencia / PENDENTES
+        if not caminho.exists():
+            return []
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+
+    def arquivar_anteriores(self, competencia: str, saidas: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Arquiva as execuções pendentes da competência e as saídas que ainda estiverem no lugar
+
+        As execuções pendentes são arquivadas da mais recente para a mais antiga: um
+        relatório listado por várias (execução interrompida antes de gravar) fica com a
+        mais recente. Saídas sem execução registrada (ex.: geradas por uma versão
+        anterior do sistema) formam uma execução identificada pela data do arquivo.
+        """
+        manifestos = []
+        pendentes = self._ler_pendentes(competencia)
+        for pendente in reversed(pendentes):
+            manifesto = self.arquivar(competencia, pendente['execucao'], pendente['arquivos'])
+            if manifesto:
+                manifestos.append(manifesto)
+
+        restantes = {nome: caminho for nome, caminho in saidas.items() if os.path.exists(caminho)}
+        if restantes:
+            modificado = max(os.path.getmtime(caminho) for caminho in restantes.values())
+            execucao = datetime.fromtimestamp(modificado).strftime('%Y%m%d_%H%M%S')
+            manifestos.append(self.arquivar(competencia, execucao, restantes))
+
+        if pendentes:
+            (self.diretorio / competencia / PENDENTES).unlink(missing_ok=True)
+        return manifestos
+
+    def arquivar(self, competencia: str, execucao: str, arquivos: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Comprime os arquivos existentes no arquivo da competência e os remove do lugar original
+
+        Retorna o manifesto gravado (None se nenhum dos arquivos existe mais).
+        """
+        existentes = {nome: Path(caminho) for nome, caminho in arquivos.items() if os.path.exists(caminho)}
+        if not existentes:
+            return None
+
+        particao = self.diretorio / competencia
+        particao.mkdir(parents=True, exist_ok=True)
+        identificador, sufixo = execucao, 2
+        while (particao / f"{identificador}.json").exists():
+            identificador, sufixo = f"{execucao}_{sufixo}", sufixo + 1
+
+        entradas = [self._guardar_objeto(nome, caminho) for nome, caminho in sorted(existentes.items())]
+        manifesto = {
+            'competencia': competencia,
+            'execucao': identificador,
+            'arquivado_em': datetime.now().isoformat(),
+            'bytes': sum(entrada['tamanho'] for entrada in entradas),
+            'bytes_comprimidos_novos': sum(entrada['tamanho_comprimido'] for entrada in entradas if entrada['novo']),
+            'arquivos': entradas
+        }
+        _gravar_json(particao / f"{identificador}.json", manifesto)
+
+        # Originais só são removidos depois de o manifesto estar gravado
+        for caminho in existentes.values():
+            try:
+                caminho.unlink()
+            except OSError as e:
+                if self.logger is not None:
+                    self.logger.log_warning(f"Não foi possível remover {caminho} após arquivar: {e}")
+
+        self._log(
+            f"Execução {identificador} de {competencia} arquivada: {len(entradas)} arquivos, "
+            f"{manifesto['bytes']} bytes ({manifesto['bytes_comprimidos_novos']} bytes novos no arquivo)"
+        )
+        return manifesto
+
+    def _caminho_objeto(self, sha256: str) -> Path:
+        return self.diretorio / 'objetos' / sha256[:2] / f"{sha256}.gz"
+
+    def _guardar_objeto(self, nome: str, caminho: Path) -> Dict[str, Any]:
+        """Grava o conteúdo comprimido do arquivo, a menos que um objeto com o mesmo hash já exista"""
+        sha256 = _hash_arquivo(caminho)
+        destino = self._caminho_objeto(sha256)
+        novo = not destino.exists()
+
+        if novo:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+            with open(caminho, 'rb') as origem, gzip.open(temporario, 'wb', compresslevel=self.nivel_compressao) as saida:
+                shutil.copyfileobj(origem, saida, TAMANHO_LEITURA)
+            os.replace(temporario, destino)
+        else:
+            # Renova a data do objeto para a retenção não removê-lo durante este arquivamento
+            os.utime(destino)
+
+        return {
+            'nome': nome,
+            'origem': str(caminho),
+            'sha256': sha256,
+            'tamanho': caminho.stat().st_size,
+            'tamanho_comprimido': destino.stat().st_size,
+            'novo': novo
+        }
+
+    def arquivar_logs_avulsos(self, diretorio_logs: str, dias: float) -> Optional[Dict[str, Any]]:
+        """Arquiva os logs mais antigos que dias que nenhuma execução pendente referencia
+
+        Cobre os logs de comandos que não geram relatório (validate, explain) e de
+        competências que não voltaram a ser processadas.
+        """
+        referenciados = set()
+        if self.diretorio.exists():
+            for particao in self.diretorio.iterdir():
+                if particao.is_dir() and particao.name != 'objetos':
+                    for pendente in self._ler_pendentes(particao.name):
+                        referenciados.update(str(Path(caminho).resolve()) for caminho in pendente['arquivos'].values())
+
+        limite = time.time() - dias * 86400
+        antigos = {
+            f"logs/{caminho.name}": str(caminho)
+            for caminho in sorted(Path(diretorio_logs).glob('*'))
+            if caminho.is_file() and caminho.stat().st_mtime < limite
+            and str(caminho.resolve()) not in referenciados
+        }
+        if not antigos:
+            return None
+        return self.arquivar(PARTICAO_AVULSOS, datetime.now().strftime('logs_%Y%m%d_%H%M%S'), antigos)
+
+    # Retenção
+
+    def aplicar_retencao(self) -> Dict[str, int]:
+        """Remove execuções fora da política de retenção e os objetos que ficaram sem referência"""
+        removidas = 0
+        limite = None if self.dias_retencao is None else datetime.now().timestamp() - self.dias_retencao * 86400
+
+        for competencia in self.competencias():
+            manifestos = sorted(self.listar(competencia), key=lambda m: m['arquivado_em'], reverse=True)
+            for posicao, manifesto in enumerate(manifestos):
+                excede_quantidade = self.manter_execucoes is not None and posicao >= self.manter_execucoes
+                excede_idade = limite is not None and datetime.fromisoformat(manifesto['arquivado_em']).timestamp() < limite
+                if excede_quantidade or excede_idade:
+                    (self.diretorio / competencia / f"{manifesto['execucao']}.json").unlink(missing_ok=True)
+                    removidas += 1
+
+        objetos = self._coletar_objetos()
+        if removidas or objetos:
+            self._log(f"Retenção do arquivo: {removidas} execuções e {objetos} objetos removidos")
+        return {'execucoes_removidas': removidas, 'objetos_removidos': objetos}
+
+    def _coletar_objetos(self) -> int:
+        """Remove objetos não referenciados por nenhum manifesto (exceto os recentes)"""
+        diretorio_objetos = self.diretorio / 'objetos'
+        if not diretorio_objetos.exists():
+            return 0
+
+        referenciados = {
+            entrada['sha256']
+            for competencia in self.competencias() for manifesto in self.listar(competencia)
+            for entrada in manifesto['arquivos']
+        }
+        limite = time.time() - CARENCIA_OBJETOS_SEGUNDOS
+        removidos = 0
+        for objeto in diretorio_objetos.glob('*/*.gz'):
+            if objeto.name[:-len('.gz')] not in referenciados and objeto.stat().st_mtime < limite:
+                objeto.unlink(missing_ok=True)
+                removidos += 1
+        return removidos
+
+    # Consulta e restauração
+
+    def competencias(self) -> List[str]:
+        """Partições existentes no arquivo (competências e logs avulsos)"""
+        if not self.diretorio.exists():
+            return []
+        return sorted(p.name for p in self.diretorio.iterdir() if p.is_dir() and p.name != 'objetos')
+
+    def listar(self, competencia: str) -> List[Dict[str, Any]]:
+        """Manifestos das execuções arquivadas da competência, da mais antiga para a mais recente"""
+        particao = self.diretorio / competencia
+        if not particao.exists():
+            return []
+        manifestos = []
+        for caminho in particao.glob('*.json'):
+            if caminho.name == PENDENTES:
+                continue
+            with open(caminho, encoding='utf-8') as f:
+                manifestos.append(json.load(f))
+        return sorted(manifestos, key=lambda m: m['arquivado_em'])
+
+    def restaurar(self, competencia: str, execucao: str, destino: str) -> List[str]:
+        """Descomprime os arquivos de uma execução arquivada em destino/<nome>
+
+        O conteúdo restaurado é conferido com o hash do manifesto.
+        """
+        manifesto_path = self.diretorio / competencia / f"{execucao}.json"
+        if not manifesto_path.exists():
+            raise FileNotFoundError(f"Execução {execucao} não encontrada no arquivo de {competencia}")
+        with open(manifesto_path, encoding='utf-8') as f:
+            manifesto = json.load(f)
+
+        restaurados = []
+        for entrada in manifesto['arquivos']:
+            caminho = Path(destino) / entrada['nome']
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            digest = hashlib.sha256()
+            with gzip.open(self._caminho_objeto(entrada['sha256']), 'rb') as origem, open(caminho, 'wb') as saida:
+                for bloco in iter(lambda: origem.read(TAMANHO_LEITURA), b''):
+                    digest.update(bloco)
+                    saida.write(bloco)
+            if digest.hexdigest() != entrada['sha256']:
+                raise ValueError(f"Conteúdo restaurado de {entrada['nome']} não confere com o manifesto")
+            restaurados.append(str(caminho))
+        return restaurados
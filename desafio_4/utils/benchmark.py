@@ -0,0 +1,349 @@
+"""
+Benchmarks do Sistema de Processamento VR
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+
+# Módulos que não devem ser carregados apenas para iniciar a CLI
+MODULOS_PESADOS = ['pandas', 'numpy', 'openpyxl']
+
+
+def _materializar(df):
+    """Quadro completo do consolidado (um ConsolidadoEmBlocos é lido do disco e fechado)"""
+    from utils.memoria import ConsolidadoEmBlocos
+
+    if isinstance(df, ConsolidadoEmBlocos):
+        blocos, df = df, df.ler()
+        blocos.fechar()
+    return df
+
+
+def _medir_comando(comando: List[str], repeticoes: int, cwd: str) -> Dict[str, float]:
+    """Executa um comando várias vezes e retorna os tempos em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'min_ms': round(min(tempos), 1),
+        'mediana_ms': round(statistics.median(tempos), 1),
+        'max_ms': round(max(tempos), 1)
+    }
+
+
+def modulos_pesados_na_inicializacao(script: str) -> List[str]:
+    """Lista os módulos pesados carregados ao importar o script da CLI"""
+    diretorio = str(Path(script).parent)
+    codigo = (
+        "import sys; sys.path.insert(0, {dir!r}); import {mod}; "
+        "print(','.join(m for m in {pesados!r} if m in sys.modules))"
+    ).format(dir=diretorio, mod=Path(script).stem, pesados=MODULOS_PESADOS)
+
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=diretorio,
+                           capture_output=True, text=True, check=True).stdout.strip()
+    return [m for m in saida.split(',') if m]
+
+
+def medir_inicializacao(script: str, config_path: str = None, repeticoes: int = 5) -> Dict[str, Any]:
+    """Mede o tempo de inicialização dos subcomandos leves da CLI"""
+    diretorio = str(Path(script).parent)
+    comando_base = [sys.executable, script]
+    if config_path:
+        comando_base += ['--config', config_path]
+
+    comandos = {
+        'python': [sys.executable, '-c', 'pass'],
+        'help': comando_base + ['--help'],
+        'validate': comando_base + ['validate']
+    }
+
+    return {
+        'repeticoes': repeticoes,
+        'comandos': {nome: _medir_comando(cmd, repeticoes, diretorio) for nome, cmd in comandos.items()},
+        'modulos_pesados_carregados': modulos_pesados_na_inicializacao(script)
+    }
+
+
+def gerar_dados_sinteticos(dados_validados: Dict[str, Any], linhas: int) -> Dict[str, Any]:
+    """Replica as bases validadas até atingir o número de colaboradores desejado
+
+    Cada réplica recebe matrículas deslocadas e um código de EMPRESA próprio, e as
+    listas por matrícula (férias, afastamentos, desligados...) são replicadas junto,
+    de modo que as regras disparam na mesma proporção dos dados reais.
+    """
+    import pandas as pd
+
+    ativos = dados_validados['ativos']
+    replicas = max(1, -(-linhas // len(ativos)))
+    matriculas = [df['MATRICULA'].max() for df in dados_validados.values() if 'MATRICULA' in df.columns]
+    deslocamento = 10 ** len(str(int(max(matriculas))))
+
+    def replicar(df, alterar_empresa=False):
+        partes = []
+        for r in range(replicas):
+            parte = df.assign(MATRICULA=df['MATRICULA'] + r * deslocamento)
+            if alterar_empresa and 'EMPRESA' in df.columns:
+                parte['EMPRESA'] = df['EMPRESA'] + r
+            partes.append(parte)
+        return pd.concat(partes, ignore_index=True)
+
+    sinteticos = {}
+    for nome, df in dados_validados.items():
+        if nome == 'ativos':
+            sinteticos[nome] = replicar(df, alterar_empresa=True).head(linhas)
+        elif 'MATRICULA' in df.columns:
+            sinteticos[nome] = replicar(df)
+        else:
+            sinteticos[nome] = df
+    return sinteticos
+
+
+def medir_consolidacao_paralela(config_loader, linhas: int, workers: List[int],
+                                chave: str = 'EMPRESA', repeticoes: int = 1) -> Dict[str, Any]:
+    """Mede a consolidação sequencial e particionada com 1..N workers sobre dados sintéticos
+
+    O tempo inclui a criação do pool de processos. Cada execução particionada é
+    comparada com o resultado sequencial.
+    """
+    from agentes.extrator_validador import ExtratorValidador
+    from agentes.consolidador_regras import ConsolidadorRegras
+    from utils.logger import VRLoggerMemoria
+
+    config = config_loader.get_config()
+    dados = ExtratorValidador(VRLoggerMemoria(config), config_loader).executar()
+    dados = gerar_dados_sinteticos(dados, linhas)
+
+    def executar(n_workers):
+        loader = config_loader.derivar()
+        loader.config.setdefault('performance', {})['consolidacao_particionada'] = {
+            'habilitada': n_workers is not None,
+            'chave': chave,
+            'workers': n_workers
+        }
+        tempos = []
+        for _ in range(repeticoes):
+            consolidador = ConsolidadorRegras(VRLoggerMemoria(loader.get_config()), loader)
+            inicio = time.perf_counter()
+            df = consolidador.executar(dados)
+            tempos.append(time.perf_counter() - inicio)
+        return statistics.median(tempos), _materializar(df)
+
+    tempo_sequencial, referencia = executar(None)
+    cenarios = [{'workers': 'sequencial', 'segundos': round(tempo_sequencial, 3), 'aceleracao': 1.0,
+                 'identico': True}]
+    for n_workers in workers:
+        tempo, df = executar(n_workers)
+        cenarios.append({
+            'workers': n_workers,
+            'segundos': round(tempo, 3),
+            'aceleracao': round(tempo_sequencial / tempo, 2),
+            'identico': df.equals(referencia)
+        })
+
+    return {
+        'linhas': len(dados['ativos']),
+        'chave': chave,
+        'particoes_distintas': int(dados['ativos'][chave].nunique(dropna=False)) if chave in dados['ativos'] else None,
+        'nucleos_disponiveis': os.cpu_count(),
+        'cenarios': cenarios
+    }
+
+
+def medir_memoria(config_loader, linhas: int) -> Dict[str, Any]:
+    """Executa extração, consolidação e relatório sobre dados sintéticos sob o governador de memória
+
+    Usa performance.max_memory_usage e performance.chunk_size da configuração. Relatórios e
+    logs são gravados em um diretório temporário. Retorna estratégia, projeção e pico de
+    RSS de cada fase. Acima do orçamento, o consolidado fica em blocos em disco e o
+    relatório é gravado diretamente a partir deles.
+    """
+    import tempfile
+    from agentes.extrator_validador import ExtratorValidador
+    from agentes.consolidador_regras import ConsolidadorRegras
+    from agentes.gerador_relatorio import GeradorRelatorio
+    from utils.logger import VRLogger
+    from utils.memoria import ConsolidadoEmBlocos, GovernadorMemoria
+
+    df = None
+    with tempfile.TemporaryDirectory(prefix='vr_bench_memoria_') as diretorio:
+        loader = config_loader.derivar(diretorio_saida=diretorio)
+        loader.config['arquivos']['diretorio_logs'] = diretorio
+        logger = VRLogger(None, loader.get_config())
+        governador = GovernadorMemoria.from_config(loader.get_config(), logger)
+
+        try:
+            tempos = {}
+            inicio = time.perf_counter()
+            with governador.monitorar('extracao'):
+                dados = ExtratorValidador(logger, loader).executar()
+                dados = gerar_dados_sinteticos(dados, linhas)
+            tempos['extracao'] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            consolidador = ConsolidadorRegras(logger, loader, governador)
+            with governador.monitorar('consolidacao'):
+                df = consolidador.executar(dados)
+            tempos['consolidacao'] = time.perf_counter() - inicio
+
+            del dados
+            inicio = time.perf_counter()
+            with governador.monitorar('relatorio'):
+                GeradorRelatorio(logger, loader, governador).executar(df, consolidador.get_estatisticas())
+            tempos['relatorio'] = time.perf_counter() - inicio
+            linhas_consolidadas = len(df)
+        finally:
+            if isinstance(df, ConsolidadoEmBlocos):
+                df.fechar()
+            logger.fechar()
+
+    fases = governador.resumo()
+    for fase, segundos in tempos.items():
+        fases[fase]['segundos'] = round(segundos, 1)
+
+    return {
+        'linhas': linhas_consolidadas,
+        'limite_bytes': governador.limite_bytes,
+        'tamanho_bloco': governador.tamanho_bloco,
+        'fases': fases
+    }
+
+
+def comparar_motores(config_loader, escalas: List[int], motores: List[str]) -> Dict[str, Any]:
+    """Executa a consolidação com cada motor sobre dados sintéticos e compara com o pandas
+
+    Para cada escala (número de colaboradores), cada motor deve produzir o mesmo
+    df_consolidado, as mesmas estatísticas de get_estatisticas e as mesmas contagens
+    de exclusões e cálculos especiais do log. Motores sem as dependências instaladas
+    são listados como indisponíveis.
+    """
+    from agentes.extrator_validador import ExtratorValidador
+    from agentes.consolidador_regras import ConsolidadorRegras
+    from agentes.motores import classe_motor
+    from utils.logger import VRLoggerMemoria
+
+    config = config_loader.get_config()
+    dados_reais = ExtratorValidador(VRLoggerMemoria(config), config_loader).executar()
+
+    def executar(motor, dados):
+        loader = config_loader.derivar()
+        performance = loader.config.setdefault('performance', {})
+        performance['motor_consolidacao'] = motor
+        # O motor pandas segue o governador de memória (em blocos nas escalas grandes)
+        performance['consolidacao_particionada'] = {'habilitada': False}
+
+        logger = VRLoggerMemoria(loader.get_config())
+        consolidador = ConsolidadorRegras(logger, loader)
+        inicio = time.perf_counter()
+        df = consolidador.executar(dados)
+        segundos = time.perf_counter() - inicio
+        contagens = {chave: logger.stats[chave] for chave in ('colaboradores_excluidos', 'exclusoes_por_categoria',
+                                                               'calculos_especiais')}
+        return segundos, _materializar(df), consolidador.get_estatisticas(), contagens
+
+    resultados = []
+    for linhas in escalas:
+        dados = gerar_dados_sinteticos(dados_reais, linhas)
+        tempo_referencia, referencia, estatisticas, contagens = executar('pandas', dados)
+        cenarios = [{'motor': 'pandas', 'segundos': round(tempo_referencia, 3), 'aceleracao': 1.0,
+                     'identico': True}]
+        for motor in motores:
+            if motor == 'pandas':
+                continue
+            if not classe_motor(motor).disponivel():
+                cenarios.append({'motor': motor, 'indisponivel': classe_motor(motor).requisitos})
+                continue
+            tempo, df, estatisticas_motor, contagens_motor = executar(motor, dados)
+            cenarios.append({
+                'motor': motor,
+                'segundos': round(tempo, 3),
+                'aceleracao': round(tempo_referencia / tempo, 2),
+                'identico': df.equals(referencia) and list(df.columns) == list(referencia.columns)
+                            and estatisticas_motor == estatisticas and contagens_motor == contagens
+            })
+        resultados.append({'linhas': len(dados['ativos']), 'cenarios': cenarios})
+        del dados, referencia
+
+    return {'escalas': resultados}
+
+
+def comparar_leitores(config_loader, linhas: int, colunas_extras: int = 20) -> Dict[str, Any]:
+    """Mede a leitura de ATIVOS em cada leitor, com todas as colunas e com a projeção
+
+    A base real é replicada até o número de linhas pedido e recebe colunas de
+    preenchimento (texto, número e data), como um cadastro largo exportado do RH. O
+    mesmo conteúdo é gravado em .xlsx, .csv e .parquet (este apenas com pyarrow), e
+    cada leitor lê o formato que atende. A leitura projetada deve ser igual às mesmas
+    colunas da leitura completa. Leitores sem as dependências instaladas são listados
+    como indisponíveis.
+    """
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    from agentes.extrator_validador import ExtratorValidador
+    from utils.leitores import LEITORES
+    from utils.logger import VRLoggerMemoria
+
+    extrator = ExtratorValidador(VRLoggerMemoria(config_loader.get_config()), config_loader)
+    colunas = extrator.colunas_leitura('ativos')
+    ativos = LEITORES['openpyxl']().ler(config_loader.get_file_path('ativos'))
+
+    largo = ativos.iloc[np.arange(linhas) % len(ativos)].reset_index(drop=True)
+    sequencia = np.arange(linhas)
+    for indice in range(colunas_extras):
+        nome = f"CAMPO {indice + 1:02d}"
+        if indice % 3 == 0:
+            largo[nome] = pd.Series(sequencia % 97).map(lambda n: f"TEXTO {n}")
+        elif indice % 3 == 1:
+            largo[nome] = sequencia * 1.5
+        else:
+            largo[nome] = pd.Timestamp('2020-01-01') + pd.to_timedelta(sequencia % 1500, unit='D')
+
+    cenarios = []
+    with tempfile.TemporaryDirectory(prefix='vr_bench_leitores_') as diretorio:
+        arquivos = {'.xlsx': os.path.join(diretorio, 'ATIVOS.xlsx'), '.csv': os.path.join(diretorio, 'ATIVOS.csv')}
+        largo.to_excel(arquivos['.xlsx'], index=False)
+        largo.to_csv(arquivos['.csv'], index=False)
+        if LEITORES['parquet'].disponivel():
+            arquivos['.parquet'] = os.path.join(diretorio, 'ATIVOS.parquet')
+            largo.to_parquet(arquivos['.parquet'], index=False)
+
+        for nome, classe in LEITORES.items():
+            formato = next((ext for ext in classe.extensoes if ext in arquivos), classe.extensoes[0])
+            if not classe.disponivel() or formato not in arquivos:
+                cenarios.append({'leitor': nome, 'formato': formato, 'indisponivel': classe.requisitos})
+                continue
+
+            leitor = classe()
+            inicio = time.perf_counter()
+            completo = leitor.ler(arquivos[formato])
+            tempo_completo = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            projetado = leitor.ler(arquivos[formato], colunas)
+            tempo_projetado = time.perf_counter() - inicio
+
+            cenarios.append({
+                'leitor': nome,
+                'formato': formato,
+                'completo_s': round(tempo_completo, 3),
+                'projetado_s': round(tempo_projetado, 3),
+                'aceleracao': round(tempo_completo / tempo_projetado, 2),
+                'identico': projetado.equals(completo[list(projetado.columns)])
+            })
+
+    return {
+        'linhas': linhas,
+        'colunas_total': len(largo.columns),
+        'colunas_projetadas': len(colunas) if colunas is not None else len(largo.columns),
+        'cenarios': cenarios
+    }
@@ -0,0 +1,96 @@
+"""
+Cache em Memória de Arquivos de Entrada Processados
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import hashlib
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def _copia_rasa(valor):
+    """Cópia rasa de um DataFrame ou de uma tupla de DataFrames"""
+    if isinstance(valor, tuple):
+        return tuple(_copia_rasa(item) for item in valor)
+    return valor.copy(deep=False)
+
+
+class CacheArquivos:
+    """Mantém DataFrames já lidos e convertidos enquanto o arquivo de origem não mudar
+
+    A chave é só o arquivo; o que depende da execução (competência, contratos de
+    qualidade) deve ser recalculado sobre a entrada em cache.
+
+    Cada job recebe uma cópia rasa dos DataFrames guardados: com Copy-on-Write (ativado
+    pelo OrquestradorVR), alterar a cópia não altera a entrada nem o que outro job
+    recebeu, e os dados só são copiados quando alterados.
+    """
+
+    def __init__(self, chaves: Iterable[str] = None, por_conteudo: bool = False):
+        """Inicializa o cache (chaves=None guarda todos os arquivos)
+
+        Com por_conteudo=True a versão do arquivo é o hash SHA-256 do conteúdo, de modo
+        que regravar um arquivo sem alterá-lo não invalida a entrada.
+        """
+        self.chaves = set(chaves) if chaves is not None else None
+        self.por_conteudo = por_conteudo
+        self._entradas: Dict[str, Tuple[Tuple, object]] = {}
+        self._hashes: Dict[str, Tuple[Tuple, str]] = {}
+        self.acertos = 0
+        self.falhas = 0
+
+    def hash_conteudo(self, file_path: str) -> str:
+        """Hash SHA-256 do conteúdo, recalculado apenas quando data de modificação ou tamanho mudam"""
+        caminho = os.path.abspath(file_path)
+        stat = os.stat(caminho)
+        versao = (stat.st_mtime_ns, stat.st_size)
+
+        em_cache = self._hashes.get(caminho)
+        if em_cache is not None and em_cache[0] == versao:
+            return em_cache[1]
+
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(bloco)
+
+        self._hashes[caminho] = (versao, sha.hexdigest())
+        return sha.hexdigest()
+
+    def _assinatura(self, file_path: str) -> Tuple:
+        """Identifica a versão de um arquivo pelo conteúdo ou pela data de modificação e tamanho"""
+        if self.por_conteudo:
+            return (os.path.abspath(file_path), self.hash_conteudo(file_path))
+
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+    def aceita(self, arquivo_key: str) -> bool:
+        """Indica se o arquivo deve ser mantido em cache"""
+        return self.chaves is None or arquivo_key in self.chaves
+
+    def obter(self, arquivo_key: str, file_path: str) -> Optional[object]:
+        """Retorna o DataFrame em cache se o arquivo não mudou desde o processamento"""
+        if not self.aceita(arquivo_key) or arquivo_key not in self._entradas:
+            return None
+
+        assinatura, df = self._entradas[arquivo_key]
+        if assinatura != self._assinatura(file_path):
+            self.falhas += 1
+            return None
+
+        self.acertos += 1
+        return _copia_rasa(df)
+
+    def guardar(self, arquivo_key: str, file_path: str, df):
+        """Guarda o DataFrame processado associado à versão atual do arquivo"""
+        if self.aceita(arquivo_key):
+            self._entradas[arquivo_key] = (self._assinatura(file_path), _copia_rasa(df))
+
+    def invalidar(self, arquivo_key: str = None):
+        """Descarta uma entrada (ou todas)"""
+        if arquivo_key is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(arquivo_key, None)
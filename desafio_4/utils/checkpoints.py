@@ -0,0 +1,157 @@
+"""
+Checkpoints de Fase do Processamento VR
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+import pandas as pd
+
+from utils.cache_arquivos import CacheArquivos
+
+
+# Seções da configuração que não alteram os dados de cada fase (não invalidam checkpoints)
+SECOES_OPERACIONAIS = ('sistema', 'arquivos', 'logging', 'performance', 'servico', 'observador',
+                       'fila', 'checkpoints', 'publicacao', 'estatisticas', 'relatorio',
+                       'arquivamento')
+
+VERSAO_MANIFESTO = 3
+
+
+def _parquet_disponivel() -> bool:
+    """Indica se há um mecanismo Parquet instalado (pyarrow)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class GerenciadorCheckpoints:
+    """Grava e recarrega o estado de cada fase para retomar um processamento interrompido
+
+    Cada fase fica em <diretorio_checkpoints>/<competencia>/<fase>/ com uma tabela por
+    DataFrame (Parquet, ou pickle quando pyarrow não está instalado ou a tabela não é
+    representável em Parquet), o estado auxiliar em estado.pkl e um manifesto.json com
+    os hashes da configuração e dos arquivos de entrada. O manifesto é gravado por
+    último e a pasta da fase é substituída de uma vez, então um checkpoint com
+    manifesto está sempre completo.
+    """
+
+    def __init__(self, config_loader, formato: str = 'parquet'):
+        """Inicializa o gerenciador para a competência da configuração"""
+        self.config_loader = config_loader
+        self.config = config_loader.get_config()
+
+        competencia = self.config['regras_negocio']['competencia_referencia']
+        self.diretorio = Path(self.config['arquivos']['diretorio_checkpoints']) / competencia
+
+        self.formato = formato
+        if formato == 'parquet' and not _parquet_disponivel():
+            self.formato = 'pickle'
+
+        self._hashes = CacheArquivos(por_conteudo=True)
+
+    @classmethod
+    def from_config(cls, config_loader) -> 'GerenciadorCheckpoints':
+        """Cria o gerenciador a partir da seção checkpoints da configuração"""
+        config_checkpoints = config_loader.get_config().get('checkpoints', {})
+        return cls(config_loader, config_checkpoints.get('formato', 'parquet'))
+
+    def hash_configuracao(self) -> str:
+        """Hash das seções da configuração que afetam os dados"""
+        relevante = {k: v for k, v in self.config.items() if k not in SECOES_OPERACIONAIS}
+        conteudo = json.dumps(relevante, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def hashes_entrada(self) -> Dict[str, str]:
+        """Hash SHA-256 de cada arquivo de entrada configurado (None se ausente)"""
+        hashes = {}
+        for arquivo_key in self.config['arquivos_entrada']:
+            file_path = self.config_loader.get_file_path(arquivo_key)
+            hashes[arquivo_key] = self._hashes.hash_conteudo(file_path) if os.path.exists(file_path) else None
+        return hashes
+
+    def _gravar_tabela(self, df: pd.DataFrame, base: Path) -> str:
+        """Grava uma tabela e retorna o formato usado"""
+        if self.formato == 'parquet':
+            try:
+                df.to_parquet(base.with_suffix('.parquet'))
+                return 'parquet'
+            except (ValueError, TypeError, NotImplementedError):
+                # Colunas com tipos mistos não são representáveis em Parquet (erros do pyarrow
+                # derivam dessas exceções)
+                base.with_suffix('.parquet').unlink(missing_ok=True)
+        df.to_pickle(base.with_suffix('.pkl'))
+        return 'pickle'
+
+    def salvar(self, fase: str, tabelas: Dict[str, pd.DataFrame], estado: Dict[str, Any] = None) -> Path:
+        """Grava o checkpoint de uma fase, substituindo o anterior"""
+        destino = self.diretorio / fase
+        temporario = self.diretorio / f".{fase}.{os.getpid()}.tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        temporario.mkdir(parents=True)
+
+        formatos = {nome: self._gravar_tabela(df, temporario / nome) for nome, df in tabelas.items()}
+        pd.to_pickle(estado or {}, temporario / 'estado.pkl')
+
+        manifesto = {
+            'versao': VERSAO_MANIFESTO,
+            'fase': fase,
+            'criado_em': datetime.now().isoformat(),
+            'hash_configuracao': self.hash_configuracao(),
+            'hashes_entrada': self.hashes_entrada(),
+            'tabelas': formatos
+        }
+        with open(temporario / 'manifesto.json', 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporario, destino)
+        return destino
+
+    def verificar(self, fase: str) -> Dict[str, Any]:
+        """Lê o manifesto da fase e confirma que configuração e entradas não mudaram"""
+        arquivo_manifesto = self.diretorio / fase / 'manifesto.json'
+        if not arquivo_manifesto.exists():
+            raise ValueError(f"Nenhum checkpoint válido da {fase} em {self.diretorio}")
+
+        with open(arquivo_manifesto, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+
+        if manifesto.get('versao') != VERSAO_MANIFESTO:
+            raise ValueError(f"Checkpoint da {fase} em formato incompatível (versão {manifesto.get('versao')})")
+        if manifesto['hash_configuracao'] != self.hash_configuracao():
+            raise ValueError(f"A configuração mudou desde o checkpoint da {fase}; execute o processamento completo")
+
+        alterados = [
+            arquivo_key for arquivo_key, hash_atual in self.hashes_entrada().items()
+            if manifesto['hashes_entrada'].get(arquivo_key) != hash_atual
+        ]
+        if alterados:
+            raise ValueError(
+                f"Arquivos de entrada alterados desde o checkpoint da {fase}: {', '.join(alterados)}"
+            )
+        return manifesto
+
+    def carregar(self, fase: str) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Any], Dict[str, Any]]:
+        """Recarrega tabelas, estado e manifesto de uma fase após verificá-la"""
+        manifesto = self.verificar(fase)
+        diretorio = self.diretorio / fase
+
+        tabelas = {}
+        for nome, formato in manifesto['tabelas'].items():
+            if formato == 'parquet':
+                tabelas[nome] = pd.read_parquet(diretorio / f"{nome}.parquet")
+            else:
+                tabelas[nome] = pd.read_pickle(diretorio / f"{nome}.pkl")
+
+        estado = pd.read_pickle(diretorio / 'estado.pkl')
+        return tabelas, estado, manifesto
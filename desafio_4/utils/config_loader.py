@@ -7,6 +7,7 @@ Data: 27/08/2025
 import yaml
 from pathlib import Path
 from typing import Dict, Any
+import copy
 import os
 
 
@@ -21,6 +22,7 @@ class ConfigLoader:
             config_path = project_root / "config" / "config.yaml"
         
         self.config_path = Path(config_path)
+        self.project_root = self.config_path.parent.parent
         self.config = self._load_and_validate_config()
         
     def _load_and_validate_config(self) -> Dict[str, Any]:
@@ -64,10 +66,11 @@ class ConfigLoader:
     
     def _resolve_paths(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Resolve caminhos relativos para absolutos"""
-        project_root = self.config_path.parent.parent
+        project_root = self.project_root
         
         # Resolver diretórios
-        for dir_key in ['diretorio_entrada', 'diretorio_saida', 'diretorio_logs']:
+        for dir_key in ['diretorio_entrada', 'diretorio_saida', 'diretorio_logs', 'diretorio_cache',
+                        'diretorio_fila', 'diretorio_checkpoints', 'diretorio_publicacao', 'diretorio_arquivo']:
             if dir_key in config['arquivos']:
                 path = config['arquivos'][dir_key]
                 if not os.path.isabs(path):
@@ -96,18 +99,36 @@ class ConfigLoader:
         return os.path.join(base_dir, filename)
     
     def get_output_path(self, filename: str = None) -> str:
-        """Retorna o caminho de saída para um arquivo"""
+        """Retorna o caminho de saída para um arquivo ({competencia} é substituída no nome)"""
         base_dir = self.config['arquivos']['diretorio_saida']
         
         if filename is None:
             # Usar template padrão
-            competencia = self.config['regras_negocio']['competencia_referencia']
-            filename = self.config['arquivos']['template_saida'].format(
-                competencia=competencia.replace('-', '_')
-            )
+            filename = self.config['arquivos']['template_saida']
+        
+        competencia = self.config['regras_negocio']['competencia_referencia']
+        filename = filename.replace('{competencia}', competencia.replace('-', '_'))
         
         return os.path.join(base_dir, filename)
     
+    def get_output_files(self) -> Dict[str, str]:
+        """Retorna os caminhos dos arquivos de saída gerados para a competência"""
+        arquivos = self.config['arquivos']
+        return {
+            'relatorio': self.get_output_path(),
+            'exclusoes': self.get_output_path(
+                arquivos.get('template_exclusoes', 'colaboradores_excluidos_{competencia}.xlsx')
+            ),
+            'quarentena': self.get_output_path(
+                self.config.get('qualidade_dados', {}).get('arquivo_quarentena', 'quarentena_{competencia}.xlsx')
+            )
+        }
+    
+    def get_fragments_path(self) -> str:
+        """Retorna o diretório dos relatórios por grupo (seção relatorio.fragmentacao)"""
+        fragmentacao = self.config.get('relatorio', {}).get('fragmentacao', {})
+        return self.get_output_path(fragmentacao.get('diretorio', 'fragmentos_{competencia}'))
+    
     def is_cargo_excluido(self, cargo: str) -> bool:
         """Verifica se um cargo está na lista de exclusões"""
         cargos_excluidos = self.config['exclusoes']['cargos_nao_elegiveis']
@@ -130,6 +151,8 @@ class ConfigLoader:
             self.config['arquivos']['diretorio_saida'],
             self.config['arquivos']['diretorio_logs']
         ]
+        if 'diretorio_cache' in self.config['arquivos']:
+            directories.append(self.config['arquivos']['diretorio_cache'])
         
         for directory in directories:
             Path(directory).mkdir(parents=True, exist_ok=True)
@@ -138,15 +161,37 @@ class ConfigLoader:
         """Recarrega a configuração do arquivo"""
         self.config = self._load_and_validate_config()
 
+    def derivar(self, diretorio_entrada: str = None, diretorio_saida: str = None,
+                competencia: str = None) -> 'ConfigLoader':
+        """Cria um carregador independente com sobrescritas pontuais, sem reler o YAML"""
+        derivado = copy.copy(self)
+        derivado.config = copy.deepcopy(self.config)
+        
+        if diretorio_entrada:
+            derivado.config['arquivos']['diretorio_entrada'] = str(Path(diretorio_entrada).resolve())
+        if diretorio_saida:
+            derivado.config['arquivos']['diretorio_saida'] = str(Path(diretorio_saida).resolve())
+        if competencia:
+            derivado.config['regras_negocio']['competencia_referencia'] = competencia
+        
+        return derivado
+
 
 # Instância global para facilitar acesso
 _config_loader = None
 
 def get_config_loader(config_path: str = None) -> ConfigLoader:
-    """Retorna instância singleton do carregador de configurações"""
+    """Retorna instância singleton do carregador de configurações
+    
+    Um config_path diferente do já carregado gera um carregador novo, sem substituir o
+    singleton. Execuções concorrentes devem usar um ContextoExecucao (utils.contexto)
+    com o próprio ConfigLoader em vez desta instância compartilhada.
+    """
     global _config_loader
     if _config_loader is None:
         _config_loader = ConfigLoader(config_path)
+    elif config_path is not None and Path(config_path).resolve() != _config_loader.config_path.resolve():
+        return ConfigLoader(config_path)
     return _config_loader
 
 def get_config() -> Dict[str, Any]:
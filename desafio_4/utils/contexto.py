@@ -0,0 +1,58 @@
+"""
+Contexto de Execução do Pipeline VR
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Dict
+
+from utils.config_loader import ConfigLoader
+from utils.logger import VRLogger
+from utils.cache_arquivos import CacheArquivos
+from utils.memoria import GovernadorMemoria
+from utils.armazem_consolidado import ArmazemConsolidado
+
+
+class ContextoExecucao:
+    """Estado de uma execução: configuração, logger, caches, orçamento de memória e saídas
+
+    O orquestrador e os agentes recebem tudo daqui, e nada fica em variáveis de
+    módulo: cada contexto tem a própria configuração (derivada ou lida do YAML), o
+    próprio logger, com handlers e arquivos de log exclusivos, e os próprios
+    caminhos de saída. Assim, várias competências podem ser processadas em threads
+    ou tarefas asyncio do mesmo processo sem compartilhar estado. Use como context
+    manager (ou chame fechar()) para liberar os handlers de log ao final.
+    """
+
+    def __init__(self, config_loader: ConfigLoader, logger: VRLogger = None,
+                 cache_arquivos: CacheArquivos = None):
+        """Cria o contexto; logger e cache podem ser injetados (ex.: cache do modo serviço)"""
+        self.config_loader = config_loader
+        self.config = config_loader.get_config()
+        self.logger = logger if logger is not None else VRLogger(None, self.config)
+        self.cache_arquivos = cache_arquivos
+
+        # Orçamento de memória compartilhado pelas fases e consolidado publicado da execução
+        self.governador = GovernadorMemoria.from_config(self.config, self.logger)
+        self.armazem = ArmazemConsolidado.from_config(self.config)
+
+    @property
+    def competencia(self) -> str:
+        """Competência de referência (AAAA-MM) desta execução"""
+        return self.config['regras_negocio']['competencia_referencia']
+
+    @property
+    def arquivos_saida(self) -> Dict[str, str]:
+        """Arquivos que esta execução grava no diretório de saída"""
+        return self.config_loader.get_output_files()
+
+    def fechar(self):
+        """Remove e fecha os handlers de log desta execução"""
+        self.logger.fechar()
+
+    def __enter__(self) -> 'ContextoExecucao':
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
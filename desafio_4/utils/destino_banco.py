@@ -0,0 +1,206 @@
+"""
+Carga dos Resultados em Banco de Dados (DB-API)
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import re
+import time
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from utils.logger import VRLogger
+
+
+# Sintaxe do upsert: ON CONFLICT (SQLite >= 3.24, PostgreSQL, DuckDB) ou ON DUPLICATE KEY (MySQL/MariaDB)
+UPSERTS = ('on_conflict', 'on_duplicate_key')
+
+# Marcador de parâmetro de cada paramstyle da DB-API (PEP 249); 'named' exige dicionários e não é usado
+MARCADORES = {
+    'qmark': lambda posicao: '?',
+    'numeric': lambda posicao: f':{posicao}',
+    'format': lambda posicao: '%s',
+    'pyformat': lambda posicao: '%s'
+}
+
+IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+
+def _identificador(nome: str) -> str:
+    """Nome de tabela ou coluna vindo da configuração (recusa qualquer coisa além de [esquema.]nome)"""
+    if not IDENTIFICADOR.match(nome):
+        raise ValueError(f"Identificador SQL inválido: {nome!r}")
+    return nome
+
+
+def _valores(serie: pd.Series) -> List[Any]:
+    """Valores da série como tipos Python aceitos pelos drivers (nulos viram None)"""
+    return [None if pd.isna(valor) else valor for valor in serie.tolist()]
+
+
+def _resolver_banco_sqlite(conexao: Dict[str, Any], raiz: Path) -> Dict[str, Any]:
+    """Argumentos de sqlite3.connect com o database relativo resolvido a partir de raiz"""
+    database = conexao.get('database')
+    if (database is None or conexao.get('uri') or str(database) == ':memory:'
+            or Path(database).is_absolute()):
+        return conexao
+    return {**conexao, 'database': str(raiz / database)}
+
+
+class CargaTabela:
+    """Linhas a gravar em uma tabela: DataFrame com as colunas da tabela e o tipo SQL de cada uma"""
+
+    def __init__(self, tabela: str, df: pd.DataFrame, tipos: Dict[str, str]):
+        self.tabela = _identificador(tabela)
+        self.tipos = {_identificador(coluna): tipo for coluna, tipo in tipos.items()}
+        self.df = df[list(self.tipos)]
+
+
+class DestinoBanco:
+    """Grava cargas em tabelas de um banco DB-API com upsert pela chave, em uma única transação
+
+    As linhas são enviadas em lotes de tamanho_lote com executemany; cada linha
+    substitui a de mesma chave (ex.: competência e matrícula), então reprocessar uma
+    competência atualiza as linhas já carregadas. Quando várias cargas são gravadas
+    juntas, a chave de cada linha é removida das outras tabelas (um colaborador que
+    passou de excluído a elegível sai da tabela de excluídos); linhas de chaves que
+    não aparecem na nova carga são mantidas. Qualquer erro desfaz a transação inteira.
+
+    A conexão vem de conectar(), sem argumentos: from_config usa driver.connect(**conexao)
+    de qualquer módulo DB-API (sqlite3, psycopg2, pymysql...).
+    """
+
+    def __init__(self, conectar: Callable[[], Any], paramstyle: str = 'qmark', upsert: str = 'on_conflict',
+                 tamanho_lote: int = 5000, criar_tabelas: bool = True, logger: VRLogger = None):
+        """Configura o destino; criar_tabelas cria as tabelas ausentes com a chave como PRIMARY KEY"""
+        if paramstyle not in MARCADORES:
+            raise ValueError(f"paramstyle não suportado: {paramstyle} (use {', '.join(MARCADORES)})")
+        if upsert not in UPSERTS:
+            raise ValueError(f"Upsert inválido: {upsert} (use {', '.join(UPSERTS)})")
+
+        self.conectar = conectar
+        self.marcador = MARCADORES[paramstyle]
+        self.upsert = upsert
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.criar_tabelas = criar_tabelas
+        self.logger = logger
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], logger: VRLogger = None,
+                    raiz: Optional[str] = None) -> Optional['DestinoBanco']:
+        """Cria o destino a partir da seção relatorio.banco (None se desabilitado)
+
+        Com o sqlite3, um database relativo é resolvido a partir de raiz (a raiz do
+        projeto, como os diretórios da seção arquivos), e não do diretório atual.
+        """
+        banco = config.get('relatorio', {}).get('banco', {})
+        if not banco.get('habilitado', False):
+            return None
+
+        driver = import_module(banco.get('driver', 'sqlite3'))
+        conexao = dict(banco.get('conexao') or {})
+        if driver.__name__ == 'sqlite3' and raiz is not None:
+            conexao = _resolver_banco_sqlite(conexao, Path(raiz))
+        return cls(
+            lambda: driver.connect(**conexao),
+            getattr(driver, 'paramstyle', 'qmark'),
+            banco.get('upsert', 'on_conflict'),
+            banco.get('tamanho_lote', 5000),
+            banco.get('criar_tabelas', True),
+            logger
+        )
+
+    def _sql_criacao(self, carga: CargaTabela, chave: Sequence[str]) -> str:
+        colunas = ', '.join(f"{coluna} {tipo}" for coluna, tipo in carga.tipos.items())
+        return f"CREATE TABLE IF NOT EXISTS {carga.tabela} ({colunas}, PRIMARY KEY ({', '.join(chave)}))"
+
+    def _sql_upsert(self, carga: CargaTabela, chave: Sequence[str]) -> str:
+        colunas = list(carga.tipos)
+        marcadores = ', '.join(self.marcador(posicao) for posicao in range(1, len(colunas) + 1))
+        atualizadas = [coluna for coluna in colunas if coluna not in chave]
+
+        sql = f"INSERT INTO {carga.tabela} ({', '.join(colunas)}) VALUES ({marcadores})"
+        if self.upsert == 'on_duplicate_key':
+            return sql + " ON DUPLICATE KEY UPDATE " + ', '.join(f"{c} = VALUES({c})" for c in atualizadas)
+        if not atualizadas:
+            return sql + f" ON CONFLICT ({', '.join(chave)}) DO NOTHING"
+        return sql + f" ON CONFLICT ({', '.join(chave)}) DO UPDATE SET " + ', '.join(
+            f"{c} = excluded.{c}" for c in atualizadas
+        )
+
+    def _sql_remocao(self, tabela: str, chave: Sequence[str]) -> str:
+        condicao = ' AND '.join(f"{coluna} = {self.marcador(posicao)}" for posicao, coluna in enumerate(chave, 1))
+        return f"DELETE FROM {tabela} WHERE {condicao}"
+
+    def _lotes(self, df: pd.DataFrame) -> Iterator[List[Tuple]]:
+        """Linhas do DataFrame em lotes de tuplas (a conversão de tipos é feita por lote)"""
+        for inicio in range(0, len(df), self.tamanho_lote):
+            lote = df.iloc[inicio:inicio + self.tamanho_lote]
+            yield list(zip(*(_valores(lote[coluna]) for coluna in lote.columns)))
+
+    def gravar(self, cargas: List[CargaTabela], chave: Sequence[str]) -> Dict[str, Any]:
+        """Grava as cargas e confirma a transação; retorna linhas, tempo e linhas/s por tabela e no total"""
+        chave = [_identificador(coluna) for coluna in chave]
+        inicio = time.perf_counter()
+        tabelas = {}
+
+        conexao = self.conectar()
+        try:
+            cursor = conexao.cursor()
+            if self.criar_tabelas:
+                for carga in cargas:
+                    cursor.execute(self._sql_criacao(carga, chave))
+
+            for carga in cargas:
+                inicio_tabela = time.perf_counter()
+                sql = self._sql_upsert(carga, chave)
+                remocoes = [self._sql_remocao(outra.tabela, chave) for outra in cargas if outra.tabela != carga.tabela]
+
+                for lote in self._lotes(carga.df):
+                    if remocoes:
+                        chaves = self._chaves(carga, lote, chave)
+                        for remocao in remocoes:
+                            cursor.executemany(remocao, chaves)
+                    cursor.executemany(sql, lote)
+
+                tabelas[carga.tabela] = self._medida(len(carga.df), time.perf_counter() - inicio_tabela)
+
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+
+        resumo = {
+            'tabelas': tabelas,
+            **self._medida(sum(medida['linhas'] for medida in tabelas.values()), time.perf_counter() - inicio)
+        }
+        if self.logger is not None:
+            for tabela, medida in tabelas.items():
+                self.logger.log_info(
+                    f"Banco: {medida['linhas']} linhas gravadas em {tabela} "
+                    f"({medida['segundos']:.2f}s, {medida['linhas_por_segundo']:,.0f} linhas/s)"
+                )
+            self.logger.log_info(
+                f"Banco: transação confirmada com {resumo['linhas']} linhas "
+                f"({resumo['segundos']:.2f}s, {resumo['linhas_por_segundo']:,.0f} linhas/s)"
+            )
+        return resumo
+
+    @staticmethod
+    def _chaves(carga: CargaTabela, lote: List[Tuple], chave: Sequence[str]) -> List[Tuple]:
+        """Valores da chave de cada linha do lote, na ordem das colunas da chave"""
+        posicoes = [list(carga.tipos).index(coluna) for coluna in chave]
+        return [tuple(linha[posicao] for posicao in posicoes) for linha in lote]
+
+    @staticmethod
+    def _medida(linhas: int, segundos: float) -> Dict[str, Any]:
+        return {
+            'linhas': linhas,
+            'segundos': round(segundos, 3),
+            'linhas_por_segundo': round(linhas / segundos, 1) if segundos > 0 else 0.0
+        }
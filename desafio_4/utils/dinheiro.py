@@ -0,0 +1,62 @@
+"""
+Valores Monetários em Centavos Inteiros
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+CENTAVOS_POR_REAL = 100
+
+# Percentuais são convertidos para pontos-base (0,8 -> 8000) antes da multiplicação
+PONTOS_BASE = 10_000
+
+Centavos = Union[pd.Series, np.ndarray, int]
+
+
+def para_centavos(valores) -> pd.Series:
+    """Converte valores em reais para centavos (Int64), arredondando meio centavo para cima
+
+    O produto por 100 é arredondado em 6 casas antes do arredondamento comercial para
+    não herdar o erro binário do float (ex.: 0,285 * 100 = 28,4999...). Nulos são mantidos.
+    """
+    serie = pd.to_numeric(pd.Series(valores), errors='coerce').astype('float64')
+    centavos = np.floor(np.round(serie.to_numpy() * CENTAVOS_POR_REAL, 6) + 0.5)
+    return pd.Series(centavos, index=serie.index).astype('Int64')
+
+
+def em_reais(centavos):
+    """Converte centavos para reais (float) apenas na exibição; nulos viram NaN/None"""
+    if isinstance(centavos, pd.Series):
+        return centavos.astype('float64') / CENTAVOS_POR_REAL
+    if centavos is None or pd.isna(centavos):
+        return None
+    return int(centavos) / CENTAVOS_POR_REAL
+
+
+def pontos_base(percentual: float) -> int:
+    """Percentual da configuração (0,2 = 20%) em pontos-base inteiros"""
+    return int(round(percentual * PONTOS_BASE))
+
+
+def dividir_valor(total: Centavos, percentual_empresa: float,
+                  percentual_colaborador: float) -> Tuple[Centavos, Centavos]:
+    """Divide o valor total em custo da empresa e desconto do colaborador, em centavos
+
+    Regra de arredondamento: o desconto do colaborador é truncado (nunca passa do seu
+    percentual) e a empresa absorve o centavo restante, de modo que empresa +
+    colaborador = total exatamente. Se os percentuais não somarem 100%, a parte da
+    empresa é arredondada meio centavo para cima, independentemente.
+    """
+    base_empresa, base_colaborador = pontos_base(percentual_empresa), pontos_base(percentual_colaborador)
+
+    desconto = total * base_colaborador // PONTOS_BASE
+    if base_empresa + base_colaborador == PONTOS_BASE:
+        custo = total - desconto
+    else:
+        custo = (total * base_empresa + PONTOS_BASE // 2) // PONTOS_BASE
+    return custo, desconto
@@ -0,0 +1,152 @@
+"""
+Estatísticas do Consolidado em uma Única Agregação
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.dinheiro import em_reais
+from utils.exclusoes import RegistroExclusoes, COLUNA_MASCARA
+
+
+# Dimensões padrão dos totais por grupo: coluna do consolidado -> rótulo exibido
+DIMENSOES_PADRAO = {
+    'EMPRESA': 'Empresa',
+    'sindicato_normalizado': 'Sindicato',
+    'TITULO DO CARGO': 'Cargo'
+}
+
+# Rótulo dos grupos sem valor na coluna da dimensão
+GRUPO_VAZIO = '(sem valor)'
+
+# Medidas somadas por colaborador; os valores monetários consideram apenas os elegíveis
+MEDIDAS_MONETARIAS = {
+    'valor_total': 'valor_total_centavos',
+    'custo_empresa': 'custo_empresa_centavos',
+    'desconto_colaborador': 'desconto_colaborador_centavos'
+}
+
+
+def dimensoes_configuradas(config: Dict[str, Any]) -> Dict[str, str]:
+    """Dimensões da seção estatisticas (lista de colunas ou coluna -> rótulo)"""
+    dimensoes = config.get('estatisticas', {}).get('dimensoes', DIMENSOES_PADRAO)
+    if isinstance(dimensoes, dict):
+        return {str(coluna): str(rotulo) for coluna, rotulo in dimensoes.items()}
+    return {str(coluna): str(coluna) for coluna in dimensoes or []}
+
+
+def colunas_estatisticas(colunas: Sequence[str], dimensoes: Dict[str, str]) -> List[str]:
+    """Colunas do consolidado lidas por calcular_estatisticas (as ausentes ficam de fora)"""
+    usadas = ['elegivel', COLUNA_MASCARA, 'dias_ferias', 'valor_exterior_centavos',
+              *MEDIDAS_MONETARIAS.values(), *dimensoes]
+    return [coluna for coluna in dict.fromkeys(usadas) if coluna in colunas]
+
+
+def _inteiros(df: pd.DataFrame, coluna: str, mascara: np.ndarray) -> np.ndarray:
+    """Coluna inteira (centavos, dias) como int64, com zero fora da máscara e nos nulos"""
+    if coluna not in df.columns:
+        return np.zeros(len(df), dtype='int64')
+    valores = pd.array(df[coluna], dtype='Int64').to_numpy(dtype='int64', na_value=0)
+    return np.where(mascara, valores, 0)
+
+
+def _medidas(df: pd.DataFrame) -> pd.DataFrame:
+    """Medidas por colaborador, calculadas uma vez e somadas nos totais e em cada dimensão"""
+    elegivel = df['elegivel'].to_numpy(dtype=bool)
+    todos = np.ones(len(df), dtype=bool)
+
+    medidas = {
+        'colaboradores': np.ones(len(df), dtype='int64'),
+        'elegiveis': elegivel.astype('int64'),
+        'com_ferias': (_inteiros(df, 'dias_ferias', todos) > 0).astype('int64'),
+        'exterior': (_inteiros(df, 'valor_exterior_centavos', todos) > 0).astype('int64')
+    }
+    for nome, coluna in MEDIDAS_MONETARIAS.items():
+        medidas[nome] = _inteiros(df, coluna, elegivel)
+    return pd.DataFrame(medidas, index=df.index, copy=False)
+
+
+def _grupo(totais: Dict[str, int]) -> Dict[str, Any]:
+    """Totais de um grupo em centavos e em reais (exibição)"""
+    grupo = {
+        'colaboradores': totais['colaboradores'],
+        'elegiveis': totais['elegiveis'],
+        'excluidos': totais['colaboradores'] - totais['elegiveis']
+    }
+    for nome in MEDIDAS_MONETARIAS:
+        grupo[nome] = em_reais(totais[nome])
+        grupo[f'{nome}_centavos'] = totais[nome]
+    return grupo
+
+
+def calcular_estatisticas(df: pd.DataFrame, registro_exclusoes: RegistroExclusoes,
+                          dimensoes: Dict[str, str] = None) -> Dict[str, Any]:
+    """Calcula todas as estatísticas do consolidado a partir de uma única tabela de medidas
+
+    As medidas de cada colaborador (elegibilidade, férias, exterior e valores em
+    centavos) são montadas uma vez; os totais são a soma das colunas e cada dimensão
+    é um groupby sobre a mesma tabela. Os grupos vêm em ordem decrescente de valor
+    total (empate pelo nome). Colunas de dimensão ausentes no consolidado são
+    ignoradas e listadas em 'dimensoes_ausentes'.
+    """
+    medidas = _medidas(df)
+    totais = {nome: int(valor) for nome, valor in medidas.sum().items()}
+    contagens_exclusao = registro_exclusoes.contagens(df[COLUNA_MASCARA])
+
+    por_dimensao, ausentes = {}, []
+    for coluna, rotulo in (dimensoes or {}).items():
+        if coluna not in df.columns:
+            ausentes.append(coluna)
+            continue
+        # Agrupa pelos códigos inteiros da coluna; os nomes só são formatados uma vez por grupo
+        codigos, valores = pd.factorize(df[coluna], use_na_sentinel=False)
+        somas = medidas.groupby(codigos, sort=False).sum()
+        somas.index = [GRUPO_VAZIO if pd.isna(valores[codigo]) else str(valores[codigo]) for codigo in somas.index]
+        somas = somas.assign(_nome=somas.index).sort_values(['valor_total', '_nome'], ascending=[False, True])
+        por_dimensao[coluna] = {
+            'rotulo': rotulo,
+            'grupos': {nome: _grupo(linha) for nome, linha in zip(
+                somas.index, somas.drop(columns='_nome').to_dict('records')
+            )}
+        }
+
+    return {
+        'total_colaboradores': totais['colaboradores'],
+        'colaboradores_elegiveis': totais['elegiveis'],
+        'colaboradores_excluidos': totais['colaboradores'] - totais['elegiveis'],
+        'valor_total': em_reais(totais['valor_total']),
+        'custo_total_empresa': em_reais(totais['custo_empresa']),
+        'desconto_total_colaboradores': em_reais(totais['desconto_colaborador']),
+        'valor_total_centavos': totais['valor_total'],
+        'custo_total_empresa_centavos': totais['custo_empresa'],
+        'desconto_total_colaboradores_centavos': totais['desconto_colaborador'],
+        'exclusoes_por_motivo': contagens_exclusao['por_motivo'],
+        'exclusoes_por_regra': contagens_exclusao['por_regra'],
+        'colaboradores_varios_motivos': contagens_exclusao['varios_motivos'],
+        'colaboradores_com_ferias': totais['com_ferias'],
+        'colaboradores_exterior': totais['exterior'],
+        'por_dimensao': por_dimensao,
+        'dimensoes_ausentes': ausentes
+    }
+
+
+def linhas_por_dimensao(estatisticas: Dict[str, Any], max_grupos: Optional[int] = None) -> Dict[str, List]:
+    """Grupos de cada dimensão para exibição: rótulo -> [(grupo, totais)]
+
+    Com max_grupos, mostra os maiores grupos por valor total e soma os demais em uma
+    linha "Demais (N)".
+    """
+    linhas = {}
+    for dimensao in estatisticas.get('por_dimensao', {}).values():
+        grupos = list(dimensao['grupos'].items())
+        if max_grupos and len(grupos) > max_grupos:
+            demais = grupos[max_grupos - 1:]
+            soma = {chave: sum(totais[chave] for _, totais in demais) for chave in ('colaboradores', 'elegiveis')}
+            soma.update({nome: sum(totais[f'{nome}_centavos'] for _, totais in demais) for nome in MEDIDAS_MONETARIAS})
+            grupos = grupos[:max_grupos - 1] + [(f'Demais ({len(demais)})', _grupo(soma))]
+        linhas[dimensao['rotulo']] = grupos
+    return linhas
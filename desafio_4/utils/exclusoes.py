@@ -0,0 +1,139 @@
+"""
+Registro dos Motivos de Exclusão do VR
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Any, Callable, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+
+# Coluna do df_consolidado com os motivos de exclusão de cada colaborador (um bit por motivo)
+COLUNA_MASCARA = 'mascara_exclusao'
+
+# Bits disponíveis em um int64 sem usar o bit de sinal (bancos SQL usam inteiros com sinal)
+MAXIMO_MOTIVOS = 63
+
+
+def removido_exterior(observacao) -> bool:
+    """Indica se a observação da base de exterior exclui o colaborador (desligado/removido)"""
+    if observacao is None or pd.isna(observacao):
+        return False
+    texto = str(observacao).lower()
+    return 'desligado' in texto or 'removido' in texto
+
+
+class RegistroExclusoes:
+    """Associa cada motivo de exclusão a um bit da máscara e define a precedência entre eles
+
+    Cada regra do ConsolidadorRegras liga o bit do seu motivo em mascara_exclusao, sem
+    apagar os motivos de regras anteriores: um aprendiz afastado fica com os dois bits.
+    Os motivos são registrados na ordem de aplicação das regras e o bit mais alto
+    prevalece na exibição. Entre regras diferentes isso equivale ao "último motivo
+    aplicado" das versões anteriores; entre linhas da mesma regra, não: dois tipos de
+    afastamento de um colaborador são exibidos pela ordem da configuração (e as
+    observações de exterior pela primeira aparição na base), e não pela última linha
+    do arquivo. O texto exibido é derivado só na geração dos relatórios; contagens
+    por motivo são feitas sobre as máscaras distintas, sem comparar textos.
+
+    O registro depende apenas da configuração e das observações da base de exterior,
+    então é o mesmo em todas as partições e pode ser reconstruído a partir da lista
+    de motivos (manifesto da publicação, checkpoints).
+    """
+
+    def __init__(self, motivos: Iterable[str]):
+        """Cria o registro; o bit de cada motivo é a sua posição na lista"""
+        self.motivos = list(dict.fromkeys(motivos))
+        if len(self.motivos) > MAXIMO_MOTIVOS:
+            raise ValueError(
+                f"{len(self.motivos)} motivos de exclusão distintos; a máscara comporta no máximo {MAXIMO_MOTIVOS}"
+            )
+        self._bits = {motivo: 1 << indice for indice, motivo in enumerate(self.motivos)}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], dados_validados: Dict[str, pd.DataFrame] = None) -> 'RegistroExclusoes':
+        """Registra os motivos na ordem das regras: aprendiz, estagiário, cargos, afastamentos,
+        desligamento e observações de exterior que excluem (na ordem em que aparecem na base)"""
+        exclusoes = config['exclusoes']
+        motivos = ['Aprendiz', 'Estagiário']
+        motivos += [f'Cargo: {cargo}' for cargo in exclusoes['cargos_nao_elegiveis']]
+        motivos += [f'Afastamento: {tipo}' for tipo in exclusoes['tipos_afastamento_excluidos']]
+        motivos.append(f"Desligado antes do dia {config['regras_negocio']['dia_corte_desligamento']}")
+
+        df_exterior = (dados_validados or {}).get('exterior')
+        if df_exterior is not None and 'Unnamed: 2' in df_exterior.columns:
+            observacoes = df_exterior['Unnamed: 2'].dropna().unique()
+            motivos += [f'Exterior: {observacao}' for observacao in observacoes if removido_exterior(observacao)]
+
+        return cls(motivos)
+
+    def como_lista(self) -> List[str]:
+        """Motivos na ordem dos bits (para gravar em manifestos)"""
+        return list(self.motivos)
+
+    def bit(self, motivo: str) -> int:
+        """Valor do bit do motivo na máscara"""
+        try:
+            return self._bits[motivo]
+        except KeyError:
+            raise KeyError(f"Motivo de exclusão não registrado: {motivo}") from None
+
+    def bits(self, motivos: pd.Series) -> np.ndarray:
+        """Bit de cada motivo da série (0 para nulos e motivos não registrados)"""
+        return motivos.map(self._bits).fillna(0).astype('int64').to_numpy()
+
+    def motivos_da_mascara(self, mascara: int) -> List[str]:
+        """Todos os motivos da máscara, do mais ao menos prioritário"""
+        mascara = int(mascara)
+        return [motivo for indice, motivo in reversed(list(enumerate(self.motivos))) if mascara >> indice & 1]
+
+    def motivo_principal(self, mascara: int) -> str:
+        """Motivo exibido para a máscara (o de maior precedência; '' se elegível)"""
+        motivos = self.motivos_da_mascara(mascara)
+        return motivos[0] if motivos else ''
+
+    def _por_mascara(self, mascaras: pd.Series, funcao: Callable[[int], Any]) -> pd.Series:
+        """Aplica a função uma vez por máscara distinta e espalha o resultado pelas linhas"""
+        codigos, distintas = pd.factorize(mascaras, sort=False)
+        valores = np.empty(len(distintas), dtype=object)
+        valores[:] = [funcao(mascara) for mascara in distintas]
+        return pd.Series(valores[codigos], index=mascaras.index, dtype=object)
+
+    def descrever(self, mascaras: pd.Series) -> pd.Series:
+        """Motivo exibido de cada linha"""
+        return self._por_mascara(mascaras, self.motivo_principal)
+
+    def descrever_todos(self, mascaras: pd.Series, separador: str = '; ') -> pd.Series:
+        """Todos os motivos de cada linha, em ordem de precedência"""
+        return self._por_mascara(mascaras, lambda mascara: separador.join(self.motivos_da_mascara(mascara)))
+
+    def contagens(self, mascaras: pd.Series) -> Dict[str, Dict[str, int]]:
+        """Contagens dos excluídos a partir das máscaras distintas
+
+        'por_motivo' conta cada colaborador uma vez, pelo motivo exibido (ordem
+        decrescente de quantidade); 'por_regra' conta cada colaborador em todos os seus
+        motivos (ordem dos bits); 'varios_motivos' é o total com mais de um motivo.
+        """
+        distintas, quantidades = np.unique(mascaras.to_numpy(dtype='int64'), return_counts=True)
+
+        por_motivo, por_regra, varios_motivos = {}, dict.fromkeys(self.motivos, 0), 0
+        for mascara, quantidade in zip(distintas.tolist(), quantidades.tolist()):
+            if mascara == 0:
+                continue
+            motivos = self.motivos_da_mascara(mascara)
+            por_motivo[motivos[0]] = por_motivo.get(motivos[0], 0) + quantidade
+            for motivo in motivos:
+                por_regra[motivo] += quantidade
+            if len(motivos) > 1:
+                varios_motivos += quantidade
+
+        # Empates seguem a precedência, para o resultado não depender da ordem das linhas
+        precedencia = {motivo: indice for indice, motivo in enumerate(self.motivos)}
+        por_motivo = dict(sorted(por_motivo.items(), key=lambda item: (-item[1], -precedencia[item[0]])))
+        return {
+            'por_motivo': por_motivo,
+            'por_regra': {motivo: quantidade for motivo, quantidade in por_regra.items() if quantidade},
+            'varios_motivos': varios_motivos
+        }
@@ -0,0 +1,74 @@
+"""
+Integridade de Chaves de Junção - Sistema de Processamento VR
+Unicidade das chaves antes dos merges e invariantes de contagem de linhas
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+POLITICAS_DUPLICATAS = ('primeiro', 'ultimo', 'mais_recente', 'falhar')
+
+
+def deduplicar_chave(df: pd.DataFrame, chave: str, politica: str = 'primeiro',
+                     coluna_data: str = None, descricao: str = None) -> Tuple[pd.DataFrame, int]:
+    """Garante que a chave de junção seja única conforme a política de duplicatas
+
+    primeiro / ultimo  mantém a primeira ou a última ocorrência na ordem do arquivo
+    mais_recente       mantém a ocorrência com a maior data em coluna_data (empate: a última)
+    falhar             levanta ValueError listando as chaves duplicadas
+
+    A detecção usa o hash dos valores da chave (duplicated) e a ordem original das
+    linhas mantidas é preservada. Retorna o DataFrame e o número de linhas descartadas.
+    """
+    if politica not in POLITICAS_DUPLICATAS:
+        raise ValueError(f"Política de duplicatas inválida: {politica} (use {', '.join(POLITICAS_DUPLICATAS)})")
+
+    duplicadas = df.duplicated(subset=chave, keep=False)
+    if not duplicadas.any():
+        return df, 0
+
+    descricao = descricao or chave
+    if politica == 'falhar':
+        exemplos = df.loc[duplicadas, chave].drop_duplicates().head(10).tolist()
+        raise ValueError(
+            f"{descricao}: {int(duplicadas.sum())} linhas com {chave} duplicado "
+            f"(a junção multiplicaria colaboradores): {exemplos}"
+        )
+
+    if politica == 'mais_recente':
+        if coluna_data is None or coluna_data not in df.columns:
+            raise ValueError(f"{descricao}: política 'mais_recente' exige uma coluna de data")
+        posicoes = df[[chave, coluna_data]].assign(_posicao=np.arange(len(df)))
+        posicoes = posicoes.sort_values(coluna_data, kind='stable', na_position='first')
+        manter = np.sort(posicoes.loc[~posicoes.duplicated(subset=chave, keep='last'), '_posicao'].to_numpy())
+        df_unico = df.iloc[manter]
+    else:
+        df_unico = df[~df.duplicated(subset=chave, keep='first' if politica == 'primeiro' else 'last')]
+
+    return df_unico, len(df) - len(df_unico)
+
+
+class InvariantesLinhas:
+    """Registra a contagem de linhas por etapa e detecta multiplicação de linhas (fan-out)"""
+
+    def __init__(self):
+        """Inicializa o registro de contagens"""
+        self.contagens: List[Dict[str, Any]] = []
+
+    def registrar(self, etapa: str, linhas: int, esperado: int = None):
+        """Registra a contagem de uma etapa; com esperado, diverge -> ValueError"""
+        self.contagens.append({'etapa': etapa, 'linhas': int(linhas),
+                               'esperado': None if esperado is None else int(esperado)})
+        if esperado is not None and linhas != esperado:
+            raise ValueError(
+                f"Invariante de linhas violado em '{etapa}': {linhas} linhas, esperado {esperado}"
+            )
+
+    def como_dict(self) -> Dict[str, int]:
+        """Contagens por etapa (a última contagem de cada etapa prevalece)"""
+        return {contagem['etapa']: contagem['linhas'] for contagem in self.contagens}
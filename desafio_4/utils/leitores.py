@@ -0,0 +1,156 @@
+"""
+Leitores de Arquivos de Entrada
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Type
+
+import pandas as pd
+
+
+def _modulo_disponivel(modulo: str) -> bool:
+    """Indica se um módulo opcional está instalado"""
+    try:
+        __import__(modulo)
+        return True
+    except ImportError:
+        return False
+
+
+def filtro_colunas(colunas: Optional[Iterable[str]]) -> Optional[Callable[[object], bool]]:
+    """Filtro de colunas por nome, ignorando espaços nas bordas do cabeçalho (None = todas)
+
+    Os cabeçalhos das planilhas chegam com espaços e NBSP nas bordas (ex.: 'MATRICULA ',
+    'ESTADO\\xa0...'); a comparação usa o nome já limpo, como em _limpar_dados.
+    """
+    if colunas is None:
+        return None
+    nomes = set(colunas)
+    return lambda coluna: str(coluna).strip() in nomes
+
+
+class LeitorEntrada:
+    """Lê um arquivo de entrada para um DataFrame, opcionalmente apenas algumas colunas
+
+    Subclasses definem nome, extensoes, requisitos (pacotes exigidos, para a mensagem de
+    erro) e ler(). A projeção é aplicada durante a leitura: colunas fora da lista não
+    chegam ao DataFrame nem passam pela limpeza e conversão de tipos.
+    """
+
+    nome = ''
+    extensoes: Tuple[str, ...] = ()
+    requisitos = ''
+
+    @staticmethod
+    def disponivel() -> bool:
+        """Indica se as dependências do leitor estão instaladas"""
+        return True
+
+    def ler(self, caminho: str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Lê o arquivo (colunas=None lê todas)"""
+        raise NotImplementedError
+
+
+class LeitorOpenpyxl(LeitorEntrada):
+    """Excel via openpyxl em modo somente leitura (leitor padrão do pandas)"""
+
+    nome = 'openpyxl'
+    extensoes = ('.xlsx', '.xlsm')
+    requisitos = 'openpyxl'
+
+    def ler(self, caminho: str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return pd.read_excel(caminho, engine='openpyxl', usecols=filtro_colunas(colunas))
+
+
+class LeitorCalamine(LeitorEntrada):
+    """Excel via calamine (leitor em Rust, várias vezes mais rápido que o openpyxl)"""
+
+    nome = 'calamine'
+    extensoes = ('.xlsx', '.xlsm', '.xls', '.xlsb', '.ods')
+    requisitos = 'python-calamine (pip install python-calamine)'
+
+    @staticmethod
+    def disponivel() -> bool:
+        return _modulo_disponivel('python_calamine')
+
+    def ler(self, caminho: str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return pd.read_excel(caminho, engine='calamine', usecols=filtro_colunas(colunas))
+
+
+class LeitorCSV(LeitorEntrada):
+    """CSV com o mesmo conteúdo lógico da planilha (cabeçalho na primeira linha)"""
+
+    nome = 'csv'
+    extensoes = ('.csv',)
+    requisitos = 'pandas'
+
+    def ler(self, caminho: str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return pd.read_csv(caminho, usecols=filtro_colunas(colunas))
+
+
+class LeitorParquet(LeitorEntrada):
+    """Parquet colunar: apenas as colunas projetadas são lidas do disco"""
+
+    nome = 'parquet'
+    extensoes = ('.parquet',)
+    requisitos = 'pyarrow (pip install pyarrow)'
+
+    @staticmethod
+    def disponivel() -> bool:
+        return _modulo_disponivel('pyarrow')
+
+    def ler(self, caminho: str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        if colunas is None:
+            return pd.read_parquet(caminho)
+
+        import pyarrow.parquet as pq
+
+        filtro = filtro_colunas(colunas)
+        nomes = [nome for nome in pq.read_schema(caminho).names if filtro(nome)]
+        return pd.read_parquet(caminho, columns=nomes)
+
+
+LEITORES: Dict[str, Type[LeitorEntrada]] = {
+    'openpyxl': LeitorOpenpyxl,
+    'calamine': LeitorCalamine,
+    'csv': LeitorCSV,
+    'parquet': LeitorParquet
+}
+
+# Leitores de Excel em ordem de preferência para motor_excel 'auto'
+PREFERENCIA_EXCEL = ('calamine', 'openpyxl')
+
+
+def criar_leitor(nome: str) -> LeitorEntrada:
+    """Instancia um leitor pelo nome; ImportError se as dependências não estiverem instaladas"""
+    if nome not in LEITORES:
+        raise ValueError(f"Leitor desconhecido: {nome} (disponíveis: {', '.join(LEITORES)})")
+
+    classe = LEITORES[nome]
+    if not classe.disponivel():
+        raise ImportError(f"Leitor '{nome}' requer {classe.requisitos}")
+    return classe()
+
+
+def escolher_leitor(caminho: str, motor_excel: str = 'auto') -> LeitorEntrada:
+    """Escolhe o leitor pela extensão do arquivo
+
+    Planilhas usam motor_excel ('auto' = calamine se instalado, senão openpyxl); CSV e
+    Parquet têm um único leitor cada.
+    """
+    extensao = Path(caminho).suffix.lower()
+
+    candidatos = [nome for nome, classe in LEITORES.items() if extensao in classe.extensoes]
+    if not candidatos:
+        raise ValueError(f"Extensão sem leitor configurado: {caminho}")
+
+    if any(nome in PREFERENCIA_EXCEL for nome in candidatos):
+        if motor_excel != 'auto':
+            return criar_leitor(motor_excel)
+        for nome in PREFERENCIA_EXCEL:
+            if nome in candidatos and LEITORES[nome].disponivel():
+                return LEITORES[nome]()
+
+    return criar_leitor(candidatos[0])
@@ -8,28 +8,33 @@ import logging
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import yaml
 
 
 class VRLogger:
     """Sistema de logging estruturado com suporte a auditoria"""
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, config: Dict = None):
         """Inicializa o sistema de logging"""
-        self.config = self._load_config(config_path)
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.config = config if config is not None else self._load_config(config_path)
         
         # Configurar diretório de logs
         self.log_dir = Path(self.config['arquivos']['diretorio_logs'])
-        self.log_dir.mkdir(exist_ok=True)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.timestamp = self._reservar_timestamp()
         
         # Inicializar loggers
         self._setup_technical_logger()
         self._setup_audit_logger()
         
         # Estatísticas de processamento
-        self.stats = {
+        self.stats = self._novas_estatisticas()
+    
+    @staticmethod
+    def _novas_estatisticas() -> Dict[str, Any]:
+        """Estrutura inicial das estatísticas de processamento"""
+        return {
             'inicio_processamento': datetime.now(),
             'arquivos_processados': 0,
             'colaboradores_processados': 0,
@@ -47,13 +52,35 @@ class VRLogger:
         with open(config_path, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     
+    def _reservar_timestamp(self) -> str:
+        """Timestamp dos arquivos de log, único mesmo com execuções iniciadas no mesmo segundo
+        
+        O arquivo de auditoria é criado de forma exclusiva; se outra execução já o criou,
+        tenta-se o sufixo _2, _3, ...
+        """
+        base = datetime.now().strftime("%Y%m%d_%H%M%S")
+        formato = self.config['logging']['arquivo_auditoria']
+        if '{timestamp}' not in formato:
+            return base
+        
+        tentativa, timestamp = 1, base
+        while True:
+            try:
+                with open(self.log_dir / formato.format(timestamp=timestamp), 'x', encoding='utf-8'):
+                    return timestamp
+            except FileExistsError:
+                tentativa += 1
+                timestamp = f"{base}_{tentativa}"
+    
     def _setup_technical_logger(self):
         """Configura logger técnico (formato estruturado)"""
         log_file = self.log_dir / self.config['logging']['arquivo_log'].format(
             timestamp=self.timestamp
         )
         
-        self.technical_logger = logging.getLogger('vr_technical')
+        # Logger próprio da instância, fora do registro global do logging: execuções
+        # simultâneas no mesmo processo não compartilham handlers nem mensagens
+        self.technical_logger = logging.Logger('vr_technical')
         self.technical_logger.setLevel(getattr(logging, self.config['logging']['nivel']))
         
         # Handler para arquivo
@@ -71,6 +98,7 @@ class VRLogger:
         
         self.technical_logger.addHandler(file_handler)
         self.technical_logger.addHandler(console_handler)
+        self._handlers = [file_handler, console_handler]
         
     def _setup_audit_logger(self):
         """Configura logger de auditoria (formato legível)"""
@@ -173,19 +201,24 @@ class VRLogger:
         message = f"Validação {status} {tipo_validacao}: {detalhes}"
         self.log_info(message)
         
-    def finalizar_processamento(self, colaboradores_elegiveis: int, valor_total: float):
-        """Finaliza o processamento e gera relatório de auditoria"""
+    def finalizar_processamento(self, colaboradores_elegiveis: int, valor_total: float,
+                                totais_por_dimensao: Dict[str, List] = None):
+        """Finaliza o processamento e gera relatório de auditoria
+        
+        totais_por_dimensao: rótulo da dimensão -> [(grupo, totais)], como em
+        utils.estatisticas.linhas_por_dimensao.
+        """
         self.stats['fim_processamento'] = datetime.now()
         self.stats['colaboradores_elegiveis'] = colaboradores_elegiveis
         self.stats['colaboradores_processados'] = colaboradores_elegiveis + self.stats['colaboradores_excluidos']
         
         # Gerar relatório de auditoria legível
-        self._gerar_relatorio_auditoria(valor_total)
+        self._gerar_relatorio_auditoria(valor_total, totais_por_dimensao or {})
         
         # Log final técnico
         self.log_info("Processamento finalizado com sucesso", self.stats)
         
-    def _gerar_relatorio_auditoria(self, valor_total: float):
+    def _gerar_relatorio_auditoria(self, valor_total: float, totais_por_dimensao: Dict[str, List]):
         """Gera relatório de auditoria em formato legível"""
         duracao = self.stats['fim_processamento'] - self.stats['inicio_processamento']
         
@@ -209,6 +242,13 @@ class VRLogger:
                     f.write(f"- {tipo}: {count} colaboradores\n")
                 f.write("\n")
             
+            for rotulo, grupos in totais_por_dimensao.items():
+                f.write(f"TOTAIS POR {rotulo.upper()}:\n")
+                for grupo, totais in grupos:
+                    f.write(f"- {grupo}: {totais['elegiveis']} elegíveis, {totais['excluidos']} excluídos, "
+                            f"R$ {totais['valor_total']:,.2f}\n")
+                f.write("\n")
+            
             f.write("VALIDAÇÕES REALIZADAS:\n")
             for validacao in self.stats['validacoes_realizadas']:
                 status = "✓" if validacao['resultado'] else "⚠"
@@ -237,6 +277,26 @@ class VRLogger:
             
             f.write("=== FIM DO RELATÓRIO ===\n")
     
+    def mesclar(self, registros: List[Tuple[int, str]], stats: Dict[str, Any]):
+        """Incorpora mensagens e estatísticas produzidas por um VRLoggerMemoria"""
+        for nivel, mensagem in registros:
+            self.technical_logger.log(nivel, mensagem)
+        
+        for chave in ['arquivos_processados', 'colaboradores_excluidos']:
+            self.stats[chave] += stats[chave]
+        for chave in ['exclusoes_por_categoria', 'calculos_especiais']:
+            for categoria, count in stats[chave].items():
+                self.stats[chave][categoria] = self.stats[chave].get(categoria, 0) + count
+        for chave in ['validacoes_realizadas', 'warnings', 'errors']:
+            self.stats[chave].extend(stats[chave])
+    
+    def fechar(self):
+        """Remove e fecha os handlers adicionados por esta instância"""
+        for handler in self._handlers:
+            self.technical_logger.removeHandler(handler)
+            handler.close()
+        self._handlers = []
+    
     def get_log_files(self) -> Dict[str, str]:
         """Retorna caminhos dos arquivos de log gerados"""
         return {
@@ -246,3 +306,56 @@ class VRLogger:
             'audit': str(self.audit_file)
         }
 
+
+class _RegistrosMemoria:
+    """Substituto do logger técnico que apenas acumula as mensagens"""
+    
+    def __init__(self):
+        self.registros: List[Tuple[int, str]] = []
+    
+    def log(self, nivel: int, mensagem: str):
+        self.registros.append((nivel, mensagem))
+    
+    def debug(self, mensagem: str):
+        self.log(logging.DEBUG, mensagem)
+    
+    def info(self, mensagem: str):
+        self.log(logging.INFO, mensagem)
+    
+    def warning(self, mensagem: str):
+        self.log(logging.WARNING, mensagem)
+    
+    def error(self, mensagem: str):
+        self.log(logging.ERROR, mensagem)
+
+
+class VRLoggerMemoria(VRLogger):
+    """Logger sem arquivos usado em processos de partição e benchmarks
+    
+    Mantém a mesma interface do VRLogger, mas guarda mensagens e estatísticas em
+    memória para que o processo principal as incorpore com VRLogger.mesclar.
+    """
+    
+    def __init__(self, config: Dict):
+        """Inicializa o logger em memória"""
+        self.config = config
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.technical_logger = _RegistrosMemoria()
+        self._handlers = []
+        self.stats = self._novas_estatisticas()
+    
+    @property
+    def registros(self) -> List[Tuple[int, str]]:
+        """Mensagens acumuladas (nível, texto) na ordem em que foram emitidas"""
+        return self.technical_logger.registros
+    
+    def finalizar_processamento(self, colaboradores_elegiveis: int, valor_total: float,
+                                totais_por_dimensao: Dict[str, List] = None):
+        """Sem relatório de auditoria: apenas atualiza as estatísticas"""
+        self.stats['fim_processamento'] = datetime.now()
+        self.stats['colaboradores_elegiveis'] = colaboradores_elegiveis
+        self.stats['colaboradores_processados'] = colaboradores_elegiveis + self.stats['colaboradores_excluidos']
+    
+    def get_log_files(self) -> Dict[str, str]:
+        """Não há arquivos de log"""
+        return {}
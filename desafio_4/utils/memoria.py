@@ -0,0 +1,286 @@
+"""
+Governador de Memória do Processamento VR
+Acompanha o RSS por fase e decide quando usar a estratégia em blocos com
+intermediários em disco
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+
+UNIDADES = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def converter_tamanho(valor) -> Optional[int]:
+    """Converte '512MB', '1.5GB' ou um número de bytes em bytes (None = sem limite)"""
+    if valor is None or isinstance(valor, (int, float)):
+        return None if valor is None else int(valor)
+
+    encontrado = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B)?\s*', str(valor).upper())
+    if not encontrado:
+        raise ValueError(f"Tamanho de memória inválido: {valor} (ex.: 512MB)")
+    return int(float(encontrado.group(1)) * UNIDADES[encontrado.group(2) or 'B'])
+
+
+def formatar_tamanho(n_bytes: Optional[float]) -> str:
+    """Formata bytes em MB para as mensagens de log"""
+    return "n/d" if n_bytes is None else f"{n_bytes / UNIDADES['MB']:.0f}MB"
+
+
+def ativar_copia_sob_escrita():
+    """Ativa o Copy-on-Write no pandas 2.x (comportamento padrão a partir do pandas 3.0)
+
+    Com Copy-on-Write, filtros, seleções de colunas, assign e cópias rasas compartilham
+    os dados da base de origem até que um dos lados seja alterado, então as fases
+    podem repassar DataFrames sem cópias defensivas e sem risco de alterar a base
+    recebida. A opção é global do processo: é ativada pelo OrquestradorVR e pelas
+    funções executadas nos processos dos pools, nunca na importação dos módulos.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+def rss_atual() -> Optional[int]:
+    """Memória residente do processo em bytes (None se a plataforma não informar)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Fora do Linux só há o pico do processo (KB no Linux/BSD, bytes no macOS)
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def _arrow_disponivel() -> bool:
+    """Indica se pyarrow está instalado para gravar intermediários em Arrow IPC"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class AreaTemporaria:
+    """Diretório temporário de intermediários de uma fase (Arrow IPC ou pickle)"""
+
+    def __init__(self, diretorio: Path):
+        self.diretorio = diretorio
+        self.formato = 'arrow' if _arrow_disponivel() else 'pickle'
+        self.bytes_gravados = 0
+        self._sequencia = 0
+        # Colunas object de cada bloco Arrow (voltam como str na leitura)
+        self._colunas_object: Dict[Path, List[str]] = {}
+        # Entregue a um ConsolidadoEmBlocos, que a remove ao ser fechado
+        self.retida = False
+
+    def gravar(self, df: pd.DataFrame) -> Path:
+        """Grava um bloco e retorna o caminho; a ordem de gravação é preservada no nome"""
+        self._sequencia += 1
+        if self.formato == 'arrow':
+            caminho = self.diretorio / f"bloco_{self._sequencia:06d}.arrow"
+            df.reset_index(drop=True).to_feather(caminho)
+            self._colunas_object[caminho] = [coluna for coluna, tipo in df.dtypes.items() if tipo == object]
+        else:
+            caminho = self.diretorio / f"bloco_{self._sequencia:06d}.pkl"
+            df.to_pickle(caminho)
+        self.bytes_gravados += caminho.stat().st_size
+        return caminho
+
+    def ler(self, caminho: Path, colunas: Optional[Sequence[str]] = None,
+            restaurar_tipos: bool = True) -> pd.DataFrame:
+        """Lê um bloco gravado por gravar, com os mesmos tipos de coluna
+
+        colunas limita a leitura (no Arrow, apenas essas colunas saem do disco). Sem
+        restaurar_tipos, os textos ficam no tipo str do Arrow, bem mais compacto que
+        um objeto Python por célula.
+        """
+        if caminho.suffix == '.arrow':
+            df = pd.read_feather(caminho, columns=None if colunas is None else list(colunas))
+            colunas_object = [c for c in self._colunas_object.get(caminho, []) if c in df.columns]
+            if restaurar_tipos and colunas_object:
+                return df.astype({coluna: object for coluna in colunas_object})
+            return df
+        df = pd.read_pickle(caminho)
+        return df if colunas is None else df[list(colunas)]
+
+    def fechar(self):
+        """Remove o diretório e os blocos gravados"""
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+
+class ConsolidadoEmBlocos:
+    """Consolidado mantido em blocos no disco pela estratégia em blocos, lido um bloco por vez
+
+    Os blocos seguem a ordem de matrícula, então a planilha principal (ordenada por
+    matrícula) é gravada bloco a bloco sem remontar o consolidado. A coluna
+    coluna_ordem guarda a posição de cada colaborador na base de ativos: ler()
+    remonta apenas as colunas e linhas pedidas, na ordem original. A área temporária
+    é removida por fechar() ou quando o objeto é descartado.
+    """
+
+    def __init__(self, area: AreaTemporaria, arquivos: List[Path], colunas: Sequence[str],
+                 linhas: int, coluna_ordem: str):
+        area.retida = True
+        self._area = area
+        self.arquivos = list(arquivos)
+        self.coluna_ordem = coluna_ordem
+        self.columns = pd.Index([coluna for coluna in colunas if coluna != coluna_ordem])
+        self.linhas = linhas
+        self._finalizador = weakref.finalize(self, shutil.rmtree, str(area.diretorio), True)
+
+    def __len__(self) -> int:
+        return self.linhas
+
+    @property
+    def empty(self) -> bool:
+        return self.linhas == 0
+
+    def blocos(self, colunas: Optional[Sequence[str]] = None,
+               restaurar_tipos: bool = True) -> Iterator[pd.DataFrame]:
+        """Blocos em ordem de matrícula, sem a coluna de ordem"""
+        for arquivo in self.arquivos:
+            yield self._area.ler(arquivo, colunas, restaurar_tipos).drop(columns=self.coluna_ordem, errors='ignore')
+
+    def ler(self, colunas: Optional[Sequence[str]] = None, filtro: Callable[[pd.DataFrame], Any] = None,
+            restaurar_tipos: bool = True, ordem_original: bool = True) -> pd.DataFrame:
+        """Remonta as colunas pedidas (todas, se None) das linhas aceitas por filtro(bloco)
+
+        O filtro recebe cada bloco já limitado às colunas pedidas. Sem ordem_original
+        as linhas ficam na ordem dos blocos (basta para somas e agrupamentos).
+        """
+        leitura = None if colunas is None else list(dict.fromkeys(list(colunas) + [self.coluna_ordem]))
+        partes = []
+        for arquivo in self.arquivos:
+            bloco = self._area.ler(arquivo, leitura, restaurar_tipos)
+            partes.append(bloco if filtro is None else bloco[filtro(bloco)])
+        if not partes:
+            return pd.DataFrame(columns=self.columns if colunas is None else list(colunas))
+
+        df = pd.concat(partes, ignore_index=True)
+        del partes
+        if ordem_original:
+            df = df.sort_values(self.coluna_ordem, kind='stable')
+        return df.drop(columns=self.coluna_ordem).reset_index(drop=True)
+
+    def fechar(self):
+        """Remove os blocos do disco"""
+        self._finalizador()
+
+
+class GovernadorMemoria:
+    """Orçamento de memória do processamento (performance.max_memory_usage)
+
+    Cada fase informa uma estimativa do que vai alocar; se o RSS atual somado à
+    estimativa ultrapassar o limite, a fase deve trocar para a estratégia em blocos
+    de performance.chunk_size linhas, gravando os intermediários em disco. Durante
+    as fases monitoradas o RSS é amostrado em uma thread para registrar o pico.
+    """
+
+    INTERVALO_AMOSTRAGEM = 0.05
+
+    def __init__(self, limite_bytes: Optional[int], tamanho_bloco: int = 1000, logger=None,
+                 diretorio_temporario: str = None):
+        """Inicializa o governador (limite_bytes=None desativa as projeções)"""
+        self.limite_bytes = limite_bytes
+        self.tamanho_bloco = max(1, int(tamanho_bloco))
+        self.logger = logger
+        self.diretorio_temporario = diretorio_temporario
+        self.fases: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], logger=None) -> 'GovernadorMemoria':
+        """Cria o governador a partir da seção performance"""
+        performance = config.get('performance', {})
+        return cls(
+            converter_tamanho(performance.get('max_memory_usage')),
+            performance.get('chunk_size', 1000),
+            logger,
+            performance.get('diretorio_temporario')
+        )
+
+    def _fase(self, fase: str) -> Dict[str, Any]:
+        return self.fases.setdefault(fase, {'estrategia': 'memoria'})
+
+    def excede_orcamento(self, fase: str, bytes_estimados: float) -> bool:
+        """Projeta o RSS da fase e indica se ela deve usar a estratégia em disco"""
+        rss = rss_atual()
+        projetado = (rss or 0) + bytes_estimados
+        registro = self._fase(fase)
+        registro.update({'rss_inicio': rss, 'projetado': int(projetado)})
+
+        if self.limite_bytes is None or projetado <= self.limite_bytes:
+            return False
+
+        registro['estrategia'] = 'blocos_em_disco'
+        if self.logger is not None:
+            self.logger.log_warning(
+                f"Memória: {fase} projetada em {formatar_tamanho(projetado)} (RSS atual "
+                f"{formatar_tamanho(rss)}), acima do limite de {formatar_tamanho(self.limite_bytes)}; "
+                f"usando blocos de {self.tamanho_bloco} linhas com intermediários em disco"
+            )
+        return True
+
+    @contextmanager
+    def monitorar(self, fase: str):
+        """Amostra o RSS enquanto a fase executa e registra o pico"""
+        registro = self._fase(fase)
+        pico = [rss_atual() or 0]
+        parar = threading.Event()
+
+        def amostrar():
+            while not parar.wait(self.INTERVALO_AMOSTRAGEM):
+                pico[0] = max(pico[0], rss_atual() or 0)
+
+        amostrador = threading.Thread(target=amostrar, daemon=True)
+        amostrador.start()
+        try:
+            yield registro
+        finally:
+            parar.set()
+            amostrador.join()
+            registro['rss_fim'] = rss_atual() or 0
+            registro['pico_rss'] = max(pico[0], registro['rss_fim'])
+            if self.logger is not None:
+                mensagem = (f"Memória: pico de RSS em {fase} = {formatar_tamanho(registro['pico_rss'])} "
+                            f"(estratégia: {registro['estrategia']})")
+                if self.limite_bytes is not None and registro['pico_rss'] > self.limite_bytes:
+                    self.logger.log_warning(f"{mensagem}, acima do limite de {formatar_tamanho(self.limite_bytes)}")
+                else:
+                    self.logger.log_info(mensagem)
+
+    @contextmanager
+    def area_temporaria(self, fase: str):
+        """Diretório temporário para os intermediários da fase, removido ao final
+
+        Uma área entregue a um ConsolidadoEmBlocos continua em disco até ele ser fechado.
+        """
+        diretorio = Path(tempfile.mkdtemp(prefix=f"vr_{fase}_", dir=self.diretorio_temporario))
+        area = AreaTemporaria(diretorio)
+        try:
+            yield area
+        finally:
+            self._fase(fase)['bytes_em_disco'] = area.bytes_gravados
+            if not area.retida:
+                area.fechar()
+
+    def resumo(self) -> Dict[str, Dict[str, Any]]:
+        """Estratégia, projeção e pico de RSS por fase"""
+        return {fase: dict(registro) for fase, registro in self.fases.items()}
@@ -0,0 +1,166 @@
+"""
+Contratos de Qualidade de Dados e Quarentena de Linhas
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from utils.dinheiro import para_centavos, CENTAVOS_POR_REAL
+
+
+def converter_coluna(serie: pd.Series, tipo: str) -> pd.Series:
+    """Converte uma coluna para o tipo do schema; valores inválidos viram nulos"""
+    if tipo == 'datetime64[ns]':
+        return pd.to_datetime(serie, errors='coerce')
+
+    if tipo == 'centavos':
+        # Valores monetários: reais na planilha, centavos inteiros no pipeline
+        return para_centavos(serie)
+
+    if tipo in ('int64', 'float64'):
+        numeros = pd.to_numeric(serie, errors='coerce')
+        if tipo == 'int64':
+            # Números fracionários não são inteiros válidos (ex.: matrícula 123.5)
+            return numeros.where(numeros % 1 == 0).astype('Int64')
+        return numeros
+
+    return serie
+
+
+class ValidadorContratos:
+    """Avalia contratos declarativos por coluna sobre todas as linhas de uma base
+
+    Um contrato aceita as chaves:
+        obrigatorio               o valor não pode estar vazio
+        min / max                 faixa permitida (números)
+        meses_antes_competencia   janela de datas em meses antes do início da competência
+        meses_depois_competencia  janela de datas em meses após o fim da competência
+        severidade                'quarentena' (padrão) remove a linha; 'aviso' apenas registra
+
+    Uma coluna pode ter uma lista de contratos quando as severidades diferem. Em colunas
+    do tipo 'centavos', min e max são declarados em reais.
+    Valores que não puderam ser convertidos para o tipo do schema também violam o
+    contrato da coluna. Cada regra é uma operação vetorizada sobre a coluna inteira.
+    """
+
+    def __init__(self, competencia: str):
+        """Inicializa o validador para uma competência (AAAA-MM)"""
+        self.inicio_competencia = pd.Timestamp(f"{competencia}-01")
+        self.fim_competencia = self.inicio_competencia + pd.offsets.MonthEnd(0)
+
+    def _janela(self, contrato: Dict[str, Any]):
+        """Limites de data do contrato (None quando aberto)"""
+        inicio = fim = None
+        if contrato.get('meses_antes_competencia') is not None:
+            inicio = self.inicio_competencia - pd.DateOffset(months=contrato['meses_antes_competencia'])
+        if contrato.get('meses_depois_competencia') is not None:
+            fim = self.fim_competencia + pd.DateOffset(months=contrato['meses_depois_competencia'])
+        return inicio, fim
+
+    def _violacoes_coluna(self, coluna: str, original: pd.Series, convertida: pd.Series,
+                          tipo: str, contrato: Dict[str, Any]) -> Dict[str, pd.Series]:
+        """Máscaras de violação de uma coluna, indexadas pelo motivo"""
+        violacoes = {}
+        vazio_original = original.isna()
+
+        if contrato.get('obrigatorio'):
+            violacoes[f"{coluna}: obrigatório ausente"] = vazio_original
+
+        if tipo in ('int64', 'float64', 'centavos', 'datetime64[ns]'):
+            violacoes[f"{coluna}: valor inválido para {tipo}"] = ~vazio_original & convertida.isna()
+
+        escala = CENTAVOS_POR_REAL if tipo == 'centavos' else 1
+        if contrato.get('min') is not None:
+            violacoes[f"{coluna}: abaixo do mínimo {contrato['min']}"] = (
+                convertida < contrato['min'] * escala
+            ).fillna(False)
+        if contrato.get('max') is not None:
+            violacoes[f"{coluna}: acima do máximo {contrato['max']}"] = (
+                convertida > contrato['max'] * escala
+            ).fillna(False)
+
+        inicio, fim = self._janela(contrato)
+        if inicio is not None or fim is not None:
+            fora = pd.Series(False, index=convertida.index)
+            if inicio is not None:
+                fora |= (convertida < inicio).fillna(False)
+            if fim is not None:
+                fora |= (convertida > fim).fillna(False)
+            descricao_inicio = f"{inicio:%d/%m/%Y}" if inicio is not None else "..."
+            descricao_fim = f"{fim:%d/%m/%Y}" if fim is not None else "..."
+            violacoes[f"{coluna}: fora da janela {descricao_inicio} a {descricao_fim}"] = fora
+
+        return {motivo: mascara.astype(bool) for motivo, mascara in violacoes.items() if mascara.any()}
+
+    def avaliar(self, original: pd.DataFrame, convertido: pd.DataFrame, tipos: Dict[str, str],
+                contratos: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Aplica os contratos e separa as linhas válidas das linhas em quarentena
+
+        Retorna um dict com 'validos', 'quarentena' (linhas originais com os motivos),
+        'violacoes' e 'avisos' (contagem por motivo) e 'perfil' (por coluna).
+        """
+        mascaras_quarentena, avisos = {}, {}
+        for coluna, contratos_coluna in contratos.items():
+            if coluna not in convertido.columns:
+                continue
+            if isinstance(contratos_coluna, dict):
+                contratos_coluna = [contratos_coluna]
+
+            for contrato in contratos_coluna:
+                violacoes = self._violacoes_coluna(
+                    coluna, original[coluna], convertido[coluna], tipos.get(coluna, 'object'), contrato
+                )
+                if contrato.get('severidade', 'quarentena') == 'aviso':
+                    avisos.update({motivo: int(mascara.sum()) for motivo, mascara in violacoes.items()})
+                else:
+                    mascaras_quarentena.update(violacoes)
+
+        if mascaras_quarentena:
+            mascaras = pd.DataFrame(mascaras_quarentena, index=convertido.index)
+            em_quarentena = mascaras.any(axis=1).to_numpy()
+        else:
+            mascaras = None
+            em_quarentena = np.zeros(len(convertido), dtype=bool)
+
+        quarentena = original[em_quarentena]
+        if mascaras is not None and em_quarentena.any():
+            # Concatena os motivos de cada linha: produto da matriz booleana pelos textos
+            motivos = mascaras[em_quarentena].dot(pd.Series([f"{m}; " for m in mascaras.columns],
+                                                            index=mascaras.columns, dtype=object))
+            quarentena.insert(0, 'motivos', motivos.str.rstrip('; '))
+
+        validos = convertido[~em_quarentena]
+        return {
+            'validos': validos,
+            'quarentena': quarentena,
+            'violacoes': {motivo: int(mascara.sum()) for motivo, mascara in mascaras_quarentena.items()},
+            'avisos': avisos,
+            'perfil': perfilar(convertido)
+        }
+
+
+def perfilar(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Perfil por coluna: taxa de nulos, valores distintos e mínimo/máximo"""
+    perfil = []
+    total = len(df)
+    for coluna in df.columns:
+        serie = df[coluna]
+        nulos = int(serie.isna().sum())
+        item = {
+            'coluna': str(coluna),
+            'tipo': str(serie.dtype),
+            'nulos': nulos,
+            'taxa_nulos': round(nulos / total, 4) if total else 0.0,
+            'distintos': int(serie.nunique(dropna=True)),
+            'minimo': None,
+            'maximo': None
+        }
+        if total > nulos and (pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie)):
+            if not pd.api.types.is_bool_dtype(serie):
+                item['minimo'], item['maximo'] = serie.min(), serie.max()
+        perfil.append(item)
+    return perfil
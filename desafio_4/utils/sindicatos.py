@@ -0,0 +1,202 @@
+"""
+Normalização de Nomes de Sindicatos
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import json
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Siglas das unidades federativas usadas nos nomes dos sindicatos
+UFS = {
+    'AC': 'Acre', 'AL': 'Alagoas', 'AP': 'Amapá', 'AM': 'Amazonas',
+    'BA': 'Bahia', 'CE': 'Ceará', 'DF': 'Distrito Federal', 'ES': 'Espírito Santo',
+    'GO': 'Goiás', 'MA': 'Maranhão', 'MT': 'Mato Grosso', 'MS': 'Mato Grosso do Sul',
+    'MG': 'Minas Gerais', 'PA': 'Pará', 'PB': 'Paraíba', 'PR': 'Paraná',
+    'PE': 'Pernambuco', 'PI': 'Piauí', 'RJ': 'Rio de Janeiro', 'RN': 'Rio Grande do Norte',
+    'RS': 'Rio Grande do Sul', 'RO': 'Rondônia', 'RR': 'Roraima', 'SC': 'Santa Catarina',
+    'SP': 'São Paulo', 'SE': 'Sergipe', 'TO': 'Tocantins'
+}
+
+# Tokens sem valor discriminante na comparação
+STOPWORDS = {'DE', 'DA', 'DO', 'DAS', 'DOS', 'E', 'EM'}
+
+
+def _normalizar_texto(texto: str) -> str:
+    """Remove acentos e caracteres invisíveis e converte para maiúsculas"""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.upper().strip()
+
+
+def _tokens(texto: str) -> List[str]:
+    """Quebra um texto normalizado em tokens alfanuméricos"""
+    return [t for t in re.split(r'[^A-Z0-9]+', _normalizar_texto(texto)) if t]
+
+
+class NormalizadorSindicatos:
+    """Normaliza nomes de sindicatos uma única vez por valor distinto"""
+
+    def __init__(self, mapeamento: Dict[str, str], estados_conhecidos: Iterable[str],
+                 arquivo_cache: Optional[str] = None, similaridade_minima: float = 0.8,
+                 usar_sugestoes_pendentes: bool = False):
+        """Inicializa o normalizador"""
+        self.mapeamento = dict(mapeamento or {})
+        self.estados_conhecidos = [e for e in dict.fromkeys(estados_conhecidos) if isinstance(e, str)]
+        self.arquivo_cache = Path(arquivo_cache) if arquivo_cache else None
+        self.similaridade_minima = similaridade_minima
+        self.usar_sugestoes_pendentes = usar_sugestoes_pendentes
+
+        # Tokens e siglas de cada estado conhecido, calculados uma vez
+        self._tokens_estados = {
+            estado: [t for t in _tokens(estado) if t not in STOPWORDS]
+            for estado in self.estados_conhecidos
+        }
+        self._siglas_estados = {
+            uf: estado
+            for uf, nome in UFS.items()
+            for estado in self.estados_conhecidos
+            if _normalizar_texto(nome) == _normalizar_texto(estado)
+        }
+
+        self.cache = self._carregar_cache()
+        self._cache_alterado = False
+
+        # Contadores para auditoria
+        self.calculos_similaridade = 0
+        self.sugestoes_pendentes = {}
+        self.nao_mapeados = set()
+
+    @classmethod
+    def from_config(cls, config: Dict, estados_conhecidos: Iterable[str]) -> 'NormalizadorSindicatos':
+        """Cria o normalizador a partir da configuração do sistema"""
+        secao = config.get('normalizacao_sindicatos', {})
+        arquivo_cache = None
+        if secao.get('arquivo_cache') and config['arquivos'].get('diretorio_cache'):
+            arquivo_cache = str(Path(config['arquivos']['diretorio_cache']) / secao['arquivo_cache'])
+
+        return cls(
+            config.get('mapeamento_sindicatos', {}),
+            estados_conhecidos,
+            arquivo_cache=arquivo_cache,
+            similaridade_minima=secao.get('similaridade_minima', 0.8),
+            usar_sugestoes_pendentes=secao.get('usar_sugestoes_pendentes', False)
+        )
+
+    def _carregar_cache(self) -> Dict[str, Dict]:
+        """Carrega sugestões persistidas em execuções anteriores"""
+        if self.arquivo_cache is None or not self.arquivo_cache.exists():
+            return {}
+
+        with open(self.arquivo_cache, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def salvar_cache(self):
+        """Persiste as sugestões calculadas para revisão"""
+        if self.arquivo_cache is None or not self._cache_alterado:
+            return
+
+        self.arquivo_cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.arquivo_cache, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+        self._cache_alterado = False
+
+    def _similaridade(self, tokens_sindicato: List[str], estado: str) -> float:
+        """Similaridade baseada em tokens entre um sindicato e um estado"""
+        tokens_estado = self._tokens_estados[estado]
+        if not tokens_estado or not tokens_sindicato:
+            return 0.0
+
+        # Cada token do estado procura o token mais parecido no nome do sindicato
+        melhores = [
+            max(SequenceMatcher(None, token, candidato).ratio() for candidato in tokens_sindicato)
+            for token in tokens_estado
+        ]
+        return sum(melhores) / len(melhores)
+
+    def sugerir(self, sindicato: str) -> Tuple[Optional[str], float]:
+        """Sugere o estado mais provável para um nome de sindicato não mapeado"""
+        self.calculos_similaridade += 1
+        tokens_sindicato = _tokens(sindicato)
+
+        scores = {estado: self._similaridade(tokens_sindicato, estado) for estado in self.estados_conhecidos}
+
+        # A sigla da UF é o sinal mais forte (ex.: "SINDPD SP - ..."). Um nome que cita mais
+        # de um estado ("... SP E RJ", "... RIO DE JANEIRO E SP") fica sem sugestão, para o mapeamento
+        estados_citados = {self._siglas_estados[t] for t in tokens_sindicato if t in self._siglas_estados}
+        tem_sigla = bool(estados_citados)
+        estados_citados |= {estado for estado, score in scores.items() if score >= self.similaridade_minima}
+        if len(estados_citados) > 1:
+            return None, 0.0
+        if tem_sigla:
+            return estados_citados.pop(), 1.0
+
+        melhor_estado, melhor_score = None, 0.0
+        for estado, score in scores.items():
+            if score > melhor_score:
+                melhor_estado, melhor_score = estado, score
+
+        return melhor_estado, round(melhor_score, 4)
+
+    def normalizar(self, sindicato) -> str:
+        """Normaliza um único nome de sindicato"""
+        if not isinstance(sindicato, str):
+            return sindicato
+
+        if sindicato in self.mapeamento:
+            return self.mapeamento[sindicato]
+        if sindicato in self.estados_conhecidos:
+            return sindicato
+
+        if sindicato not in self.cache:
+            sugestao, score = self.sugerir(sindicato)
+            self.cache[sindicato] = {
+                'sugestao': sugestao,
+                'similaridade': score,
+                'aprovado': None
+            }
+            self._cache_alterado = True
+
+        # A aprovação manual vale por si; o limite de similaridade só filtra as pendentes
+        entrada = self.cache[sindicato]
+        aceita = entrada['aprovado'] is True or (
+            entrada['aprovado'] is None and self.usar_sugestoes_pendentes
+            and entrada['similaridade'] >= self.similaridade_minima
+        )
+
+        if entrada['sugestao'] and aceita:
+            if entrada['aprovado'] is None:
+                self.sugestoes_pendentes[sindicato] = entrada['sugestao']
+            return entrada['sugestao']
+
+        self.nao_mapeados.add(sindicato)
+        return sindicato
+
+    def normalizar_serie(self, serie: pd.Series) -> pd.Series:
+        """Normaliza uma coluna inteira calculando cada valor distinto uma única vez"""
+        categorias = pd.Categorical(serie)
+
+        # Resolver cada categoria e reagrupar as que apontam para o mesmo nome
+        normalizados = [self.normalizar(c) for c in categorias.categories]
+        novos_codigos, novas_categorias = pd.factorize(pd.Index(normalizados, dtype=object))
+
+        codigos = categorias.codes
+        if len(novos_codigos):
+            remapeados = np.where(codigos >= 0, novos_codigos.take(codigos), -1)
+        else:
+            remapeados = codigos
+
+        self.salvar_cache()
+        return pd.Series(
+            pd.Categorical.from_codes(remapeados, categories=novas_categorias),
+            index=serie.index,
+            name=serie.name
+        )
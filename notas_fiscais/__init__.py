@@ -0,0 +1,5 @@
+"""
+Notas Fiscais - componentes Python do agente de análise de notas fiscais (n8n + MySQL)
+Autor: Manus AI
+Data: 27/08/2025
+"""
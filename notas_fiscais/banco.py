@@ -0,0 +1,60 @@
+"""
+Conexão e Dialetos SQL (MySQL e SQLite) das Notas Fiscais
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import os
+import sqlite3
+from typing import Any, List, Sequence, Tuple
+
+
+# Marcador de parâmetro de cada banco (pymysql usa %s, sqlite3 usa ?)
+DIALETOS = ('mysql', 'sqlite')
+MARCADOR = {'mysql': '%s', 'sqlite': '?'}
+
+
+def _pymysql_disponivel() -> bool:
+    """Indica se o driver pymysql está instalado"""
+    try:
+        import pymysql  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def adicionar_argumentos_conexao(parser):
+    """Argumentos de conexão comuns aos scripts: --sqlite ou --mysql-* (senha em MYSQL_PWD)"""
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--sqlite', help="Arquivo SQLite (substituto local do MySQL)")
+    destino.add_argument('--mysql-host')
+    parser.add_argument('--mysql-porta', type=int, default=3306)
+    parser.add_argument('--mysql-banco', default='notas')
+    parser.add_argument('--mysql-usuario', default='root')
+
+
+def conectar(args) -> Tuple[Any, str]:
+    """Abre a conexão dos argumentos e retorna (conexão, dialeto)"""
+    if args.sqlite:
+        return sqlite3.connect(args.sqlite), 'sqlite'
+
+    if not _pymysql_disponivel():
+        raise ImportError("Conexão com o MySQL requer pymysql (pip install pymysql)")
+
+    import pymysql
+
+    conexao = pymysql.connect(
+        host=args.mysql_host, port=args.mysql_porta, user=args.mysql_usuario,
+        password=os.environ.get('MYSQL_PWD', ''), database=args.mysql_banco, charset='utf8mb4'
+    )
+    return conexao, 'mysql'
+
+
+def clausula_upsert(dialeto: str, chave: Sequence[str], atualizadas: List[str]) -> str:
+    """Sufixo de um INSERT que atualiza as colunas informadas quando a chave já existe"""
+    if dialeto == 'mysql':
+        atualizadas = atualizadas or [chave[0]]
+        return " ON DUPLICATE KEY UPDATE " + ', '.join(f"{c} = VALUES({c})" for c in atualizadas)
+    if not atualizadas:
+        return f" ON CONFLICT ({', '.join(chave)}) DO NOTHING"
+    return f" ON CONFLICT ({', '.join(chave)}) DO UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in atualizadas)
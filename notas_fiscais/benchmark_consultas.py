@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark das Perguntas de Exemplo: tabela única x esquema normalizado
+Autor: Manus AI
+Data: 27/08/2025
+
+Executa cada pergunta do README (e variações com os filtros indexados) sobre a
+tabela notas_fiscais e sobre notas_fiscais_cabecalho/notas_fiscais_itens, e mostra
+a mediana do tempo, se os resultados coincidem e o plano de execução no esquema
+normalizado (índice usado ou varredura).
+
+Uso:
+    python3 notas_fiscais/benchmark_consultas.py --sqlite notas.db --repeticoes 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Permite executar o arquivo diretamente (python3 notas_fiscais/benchmark_consultas.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notas_fiscais.banco import adicionar_argumentos_conexao, conectar
+
+
+# (pergunta, SQL na tabela única, SQL no esquema normalizado). Contagens e valores de nota
+# usam o cabeçalho; na tabela única cada nota é uma linha, com apenas o último item
+CONSULTAS = [
+    (
+        "Qual o valor total das notas emitidas?",
+        "SELECT SUM(valor_nota_fiscal) FROM notas_fiscais",
+        "SELECT SUM(valor_nota_fiscal) FROM notas_fiscais_cabecalho"
+    ),
+    (
+        "Quantas notas fiscais foram emitidas?",
+        "SELECT COUNT(DISTINCT chave_acesso) FROM notas_fiscais",
+        "SELECT COUNT(*) FROM notas_fiscais_cabecalho"
+    ),
+    (
+        "Qual empresa mais vendeu?",
+        "SELECT razao_social_emitente, SUM(valor_nota_fiscal) AS total_vendas FROM notas_fiscais "
+        "GROUP BY razao_social_emitente ORDER BY total_vendas DESC LIMIT 1",
+        "SELECT razao_social_emitente, SUM(valor_nota_fiscal) AS total_vendas FROM notas_fiscais_cabecalho "
+        "GROUP BY razao_social_emitente ORDER BY total_vendas DESC LIMIT 1"
+    ),
+    (
+        "Qual a nota com maior valor?",
+        "SELECT numero, valor_nota_fiscal FROM notas_fiscais ORDER BY valor_nota_fiscal DESC, numero LIMIT 1",
+        "SELECT numero, valor_nota_fiscal FROM notas_fiscais_cabecalho "
+        "ORDER BY valor_nota_fiscal DESC, numero LIMIT 1"
+    ),
+    (
+        "Valor das notas emitidas em 15/01/2024 (índice data_emissao)",
+        "SELECT COUNT(*), SUM(valor_nota_fiscal) FROM notas_fiscais "
+        "WHERE data_emissao >= '2024-01-15' AND data_emissao < '2024-01-16'",
+        "SELECT COUNT(*), SUM(valor_nota_fiscal) FROM notas_fiscais_cabecalho "
+        "WHERE data_emissao >= '2024-01-15' AND data_emissao < '2024-01-16'"
+    ),
+    (
+        "Valor das notas de emitentes de SP (índice uf_emitente)",
+        "SELECT COUNT(*), SUM(valor_nota_fiscal) FROM notas_fiscais WHERE uf_emitente = 'SP'",
+        "SELECT COUNT(*), SUM(valor_nota_fiscal) FROM notas_fiscais_cabecalho WHERE uf_emitente = 'SP'"
+    ),
+    (
+        "Notas do emitente de maior faturamento (índice cpf_cnpj_emitente)",
+        "SELECT COUNT(*) FROM notas_fiscais WHERE cpf_cnpj_emitente = "
+        "(SELECT cpf_cnpj_emitente FROM notas_fiscais GROUP BY cpf_cnpj_emitente "
+        "ORDER BY SUM(valor_nota_fiscal) DESC LIMIT 1)",
+        "SELECT COUNT(*) FROM notas_fiscais_cabecalho WHERE cpf_cnpj_emitente = "
+        "(SELECT cpf_cnpj_emitente FROM notas_fiscais_cabecalho GROUP BY cpf_cnpj_emitente "
+        "ORDER BY SUM(valor_nota_fiscal) DESC LIMIT 1)"
+    ),
+    (
+        "Valor dos itens com CFOP 6102 (índice cfop)",
+        "SELECT COUNT(*), SUM(valor_total) FROM notas_fiscais WHERE cfop = '6102'",
+        "SELECT COUNT(*), SUM(valor_total) FROM notas_fiscais_itens WHERE cfop = '6102'"
+    )
+]
+
+
+def _executar(cursor, sql: str) -> List[tuple]:
+    cursor.execute(sql)
+    return [tuple(linha) for linha in cursor.fetchall()]
+
+
+def _normalizar(resultado: List[tuple]) -> List[tuple]:
+    """Resultado comparável entre bancos e tabelas (decimais e reais com 2 casas)"""
+    return [
+        tuple(round(float(valor), 2) if isinstance(valor, (int, float, Decimal)) else valor for valor in linha)
+        for linha in resultado
+    ]
+
+
+def medir(cursor, sql: str, repeticoes: int) -> Dict[str, Any]:
+    """Mediana do tempo de execução (em ms, com a leitura do resultado) e o resultado"""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = _executar(cursor, sql)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tempos), 'resultado': resultado}
+
+
+def plano(cursor, dialeto: str, sql: str) -> str:
+    """Resumo do plano de execução: índices usados ou tabelas varridas"""
+    if dialeto == 'sqlite':
+        return '; '.join(linha[-1] for linha in _executar(cursor, f"EXPLAIN QUERY PLAN {sql}"))
+
+    cursor.execute(f"EXPLAIN {sql}")
+    colunas = [descricao[0] for descricao in cursor.description]
+    etapas = []
+    for linha in cursor.fetchall():
+        registro = dict(zip(colunas, linha))
+        etapas.append(f"{registro.get('table')}: {registro.get('type')} {registro.get('key') or ''}".strip())
+    return '; '.join(etapas)
+
+
+def executar_benchmark(conexao, dialeto: str, repeticoes: int = 5,
+                       consultas: Optional[List[tuple]] = None) -> List[Dict[str, Any]]:
+    """Mede cada consulta nos dois esquemas (a primeira execução aquece o cache e não é contada)"""
+    cursor = conexao.cursor()
+    resultados = []
+    for pergunta, sql_legado, sql_normalizado in consultas or CONSULTAS:
+        _executar(cursor, sql_legado)
+        _executar(cursor, sql_normalizado)
+        legado = medir(cursor, sql_legado, repeticoes)
+        normalizado = medir(cursor, sql_normalizado, repeticoes)
+        resultados.append({
+            'pergunta': pergunta,
+            'legado_ms': round(legado['mediana_ms'], 3),
+            'normalizado_ms': round(normalizado['mediana_ms'], 3),
+            'mesmo_resultado': _normalizar(legado['resultado']) == _normalizar(normalizado['resultado']),
+            'resultado': normalizado['resultado'],
+            'plano': plano(cursor, dialeto, sql_normalizado)
+        })
+    return resultados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark das perguntas de exemplo nos dois esquemas")
+    adicionar_argumentos_conexao(parser)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        conexao, dialeto = conectar(args)
+    except ImportError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    try:
+        resultados = executar_benchmark(conexao, dialeto, args.repeticoes)
+    finally:
+        conexao.close()
+
+    print(f"{'Pergunta':<68} {'Única (ms)':>11} {'Normal. (ms)':>13}  Igual")
+    for resultado in resultados:
+        print(
+            f"{resultado['pergunta'][:68]:<68} {resultado['legado_ms']:>11.2f} {resultado['normalizado_ms']:>13.2f}  "
+            f"{'sim' if resultado['mesmo_resultado'] else 'não'}"
+        )
+        print(f"    resultado: {resultado['resultado']}")
+        print(f"    plano: {resultado['plano']}")
+    print("\nNa tabela única cada nota guarda só o último item: consultas de itens podem divergir.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
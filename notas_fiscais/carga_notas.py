@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Carga em Lote das Notas Fiscais (CSV -> MySQL/SQLite)
+Substitui o nó "Insert or update rows in a table" do workflow n8n, que faz um
+upsert (uma ida ao banco) por linha
+Autor: Manus AI
+Data: 27/08/2025
+
+Uso:
+    python3 notas_fiscais/carga_notas.py --cabecalho 202401_NFs_Cabecalho.csv \\
+        --itens 202401_NFs_Itens.csv --sqlite notas.db --criar-tabelas
+    MYSQL_PWD=... python3 notas_fiscais/carga_notas.py --cabecalho ... --itens ... \\
+        --mysql-host localhost --mysql-banco notas --mysql-usuario n8n
+"""
+
+import argparse
+import logging
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Permite executar o arquivo diretamente (python3 notas_fiscais/carga_notas.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notas_fiscais.banco import DIALETOS, MARCADOR, adicionar_argumentos_conexao, clausula_upsert, conectar
+from notas_fiscais.esquema import ESQUEMAS, Tabela, criar_tabelas
+
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho do CSV -> coluna de notas_fiscais (o mesmo mapeamento do nó MySQL do workflow)
+COLUNAS_CSV = {
+    'CHAVE DE ACESSO': 'chave_acesso',
+    'MODELO': 'modelo',
+    'SÉRIE': 'serie',
+    'NÚMERO': 'numero',
+    'NATUREZA DA OPERAÇÃO': 'natureza_operacao',
+    'DATA EMISSÃO': 'data_emissao',
+    'CPF/CNPJ Emitente': 'cpf_cnpj_emitente',
+    'RAZÃO SOCIAL EMITENTE': 'razao_social_emitente',
+    'INSCRIÇÃO ESTADUAL EMITENTE': 'inscricao_estadual_emitente',
+    'UF EMITENTE': 'uf_emitente',
+    'MUNICÍPIO EMITENTE': 'municipio_emitente',
+    'CNPJ DESTINATÁRIO': 'cnpj_destinatario',
+    'NOME DESTINATÁRIO': 'nome_destinatario',
+    'UF DESTINATÁRIO': 'uf_destinatario',
+    'INDICADOR IE DESTINATÁRIO': 'indicador_ie_destinatario',
+    'DESTINO DA OPERAÇÃO': 'destino_operacao',
+    'CONSUMIDOR FINAL': 'consumidor_final',
+    'PRESENÇA DO COMPRADOR': 'presenca_comprador',
+    'NÚMERO PRODUTO': 'numero_produto',
+    'DESCRIÇÃO DO PRODUTO/SERVIÇO': 'descricao_produto_servico',
+    'CÓDIGO NCM/SH': 'codigo_ncm_sh',
+    'NCM/SH (TIPO DE PRODUTO)': 'ncm_sh_tipo_produto',
+    'CFOP': 'cfop',
+    'QUANTIDADE': 'quantidade',
+    'UNIDADE': 'unidade',
+    'VALOR UNITÁRIO': 'valor_unitario',
+    'VALOR TOTAL': 'valor_total',
+    'EVENTO MAIS RECENTE': 'evento_mais_recente',
+    'DATA/HORA EVENTO MAIS RECENTE': 'data_hora_evento_mais_recente',
+    'VALOR NOTA FISCAL': 'valor_nota_fiscal'
+}
+
+# Coluna obrigatória nos dois CSVs
+CHAVE = 'chave_acesso'
+
+# Conversão de cada coluna não textual
+COLUNAS_DATA = ('data_emissao', 'data_hora_evento_mais_recente')
+COLUNAS_DECIMAIS = ('quantidade', 'valor_unitario', 'valor_total', 'valor_nota_fiscal')
+COLUNAS_INTEIRAS = ('numero_produto',)
+
+# Formatos aceitos nas colunas de data, na ordem em que são tentados
+FORMATOS_DATA = ('%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y')
+
+# Parâmetros por comando: limite do SQLite (SQLITE_MAX_VARIABLE_NUMBER desde a 3.32);
+# o pymysql interpola os valores no cliente, então no MySQL vale apenas max_allowed_packet
+LIMITE_PARAMETROS = 32766
+
+
+def _texto(valor: str) -> Optional[str]:
+    """Texto sem espaços nas bordas ('' vira NULL)"""
+    valor = valor.strip()
+    return valor or None
+
+
+def _decimal(valor: str) -> Optional[str]:
+    """Número em formato brasileiro ('1.234,56') ou com ponto ('1234.56') como texto decimal exato"""
+    valor = valor.strip()
+    if not valor:
+        return None
+    if ',' in valor:
+        valor = valor.replace('.', '').replace(',', '.')
+    try:
+        return str(Decimal(valor))
+    except InvalidOperation:
+        raise ValueError(f"Valor decimal inválido: {valor!r}") from None
+
+
+def _inteiro(valor: str) -> Optional[int]:
+    """Número inteiro, aceito também com casas decimais zeradas ('2,00' ou '2.0')"""
+    valor = valor.strip()
+    if not valor:
+        return None
+    try:
+        numero = Decimal(valor.replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Valor inteiro inválido: {valor!r}") from None
+    if not numero.is_finite() or numero != numero.to_integral_value():
+        raise ValueError(f"Valor inteiro inválido: {valor!r}")
+    return int(numero)
+
+
+def _datas(serie: pd.Series) -> List[Optional[str]]:
+    """Datas ISO ('2024-01-30 13:22:55') ou brasileiras ('30/01/2024 13:22:55') como DATETIME"""
+    texto = serie.str.strip()
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    for formato in FORMATOS_DATA:
+        faltantes = datas.isna() & (texto != '')
+        if not faltantes.any():
+            break
+        datas[faltantes] = pd.to_datetime(texto[faltantes], format=formato, errors='coerce')
+
+    invalidas = datas.isna() & (texto != '')
+    if invalidas.any():
+        raise ValueError(f"Data inválida em {serie.name}: {texto[invalidas].iloc[0]!r}")
+    return datas.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(datas.notna(), None).tolist()
+
+
+def _valores(df: pd.DataFrame, coluna: str) -> List[Any]:
+    """Valores de uma coluna do bloco convertidos para o tipo da tabela"""
+    if coluna in COLUNAS_DATA:
+        return _datas(df[coluna])
+    if coluna in COLUNAS_DECIMAIS:
+        conversor: Callable[[str], Any] = _decimal
+    elif coluna in COLUNAS_INTEIRAS:
+        conversor = _inteiro
+    else:
+        conversor = _texto
+    return [conversor(valor) for valor in df[coluna].tolist()]
+
+
+class CargaNotasFiscais:
+    """Carrega os CSVs de cabeçalho e itens em blocos, com upsert de várias linhas por comando
+
+    Cada CSV é lido em blocos de tamanho_lote linhas (apenas as colunas mapeadas em
+    COLUNAS_CSV, tudo como texto para preservar zeros à esquerda de chaves e CNPJs) e
+    cada bloco vira um INSERT com várias linhas e ON DUPLICATE KEY UPDATE (MySQL) ou
+    ON CONFLICT DO UPDATE (SQLite) pela chave da tabela de destino, confirmado ao
+    final do bloco. Recarregar os arquivos não duplica linhas.
+
+    Com o esquema 'normalizado', o cabeçalho vai para notas_fiscais_cabecalho e cada
+    item para notas_fiscais_itens (chave_acesso, numero_produto). Com o 'legado', os
+    dois arquivos vão para a tabela única notas_fiscais, como no workflow: o
+    cabeçalho é carregado primeiro e cada chave_acesso fica com os dados do último
+    item lido.
+    """
+
+    def __init__(self, conexao, dialeto: str = 'mysql', tamanho_lote: int = 1000, esquema: str = 'normalizado',
+                 encoding: str = 'utf-8', separador: str = ','):
+        """Usa uma conexão DB-API já aberta (pymysql ou sqlite3)"""
+        if dialeto not in DIALETOS:
+            raise ValueError(f"Dialeto inválido: {dialeto} (use {', '.join(DIALETOS)})")
+        if esquema not in ESQUEMAS:
+            raise ValueError(f"Esquema inválido: {esquema} (use {', '.join(ESQUEMAS)})")
+
+        self.conexao = conexao
+        self.dialeto = dialeto
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.esquema = esquema
+        self.encoding = encoding
+        self.separador = separador
+
+    def criar_tabelas(self):
+        """Cria as tabelas do esquema, se não existirem"""
+        criar_tabelas(self.conexao, self.dialeto, self.esquema)
+
+    def carregar(self, arquivo_cabecalho: str, arquivo_itens: str) -> Dict[str, Any]:
+        """Carrega o cabeçalho e depois os itens; retorna linhas, tempo e linhas/s de cada arquivo"""
+        inicio = time.perf_counter()
+        arquivos = {
+            'cabecalho': self.carregar_arquivo(arquivo_cabecalho, ESQUEMAS[self.esquema]['cabecalho']),
+            'itens': self.carregar_arquivo(arquivo_itens, ESQUEMAS[self.esquema]['itens'])
+        }
+        return {'arquivos': arquivos, **self._medida(
+            sum(arquivo['linhas'] for arquivo in arquivos.values()), time.perf_counter() - inicio
+        )}
+
+    def _blocos(self, arquivo: str) -> Iterator[pd.DataFrame]:
+        """Blocos do CSV com as colunas mapeadas, renomeadas para as colunas da tabela"""
+        leitor = pd.read_csv(
+            arquivo, sep=self.separador, encoding=self.encoding, dtype=str, keep_default_na=False,
+            usecols=lambda coluna: coluna.strip() in COLUNAS_CSV, chunksize=self.tamanho_lote
+        )
+        with leitor:
+            for bloco in leitor:
+                bloco.columns = [COLUNAS_CSV[coluna.strip()] for coluna in bloco.columns]
+                if CHAVE not in bloco.columns:
+                    raise ValueError(f"{arquivo} não tem a coluna CHAVE DE ACESSO")
+                yield bloco
+
+    def carregar_arquivo(self, arquivo: str, tabela: Tabela) -> Dict[str, Any]:
+        """Carrega as colunas do CSV que existem na tabela; elas sobrescrevem as da linha de mesma chave"""
+        inicio = time.perf_counter()
+        linhas = comandos = 0
+        cursor = self.conexao.cursor()
+
+        for bloco in self._blocos(arquivo):
+            colunas = [coluna for coluna in bloco.columns if coluna in tabela.colunas]
+            faltantes = [coluna for coluna in tabela.chave if coluna not in colunas]
+            if faltantes:
+                raise ValueError(f"{arquivo} não tem as colunas da chave de {tabela.nome}: {', '.join(faltantes)}")
+
+            valores = [_valores(bloco, coluna) for coluna in colunas]
+            posicoes_chave = [colunas.index(coluna) for coluna in tabela.chave]
+            registros = [
+                registro for registro in zip(*valores)
+                if all(registro[posicao] is not None for posicao in posicoes_chave)
+            ]
+
+            # Um comando por fatia de até LIMITE_PARAMETROS parâmetros
+            por_comando = max(1, min(self.tamanho_lote, LIMITE_PARAMETROS // len(colunas)))
+            for posicao in range(0, len(registros), por_comando):
+                fatia = registros[posicao:posicao + por_comando]
+                cursor.execute(
+                    self._sql_upsert(tabela, colunas, len(fatia)), [valor for registro in fatia for valor in registro]
+                )
+                comandos += 1
+            self.conexao.commit()
+            linhas += len(registros)
+
+        medida = {
+            'arquivo': arquivo, 'tabela': tabela.nome, 'comandos': comandos,
+            **self._medida(linhas, time.perf_counter() - inicio)
+        }
+        logger.info(
+            f"{arquivo} -> {tabela.nome}: {linhas} linhas em {comandos} comandos "
+            f"({medida['segundos']:.2f}s, {medida['linhas_por_segundo']:,.0f} linhas/s)"
+        )
+        return medida
+
+    def _sql_upsert(self, tabela: Tabela, colunas: List[str], linhas: int) -> str:
+        """INSERT de várias linhas que atualiza as colunas informadas quando a chave já existe"""
+        linha = f"({', '.join([MARCADOR[self.dialeto]] * len(colunas))})"
+        atualizadas = [coluna for coluna in colunas if coluna not in tabela.chave]
+        return (
+            f"INSERT INTO {tabela.nome} ({', '.join(colunas)}) VALUES {', '.join([linha] * linhas)}"
+            + clausula_upsert(self.dialeto, tabela.chave, atualizadas)
+        )
+
+    @staticmethod
+    def _medida(linhas: int, segundos: float) -> Dict[str, Any]:
+        return {
+            'linhas': linhas,
+            'segundos': round(segundos, 3),
+            'linhas_por_segundo': round(linhas / segundos, 1) if segundos > 0 else 0.0
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Carga em lote dos CSVs de notas fiscais")
+    parser.add_argument('--cabecalho', required=True, help="CSV de cabeçalho (ex.: 202401_NFs_Cabecalho.csv)")
+    parser.add_argument('--itens', required=True, help="CSV de itens (ex.: 202401_NFs_Itens.csv)")
+    parser.add_argument('--tamanho-lote', type=int, default=1000, help="Linhas por bloco lido e por INSERT (padrão: 1000)")
+    parser.add_argument('--esquema', choices=list(ESQUEMAS), default='normalizado',
+                        help="normalizado (cabeçalho e itens) ou legado (tabela única notas_fiscais do workflow)")
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--separador', default=',')
+    parser.add_argument('--criar-tabelas', action='store_true', help="Cria as tabelas do esquema se não existirem")
+    adicionar_argumentos_conexao(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        conexao, dialeto = conectar(args)
+    except ImportError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    try:
+        carga = CargaNotasFiscais(conexao, dialeto, args.tamanho_lote, args.esquema, args.encoding, args.separador)
+        if args.criar_tabelas:
+            carga.criar_tabelas()
+        resultado = carga.carregar(args.cabecalho, args.itens)
+    finally:
+        conexao.close()
+
+    print(f"Linhas carregadas: {resultado['linhas']} em {resultado['segundos']:.2f}s "
+          f"({resultado['linhas_por_segundo']:,.0f} linhas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
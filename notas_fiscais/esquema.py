@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Esquema das Notas Fiscais: tabela única do workflow e esquema normalizado
+Autor: Manus AI
+Data: 27/08/2025
+
+A tabela notas_fiscais do README usa chave_acesso como chave, mas guarda também as
+colunas de item: cada upsert de um item da mesma nota sobrescreve o anterior. O
+esquema normalizado separa o cabeçalho (uma linha por nota) dos itens (uma linha
+por chave_acesso e numero_produto), com índices nas colunas usadas como filtro.
+
+Uso (migração da tabela existente):
+    python3 notas_fiscais/esquema.py --sqlite notas.db
+    MYSQL_PWD=... python3 notas_fiscais/esquema.py --mysql-host localhost --mysql-banco notas
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+# Permite executar o arquivo diretamente (python3 notas_fiscais/esquema.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notas_fiscais.banco import adicionar_argumentos_conexao, clausula_upsert, conectar
+
+
+class Tabela:
+    """Definição de uma tabela: nome, colunas com tipos (na ordem), chave e índices secundários"""
+
+    def __init__(self, nome: str, colunas: Dict[str, str], chave: Sequence[str], indices: Sequence[str] = ()):
+        self.nome = nome
+        self.colunas = dict(colunas)
+        self.chave = tuple(chave)
+        self.indices = tuple(indices)
+
+    def comandos_criacao(self, dialeto: str) -> List[str]:
+        """CREATE TABLE e índices (no MySQL os índices vão no próprio CREATE TABLE, que aceita IF NOT EXISTS)"""
+        definicoes = [
+            f"{coluna} {tipo}{' NOT NULL' if coluna in self.chave else ''}" for coluna, tipo in self.colunas.items()
+        ]
+        definicoes.append(f"PRIMARY KEY ({', '.join(self.chave)})")
+        if dialeto == 'mysql':
+            definicoes += [f"INDEX {self.nome_indice(coluna)} ({coluna})" for coluna in self.indices]
+
+        comandos = [f"CREATE TABLE IF NOT EXISTS {self.nome} (\n    " + ",\n    ".join(definicoes) + "\n)"]
+        if dialeto == 'sqlite':
+            comandos += [
+                f"CREATE INDEX IF NOT EXISTS {self.nome_indice(coluna)} ON {self.nome} ({coluna})"
+                for coluna in self.indices
+            ]
+        return comandos
+
+    def nome_indice(self, coluna: str) -> str:
+        return f"idx_{self.nome}_{coluna}"
+
+
+# Colunas da nota (uma vez por chave_acesso)
+COLUNAS_CABECALHO = {
+    'chave_acesso': 'VARCHAR(44)',
+    'modelo': 'VARCHAR(100)',
+    'serie': 'VARCHAR(10)',
+    'numero': 'VARCHAR(20)',
+    'natureza_operacao': 'VARCHAR(100)',
+    'data_emissao': 'DATETIME',
+    'cpf_cnpj_emitente': 'VARCHAR(14)',
+    'razao_social_emitente': 'VARCHAR(150)',
+    'inscricao_estadual_emitente': 'VARCHAR(20)',
+    'uf_emitente': 'CHAR(2)',
+    'municipio_emitente': 'VARCHAR(100)',
+    'cnpj_destinatario': 'VARCHAR(14)',
+    'nome_destinatario': 'VARCHAR(150)',
+    'uf_destinatario': 'CHAR(2)',
+    'indicador_ie_destinatario': 'VARCHAR(50)',
+    'destino_operacao': 'VARCHAR(50)',
+    'consumidor_final': 'VARCHAR(50)',
+    'presenca_comprador': 'VARCHAR(50)',
+    'evento_mais_recente': 'VARCHAR(100)',
+    'data_hora_evento_mais_recente': 'DATETIME',
+    'valor_nota_fiscal': 'DECIMAL(10,2)'
+}
+
+# Colunas de cada item da nota
+COLUNAS_ITEM = {
+    'chave_acesso': 'VARCHAR(44)',
+    'numero_produto': 'INT',
+    'descricao_produto_servico': 'VARCHAR(150)',
+    'codigo_ncm_sh': 'VARCHAR(10)',
+    'ncm_sh_tipo_produto': 'VARCHAR(150)',
+    'cfop': 'VARCHAR(10)',
+    'quantidade': 'DECIMAL(10,2)',
+    'unidade': 'VARCHAR(20)',
+    'valor_unitario': 'DECIMAL(10,2)',
+    'valor_total': 'DECIMAL(10,2)'
+}
+
+# Tabela única do README, na ordem das colunas do README
+ORDEM_LEGADO = (
+    list(COLUNAS_CABECALHO)[:18]
+    + [coluna for coluna in COLUNAS_ITEM if coluna != 'chave_acesso']
+    + ['evento_mais_recente', 'data_hora_evento_mais_recente', 'valor_nota_fiscal']
+)
+NOTAS_FISCAIS = Tabela(
+    'notas_fiscais', {coluna: {**COLUNAS_CABECALHO, **COLUNAS_ITEM}[coluna] for coluna in ORDEM_LEGADO},
+    ['chave_acesso']
+)
+
+# Esquema normalizado; sem chave estrangeira, para que itens e cabeçalhos possam ser carregados
+# em qualquer ordem (e em paralelo) sem verificação linha a linha
+NOTAS_FISCAIS_CABECALHO = Tabela(
+    'notas_fiscais_cabecalho', COLUNAS_CABECALHO, ['chave_acesso'],
+    indices=['data_emissao', 'cpf_cnpj_emitente', 'uf_emitente']
+)
+NOTAS_FISCAIS_ITENS = Tabela(
+    'notas_fiscais_itens', COLUNAS_ITEM, ['chave_acesso', 'numero_produto'],
+    indices=['cfop']
+)
+
+# Tabela de destino de cada arquivo CSV, por esquema
+ESQUEMAS = {
+    'legado': {'cabecalho': NOTAS_FISCAIS, 'itens': NOTAS_FISCAIS},
+    'normalizado': {'cabecalho': NOTAS_FISCAIS_CABECALHO, 'itens': NOTAS_FISCAIS_ITENS}
+}
+
+
+def criar_tabelas(conexao, dialeto: str, esquema: str = 'normalizado'):
+    """Cria as tabelas (e índices) do esquema que ainda não existirem"""
+    cursor = conexao.cursor()
+    for tabela in dict.fromkeys(ESQUEMAS[esquema].values()):
+        for comando in tabela.comandos_criacao(dialeto):
+            cursor.execute(comando)
+    conexao.commit()
+
+
+def _copiar(cursor, dialeto: str, origem: Tabela, destino: Tabela, condicao: str) -> int:
+    """INSERT ... SELECT da origem para o destino com upsert (a migração pode ser repetida)"""
+    colunas = [coluna for coluna in destino.colunas if coluna in origem.colunas]
+    atualizadas = [coluna for coluna in colunas if coluna not in destino.chave]
+    # WHERE obrigatório no SQLite para um upsert com SELECT (ambiguidade com ON CONFLICT)
+    cursor.execute(
+        f"INSERT INTO {destino.nome} ({', '.join(colunas)}) "
+        f"SELECT {', '.join(colunas)} FROM {origem.nome} WHERE {condicao}"
+        + clausula_upsert(dialeto, destino.chave, atualizadas)
+    )
+    cursor.execute(f"SELECT COUNT(*) FROM {destino.nome}")
+    return cursor.fetchone()[0]
+
+
+def migrar(conexao, dialeto: str) -> Dict[str, Any]:
+    """Cria o esquema normalizado e copia a tabela notas_fiscais para ele, em uma transação
+
+    Cada nota gera uma linha de cabeçalho e, se tiver numero_produto, uma linha de
+    item. A tabela antiga guarda apenas o último item de cada nota (os anteriores
+    foram sobrescritos), então os demais itens só voltam recarregando o CSV de itens
+    com o esquema normalizado. A tabela notas_fiscais é mantida.
+    """
+    inicio = time.perf_counter()
+    criar_tabelas(conexao, dialeto, 'normalizado')
+
+    cursor = conexao.cursor()
+    try:
+        cabecalhos = _copiar(cursor, dialeto, NOTAS_FISCAIS, NOTAS_FISCAIS_CABECALHO, 'chave_acesso IS NOT NULL')
+        itens = _copiar(cursor, dialeto, NOTAS_FISCAIS, NOTAS_FISCAIS_ITENS, 'numero_produto IS NOT NULL')
+        conexao.commit()
+    except Exception:
+        conexao.rollback()
+        raise
+
+    return {
+        NOTAS_FISCAIS_CABECALHO.nome: cabecalhos,
+        NOTAS_FISCAIS_ITENS.nome: itens,
+        'segundos': round(time.perf_counter() - inicio, 3)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migra a tabela notas_fiscais para o esquema normalizado")
+    adicionar_argumentos_conexao(parser)
+    args = parser.parse_args()
+
+    try:
+        conexao, dialeto = conectar(args)
+    except ImportError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    try:
+        resultado = migrar(conexao, dialeto)
+    finally:
+        conexao.close()
+
+    print(f"Cabeçalhos: {resultado[NOTAS_FISCAIS_CABECALHO.nome]}")
+    print(f"Itens: {resultado[NOTAS_FISCAIS_ITENS.nome]} (a tabela antiga guarda só o último item de cada nota; "
+          f"recarregue o CSV de itens com --esquema normalizado para obter todos)")
+    print(f"Tempo: {resultado['segundos']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Testes da Carga em Lote das Notas Fiscais contra SQLite
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import re
+import sqlite3
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from notas_fiscais.carga_notas import CargaNotasFiscais
+
+CHAVE_1 = '41240106267630001509550010035101291224888487'
+CHAVE_2 = '50240129843878000170550010000025251000181553'
+
+CABECALHO = (
+    'CHAVE DE ACESSO,MODELO,SÉRIE,NÚMERO,DATA EMISSÃO,CPF/CNPJ Emitente,UF EMITENTE,VALOR NOTA FISCAL\n'
+    f'{CHAVE_1},55 - NF-E EMITIDA EM SUBSTITUIÇÃO AO MODELO 1 OU 1A,1,3510129,'
+    '2024-01-25 09:04:26,06267630001509,PR,"1.234,56"\n'
+    f'{CHAVE_2},55 - NF-E EMITIDA EM SUBSTITUIÇÃO AO MODELO 1 OU 1A,1,2525,'
+    '30/01/2024 13:22:55,29843878000170,MS,"9.999.999,99"\n'
+)
+
+ITENS = (
+    'CHAVE DE ACESSO,NÚMERO PRODUTO,DESCRIÇÃO DO PRODUTO/SERVIÇO,CFOP,QUANTIDADE,VALOR UNITÁRIO,VALOR TOTAL\n'
+    f'{CHAVE_1},1,CADEIRA,5102,"2,00","617,28","1.234,56"\n'
+    f'{CHAVE_2},1,MESA,6102,"3,00","1.000,01","3.000,03"\n'
+    f'{CHAVE_2},2,ARMARIO,6102,1.5,0.33,0.50\n'
+)
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    cabecalho = tmp_path / '202401_NFs_Cabecalho.csv'
+    itens = tmp_path / '202401_NFs_Itens.csv'
+    cabecalho.write_text(CABECALHO, encoding='utf-8')
+    itens.write_text(ITENS, encoding='utf-8')
+    return str(cabecalho), str(itens)
+
+
+def _carregar_duas_vezes(banco: Path, arquivos, esquema: str):
+    conexao = sqlite3.connect(banco)
+    try:
+        carga = CargaNotasFiscais(conexao, 'sqlite', tamanho_lote=2, esquema=esquema)
+        carga.criar_tabelas()
+        return carga.carregar(*arquivos), carga.carregar(*arquivos)
+    finally:
+        conexao.close()
+
+
+def _linhas(banco: Path, sql: str):
+    with sqlite3.connect(banco) as conexao:
+        return conexao.execute(sql).fetchall()
+
+
+def _decimal(valor) -> Decimal:
+    return Decimal(str(valor))
+
+
+def test_recarga_normalizado_nao_duplica_e_preserva_decimais(tmp_path, arquivos):
+    banco = tmp_path / 'notas.db'
+    primeira, segunda = _carregar_duas_vezes(banco, arquivos, 'normalizado')
+
+    assert primeira['linhas'] == segunda['linhas'] == 5
+    assert segunda['arquivos']['itens']['linhas'] == 3
+
+    cabecalhos = _linhas(banco, "SELECT chave_acesso, cpf_cnpj_emitente, data_emissao, valor_nota_fiscal "
+                                "FROM notas_fiscais_cabecalho ORDER BY chave_acesso")
+    assert [linha[:3] for linha in cabecalhos] == [
+        (CHAVE_1, '06267630001509', '2024-01-25 09:04:26'),
+        (CHAVE_2, '29843878000170', '2024-01-30 13:22:55')
+    ]
+    assert [_decimal(linha[3]) for linha in cabecalhos] == [Decimal('1234.56'), Decimal('9999999.99')]
+
+    itens = _linhas(banco, "SELECT chave_acesso, numero_produto, quantidade, valor_unitario, valor_total "
+                           "FROM notas_fiscais_itens ORDER BY chave_acesso, numero_produto")
+    assert [linha[:2] for linha in itens] == [(CHAVE_1, 1), (CHAVE_2, 1), (CHAVE_2, 2)]
+    assert [tuple(_decimal(valor) for valor in linha[2:]) for linha in itens] == [
+        (Decimal('2'), Decimal('617.28'), Decimal('1234.56')),
+        (Decimal('3'), Decimal('1000.01'), Decimal('3000.03')),
+        (Decimal('1.5'), Decimal('0.33'), Decimal('0.5'))
+    ]
+
+
+@pytest.mark.parametrize('linha, erro', [
+    (f'{CHAVE_1},1,CADEIRA,5102,"2,00","617,2x","1.234,56"\n', "Valor decimal inválido: '617.2x'"),
+    (f'{CHAVE_1},A1,CADEIRA,5102,"2,00","617,28","1.234,56"\n', "Valor inteiro inválido: 'A1'"),
+    (f'{CHAVE_1},"1,5",CADEIRA,5102,"2,00","617,28","1.234,56"\n', "Valor inteiro inválido: '1,5'"),
+])
+def test_valor_malformado_nos_itens_interrompe_a_carga_com_value_error(tmp_path, arquivos, linha, erro):
+    itens = tmp_path / 'itens_invalidos.csv'
+    itens.write_text(ITENS.splitlines(keepends=True)[0] + linha, encoding='utf-8')
+
+    with sqlite3.connect(tmp_path / 'notas.db') as conexao:
+        carga = CargaNotasFiscais(conexao, 'sqlite')
+        carga.criar_tabelas()
+        with pytest.raises(ValueError, match=re.escape(erro)):
+            carga.carregar(arquivos[0], str(itens))
+
+
+def test_data_malformada_no_cabecalho_interrompe_a_carga_com_value_error(tmp_path, arquivos):
+    cabecalho = tmp_path / 'cabecalho_invalido.csv'
+    cabecalho.write_text(CABECALHO.replace('30/01/2024 13:22:55', '31/02/2024 13:22:55'), encoding='utf-8')
+
+    with sqlite3.connect(tmp_path / 'notas.db') as conexao:
+        carga = CargaNotasFiscais(conexao, 'sqlite')
+        carga.criar_tabelas()
+        with pytest.raises(ValueError, match=re.escape("Data inválida em data_emissao: '31/02/2024 13:22:55'")):
+            carga.carregar(str(cabecalho), arquivos[1])
+
+
+def test_recarga_legado_mantem_uma_linha_por_nota(tmp_path, arquivos):
+    banco = tmp_path / 'notas.db'
+    _carregar_duas_vezes(banco, arquivos, 'legado')
+
+    notas = _linhas(banco, "SELECT chave_acesso, numero_produto, valor_total, valor_nota_fiscal "
+                           "FROM notas_fiscais ORDER BY chave_acesso")
+    assert [linha[:2] for linha in notas] == [(CHAVE_1, 1), (CHAVE_2, 2)]
+    assert [(_decimal(linha[2]), _decimal(linha[3])) for linha in notas] == [
+        (Decimal('1234.56'), Decimal('1234.56')),
+        (Decimal('0.5'), Decimal('9999999.99'))
+    ]
@@ -0,0 +1,70 @@
+"""
+Testes da Migração para o Esquema Normalizado contra SQLite
+Autor: Manus AI
+Data: 27/08/2025
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from notas_fiscais.benchmark_consultas import CONSULTAS, plano
+from notas_fiscais.esquema import NOTAS_FISCAIS_CABECALHO, NOTAS_FISCAIS_ITENS, criar_tabelas, migrar
+
+CHAVE_1 = '41240106267630001509550010035101291224888487'
+CHAVE_2 = '50240129843878000170550010000025251000181553'
+
+
+@pytest.fixture
+def conexao():
+    """Banco com a tabela única do workflow: uma nota com item e outra só com o cabeçalho"""
+    conexao = sqlite3.connect(':memory:')
+    criar_tabelas(conexao, 'sqlite', 'legado')
+    conexao.executemany(
+        "INSERT INTO notas_fiscais (chave_acesso, data_emissao, uf_emitente, numero_produto, cfop, "
+        "valor_total, valor_nota_fiscal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (CHAVE_1, '2024-01-25 09:04:26', 'PR', 2, '5102', '617.28', '1234.56'),
+            (CHAVE_2, '2024-01-30 13:22:55', 'MS', None, None, None, '9999999.99'),
+        ]
+    )
+    conexao.commit()
+    yield conexao
+    conexao.close()
+
+
+def test_migrar_copia_cabecalhos_e_itens_e_pode_ser_repetida(conexao):
+    primeira = migrar(conexao, 'sqlite')
+    segunda = migrar(conexao, 'sqlite')
+
+    for resultado in (primeira, segunda):
+        assert resultado[NOTAS_FISCAIS_CABECALHO.nome] == 2
+        assert resultado[NOTAS_FISCAIS_ITENS.nome] == 1
+    assert conexao.execute(
+        "SELECT chave_acesso, data_emissao, uf_emitente FROM notas_fiscais_cabecalho ORDER BY chave_acesso"
+    ).fetchall() == [(CHAVE_1, '2024-01-25 09:04:26', 'PR'), (CHAVE_2, '2024-01-30 13:22:55', 'MS')]
+    assert conexao.execute(
+        "SELECT chave_acesso, numero_produto, cfop FROM notas_fiscais_itens"
+    ).fetchall() == [(CHAVE_1, 2, '5102')]
+    # A tabela antiga é mantida
+    assert conexao.execute("SELECT COUNT(*) FROM notas_fiscais").fetchone()[0] == 2
+
+
+def test_migrar_cria_os_indices_usados_nas_consultas(conexao):
+    migrar(conexao, 'sqlite')
+
+    for tabela in (NOTAS_FISCAIS_CABECALHO, NOTAS_FISCAIS_ITENS):
+        indices = {linha[1] for linha in conexao.execute(f"PRAGMA index_list({tabela.nome})")}
+        assert {tabela.nome_indice(coluna) for coluna in tabela.indices} <= indices
+
+    # As consultas com filtro do benchmark usam o índice da coluna filtrada no esquema normalizado
+    cursor = conexao.cursor()
+    for pergunta, _, sql in CONSULTAS:
+        if '(índice ' in pergunta:
+            coluna = pergunta.split('(índice ')[1].rstrip(')')
+            tabela = NOTAS_FISCAIS_ITENS if coluna in NOTAS_FISCAIS_ITENS.indices else NOTAS_FISCAIS_CABECALHO
+            assert tabela.nome_indice(coluna) in plano(cursor, 'sqlite', sql), pergunta